@@ -0,0 +1,5 @@
+"""
+Benchmark suite of the fuzzy engine and INP editing hot paths.
+
+Run with ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,65 @@
+"""
+Run the benchmark suite.
+
+Usage:
+    python -m benchmarks [--sizes 1000 10000 100000] [--filter NAME] [--output results.json]
+    python -m benchmarks --baseline baseline.json [--threshold 0.10] [--threshold-for compute_all=0.25]
+
+With ``--baseline`` the exit status is 1 if any benchmark is slower than
+its threshold allows, or, without ``--filter``, if a benchmark of the
+baseline did not run, so the suite can gate upgrades.
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import harness
+from benchmarks.scenarios import DEFAULT_SIZES, engine_scenarios, model_scenarios
+
+
+def _thresholds(values: list[str]) -> dict[str, float]:
+    """Parse ``NAME=FRACTION`` arguments."""
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.partition("=")
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rapid Catchment Generator benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Subcatchments per model")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of the model scenarios")
+    parser.add_argument("--filter", default=None, help="Run only benchmarks whose name contains this text")
+    parser.add_argument("--output", type=Path, default=None, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against saved results")
+    parser.add_argument(
+        "--threshold", type=float, default=harness.DEFAULT_THRESHOLD, help="Allowed relative slowdown (0.10 = 10%%)"
+    )
+    parser.add_argument(
+        "--threshold-for", nargs="+", default=[], metavar="NAME=FRACTION", help="Per-benchmark allowed slowdown"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="rcg_bench_") as workdir:
+        scenarios = engine_scenarios(args.filter) + model_scenarios(Path(workdir), tuple(args.sizes), args.repeat, args.filter)
+        report = harness.run_suite(scenarios)
+
+    if args.output is not None:
+        harness.save(report, args.output)
+    if args.baseline is None:
+        return 0
+
+    rows = harness.compare(report, harness.load(args.baseline), args.threshold, _thresholds(args.threshold_for))
+    print(harness.format_comparison(rows))
+    # A filtered run skips benchmarks on purpose; otherwise a missing one fails the gate like a regression
+    missing = [row["name"] for row in rows if row["missing"]] if args.filter is None else []
+    if missing:
+        print(f"{len(missing)} baseline benchmark(s) did not run: {', '.join(missing)}")
+    return 1 if missing or any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Timing, result files and baseline comparison of the benchmark suite.
+"""
+
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from rcg.sysinfo import machine_metadata
+
+# Relative slowdown of the median above which a benchmark counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+@dataclass
+class Scenario:
+    """
+    One benchmark.
+
+    ``setup`` runs untimed before every repetition and its return value is
+    passed to ``run``, so scenarios that modify files start from the same
+    state each time.
+
+    Attributes
+    ----------
+    name : str
+        Unique name, e.g. ``"build_catchments_init[n=10000]"``.
+    run : Callable[[Any], Any]
+        Timed call.
+    setup : Optional[Callable[[], Any]]
+        Untimed preparation returning the argument of ``run``.
+    repeat : int
+        Number of timed repetitions.
+    number : int
+        Calls of ``run`` per repetition, for operations too fast to time
+        one by one; timings are per call.
+    params : Dict[str, Any]
+        Parameters recorded with the result.
+    """
+
+    name: str
+    run: Callable[[Any], Any]
+    setup: Optional[Callable[[], Any]] = None
+    repeat: int = 5
+    number: int = 1
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+def selected(name: str, name_filter: Optional[str]) -> bool:
+    """Whether a benchmark runs under ``--filter``: always without one, else if the filter is part of its name."""
+    return name_filter is None or name_filter in name
+
+
+def measure(scenario: Scenario) -> dict[str, Any]:
+    """Time ``scenario.repeat`` repetitions and summarize the per-call times in seconds."""
+    timings = []
+    for _ in range(scenario.repeat):
+        state = scenario.setup() if scenario.setup is not None else None
+        started = time.perf_counter()
+        for _ in range(scenario.number):
+            scenario.run(state)
+        timings.append((time.perf_counter() - started) / scenario.number)
+    return {
+        "name": scenario.name,
+        "params": scenario.params,
+        "repeat": scenario.repeat,
+        "number": scenario.number,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def run_suite(scenarios: list[Scenario], log: Callable[[str], None] = print) -> dict[str, Any]:
+    """Measure every scenario and return the results with machine metadata."""
+    results = []
+    for scenario in scenarios:
+        result = measure(scenario)
+        log(f"{scenario.name:<48} median {result['median_s'] * 1000:10.3f} ms  (min {result['min_s'] * 1000:.3f} ms)")
+        results.append(result)
+    return {"metadata": machine_metadata(), "results": results}
+
+
+def save(report: dict[str, Any], path: Path) -> None:
+    """Write a report as JSON, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load(path: Path) -> dict[str, Any]:
+    """Read a report written by :func:`save`."""
+    return json.loads(Path(path).read_text())
+
+
+def _threshold(name: str, threshold: float, thresholds: dict[str, float]) -> float:
+    """Allowed slowdown of ``name``: its own override, that of its name without parameters, or the default."""
+    return thresholds.get(name, thresholds.get(name.split("[")[0], threshold))
+
+
+def compare(
+    report: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    thresholds: Optional[dict[str, float]] = None,
+) -> list[dict[str, Any]]:
+    """
+    Compare the medians of ``report`` with those of ``baseline``.
+
+    Parameters
+    ----------
+    report : Dict[str, Any]
+        Results of the current run.
+    baseline : Dict[str, Any]
+        Saved results to compare against.
+    threshold : float
+        Allowed relative slowdown, e.g. 0.10 for 10%.
+    thresholds : Optional[Dict[str, float]]
+        Per-benchmark overrides of ``threshold``, keyed by name or by the
+        name without parameters (``"add_subcatchment"`` covers
+        ``"add_subcatchment[n=1000]"``).
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        One row per benchmark of the baseline with ``name``, ``baseline_s``,
+        ``current_s``, ``change`` (relative), ``threshold``, ``regression``
+        and ``missing``. Benchmarks missing from ``report`` come last with
+        ``current_s`` and ``change`` None; benchmarks new in ``report`` are
+        not listed.
+    """
+    thresholds = thresholds or {}
+    previous = {result["name"]: result for result in baseline["results"]}
+    current = {result["name"] for result in report["results"]}
+    rows = []
+    for result in report["results"]:
+        name = result["name"]
+        if name not in previous:
+            continue
+        limit = _threshold(name, threshold, thresholds)
+        before, after = previous[name]["median_s"], result["median_s"]
+        change = after / before - 1 if before > 0 else 0.0
+        rows.append(
+            {
+                "name": name,
+                "baseline_s": before,
+                "current_s": after,
+                "change": change,
+                "threshold": limit,
+                "regression": change > limit,
+                "missing": False,
+            }
+        )
+    for name, result in previous.items():
+        if name not in current:
+            rows.append(
+                {
+                    "name": name,
+                    "baseline_s": result["median_s"],
+                    "current_s": None,
+                    "change": None,
+                    "threshold": _threshold(name, threshold, thresholds),
+                    "regression": False,
+                    "missing": True,
+                }
+            )
+    return rows
+
+
+def format_comparison(rows: list[dict[str, Any]]) -> str:
+    """Render :func:`compare` rows as a text table."""
+    lines = [f"{'benchmark':<48} {'baseline ms':>12} {'current ms':>12} {'change':>8}"]
+    for row in rows:
+        if row["missing"]:
+            lines.append(f"{row['name']:<48} {row['baseline_s'] * 1000:12.3f} {'-':>12} {'-':>8}  MISSING")
+            continue
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['name']:<48} {row['baseline_s'] * 1000:12.3f} {row['current_s'] * 1000:12.3f} {row['change']:+8.1%}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+"""
+Benchmark scenarios of the fuzzy engine and INP editing hot paths.
+"""
+
+import copy
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from skfuzzy import control as ctrl
+
+from benchmarks.harness import Scenario, selected
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.fuzzy.engine import FuzzyEngine, Prototype, create_fuzzy_engine, get_default_fuzzy_engine
+from rcg.fuzzy.table import EngineTable
+from rcg.inp_manage.inp import BuildCatchments
+from rcg.inp_manage.synthetic import SyntheticModelSpec, generate_model
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# Subcatchments added by the batch insert scenario
+BATCH_SIZE = 100
+
+# Land form and land cover pairs cycled through by the batch insert scenario
+BATCH_PAIRS = (
+    (LandForm.flats_and_plateaus, LandCover.rural),
+    (LandForm.mountains, LandCover.forests),
+    (LandForm.hills_with_gentle_slopes, LandCover.urban_highly_impervious),
+)
+
+
+def _uncached(engine: FuzzyEngine) -> FuzzyEngine:
+    """
+    Copy of ``engine`` whose simulations do not cache results.
+
+    scikit-fuzzy returns the stored output when a simulation sees the same
+    inputs again, which would time a dictionary lookup instead of inference.
+    """
+    uncached = copy.copy(engine)
+    for name in ("slope", "impervious", "catchment"):
+        simulation = ctrl.ControlSystemSimulation(getattr(engine, f"{name}_ctrl"), cache=False)
+        setattr(uncached, f"{name}_sim", simulation)
+    return uncached
+
+
+def engine_scenarios(name_filter: Optional[str] = None) -> list[Scenario]:
+    """Engine construction, one inference and linguistic classification, limited to names containing ``name_filter``."""
+    engine = get_default_fuzzy_engine()
+    scenarios = []
+    if selected("fuzzy_engine_init", name_filter):
+        scenarios.append(Scenario("fuzzy_engine_init", lambda _: create_fuzzy_engine(), repeat=2))
+    if selected("compute_all", name_filter):
+        uncached = _uncached(engine)
+        scenarios.append(
+            Scenario(
+                "compute_all", lambda _: uncached.compute_all(LandForm.mountains.value, LandCover.forests.value), repeat=5
+            )
+        )
+    if selected("get_linguistic", name_filter):
+        prototype = Prototype(LandForm.mountains, LandCover.forests, engine)
+        scenarios.append(
+            Scenario("get_linguistic", lambda _: prototype.get_linguistic(prototype.catchment_result), repeat=5, number=100)
+        )
+    return scenarios
+
+
+def model_scenarios(
+    workdir: Path, sizes: tuple[int, ...] = DEFAULT_SIZES, repeat: int = 3, name_filter: Optional[str] = None
+) -> list[Scenario]:
+    """
+    Loading, editing and backing up synthetic models of each size.
+
+    ``build_catchments_init`` includes parsing the subcatchments section,
+    which swmmio defers until first access.
+
+    Every repetition works on a fresh copy of the model in its own directory,
+    so files written by earlier repetitions (backups, journals) do not affect
+    later ones. Only the models of sizes with a scenario matching
+    ``name_filter`` are generated.
+    """
+    batch_names = {n: f"add_subcatchments[n={n},batch={BATCH_SIZE}]" for n in sizes}
+    batch_selected = any(selected(name, name_filter) for name in batch_names.values())
+    prototypes = EngineTable.compute(BATCH_PAIRS).prototypes() if batch_selected else {}
+    specs = [(1.0, *BATCH_PAIRS[i % len(BATCH_PAIRS)]) for i in range(BATCH_SIZE)]
+    scenarios = []
+    for n in sizes:
+        names = [f"build_catchments_init[n={n}]", f"add_subcatchment[n={n}]", batch_names[n], f"create_backup[n={n}]"]
+        if not any(selected(name, name_filter) for name in names):
+            continue
+        spec = SyntheticModelSpec(subcatchments=n, junctions=max(n // 20, 10), outfalls=max(n // 10_000, 1))
+        template = generate_model(workdir / f"model_{n}.inp", spec)
+
+        def fresh_copy(template: Path = template, n: int = n, copies=iter(range(1_000_000))) -> Path:
+            directory = workdir / f"run_{n}_{next(copies)}"
+            directory.mkdir()
+            return Path(shutil.copy(template, directory / template.name))
+
+        def loaded(fresh_copy=fresh_copy, **options) -> BuildCatchments:
+            return BuildCatchments(str(fresh_copy()), **options)
+
+        params = {"subcatchments": n}
+        candidates = [
+            Scenario(
+                names[0],
+                lambda path: BuildCatchments(str(path)).model.inp.subcatchments,
+                fresh_copy,
+                repeat,
+                params=params,
+            ),
+            Scenario(
+                names[1],
+                lambda model: model.add_subcatchment(1.0, LandForm.mountains, LandCover.forests),
+                lambda loaded=loaded: loaded(backup=False),
+                repeat,
+                params=params,
+            ),
+            Scenario(
+                names[2],
+                lambda model: model.add_subcatchments(specs, prototypes=prototypes),
+                lambda loaded=loaded: loaded(backup=False),
+                repeat,
+                params={**params, "batch": BATCH_SIZE},
+            ),
+            Scenario(
+                names[3],
+                lambda model: model._create_backup(),
+                loaded,
+                repeat,
+                params=params,
+            ),
+        ]
+        scenarios += [scenario for scenario in candidates if selected(scenario.name, name_filter)]
+    return scenarios
@@ -0,0 +1,94 @@
+import pytest
+
+from benchmarks import harness
+from benchmarks.harness import Scenario, compare, format_comparison, measure, selected
+
+
+def report(**medians):
+    return {"metadata": {}, "results": [{"name": name, "median_s": median} for name, median in medians.items()]}
+
+
+def by_name(rows):
+    return {row["name"]: row for row in rows}
+
+
+def test_measure_times_per_call():
+    calls = []
+
+    result = measure(Scenario("noop", calls.append, setup=lambda: "state", repeat=3, number=4))
+
+    assert calls == ["state"] * 12
+    assert result["repeat"] == 3
+    assert 0 <= result["min_s"] <= result["median_s"] <= result["max_s"]
+
+
+def test_run_suite_records_machine_metadata():
+    result = harness.run_suite([Scenario("noop", lambda _: None, repeat=2)], log=lambda line: None)
+
+    assert result["metadata"]["python"]
+    assert [row["name"] for row in result["results"]] == ["noop"]
+
+
+@pytest.mark.parametrize(
+    ("name", "name_filter", "expected"),
+    [("compute_all", None, True), ("add_subcatchment[n=1000]", "n=1000", True), ("compute_all", "backup", False)],
+)
+def test_selected(name, name_filter, expected):
+    assert selected(name, name_filter) is expected
+
+
+class TestCompare:
+    def test_regression_above_default_threshold(self):
+        rows = by_name(compare(report(a=1.2, b=1.05), report(a=1.0, b=1.0)))
+
+        assert rows["a"]["change"] == pytest.approx(0.2)
+        assert rows["a"]["regression"]
+        assert not rows["b"]["regression"]
+
+    def test_threshold_overrides(self):
+        rows = by_name(
+            compare(
+                report(**{"add[n=1]": 1.3, "add[n=2]": 1.3, "init": 1.3}),
+                report(**{"add[n=1]": 1.0, "add[n=2]": 1.0, "init": 1.0}),
+                threshold=0.5,
+                thresholds={"add": 0.4, "add[n=2]": 0.2},
+            )
+        )
+
+        assert rows["add[n=1]"]["threshold"] == 0.4
+        assert not rows["add[n=1]"]["regression"]
+        assert rows["add[n=2]"]["threshold"] == 0.2
+        assert rows["add[n=2]"]["regression"]
+        assert rows["init"]["threshold"] == 0.5
+
+    def test_speedup_is_not_a_regression(self):
+        (row,) = compare(report(a=0.5), report(a=1.0))
+
+        assert row["change"] == pytest.approx(-0.5)
+        assert not row["regression"]
+
+    def test_missing_benchmarks_are_reported(self):
+        rows = compare(report(a=1.0, new=1.0), report(a=1.0, gone=2.0))
+
+        assert [row["name"] for row in rows] == ["a", "gone"]
+        gone = rows[1]
+        assert gone["missing"]
+        assert gone["current_s"] is None
+        assert not gone["regression"]
+        assert not rows[0]["missing"]
+
+    def test_zero_baseline(self):
+        (row,) = compare(report(a=1.0), report(a=0.0))
+
+        assert row["change"] == 0.0
+
+
+def test_format_comparison_flags_rows():
+    rows = compare(report(slow=2.0, same=1.0), report(slow=1.0, same=1.0, gone=1.0))
+
+    lines = format_comparison(rows).splitlines()
+
+    assert len(lines) == 4
+    assert lines[1].startswith("slow") and lines[1].endswith("REGRESSION")
+    assert not lines[2].endswith("REGRESSION")
+    assert lines[3].startswith("gone") and lines[3].endswith("MISSING")
@@ -0,0 +1,14 @@
+from benchmarks.scenarios import engine_scenarios, model_scenarios
+
+
+def test_filter_skips_unselected_models(tmp_path):
+    scenarios = model_scenarios(tmp_path, sizes=(20, 30), repeat=1, name_filter="create_backup[n=30]")
+
+    assert [scenario.name for scenario in scenarios] == ["create_backup[n=30]"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["model_30.inp"]
+
+
+def test_filter_without_model_scenarios(tmp_path):
+    assert model_scenarios(tmp_path, sizes=(20,), name_filter="compute_all") == []
+    assert [scenario.name for scenario in engine_scenarios("compute_all")] == ["compute_all"]
+    assert not any(tmp_path.iterdir())
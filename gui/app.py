@@ -6,10 +6,18 @@ import customtkinter as ctk
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from gui.preview import PreviewTable
+from gui.worker import GenerationWorker, PendingSubcatchment, WorkerEvent
+from rcg.exceptions import ConfigurationError
 from rcg.fuzzy.categories import LandCover, LandForm
-from rcg.runner import generate_subcatchment
+from rcg.logging_config import get_logger
 from rcg.validation import validate_area, validate_land_cover, validate_land_form
 
+# Interval of polling the generation worker for events [ms]
+POLL_INTERVAL_MS = 100
+
+logger = get_logger("gui.app")
+
 
 def get_help_file_path():
     if getattr(sys, "frozen", False):
@@ -23,12 +31,17 @@ class RcgApp(ctk.CTk):
     def __init__(self):
         super().__init__()
         self.file_path = None
+        self.previews = self.load_previews()
+        self.worker = GenerationWorker()
+        self.worker.start()
         self.setup_window()
         self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(POLL_INTERVAL_MS, self.poll_worker)
 
     def setup_window(self):
         self.title("Rapid Catchment Generator")
-        self.geometry("540x840")
+        self.geometry("540x1000")
         self.resizable(False, False)
 
         # Set appearance mode and color theme
@@ -39,7 +52,7 @@ class RcgApp(ctk.CTk):
         self.update_idletasks()
         x = (self.winfo_screenwidth() - 540) // 2
         y = (self.winfo_screenheight() - 760) // 2
-        self.geometry(f"540x840+{x}+{y}")
+        self.geometry(f"540x1000+{x}+{y}")
 
     def create_widgets(self):
         # Main container with padding
@@ -142,6 +155,43 @@ class RcgApp(ctk.CTk):
         )
         self.area_entry.pack(fill="x")
 
+        # Live preview of the parameters the subcatchment will get
+        preview_card = ctk.CTkFrame(main_frame, corner_radius=16)
+        preview_card.pack(fill="x", pady=(0, 20))
+
+        preview_inner = ctk.CTkFrame(preview_card, fg_color="transparent")
+        preview_inner.pack(fill="x", padx=24, pady=16)
+        preview_inner.grid_columnconfigure((1, 3), weight=1)
+
+        self.preview_vars = {}
+        preview_fields = [
+            ("slope", "Slope"),
+            ("impervious", "Impervious"),
+            ("catchment_class", "Catchment"),
+            ("mannings_n", "Manning's n"),
+            ("depression_storage", "Dstore"),
+            ("pct_zero", "Zero Dstore"),
+        ]
+        for position, (key, text) in enumerate(preview_fields):
+            row, column = divmod(position, 2)
+            ctk.CTkLabel(
+                preview_inner,
+                text=text,
+                font=ctk.CTkFont(size=12, weight="bold"),
+                anchor="w",
+            ).grid(row=row, column=2 * column, sticky="w", padx=(0, 8))
+            self.preview_vars[key] = ctk.StringVar(value="-")
+            ctk.CTkLabel(
+                preview_inner,
+                textvariable=self.preview_vars[key],
+                font=ctk.CTkFont(size=12),
+                text_color=("#374151", "#d1d5db"),
+                anchor="w",
+            ).grid(row=row, column=2 * column + 1, sticky="w")
+
+        self.land_form_var.trace_add("write", self.update_preview)
+        self.land_cover_var.trace_add("write", self.update_preview)
+
         # File selection card
         file_card = ctk.CTkFrame(main_frame, corner_radius=16)
         file_card.pack(fill="x", pady=(0, 24))
@@ -202,6 +252,38 @@ class RcgApp(ctk.CTk):
         )
         run_button.pack(fill="x", pady=(0, 12))
 
+        # Progress of the background generation
+        progress_frame = ctk.CTkFrame(button_frame, fg_color="transparent")
+        progress_frame.pack(fill="x", pady=(0, 6))
+
+        self.progress_bar = ctk.CTkProgressBar(progress_frame, height=8, corner_radius=4)
+        self.progress_bar.pack(side="left", fill="x", expand=True, padx=(0, 12))
+        self.progress_bar.set(0)
+
+        self.cancel_button = ctk.CTkButton(
+            progress_frame,
+            text="Cancel",
+            command=self.cancel_generation,
+            width=80,
+            height=28,
+            corner_radius=8,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=("#ef4444", "#dc2626"),
+            hover_color=("#dc2626", "#b91c1c"),
+            state="disabled",
+        )
+        self.cancel_button.pack(side="right")
+
+        self.status_var = ctk.StringVar(value="Ready")
+        status_label = ctk.CTkLabel(
+            button_frame,
+            textvariable=self.status_var,
+            font=ctk.CTkFont(size=12),
+            text_color=("#6b7280", "#9ca3af"),
+            anchor="w",
+        )
+        status_label.pack(fill="x", pady=(0, 12))
+
         help_button = ctk.CTkButton(
             button_frame,
             text="Help & Documentation",
@@ -227,6 +309,31 @@ class RcgApp(ctk.CTk):
         )
         self.theme_switch.pack(anchor="center")
 
+    @staticmethod
+    def load_previews():
+        """Load the precomputed engine outputs; the preview stays empty if they are unavailable."""
+        try:
+            return PreviewTable.load()
+        except ConfigurationError as e:
+            logger.warning("Parameter preview unavailable: %s", e)
+            return None
+
+    def update_preview(self, *args):
+        """Show the parameters of the selected land form and land cover."""
+        preview = None
+        if self.previews is not None:
+            preview = self.previews.get(self.land_form_var.get(), self.land_cover_var.get())
+        if preview is None:
+            for var in self.preview_vars.values():
+                var.set("-")
+            return
+        self.preview_vars["slope"].set(f"{preview.slope:.2f} %")
+        self.preview_vars["impervious"].set(f"{preview.impervious:.2f} %")
+        self.preview_vars["catchment_class"].set(preview.catchment_class.replace("_", " ").title())
+        self.preview_vars["mannings_n"].set(f"{preview.n_imperv:g} / {preview.n_perv:g}")
+        self.preview_vars["depression_storage"].set(f"{preview.s_imperv:.2f} / {preview.s_perv:.2f} mm")
+        self.preview_vars["pct_zero"].set(f"{preview.pct_zero:g} %")
+
     def toggle_theme(self):
         if self.theme_switch.get():
             ctk.set_appearance_mode("dark")
@@ -339,6 +446,8 @@ The application will generate subcatchments with appropriate parameters based on
 
             self.selected_file_var.set(os.path.basename(file_path))
             self.file_path = file_path
+            # Parse the model in the background while the user fills in the form
+            self.worker.preload(file_path)
 
     def run_simulation(self):
         """Run the subcatchment generation with centralized validation."""
@@ -373,30 +482,89 @@ The application will generate subcatchments with appropriate parameters based on
             return
 
         try:
-            validate_land_form(land_form_str)
+            land_form = validate_land_form(land_form_str)
         except Exception as e:
             messagebox.showerror("Invalid Land Form", str(e))
             return
 
         try:
-            validate_land_cover(land_cover_str)
+            land_cover = validate_land_cover(land_cover_str)
         except Exception as e:
             messagebox.showerror("Invalid Land Cover", str(e))
             return
 
-        # Generate subcatchment
-        try:
-            generate_subcatchment(self.file_path, area, land_form_str, land_cover_str)
+        # Generate subcatchment in the background; requests queued meanwhile are written together
+        pending = self.worker.submit(PendingSubcatchment(self.file_path, area, land_form, land_cover))
+        self.status_var.set(f"Queued {area} ha subcatchment ({pending} pending)")
+
+    def cancel_generation(self):
+        """Stop the running batch after its current chunk and drop the queued subcatchments."""
+        self.worker.cancel()
+        self.status_var.set("Cancelling...")
+
+    def poll_worker(self):
+        """Apply the events of the generation worker and schedule the next poll."""
+        for event in self.worker.poll():
+            self.handle_worker_event(event)
+        self.cancel_button.configure(state="normal" if self.worker.pending else "disabled")
+        self.after(POLL_INTERVAL_MS, self.poll_worker)
+
+    def handle_worker_event(self, event: WorkerEvent):
+        if event.kind == "loading":
+            self.status_var.set(event.message)
+            self.progress_bar.configure(mode="indeterminate")
+            self.progress_bar.start()
+        elif event.kind == "progress":
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(event.report.fraction or 0)
+            self.status_var.set(event.message)
+        elif event.kind == "done":
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(1)
+            self.status_var.set(f"{event.message} to {os.path.basename(event.file_path)}")
+            if len(event.requests) == 1:
+                (request,) = event.requests
+                details = (
+                    f"Area: {request.area} ha\n"
+                    f"Land Cover: {request.land_cover.name.replace('_', ' ').title()}\n"
+                    f"Land Form: {request.land_form.name.replace('_', ' ').title()}\n"
+                )
+            else:
+                details = f"Subcatchments: {', '.join(event.names)}\n"
             messagebox.showinfo(
                 "Simulation Complete",
-                f"Subcatchment generated successfully!\n\n"
-                f"Area: {area} ha\n"
-                f"Land Cover: {land_cover_str.replace('_', ' ').title()}\n"
-                f"Land Form: {land_form_str.replace('_', ' ').title()}\n"
-                f"File: {os.path.basename(self.file_path)}",
+                f"{event.message} successfully!\n\n{details}File: {os.path.basename(event.file_path)}",
             )
-        except Exception as e:
-            messagebox.showerror("Simulation Error", f"An error occurred during simulation:\n\n{str(e)}")
+        elif event.kind == "cancelled":
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(0)
+            self.status_var.set(event.message)
+        elif event.kind == "error":
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(0)
+            self.status_var.set("Generation failed")
+            messagebox.showerror("Simulation Error", f"An error occurred during simulation:\n\n{event.message}")
+
+    def on_close(self):
+        """Let queued subcatchments reach the file, or cancel them, before the window closes."""
+        pending = self.worker.pending
+        if pending:
+            wait = messagebox.askyesnocancel(
+                "Generation in Progress",
+                f"{pending} subcatchment(s) are still being written.\n\nYes: wait for them and quit\nNo: cancel them and quit",
+            )
+            if wait is None:
+                return
+            if not wait:
+                self.worker.cancel()
+        self.status_var.set("Finishing...")
+        self.update_idletasks()
+        self.worker.stop()
+        self.destroy()
 
 
 def main():
@@ -0,0 +1,107 @@
+"""
+Instant preview of the parameters of a subcatchment in the GUI.
+
+The engine only has 126 distinct results, shipped precomputed in
+:data:`rcg.fuzzy.table.DEFAULT_TABLE_PATH`. :class:`PreviewTable` turns them
+into the values written to the model for every land form and land cover pair
+once at startup, so a change of a combo box is a dictionary lookup instead of
+a fuzzy inference on the Tk thread.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.fuzzy.table import EngineTable
+from rcg.inp_manage.inp import ModelParameters
+
+
+@dataclass(frozen=True)
+class ParameterPreview:
+    """
+    Parameters a new subcatchment of one land form and land cover would get.
+
+    Attributes
+    ----------
+    slope : float
+        Slope [%], as written to ``[SUBCATCHMENTS]``.
+    impervious : float
+        Imperviousness [%], as written to ``[SUBCATCHMENTS]``.
+    catchment_class : str
+        Linguistic catchment class, e.g. ``"urban"``.
+    n_imperv : float
+        Manning's n of the impervious area.
+    n_perv : float
+        Manning's n of the pervious area.
+    s_imperv : float
+        Depression storage of the impervious area [mm].
+    s_perv : float
+        Depression storage of the pervious area [mm].
+    pct_zero : float
+        Impervious area without depression storage [%].
+    """
+
+    slope: float
+    impervious: float
+    catchment_class: str
+    n_imperv: float
+    n_perv: float
+    s_imperv: float
+    s_perv: float
+    pct_zero: float
+
+
+class PreviewTable:
+    """
+    Previews of all land form and land cover pairs of an engine table.
+
+    Example
+    -------
+    >>> previews = PreviewTable.load()
+    >>> previews.get("mountains", "forests").catchment_class
+    'forests'
+    """
+
+    def __init__(self, table: EngineTable, parameters: Optional[ModelParameters] = None) -> None:
+        parameters = parameters if parameters is not None else ModelParameters()
+        self._previews: dict[tuple[LandForm, LandCover], ParameterPreview] = {}
+        for (land_form, land_cover), prototype in table.prototypes().items():
+            catchment_class = table.catchment_classes[land_form.value - 1, land_cover.value - 1]
+            subarea = parameters.subarea_values(catchment_class)
+            self._previews[land_form, land_cover] = ParameterPreview(
+                slope=round(prototype.slope_result, 2),
+                impervious=round(prototype.impervious_result, 2),
+                catchment_class=catchment_class,
+                n_imperv=subarea["N-Imperv"],
+                n_perv=subarea["N-Perv"],
+                s_imperv=subarea["S-Imperv"],
+                s_perv=subarea["S-Perv"],
+                pct_zero=subarea["PctZero"],
+            )
+
+    @classmethod
+    def load(cls, path: Optional[Union[str, Path]] = None) -> "PreviewTable":
+        """
+        Build the previews from a saved engine table.
+
+        Raises
+        ------
+        ConfigurationError
+            If the table cannot be read.
+        """
+        return cls(EngineTable.load(path))
+
+    def __len__(self) -> int:
+        return len(self._previews)
+
+    def get(self, land_form: Union[str, LandForm], land_cover: Union[str, LandCover]) -> Optional[ParameterPreview]:
+        """Preview of a pair given by enums or names; None if a name is invalid or the pair is not tabulated."""
+        try:
+            key = (
+                land_form if isinstance(land_form, LandForm) else LandForm[land_form],
+                land_cover if isinstance(land_cover, LandCover) else LandCover[land_cover],
+            )
+        except KeyError:
+            return None
+        return self._previews.get(key)
@@ -0,0 +1,172 @@
+import os
+import time
+from pathlib import Path
+
+from swmmio import Model
+
+from gui.worker import GenerationWorker, ModelCache, PendingSubcatchment
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.inp_manage.checkpoint import JOBS_DIR, JobResult
+from rcg.inp_manage.inp import BuildCatchments
+
+
+class FakeModel:
+    def __init__(self, file_path, fail=False):
+        self.file_path = Path(file_path)
+        self.fail = fail
+        self.calls = []
+
+    def run_batch(self, specs, job_id, chunk_rows, progress=None, cancel=None):
+        self.calls.append(list(specs))
+        if self.fail:
+            raise RuntimeError("disk full")
+        names = [f"S{number}" for number in range(len(self.calls[-1]))]
+        return JobResult(job_id, self.file_path.parent / f"{job_id}.checkpoint.jsonl", names=names, chunks=1)
+
+
+def request(file_path, area=1.0):
+    return PendingSubcatchment(str(file_path), area, LandForm.mountains, LandCover.forests)
+
+
+def wait_for(worker, kinds, timeout=120):
+    events, deadline = [], time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        events.extend(worker.poll())
+        if events and events[-1].kind in kinds:
+            return events
+        time.sleep(0.01)
+    raise AssertionError(f"No {kinds} event, got {[event.kind for event in events]}")
+
+
+class TestModelCache:
+    def test_model_is_reused_until_file_changes_outside(self, temp_inp_file):
+        loaded = []
+        cache = ModelCache(lambda path: loaded.append(path) or FakeModel(path))
+
+        model, parsed = cache.get(temp_inp_file)
+        assert parsed
+        assert cache.get(temp_inp_file) == (model, False)
+        assert cache.is_current(temp_inp_file)
+
+        # A write through the cached model is recorded and keeps the model
+        stat = os.stat(temp_inp_file)
+        os.utime(temp_inp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        cache.touch(temp_inp_file)
+        assert cache.get(temp_inp_file) == (model, False)
+
+        # A write by another program is not
+        os.utime(temp_inp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        assert not cache.is_current(temp_inp_file)
+        reloaded, parsed = cache.get(temp_inp_file)
+        assert parsed
+        assert reloaded is not model
+        assert loaded == [str(temp_inp_file.resolve())] * 2
+
+    def test_discard(self, temp_inp_file):
+        cache = ModelCache(FakeModel)
+        cache.get(temp_inp_file)
+
+        cache.discard(temp_inp_file)
+
+        assert not cache.is_current(temp_inp_file)
+
+
+class TestGenerationWorker:
+    def test_pending_requests_are_written_in_one_batch(self, temp_inp_file):
+        models = []
+        worker = GenerationWorker(ModelCache(lambda path: models.append(FakeModel(path)) or models[-1]))
+        for area in (1.0, 2.0, 3.0):
+            worker.submit(request(temp_inp_file, area))
+        assert worker.pending == 3
+
+        worker.start()
+        events = wait_for(worker, {"done"})
+        worker.stop(10)
+
+        (model,) = models
+        assert [[spec[0] for spec in call] for call in model.calls] == [[1.0, 2.0, 3.0]]
+        assert [event.kind for event in events] == ["loading", "progress", "done"]
+        assert events[-1].names == ("S0", "S1", "S2")
+        assert len(events[-1].requests) == 3
+        assert worker.pending == 0
+
+    def test_failed_write_reports_error_and_drops_model(self, temp_inp_file):
+        worker = GenerationWorker(ModelCache(lambda path: FakeModel(path, fail=True)))
+        worker.submit(request(temp_inp_file))
+        worker.start()
+
+        events = wait_for(worker, {"error"})
+        worker.stop(10)
+
+        assert "disk full" in events[-1].message
+        assert not worker.cache.is_current(temp_inp_file)
+        assert worker.pending == 0
+
+    def test_missing_file_reports_error(self, tmp_path):
+        worker = GenerationWorker(ModelCache(FakeModel))
+        worker.submit(request(tmp_path / "missing.inp"))
+        worker.start()
+
+        events = wait_for(worker, {"error"})
+        worker.stop(10)
+
+        assert events[-1].message.startswith("Could not load the model")
+        assert len(events[-1].requests) == 1
+
+    def test_done_writes_model_and_removes_checkpoint(self, temp_inp_file):
+        existing = len(Model(str(temp_inp_file)).inp.subcatchments)
+        worker = GenerationWorker(ModelCache(lambda path: BuildCatchments(path, backup=False)))
+        worker.submit(request(temp_inp_file, 1.0))
+        worker.submit(request(temp_inp_file, 2.0))
+        worker.start()
+
+        events = wait_for(worker, {"done"})
+        worker.stop(10)
+
+        assert len(events[-1].names) == 2
+        assert events[-1].report.done == 2
+        subcatchments = Model(str(temp_inp_file)).inp.subcatchments
+        assert len(subcatchments) == existing + 2
+        assert list(events[-1].names) == subcatchments.index[-2:].tolist()
+        assert not list((temp_inp_file.parent / JOBS_DIR).glob("*.checkpoint.jsonl"))
+
+    def test_cancel_keeps_committed_chunks(self, temp_inp_file):
+        existing = len(Model(str(temp_inp_file)).inp.subcatchments)
+        worker = None
+
+        class CancellingModel(BuildCatchments):
+            def run_batch(self, specs, job_id, chunk_rows, progress=None, cancel=None):
+                def cancel_after_first_chunk(report):
+                    progress(report)
+                    if report.done:
+                        worker.cancel()
+
+                return super().run_batch(specs, job_id, chunk_rows, progress=cancel_after_first_chunk, cancel=cancel)
+
+        worker = GenerationWorker(ModelCache(lambda path: CancellingModel(path, backup=False)))
+        for area in (1.0, 2.0, 3.0, 4.0):
+            worker.submit(request(temp_inp_file, area))
+        worker.start()
+
+        events = wait_for(worker, {"cancelled"})
+        worker.stop(10)
+
+        assert events[-1].message == "Cancelled after 1 of 4 subcatchment(s)"
+        assert len(Model(str(temp_inp_file)).inp.subcatchments) == existing + 1
+        assert not list((temp_inp_file.parent / JOBS_DIR).glob("*.checkpoint.jsonl"))
+        assert worker.pending == 0
+
+    def test_cancel_drops_queued_requests(self, temp_inp_file):
+        worker = GenerationWorker(ModelCache(FakeModel))
+        worker.submit(request(temp_inp_file))
+        worker.submit(request(temp_inp_file))
+        worker.preload(str(temp_inp_file))
+
+        assert worker.cancel() == 2
+
+        (event,) = worker.poll()
+        assert event.kind == "cancelled"
+        assert worker.pending == 0
+        worker.start()
+        assert [event.kind for event in wait_for(worker, {"loading"})] == ["loading"]
+        worker.stop(10)
@@ -0,0 +1,379 @@
+"""
+Background generation of subcatchments for the GUI.
+
+Tk is single-threaded, so parsing an INP file and writing subcatchments on
+the main thread freezes the window, for minutes on large models. The
+:class:`GenerationWorker` does both on its own thread: the GUI submits
+requests and drains :attr:`GenerationWorker.events` from an ``after()``
+callback. Parsed models stay in a :class:`ModelCache` between clicks, and
+every request queued while a write is running is written with the next
+batch.
+
+A batch goes through :meth:`BuildCatchments.run_batch` in up to
+:data:`PROGRESS_STEPS` chunks, so the GUI gets progress after every chunk
+and :meth:`GenerationWorker.cancel` stops it between chunks; committed chunks
+are kept and the chunk in progress is rolled back.
+"""
+
+import math
+import os
+import queue
+import threading
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from rcg.exceptions import OperationCancelled
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.inp_manage.checkpoint import JobCheckpoint
+from rcg.inp_manage.inp import BuildCatchments
+from rcg.logging_config import get_logger
+from rcg.progress import CancellationToken, ProgressReport
+
+logger = get_logger("gui.worker")
+
+# Chunks a batch is split into at most; each is one write and one progress update
+PROGRESS_STEPS = 10
+
+# Sentinel stopping the worker thread
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class PendingSubcatchment:
+    """
+    Subcatchment requested in the GUI and not yet written.
+
+    Attributes
+    ----------
+    file_path : str
+        INP file the subcatchment is added to.
+    area : float
+        Area in hectares.
+    land_form : LandForm
+        Validated land form.
+    land_cover : LandCover
+        Validated land cover.
+    """
+
+    file_path: str
+    area: float
+    land_form: LandForm
+    land_cover: LandCover
+
+
+@dataclass(frozen=True)
+class WorkerEvent:
+    """
+    Message from the worker thread to the GUI.
+
+    Attributes
+    ----------
+    kind : str
+        ``"loading"`` while a model is parsed, ``"progress"`` while a batch
+        is written, ``"done"`` after it was committed, ``"cancelled"`` if
+        :meth:`GenerationWorker.cancel` stopped it and ``"error"`` if it
+        failed.
+    file_path : str
+        INP file the event is about.
+    message : str
+        Human-readable description.
+    names : Tuple[str, ...]
+        IDs of the subcatchments added, for ``"done"``.
+    requests : Tuple[PendingSubcatchment, ...]
+        Requests of the batch, for every kind but ``"loading"``.
+    report : Optional[ProgressReport]
+        Progress of the batch, for ``"progress"`` and ``"done"``.
+    """
+
+    kind: str
+    file_path: str
+    message: str = ""
+    names: tuple[str, ...] = ()
+    requests: tuple[PendingSubcatchment, ...] = ()
+    report: Optional[ProgressReport] = None
+
+
+class ModelCache:
+    """
+    Parsed models keyed by resolved path and modification time.
+
+    A model is parsed once and reused while its file is unchanged; writes
+    made through the cached model are recorded with :meth:`touch`, so only a
+    change by another program causes a reparse.
+
+    Attributes
+    ----------
+    factory : Callable[[str], BuildCatchments]
+        Loader of a model from a path.
+    """
+
+    def __init__(self, factory: Callable[[str], BuildCatchments] = BuildCatchments) -> None:
+        self.factory = factory
+        self._models: dict[str, tuple[int, BuildCatchments]] = {}
+
+    @staticmethod
+    def _key(file_path: Union[str, Path]) -> str:
+        return str(Path(file_path).resolve())
+
+    def is_current(self, file_path: Union[str, Path]) -> bool:
+        """Whether the model of ``file_path`` is parsed and its file unchanged since."""
+        key = self._key(file_path)
+        cached = self._models.get(key)
+        return cached is not None and cached[0] == os.stat(key).st_mtime_ns
+
+    def get(self, file_path: Union[str, Path]) -> tuple[BuildCatchments, bool]:
+        """
+        Return the model of ``file_path``, parsing it if needed.
+
+        Returns
+        -------
+        Tuple[BuildCatchments, bool]
+            The model and whether it was parsed by this call.
+        """
+        key = self._key(file_path)
+        mtime = os.stat(key).st_mtime_ns
+        cached = self._models.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], False
+        model = self.factory(key)
+        self._models[key] = (mtime, model)
+        return model, True
+
+    def touch(self, file_path: Union[str, Path]) -> None:
+        """Record the current modification time after a write through the cached model."""
+        key = self._key(file_path)
+        if key in self._models:
+            self._models[key] = (os.stat(key).st_mtime_ns, self._models[key][1])
+
+    def discard(self, file_path: Union[str, Path]) -> None:
+        """Drop the model of ``file_path``, e.g. after a failed write."""
+        self._models.pop(self._key(file_path), None)
+
+
+class GenerationWorker:
+    """
+    Thread loading models and writing queued subcatchments off the Tk thread.
+
+    Only the worker thread touches the models; the GUI talks to it through
+    two thread-safe queues.
+
+    Attributes
+    ----------
+    cache : ModelCache
+        Parsed models, owned by the worker thread.
+    events : queue.Queue
+        :class:`WorkerEvent` objects for the GUI to drain with :meth:`poll`.
+
+    Example
+    -------
+    >>> worker = GenerationWorker()
+    >>> worker.start()
+    >>> worker.submit(PendingSubcatchment("model.inp", 2.0, LandForm.mountains, LandCover.forests))
+    >>> app.after(100, lambda: handle(worker.poll()))
+    """
+
+    def __init__(self, cache: Optional[ModelCache] = None) -> None:
+        self.cache = cache if cache is not None else ModelCache()
+        self.events: queue.Queue[WorkerEvent] = queue.Queue()
+        self._requests: queue.Queue = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._cancel = CancellationToken()
+        self._thread = threading.Thread(target=self._run, name="rcg-gui-worker", daemon=True)
+
+    @property
+    def pending(self) -> int:
+        """Subcatchments submitted and not yet written or failed."""
+        return self._pending
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker thread is alive."""
+        return self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread.start()
+
+    def preload(self, file_path: str) -> None:
+        """Parse ``file_path`` in the background, e.g. as soon as it is selected."""
+        self._requests.put(file_path)
+
+    def submit(self, request: PendingSubcatchment) -> int:
+        """
+        Queue a subcatchment for the next write.
+
+        Returns
+        -------
+        int
+            Number of subcatchments now pending.
+        """
+        with self._pending_lock:
+            self._pending += 1
+            pending = self._pending
+        self._requests.put(request)
+        return pending
+
+    def cancel(self) -> int:
+        """
+        Stop the batch being written after its current chunk and drop the queued requests.
+
+        Returns
+        -------
+        int
+            Number of queued requests dropped.
+        """
+        self._cancel.cancel()
+        kept, dropped = [], []
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            (dropped if isinstance(item, PendingSubcatchment) else kept).append(item)
+        for item in kept:
+            self._requests.put(item)
+        with self._pending_lock:
+            self._pending -= len(dropped)
+        if dropped:
+            self.events.put(
+                WorkerEvent(
+                    "cancelled",
+                    dropped[0].file_path,
+                    f"Dropped {len(dropped)} queued subcatchment(s)",
+                    requests=tuple(dropped),
+                )
+            )
+        return len(dropped)
+
+    def poll(self) -> list[WorkerEvent]:
+        """Events posted since the last call, without blocking."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        Finish the queued work and stop the thread.
+
+        Returns
+        -------
+        bool
+            Whether the thread stopped within ``timeout``.
+        """
+        self._requests.put(_STOP)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _drain(self, first: object) -> tuple[list[object], bool]:
+        """Collect ``first`` and every request queued behind it."""
+        items, stop = [first], False
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                return items, stop
+            if item is _STOP:
+                stop = True
+            else:
+                items.append(item)
+
+    def _run(self) -> None:
+        while True:
+            item = self._requests.get()
+            if item is _STOP:
+                return
+            items, stop = self._drain(item)
+            # Cancel only stops work that had already started when it was requested
+            self._cancel = CancellationToken()
+            batches: dict[str, list[PendingSubcatchment]] = {}
+            preloads: list[str] = []
+            for item in items:
+                if isinstance(item, PendingSubcatchment):
+                    batches.setdefault(item.file_path, []).append(item)
+                elif item not in preloads:
+                    preloads.append(item)
+            for file_path in preloads:
+                if file_path not in batches:
+                    self._load(file_path)
+            for file_path, requests in batches.items():
+                self._write(file_path, requests)
+            if stop:
+                return
+
+    def _load(self, file_path: str, requests: tuple[PendingSubcatchment, ...] = ()) -> Optional[BuildCatchments]:
+        """Return the cached model, posting a ``"loading"`` event if it has to be parsed."""
+        try:
+            if not self.cache.is_current(file_path):
+                self.events.put(WorkerEvent("loading", file_path, f"Loading {Path(file_path).name}..."))
+            model, parsed = self.cache.get(file_path)
+        except Exception as e:
+            logger.exception("Loading %s failed", file_path)
+            self.events.put(WorkerEvent("error", file_path, f"Could not load the model:\n\n{e}", requests=requests))
+            return None
+        if parsed:
+            logger.info("Loaded %s", file_path)
+        return model
+
+    def _write(self, file_path: str, requests: list[PendingSubcatchment]) -> None:
+        """Write ``requests`` to ``file_path`` as a cancellable batch job."""
+        batch = tuple(requests)
+        reports: list[ProgressReport] = []
+
+        def progress(report: ProgressReport) -> None:
+            reports.append(report)
+            message = f"Writing {len(batch)} subcatchment(s)... {report.done}/{len(batch)}"
+            self.events.put(WorkerEvent("progress", file_path, message, requests=batch, report=report))
+
+        try:
+            model = self._load(file_path, batch)
+            if model is None:
+                return
+            progress(ProgressReport(0, len(batch), 0.0, 0.0, None))
+            # A job of its own per batch: the checkpoint only guards this write and is removed after it
+            job_id = f"gui-{uuid.uuid4().hex[:12]}"
+            specs = [(request.area, request.land_form, request.land_cover) for request in batch]
+            chunk_rows = math.ceil(len(batch) / PROGRESS_STEPS)
+            try:
+                result = model.run_batch(specs, job_id, chunk_rows, progress=progress, cancel=self._cancel)
+            except OperationCancelled as e:
+                self.cache.touch(file_path)
+                JobCheckpoint.for_model(model.file_path, job_id).remove()
+                self.events.put(
+                    WorkerEvent(
+                        "cancelled",
+                        file_path,
+                        f"Cancelled after {e.done or 0} of {len(batch)} subcatchment(s)",
+                        requests=batch,
+                    )
+                )
+                return
+            except Exception as e:
+                # The model may no longer match the file; parse it again next time
+                self.cache.discard(file_path)
+                JobCheckpoint.for_model(model.file_path, job_id).remove()
+                logger.exception("Writing %d subcatchment(s) to %s failed", len(batch), file_path)
+                self.events.put(WorkerEvent("error", file_path, str(e), requests=batch))
+                return
+            self.cache.touch(file_path)
+            JobCheckpoint(result.checkpoint_path, job_id).remove()
+            self.events.put(
+                WorkerEvent(
+                    "done",
+                    file_path,
+                    f"Added {result.added} subcatchment(s)",
+                    names=tuple(result.names),
+                    requests=batch,
+                    report=reports[-1],
+                )
+            )
+        finally:
+            with self._pending_lock:
+                self._pending -= len(batch)
@@ -3,14 +3,20 @@
 import argparse
 import logging
 import sys
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Optional
 
+from . import daemon, metrics
 from .fuzzy.categories import LandCover, LandForm
-from .inp_manage.inp import BuildCatchments
 from .logging_config import setup_logging as setup_central_logging
+from .profiling import DEFAULT_TOP, PROFILE_MODES, Profiler
 from .validation import validate_area, validate_file_path, validate_land_cover, validate_land_form
 
+if TYPE_CHECKING:
+    from .inp_manage.inp import BuildCatchments
 
-def setup_logging(verbose: bool = False) -> logging.Logger:
+
+def setup_logging(verbose: bool = False, json_format: bool = False) -> logging.Logger:
     """
     Configure logging based on verbosity level using centralized config.
 
@@ -18,6 +24,8 @@ def setup_logging(verbose: bool = False) -> logging.Logger:
     ----------
     verbose : bool
         If True, sets logging level to DEBUG.
+    json_format : bool
+        If True, logs one JSON object per line.
 
     Returns
     -------
@@ -25,7 +33,7 @@ def setup_logging(verbose: bool = False) -> logging.Logger:
         Configured logger instance.
     """
     level = logging.DEBUG if verbose else logging.INFO
-    return setup_central_logging(level=level, name="rcg.cli")
+    return setup_central_logging(level=level, name="rcg.cli", json_format=json_format)
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -40,6 +48,7 @@ def create_parser() -> argparse.ArgumentParser:
     Examples:
         %(prog)s model.inp --area 5.5 --land-form flats_and_plateaus --land-cover urban_moderately_impervious
         %(prog)s model.inp --area 2.1 --land-form mountains --land-cover forests --verbose
+        %(prog)s model.inp --area 2.1 --land-form mountains --land-cover forests --profile cpu
         %(prog)s --list-options
 
     Land Form Options (sorted): {", ".join(all_land_forms[:5])}...
@@ -48,7 +57,7 @@ def create_parser() -> argparse.ArgumentParser:
     """,
     )
 
-    parser.add_argument("input_file", type=validate_file_path, help="Path to the SWMM input (.inp) file")
+    parser.add_argument("input_file", type=validate_file_path, help="Path to the SWMM input file (.inp, .inp.gz or .inp.zst)")
 
     parser.add_argument(
         "--area", type=validate_area, required=True, help="Area of the subcatchment in hectares (ha), e.g., 5.5"
@@ -64,6 +73,29 @@ def create_parser() -> argparse.ArgumentParser:
 
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
 
+    parser.add_argument("--log-json", action="store_true", help="Log one JSON object per line")
+
+    parser.add_argument(
+        "--no-daemon", action="store_true", help="Run in this process even if an RCG daemon (python -m rcg.daemon) is running"
+    )
+
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="Profile the run in this process: cpu writes a .pstats file, mem reports allocation growth per stage",
+    )
+
+    parser.add_argument("--profile-output", help="Where to write the profile (default: rcg-<timestamp>.pstats for cpu)")
+
+    parser.add_argument(
+        "--profile-top", type=int, default=DEFAULT_TOP, help=f"Functions or allocation sites listed (default: {DEFAULT_TOP})"
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        help="Write engine and I/O metrics on exit: JSON for a .json path, else Prometheus text (e.g. rcg.prom)",
+    )
+
     parser.add_argument(
         "--list-options", action="store_true", help="List all available land form and cover options (sorted alphabetically)"
     )
@@ -83,21 +115,53 @@ def list_options() -> None:
 
 
 def add_subcatchment(
-    model: BuildCatchments, area: float, land_form: LandForm, land_cover: LandCover, logger: logging.Logger
+    model: "BuildCatchments", area: float, land_form: LandForm, land_cover: LandCover, logger: logging.Logger
 ) -> None:
     """Add subcatchment to the model with logging."""
+    context = {"area": area, "land_form": land_form.name, "land_cover": land_cover.name}
     logger.info(
-        f"Starting subcatchment generation: Area={area:.2f} ha, Land form={land_form.name}, Land cover={land_cover.name}"
+        "Starting subcatchment generation: Area=%.2f ha, Land form=%s, Land cover=%s",
+        area,
+        land_form.name,
+        land_cover.name,
+        extra=context,
     )
 
     try:
-        model.add_subcatchment(area, land_form, land_cover)
-        logger.info("Successfully generated subcatchment")
+        name = model.add_subcatchment(area, land_form, land_cover)
+        logger.info("Successfully generated subcatchment %s", name, extra={**context, "subcatchment": name})
     except Exception as e:
-        logger.error(f"Failed to generate subcatchment: {e}")
+        logger.error("Failed to generate subcatchment: %s", e, extra=context)
         raise
 
 
+def forward_to_daemon(args: argparse.Namespace, logger: logging.Logger) -> Optional[int]:
+    """
+    Let a running RCG daemon add the subcatchment.
+
+    Returns
+    -------
+    Optional[int]
+        Exit code, or None if no daemon is running.
+    """
+    response = daemon.forward(
+        {
+            "command": "add_subcatchment",
+            "input_file": str(args.input_file.resolve()),
+            "area": args.area,
+            "land_form": args.land_form.name,
+            "land_cover": args.land_cover.name,
+        }
+    )
+    if response is None:
+        return None
+    if not response["ok"]:
+        logger.error("Daemon failed to generate subcatchment: %s", response["error"])
+        return 1
+    logger.info("Successfully generated subcatchment %s (daemon)", response["result"]["subcatchment"])
+    return 0
+
+
 def parse_args() -> tuple[argparse.Namespace, argparse.ArgumentParser]:
     """Parse command-line arguments."""
     parser = create_parser()
@@ -112,13 +176,22 @@ def main() -> int:
         list_options()
         return 0
 
-    logger = setup_logging(args.verbose)
+    logger = setup_logging(args.verbose, args.log_json)
+
+    if not args.no_daemon and not args.profile and not args.metrics_file:
+        exit_code = forward_to_daemon(args, logger)
+        if exit_code is not None:
+            return exit_code
 
     try:
-        logger.info(f"Loading SWMM model: {args.input_file}")
-        model = BuildCatchments(str(args.input_file))
+        from .inp_manage.inp import BuildCatchments
+
+        profiling = Profiler(args.profile, args.profile_output, args.profile_top) if args.profile else nullcontext()
+        with profiling as profiler:
+            logger.info("Loading SWMM model: %s", args.input_file)
+            model = BuildCatchments(str(args.input_file), recorder=profiler.recorder if profiler else None)
 
-        add_subcatchment(model=model, area=args.area, land_form=args.land_form, land_cover=args.land_cover, logger=logger)
+            add_subcatchment(model=model, area=args.area, land_form=args.land_form, land_cover=args.land_cover, logger=logger)
 
         logger.info("Process completed successfully")
         return 0
@@ -127,10 +200,13 @@ def main() -> int:
         logger.warning("Process interrupted by user")
         return 1
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         if args.verbose:
             logger.exception("Full traceback:")
         return 1
+    finally:
+        if args.metrics_file:
+            metrics.REGISTRY.save(args.metrics_file)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,342 @@
+"""
+Warm-engine daemon for the command-line interface.
+
+Starting ``rcg`` imports pandas, swmmio and scikit-fuzzy and builds the fuzzy
+engine, which takes seconds, while adding a subcatchment takes milliseconds.
+The daemon pays that cost once: it keeps the engine and the most recently
+used models loaded and serves requests on a Unix domain socket. ``rcg.cli``
+forwards to it whenever it is running and otherwise works in-process.
+
+The socket lives in ``$XDG_RUNTIME_DIR`` or in an owner-only directory under
+the temporary directory, and the client only talks to a daemon run by the
+same user, so other users can neither impersonate nor reach it.
+
+The client side of this module imports only the standard library, so
+forwarding a request stays fast.
+
+Usage:
+    python -m rcg.daemon [--socket PATH] [--max-models N]
+    python -m rcg.daemon --stop
+
+Protocol:
+    One JSON object per line in each direction. Requests carry a
+    ``command`` (``ping``, ``add_subcatchment`` or ``shutdown``) and its
+    arguments; responses are ``{"ok": true, "result": ...}`` or
+    ``{"ok": false, "error": ..., "type": ...}``.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Optional
+
+from rcg.logging_config import get_logger, setup_logging
+
+logger = get_logger("daemon")
+
+# Environment variable overriding the socket location
+SOCKET_ENV = "RCG_DAEMON_SOCKET"
+
+# Number of models kept loaded by default
+DEFAULT_MAX_MODELS = 8
+
+# Seconds to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 0.5
+
+
+def default_socket_path() -> Path:
+    """Socket path from ``RCG_DAEMON_SOCKET``, in ``$XDG_RUNTIME_DIR`` or in a per-user temporary directory."""
+    if os.environ.get(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(os.environ["XDG_RUNTIME_DIR"]) / "rcg.sock"
+    name = f"rcg-{os.getuid()}" if hasattr(os, "getuid") else "rcg"
+    return Path(tempfile.gettempdir()) / name / "rcg.sock"
+
+
+def _ensure_private_directory(directory: Path) -> None:
+    """
+    Create the socket directory owner-only if it is missing.
+
+    Raises
+    ------
+    RuntimeError
+        If the directory belongs to another user or others can write to it,
+        so they could bind the socket path first.
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    status = directory.stat()
+    if status.st_uid != os.getuid() or status.st_mode & 0o022:
+        raise RuntimeError(
+            f"Refusing to place the daemon socket in {directory}: it must belong to the current user "
+            "and must not be writable by others"
+        )
+
+
+def _owned_by_current_user(client: socket.socket, socket_path: Path) -> bool:
+    """Whether the socket file and, where the platform reports it, the peer process belong to the current user."""
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        if socket_path.stat().st_uid != os.getuid():
+            return False
+    except OSError:
+        return False
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = client.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", credentials)
+        return uid == os.getuid()
+    return True
+
+
+def forward(request: dict[str, Any], socket_path: Optional[Path] = None, timeout: Optional[float] = None) -> Optional[dict]:
+    """
+    Send one request to the daemon.
+
+    Parameters
+    ----------
+    request : Dict[str, Any]
+        JSON-serializable request with a ``command`` key.
+    socket_path : Optional[Path]
+        Daemon socket; defaults to :func:`default_socket_path`.
+    timeout : Optional[float]
+        Seconds to wait for the response; None waits as long as the operation takes.
+
+    Returns
+    -------
+    Optional[dict]
+        The daemon's response, or None if no daemon of the current user is listening.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+            return None
+        if not _owned_by_current_user(client, socket_path):
+            logger.warning("Ignoring daemon socket %s: it belongs to another user", socket_path)
+            return None
+        client.settimeout(timeout)
+        client.sendall(json.dumps(request).encode() + b"\n")
+        with client.makefile("rb") as stream:
+            line = stream.readline()
+        return json.loads(line) if line else None
+    finally:
+        client.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer every JSON line of a connection."""
+
+    server: "_DaemonServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = {"ok": True, "result": self.server.daemon.handle(json.loads(line))}
+            except Exception as e:
+                response = {"ok": False, "error": str(e), "type": type(e).__name__}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+# Python on Windows has no Unix domain sockets; the base only keeps this module importable there
+_UnixStreamServer = getattr(socketserver, "UnixStreamServer", socketserver.TCPServer)
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, _UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: "RcgDaemon") -> None:
+        self.daemon = daemon
+        super().__init__(socket_path, _RequestHandler)
+
+
+class RcgDaemon:
+    """
+    Server keeping the fuzzy engine and recently used models warm.
+
+    Requests for the same model are serialized; different models are served
+    concurrently. A cached model picks up changes made by other processes
+    through the file signature check of :class:`BuildCatchments`.
+
+    Attributes
+    ----------
+    socket_path : Path
+        Path of the listening socket.
+    max_models : int
+        Number of models kept loaded; the least recently used one is dropped first.
+    ready : threading.Event
+        Set once the socket accepts connections.
+
+    Example
+    -------
+    >>> RcgDaemon().serve_forever()
+    """
+
+    def __init__(self, socket_path: Optional[Path] = None, max_models: int = DEFAULT_MAX_MODELS) -> None:
+        if max_models < 1:
+            raise ValueError(f"max_models must be positive, got: {max_models}")
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+        self.max_models = max_models
+        self._models: OrderedDict[str, tuple[Any, threading.Lock]] = OrderedDict()
+        self._models_lock = threading.Lock()
+        # Models being loaded, so concurrent requests for one of them wait for a single load
+        self._loading: dict[str, Future] = {}
+        self._server: Optional[_DaemonServer] = None
+        self.ready = threading.Event()
+
+    def _model(self, input_file: str) -> tuple[Any, threading.Lock]:
+        """Return the cached model for ``input_file`` and its lock, loading it if needed."""
+        from rcg.inp_manage.inp import BuildCatchments
+
+        key = str(Path(input_file).resolve())
+        with self._models_lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = Future()
+        if not owner:
+            # Another request is loading this model; wait for it instead of parsing the file twice
+            return loading.result()
+
+        # Parsing a large model takes a while, so other models stay available meanwhile
+        try:
+            entry = (BuildCatchments(key), threading.Lock())
+        except BaseException as e:
+            with self._models_lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        with self._models_lock:
+            del self._loading[key]
+            self._models[key] = entry
+            while len(self._models) > self.max_models:
+                dropped, _ = self._models.popitem(last=False)
+                logger.info("Dropped model from cache: %s", dropped)
+        loading.set_result(entry)
+        return entry
+
+    def handle(self, request: dict[str, Any]) -> Any:
+        """
+        Execute one request.
+
+        Raises
+        ------
+        ValueError
+            If the command is unknown or its arguments are invalid.
+        """
+        from rcg.validation import validate_area, validate_file_path, validate_land_cover, validate_land_form
+
+        command = request.get("command")
+        if command == "ping":
+            with self._models_lock:
+                models = list(self._models)
+            return {"pid": os.getpid(), "models": models}
+        if command == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"pid": os.getpid()}
+        if command == "add_subcatchment":
+            input_file = validate_file_path(str(request["input_file"]))
+            area = validate_area(str(request["area"]))
+            land_form = validate_land_form(str(request["land_form"]))
+            land_cover = validate_land_cover(str(request["land_cover"]))
+            model, lock = self._model(str(input_file))
+            with lock:
+                return {"subcatchment": model.add_subcatchment(area, land_form, land_cover)}
+        raise ValueError(f"Unknown command: {command}")
+
+    def serve_forever(self) -> None:
+        """
+        Warm up the engine, bind the socket and serve until shut down.
+
+        Raises
+        ------
+        RuntimeError
+            If another daemon is already listening on the socket, its directory
+            is not private to the current user, or the platform has no Unix
+            domain sockets.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The RCG daemon needs Unix domain sockets, which this platform lacks")
+        _ensure_private_directory(self.socket_path.parent)
+        if forward({"command": "ping"}, self.socket_path) is not None:
+            raise RuntimeError(f"An RCG daemon is already listening on {self.socket_path}")
+        # A socket file left behind by a daemon that was killed
+        self.socket_path.unlink(missing_ok=True)
+
+        from rcg.fuzzy.engine import get_default_fuzzy_engine
+        from rcg.inp_manage import inp  # noqa: F401
+
+        get_default_fuzzy_engine()
+        # Create the socket owner-only: a chmod after bind() leaves a window in which others can connect
+        umask = os.umask(0o177)
+        try:
+            self._server = _DaemonServer(str(self.socket_path), self)
+        finally:
+            os.umask(umask)
+        self.ready.set()
+        logger.info("RCG daemon listening on %s", self.socket_path)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            logger.info("RCG daemon stopped")
+
+    def shutdown(self) -> None:
+        """Stop :meth:`serve_forever` from another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def main() -> int:
+    """Run the daemon, or stop a running one with ``--stop``."""
+    parser = argparse.ArgumentParser(description="Rapid Catchment Generator daemon")
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help="Socket path (default: $RCG_DAEMON_SOCKET, $XDG_RUNTIME_DIR/rcg.sock or a per-user temp directory)",
+    )
+    parser.add_argument("--max-models", type=int, default=DEFAULT_MAX_MODELS, help="Number of models kept loaded")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    args = parser.parse_args()
+
+    setup_logging(name="rcg.daemon")
+    if args.stop:
+        if forward({"command": "shutdown"}, args.socket) is None:
+            logger.warning("No RCG daemon is running")
+            return 1
+        return 0
+
+    try:
+        RcgDaemon(args.socket, args.max_models).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -164,3 +164,69 @@ class RuleDefinitionError(RCGError):
     def __init__(self, message: str, rule_name: str = None):
         super().__init__(message)
         self.rule_name = rule_name
+
+
+class ServiceOverloadedError(RCGError):
+    """
+    Exception raised when a service rejects work to protect its latency.
+
+    This exception is raised when accepting a request would exceed the
+    number of items allowed to wait for processing.
+
+    Attributes
+    ----------
+    pending : int, optional
+        Number of items waiting when the request was rejected.
+    limit : int, optional
+        Maximum number of waiting items.
+
+    Example
+    -------
+    >>> raise ServiceOverloadedError("Too many pending items", pending=1024, limit=1024)
+    """
+
+    def __init__(self, message: str, pending: int = None, limit: int = None):
+        super().__init__(message)
+        self.pending = pending
+        self.limit = limit
+
+
+class CheckpointError(RCGError):
+    """
+    Exception raised for unreadable or mismatched batch job checkpoints.
+
+    Attributes
+    ----------
+    checkpoint_path : str, optional
+        Path to the checkpoint file.
+
+    Example
+    -------
+    >>> raise CheckpointError("Corrupted checkpoint record on line 3", checkpoint_path="/path/to/job.checkpoint.jsonl")
+    """
+
+    def __init__(self, message: str, checkpoint_path: str = None):
+        super().__init__(message)
+        self.checkpoint_path = checkpoint_path
+
+
+class OperationCancelled(RCGError):
+    """
+    Exception raised when a long operation stops because it was cancelled.
+
+    Work committed before the cancellation is kept; the chunk in progress is
+    rolled back.
+
+    Attributes
+    ----------
+    done : int, optional
+        Input rows processed before the operation stopped.
+
+    Example
+    -------
+    >>> raise OperationCancelled("Batch cancelled", done=12000)
+    """
+
+    def __init__(self, message: str, done: int = None):
+        super().__init__(message)
+        self.done = done
@@ -12,6 +12,7 @@ from typing import TYPE_CHECKING, Optional
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 
+from rcg import metrics
 from rcg.fuzzy import categories
 
 if TYPE_CHECKING:
@@ -135,15 +136,20 @@ class FuzzyEngine:
         """
         self._validate_inputs(land_form, land_cover)
 
-        return {
-            "slope": self.compute_slope(land_form, land_cover),
-            "impervious": self.compute_impervious(land_form, land_cover),
-            "catchment": self.compute_catchment(land_form, land_cover),
-        }
+        with metrics.INFERENCE_SECONDS.time():
+            return {
+                "slope": self.compute_slope(land_form, land_cover),
+                "impervious": self.compute_impervious(land_form, land_cover),
+                "catchment": self.compute_catchment(land_form, land_cover),
+            }
 
     def _compute_single(self, sim: ctrl.ControlSystemSimulation, land_form: int, land_cover: int, output_label: str) -> float:
         """DRY helper for single parameter computation."""
         self._set_inputs(sim, land_form, land_cover)
+        # scikit-fuzzy answers repeated inputs from its cache, keyed by the unique_id of the inputs
+        cached = sim.cache is not False and sim.unique_id in sim._calculated
+        metrics.ENGINE_CALLS.inc(output=output_label)
+        (metrics.ENGINE_CACHE_HITS if cached else metrics.ENGINE_CACHE_MISSES).inc(output=output_label)
         sim.compute()
         return sim.output[output_label]
 
@@ -196,6 +202,26 @@ class Prototype:
         self.impervious_result = results["impervious"]
         self.catchment_result = results["catchment"]
 
+    @classmethod
+    def from_results(cls, results: dict[str, float], engine: Optional[FuzzyEngine] = None) -> "Prototype":
+        """
+        Create a prototype from already computed engine outputs, skipping inference.
+
+        Parameters
+        ----------
+        results : Dict[str, float]
+            ``slope``, ``impervious`` and ``catchment`` values as returned by
+            :meth:`FuzzyEngine.compute_all`, e.g. from a :class:`rcg.fuzzy.table.EngineTable`.
+        engine : Optional[FuzzyEngine]
+            Engine whose memberships are used by :meth:`get_linguistic`.
+        """
+        prototype = cls.__new__(cls)
+        prototype._engine = engine if engine is not None else get_default_fuzzy_engine()
+        prototype.slope_result = results["slope"]
+        prototype.impervious_result = results["impervious"]
+        prototype.catchment_result = results["catchment"]
+        return prototype
+
     def get_linguistic(self, result: float, member=None) -> str:
         """
         Convert numeric fuzzy result to linguistic category name.
@@ -0,0 +1,306 @@
+"""
+Tabulated fuzzy engine outputs.
+
+Land form and land cover are categorical, so the engine can only ever
+produce 9 x 14 = 126 distinct results. An :class:`EngineTable` holds them as
+arrays indexed by ``(land_form - 1, land_cover - 1)``, which turns inference
+for any number of inputs into one NumPy fancy-indexing operation.
+
+Computing all 126 pairs takes over a minute, so the full table of the default
+engine ships with the package (:data:`DEFAULT_TABLE_PATH`) and is loaded with
+:meth:`EngineTable.load`. The table records a fingerprint of the rules and
+membership functions it was computed with (:func:`engine_fingerprint`), and a
+table whose fingerprint does not match the engine is rejected. Regenerate it
+after changing rules or memberships::
+
+    python -m rcg.fuzzy.table
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from rcg.exceptions import ConfigurationError
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.fuzzy.engine import FuzzyEngine, Prototype, get_default_fuzzy_engine
+from rcg.logging_config import get_logger
+
+logger = get_logger("fuzzy.table")
+
+N_LAND_FORMS = len(LandForm)
+N_LAND_COVERS = len(LandCover)
+
+# Outputs of FuzzyEngine.compute_all
+OUTPUTS = ("slope", "impervious", "catchment")
+
+# Table format version
+TABLE_VERSION = 2
+
+# Precomputed table of the default engine
+DEFAULT_TABLE_PATH = Path(__file__).resolve().parent.parent / "config" / "engine_table.json"
+
+
+def engine_fingerprint(engine: FuzzyEngine) -> str:
+    """
+    SHA-256 of the rules and membership functions that determine the outputs of ``engine``.
+
+    Rules are hashed in sorted order, as their order does not change the
+    results; membership values are rounded so that the fingerprint does not
+    depend on the last bits of the platform's floating point.
+    """
+    digest = hashlib.sha256()
+    for system in (engine.slope_ctrl, engine.impervious_ctrl, engine.catchment_ctrl):
+        for rule in sorted(str(rule) for rule in system.rules):
+            digest.update(rule.encode())
+    memberships = engine.memberships
+    for variable in (
+        memberships.land_form_type,
+        memberships.land_cover_type,
+        memberships.slope,
+        memberships.impervious,
+        memberships.catchment,
+    ):
+        digest.update(f"{variable.label}:{getattr(variable, 'defuzzify_method', '')}".encode())
+        digest.update((np.round(np.asarray(variable.universe, dtype=float), 9) + 0.0).tobytes())
+        for name, term in variable.terms.items():
+            digest.update(name.encode())
+            digest.update((np.round(np.asarray(term.mf, dtype=float), 9) + 0.0).tobytes())
+    return digest.hexdigest()
+
+
+class EngineTable:
+    """
+    Engine outputs for every (or a subset of) land form and land cover pairs.
+
+    Attributes
+    ----------
+    values : Dict[str, np.ndarray]
+        ``(9, 14)`` array per output; pairs that were not computed are NaN.
+    catchment_classes : np.ndarray
+        ``(9, 14)`` linguistic catchment class of each computed pair, else None.
+    engine : FuzzyEngine
+        Engine the table was computed with.
+
+    Example
+    -------
+    >>> table = EngineTable.compute()
+    >>> table.lookup([2, 8], [10, 11])["impervious"]
+    """
+
+    def __init__(self, values: dict[str, np.ndarray], engine: Optional[FuzzyEngine] = None) -> None:
+        self.values = {name: np.asarray(values[name], dtype=float).reshape(N_LAND_FORMS, N_LAND_COVERS) for name in OUTPUTS}
+        self.engine = engine if engine is not None else get_default_fuzzy_engine()
+        self.catchment_classes = np.full((N_LAND_FORMS, N_LAND_COVERS), None, dtype=object)
+        for form, cover in zip(*np.nonzero(self.computed)):
+            self.catchment_classes[form, cover] = self._linguistic(form, cover)
+
+    @classmethod
+    def empty(cls, engine: Optional[FuzzyEngine] = None) -> "EngineTable":
+        """Create a table without results, to be filled by :meth:`update`."""
+        return cls({name: np.full((N_LAND_FORMS, N_LAND_COVERS), np.nan) for name in OUTPUTS}, engine)
+
+    @classmethod
+    def compute(cls, pairs: Optional[Iterable[tuple[int, int]]] = None, engine: Optional[FuzzyEngine] = None) -> "EngineTable":
+        """
+        Run the engine once per pair.
+
+        Parameters
+        ----------
+        pairs : Optional[Iterable[Tuple[int, int]]]
+            Land form and land cover codes (or enums) to compute; all 126 pairs by default.
+        engine : Optional[FuzzyEngine]
+            Engine to use. If None, uses the default engine.
+        """
+        table = cls.empty(engine)
+        if pairs is None:
+            pairs = [(form, cover) for form in range(1, N_LAND_FORMS + 1) for cover in range(1, N_LAND_COVERS + 1)]
+        table.update(pairs)
+        return table
+
+    def update(self, pairs: Iterable[tuple[int, int]]) -> int:
+        """
+        Compute the pairs that are not in the table yet.
+
+        Returns
+        -------
+        int
+            Number of pairs computed.
+        """
+        missing = [
+            (form, cover)
+            for form, cover in dict.fromkeys((int(form), int(cover)) for form, cover in pairs)
+            if not self.computed[form - 1, cover - 1]
+        ]
+        for form, cover in missing:
+            results = self.engine.compute_all(form, cover)
+            for name in OUTPUTS:
+                self.values[name][form - 1, cover - 1] = results[name]
+            self.catchment_classes[form - 1, cover - 1] = self._linguistic(form - 1, cover - 1)
+        return len(missing)
+
+    @classmethod
+    def load(cls, path: Optional[Union[str, Path]] = None, engine: Optional[FuzzyEngine] = None) -> "EngineTable":
+        """
+        Read a table written by :meth:`save`.
+
+        Parameters
+        ----------
+        path : Optional[Union[str, Path]]
+            Table file; :data:`DEFAULT_TABLE_PATH` by default.
+        engine : Optional[FuzzyEngine]
+            Engine used for linguistic classes and missing pairs. If None, uses the default engine.
+
+        Raises
+        ------
+        ConfigurationError
+            If the file cannot be read, does not match the land form and land
+            cover categories, or was computed with other rules or memberships.
+        """
+        path = Path(path) if path is not None else DEFAULT_TABLE_PATH
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ConfigurationError(f"Cannot read engine table: {e}", config_file=str(path)) from e
+        if data.get("version") != TABLE_VERSION:
+            raise ConfigurationError(
+                f"Unsupported engine table version: {data.get('version')}, expected {TABLE_VERSION}", config_file=str(path)
+            )
+        if data.get("land_forms") != [form.name for form in LandForm] or data.get("land_covers") != [
+            cover.name for cover in LandCover
+        ]:
+            raise ConfigurationError("Engine table categories do not match LandForm and LandCover", config_file=str(path))
+        engine = engine if engine is not None else get_default_fuzzy_engine()
+        if data.get("engine") != engine_fingerprint(engine):
+            raise ConfigurationError(
+                "Engine table was computed with other rules or memberships; regenerate it with 'python -m rcg.fuzzy.table'",
+                config_file=str(path),
+            )
+        try:
+            values = {
+                name: np.array([[np.nan if value is None else value for value in row] for row in data[name]], dtype=float)
+                for name in OUTPUTS
+            }
+            return cls(values, engine)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ConfigurationError(f"Invalid engine table: {e}", config_file=str(path)) from e
+
+    @classmethod
+    def load_default(cls, engine: Optional[FuzzyEngine] = None) -> "EngineTable":
+        """
+        Table of the default engine: the shipped one, or an empty one to be filled lazily.
+
+        The shipped :data:`DEFAULT_TABLE_PATH` is only valid for the default
+        engine; for another ``engine``, or if the file is missing, unreadable
+        or computed with other rules or memberships than the live engine, an
+        empty table is returned and pairs are computed as they are requested.
+        """
+        default_engine = get_default_fuzzy_engine()
+        if engine is not None and engine is not default_engine:
+            return cls.empty(engine)
+        try:
+            return cls.load(DEFAULT_TABLE_PATH, default_engine)
+        except ConfigurationError as e:
+            logger.warning("Computing engine outputs on demand, the precomputed table is unusable: %s", e)
+            return cls.empty(default_engine)
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-compatible form of the table; pairs that were not computed are None."""
+        data: dict[str, Any] = {
+            "version": TABLE_VERSION,
+            "engine": engine_fingerprint(self.engine),
+            "land_forms": [form.name for form in LandForm],
+            "land_covers": [cover.name for cover in LandCover],
+        }
+        for name in OUTPUTS:
+            data[name] = [[None if np.isnan(value) else float(value) for value in row] for row in self.values[name]]
+        return data
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the table atomically as JSON to ``path``."""
+        path = Path(path)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=1)
+                f.write("\n")
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return path
+
+    def _linguistic(self, form: int, cover: int) -> str:
+        """Linguistic catchment class of a computed pair, given as zero-based positions."""
+        prototype = self.prototype(LandForm(form + 1), LandCover(cover + 1))
+        return prototype.get_linguistic(prototype.catchment_result)
+
+    @property
+    def computed(self) -> np.ndarray:
+        """``(9, 14)`` mask of the pairs present in the table."""
+        return ~np.isnan(self.values["slope"])
+
+    def _positions(
+        self, land_forms: Union[Sequence[int], np.ndarray], land_covers: Union[Sequence[int], np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        forms = np.asarray(land_forms, dtype=np.int64) - 1
+        covers = np.asarray(land_covers, dtype=np.int64) - 1
+        if ((forms < 0) | (forms >= N_LAND_FORMS)).any():
+            raise ValueError(f"Invalid land_form code. Must be 1-{N_LAND_FORMS}")
+        if ((covers < 0) | (covers >= N_LAND_COVERS)).any():
+            raise ValueError(f"Invalid land_cover code. Must be 1-{N_LAND_COVERS}")
+        if not self.computed[forms, covers].all():
+            raise ValueError("The table has no results for some of the requested pairs")
+        return forms, covers
+
+    def lookup(
+        self, land_forms: Union[Sequence[int], np.ndarray], land_covers: Union[Sequence[int], np.ndarray]
+    ) -> dict[str, np.ndarray]:
+        """
+        Engine outputs for arrays of land form and land cover codes.
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            ``slope``, ``impervious`` and ``catchment`` arrays shaped like the inputs.
+
+        Raises
+        ------
+        ValueError
+            If a code is out of range or a pair was not computed.
+        """
+        forms, covers = self._positions(land_forms, land_covers)
+        return {name: self.values[name][forms, covers] for name in OUTPUTS}
+
+    def prototype(self, land_form: LandForm, land_cover: LandCover) -> Prototype:
+        """Build a :class:`Prototype` for one pair without running inference."""
+        forms, covers = self._positions([land_form], [land_cover])
+        return Prototype.from_results({name: float(self.values[name][forms[0], covers[0]]) for name in OUTPUTS}, self.engine)
+
+    def prototypes(self) -> dict[tuple[LandForm, LandCover], Prototype]:
+        """Prototypes of all computed pairs, keyed by enums."""
+        forms, covers = np.nonzero(self.computed)
+        return {
+            (LandForm(form + 1), LandCover(cover + 1)): self.prototype(LandForm(form + 1), LandCover(cover + 1))
+            for form, cover in zip(forms.tolist(), covers.tolist())
+        }
+
+
+def main() -> int:
+    """Compute all pairs with the default engine and write them to :data:`DEFAULT_TABLE_PATH` or ``argv[1]``."""
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TABLE_PATH
+    EngineTable.compute().save(path)
+    print(f"Engine table written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import unittest
 
 from skfuzzy.control import ControlSystem, ControlSystemSimulation
 
+from rcg import metrics
 from rcg.fuzzy import categories
 from rcg.fuzzy.engine import FuzzyEngine, Prototype, create_fuzzy_engine
 from rcg.fuzzy.memberships import create_memberships, get_default_memberships
@@ -57,6 +58,21 @@ class TestFuzzyEngine(unittest.TestCase):
         self.assertIn("impervious", results)
         self.assertIn("catchment", results)
 
+    def test_compute_all_records_metrics(self):
+        label = self.engine.memberships.slope.label
+        calls = metrics.ENGINE_CALLS.value(output=label)
+        hits = metrics.ENGINE_CACHE_HITS.value(output=label)
+        misses = metrics.ENGINE_CACHE_MISSES.value(output=label)
+        inferences = sum(sample["count"] for sample in metrics.INFERENCE_SECONDS.samples())
+
+        self.engine.compute_all(3, 7)
+        self.engine.compute_all(3, 7)
+
+        self.assertEqual(metrics.ENGINE_CALLS.value(output=label), calls + 2)
+        self.assertEqual(metrics.ENGINE_CACHE_MISSES.value(output=label), misses + 1)
+        self.assertEqual(metrics.ENGINE_CACHE_HITS.value(output=label), hits + 1)
+        self.assertEqual(sum(sample["count"] for sample in metrics.INFERENCE_SECONDS.samples()), inferences + 2)
+
     def tearDown(self) -> None:
         del self.engine
 
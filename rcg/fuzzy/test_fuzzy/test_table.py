@@ -0,0 +1,118 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from rcg.exceptions import ConfigurationError
+from rcg.fuzzy.categories import Catchments, LandCover, LandForm
+from rcg.fuzzy.engine import FuzzyEngine, Prototype, get_default_fuzzy_engine
+from rcg.fuzzy.rule_engine import create_rule_engine, get_default_rule_engine
+from rcg.fuzzy.table import DEFAULT_TABLE_PATH, OUTPUTS, EngineTable, engine_fingerprint
+
+
+def engine_with_changed_rule():
+    """Default engine whose first rule yields another catchment class."""
+    default = get_default_rule_engine()
+    rule_engine = create_rule_engine(default._get_memberships())
+    rule_engine.rules = list(default.rules)
+    first = rule_engine.rules[0]
+    rule_engine.rules[0] = type(first)(first.name, first.conditions, {**first.consequences, "catchment": Catchments.urban})
+    rule_engine.build_rule_systems()
+    return FuzzyEngine(default._get_memberships(), rule_engine)
+
+
+class TestEngineTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = get_default_fuzzy_engine()
+        cls.table = EngineTable.compute([(2, 10), (8, 11), (2, 10)], engine=cls.engine)
+
+    def test_only_requested_pairs_are_computed(self):
+        self.assertEqual(self.table.computed.sum(), 2)
+        self.assertTrue(self.table.computed[1, 9])
+        self.assertTrue(self.table.computed[7, 10])
+
+    def test_lookup_matches_engine(self):
+        results = self.table.lookup(np.array([[2, 8], [8, 2]]), np.array([[10, 11], [11, 10]]))
+
+        self.assertEqual(results["impervious"].shape, (2, 2))
+        for form, cover, position in [(2, 10, (0, 0)), (8, 11, (0, 1))]:
+            expected = self.engine.compute_all(form, cover)
+            for name in ("slope", "impervious", "catchment"):
+                self.assertAlmostEqual(results[name][position], expected[name])
+        self.assertEqual(results["slope"][1, 0], results["slope"][0, 1])
+
+    def test_lookup_rejects_missing_and_invalid_pairs(self):
+        with self.assertRaises(ValueError):
+            self.table.lookup([3], [10])
+        with self.assertRaises(ValueError):
+            self.table.lookup([10], [10])
+        with self.assertRaises(ValueError):
+            self.table.lookup([2], [0])
+
+    def test_prototype_matches_inference(self):
+        tabulated = self.table.prototype(LandForm.flats_and_plateaus, LandCover.rural)
+        inferred = Prototype(LandForm.flats_and_plateaus, LandCover.rural, engine=self.engine)
+
+        self.assertAlmostEqual(tabulated.impervious_result, inferred.impervious_result)
+        self.assertAlmostEqual(tabulated.slope_result, inferred.slope_result)
+        self.assertEqual(
+            tabulated.get_linguistic(tabulated.catchment_result), inferred.get_linguistic(inferred.catchment_result)
+        )
+
+    def test_prototypes_are_keyed_by_enums(self):
+        prototypes = self.table.prototypes()
+
+        self.assertEqual(
+            set(prototypes), {(LandForm.flats_and_plateaus, LandCover.rural), (LandForm.mountains, LandCover.forests)}
+        )
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.table.save(Path(tmp) / "table.json")
+            loaded = EngineTable.load(path, engine=self.engine)
+
+        np.testing.assert_array_equal(loaded.computed, self.table.computed)
+        for name in OUTPUTS:
+            np.testing.assert_array_equal(loaded.values[name], self.table.values[name])
+        self.assertEqual(loaded.catchment_classes[1, 9], self.table.catchment_classes[1, 9])
+
+    def test_load_rejects_mismatched_categories(self):
+        data = self.table.to_dict()
+        data["land_covers"] = data["land_covers"][:-1]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "table.json"
+            path.write_text(json.dumps(data))
+            with self.assertRaises(ConfigurationError):
+                EngineTable.load(path, engine=self.engine)
+
+    def test_load_rejects_table_of_other_rules(self):
+        changed = engine_with_changed_rule()
+        self.assertNotEqual(engine_fingerprint(changed), engine_fingerprint(self.engine))
+
+        with self.assertRaises(ConfigurationError):
+            EngineTable.load(DEFAULT_TABLE_PATH, engine=changed)
+
+    def test_load_default_falls_back_when_rules_changed(self):
+        changed = engine_with_changed_rule()
+        with mock.patch("rcg.fuzzy.table.get_default_fuzzy_engine", return_value=changed):
+            with self.assertLogs("rcg.fuzzy.table", level="WARNING"):
+                table = EngineTable.load_default()
+
+        self.assertIs(table.engine, changed)
+        self.assertFalse(table.computed.any())
+
+    def test_shipped_table_matches_engine(self):
+        shipped = EngineTable.load(DEFAULT_TABLE_PATH, engine=self.engine)
+
+        self.assertTrue(shipped.computed.all())
+        for form, cover in [(2, 10), (8, 11)]:
+            for name in OUTPUTS:
+                self.assertAlmostEqual(shipped.values[name][form - 1, cover - 1], self.table.values[name][form - 1, cover - 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,305 @@
+"""
+Content-addressed, deduplicated backup store for INP files.
+
+A backup is a small JSON manifest listing the SHA-256 hashes of the chunks
+that make up the file. Chunks follow section boundaries (long sections are
+split every ``chunk_lines`` lines) and are stored once under
+``objects/<hash[:2]>/<hash>``, so unchanged sections are shared between all
+backups of a model and a new backup only writes the sections that changed.
+
+:meth:`BackupStore.save` and :meth:`BackupStore.collect_garbage` hold the
+store's ``store.lock``, so garbage collection never deletes a chunk that a
+backup being written by another process or thread already counts on.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from rcg import metrics
+from rcg.exceptions import BackupError
+from rcg.inp_manage.compression import (
+    compress_bytes,
+    compression_suffix,
+    decompress_bytes,
+    detect_compression,
+    inp_stem,
+    open_inp,
+)
+from rcg.inp_manage.locking import FileLock
+
+# Manifest format version
+MANIFEST_VERSION = 1
+
+# Maximum number of lines per chunk within a single section
+DEFAULT_CHUNK_LINES = 4096
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` through a temporary file and an atomic replace."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def iter_chunks(path: Union[str, Path], chunk_lines: int = DEFAULT_CHUNK_LINES) -> Iterator[bytes]:
+    """
+    Split a (possibly compressed) INP file into section-aligned chunks.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        INP file to read.
+    chunk_lines : int
+        Maximum number of lines per chunk.
+
+    Yields
+    ------
+    bytes
+        Consecutive chunks whose concatenation is the decompressed file.
+    """
+    lines: list[bytes] = []
+    with open_inp(path, "rb") as f:
+        for line in f:
+            if lines and (line.lstrip().startswith(b"[") or len(lines) >= chunk_lines):
+                yield b"".join(lines)
+                lines = []
+            lines.append(line)
+    if lines:
+        yield b"".join(lines)
+
+
+class BackupStore:
+    """
+    Deduplicating backup store rooted in a ``.rcg_backups`` directory.
+
+    Attributes
+    ----------
+    root : Path
+        Directory holding the manifests and the ``objects`` subdirectory.
+    compression : Optional[str]
+        Compression applied to newly stored chunks (``"gzip"``, ``"zstd"`` or None).
+    chunk_lines : int
+        Maximum number of lines per chunk.
+
+    Example
+    -------
+    >>> store = BackupStore(Path("models/.rcg_backups"), compression="gzip")
+    >>> manifest = store.save(Path("models/city.inp"))
+    >>> store.restore(manifest, Path("models/city.inp"))
+    """
+
+    def __init__(self, root: Path, compression: Optional[str] = None, chunk_lines: int = DEFAULT_CHUNK_LINES) -> None:
+        compression_suffix(compression)
+        self.root = Path(root)
+        self.compression = compression
+        self.chunk_lines = chunk_lines
+
+    @property
+    def objects_dir(self) -> Path:
+        """Directory holding the content-addressed chunks."""
+        return self.root / "objects"
+
+    def _lock(self) -> FileLock:
+        """Lock serializing writers of manifests and chunks with garbage collection."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        return FileLock(self.root / "store.lock")
+
+    def _object_path(self, digest: str, compression: Optional[str]) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}{compression_suffix(compression)}"
+
+    def _new_manifest_path(self, source: Path) -> Path:
+        stem = inp_stem(source)
+        while True:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            manifest_path = self.root / f"{stem}_backup_{timestamp}.json"
+            if not manifest_path.exists():
+                return manifest_path
+
+    def save(self, source: Union[str, Path]) -> Path:
+        """
+        Back up an INP file, storing only chunks that are not already present.
+
+        Parameters
+        ----------
+        source : Union[str, Path]
+            INP file to back up (plain or compressed).
+
+        Returns
+        -------
+        Path
+            Path to the new manifest.
+        """
+        source = Path(source)
+        with self._lock():
+            return self._save(source)
+
+    def _save(self, source: Path) -> Path:
+        file_hash = hashlib.sha256()
+        chunks = []
+        size = 0
+        written = 0
+        for chunk in iter_chunks(source, self.chunk_lines):
+            file_hash.update(chunk)
+            size += len(chunk)
+            digest = hashlib.sha256(chunk).hexdigest()
+            chunks.append(digest)
+
+            object_path = self._object_path(digest, self.compression)
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                data = compress_bytes(chunk, self.compression)
+                _atomic_write(object_path, data)
+                written += len(data)
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "source": source.name,
+            "created": datetime.now().isoformat(),
+            "compression": self.compression,
+            "size": size,
+            "sha256": file_hash.hexdigest(),
+            "chunks": chunks,
+        }
+        manifest_path = self._new_manifest_path(source)
+        data = json.dumps(manifest, indent=2).encode("utf-8")
+        _atomic_write(manifest_path, data)
+        metrics.BACKUP_SOURCE_BYTES.inc(size)
+        metrics.BACKUP_WRITTEN_BYTES.inc(written + len(data))
+        return manifest_path
+
+    def read_manifest(self, manifest_path: Union[str, Path]) -> dict:
+        """
+        Load a backup manifest.
+
+        Raises
+        ------
+        BackupError
+            If the manifest cannot be read or is not valid JSON.
+        """
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise BackupError(f"Cannot read backup manifest: {e}", backup_path=str(manifest_path)) from e
+
+    def restore(self, manifest_path: Union[str, Path], target: Union[str, Path]) -> None:
+        """
+        Rebuild an INP file from a manifest.
+
+        The chunks are streamed into a temporary file next to ``target``, which
+        is compressed according to the target suffix and replaces it atomically
+        once the content hash has been verified.
+
+        Parameters
+        ----------
+        manifest_path : Union[str, Path]
+            Manifest created by :meth:`save`.
+        target : Union[str, Path]
+            File to overwrite with the backed-up content.
+
+        Raises
+        ------
+        BackupError
+            If a chunk is missing or the restored content does not match the manifest.
+        """
+        manifest = self.read_manifest(manifest_path)
+        target = Path(target)
+        compression = manifest.get("compression")
+
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+        os.close(fd)
+        try:
+            file_hash = hashlib.sha256()
+            with open_inp(tmp_name, "wb", detect_compression(target)) as out:
+                for digest in manifest["chunks"]:
+                    object_path = self._object_path(digest, compression)
+                    try:
+                        chunk = decompress_bytes(object_path.read_bytes(), compression)
+                    except OSError as e:
+                        raise BackupError(f"Missing backup chunk: {digest}", backup_path=str(manifest_path)) from e
+                    file_hash.update(chunk)
+                    out.write(chunk)
+
+            if file_hash.hexdigest() != manifest["sha256"]:
+                raise BackupError("Restored content does not match the backup checksum", backup_path=str(manifest_path))
+            if target.exists():
+                shutil.copymode(target, tmp_name)
+            os.replace(tmp_name, target)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def list_manifests(self, source: Optional[Union[str, Path]] = None) -> list[Path]:
+        """
+        List manifests in the store, oldest first.
+
+        Parameters
+        ----------
+        source : Optional[Union[str, Path]]
+            Only list backups of this INP file.
+        """
+        if not self.root.exists():
+            return []
+        pattern = f"{inp_stem(source)}_backup_*.json" if source is not None else "*_backup_*.json"
+        return sorted(self.root.glob(pattern))
+
+    def delete(self, manifest_path: Union[str, Path], collect_garbage: bool = True) -> None:
+        """
+        Delete a manifest and, by default, every chunk no longer referenced.
+
+        Parameters
+        ----------
+        manifest_path : Union[str, Path]
+            Manifest to delete.
+        collect_garbage : bool
+            Whether to run :meth:`collect_garbage` afterwards.
+        """
+        Path(manifest_path).unlink(missing_ok=True)
+        if collect_garbage:
+            self.collect_garbage()
+
+    def collect_garbage(self) -> int:
+        """
+        Remove chunks that are not referenced by any manifest.
+
+        Runs under the store lock: a concurrent :meth:`save` either finished
+        its manifest before, or reuses and writes chunks after the collection.
+
+        Returns
+        -------
+        int
+            Number of chunk files removed.
+        """
+        if not self.objects_dir.exists():
+            return 0
+        with self._lock():
+            return self._collect_garbage()
+
+    def _collect_garbage(self) -> int:
+        referenced = set()
+        for manifest_path in self.list_manifests():
+            manifest = self.read_manifest(manifest_path)
+            referenced.update(self._object_path(digest, manifest.get("compression")) for digest in manifest["chunks"])
+
+        removed = 0
+        for object_path in self.objects_dir.glob("*/*"):
+            # Skip temporary files of writers that are still running
+            if object_path.name.startswith("."):
+                continue
+            if object_path not in referenced:
+                object_path.unlink()
+                removed += 1
+        return removed
@@ -0,0 +1,241 @@
+"""
+Checkpoints of resumable batch jobs.
+
+:meth:`rcg.inp_manage.inp.BuildCatchments.run_batch` adds subcatchments
+chunk by chunk. Before a chunk is written, its rows are appended to
+``.rcg_jobs/<model>.<job_id>.checkpoint.jsonl`` next to the INP file: the
+input offset of every row, a content hash of the row and the ID allocated to
+it. After the write, a commit record with the input offset reached and the
+state of the INP file follows.
+
+A rerun with the same job ID skips every row whose offset and content hash
+are logged and whose subcatchment is in the model. A crash at any point, even
+between a write and its commit record, therefore never writes a row twice,
+while rows whose subcatchment was lost (e.g. by restoring a backup) or whose
+input changed are applied again.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections.abc import Container, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from rcg.exceptions import CheckpointError
+from rcg.inp_manage.compression import inp_stem
+
+# Checkpoint format version
+CHECKPOINT_VERSION = 1
+
+# Directory next to the INP file holding the checkpoints of its batch jobs
+JOBS_DIR = ".rcg_jobs"
+
+# Rows added per chunk, i.e. per journaled write and checkpoint
+DEFAULT_CHUNK_ROWS = 1000
+
+_JOB_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+def _category_name(value: Any) -> str:
+    return value.name if hasattr(value, "name") else str(value)
+
+
+def row_key(offset: int, area: float, land_form: Any, land_cover: Any) -> int:
+    """
+    Content hash of one input row.
+
+    The offset is part of the hash, so identical rows at different positions
+    of the input are distinct subcatchments.
+
+    Returns
+    -------
+    int
+        64-bit BLAKE2b digest of the offset, area and category names.
+    """
+    text = f"{offset}|{float(area)!r}|{_category_name(land_form)}|{_category_name(land_cover)}"
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@dataclass
+class ResumeState:
+    """
+    What the checkpoint of a job says about its earlier runs.
+
+    Attributes
+    ----------
+    applied : Set[int]
+        Row keys whose subcatchment is in the model.
+    offset : int
+        Input rows consumed up to the last committed chunk.
+    chunks : int
+        Chunks recorded, committed or not.
+    lost : int
+        Logged rows whose subcatchment is no longer in the model.
+    file_state : Optional[Dict]
+        Size and modification time of the INP file after the last commit.
+    """
+
+    applied: set[int] = field(default_factory=set)
+    offset: int = 0
+    chunks: int = 0
+    lost: int = 0
+    file_state: Optional[dict] = None
+
+
+@dataclass
+class JobResult:
+    """
+    Outcome of one run of a batch job.
+
+    Attributes
+    ----------
+    job_id : str
+        Identifier of the job.
+    checkpoint_path : Path
+        Checkpoint file of the job.
+    names : List[str]
+        IDs of the subcatchments added by this run, in input order.
+    skipped : int
+        Input rows skipped because an earlier run already applied them.
+    chunks : int
+        Chunks written by this run.
+    resumed : bool
+        Whether an earlier run of the job had recorded chunks.
+    """
+
+    job_id: str
+    checkpoint_path: Path
+    names: list[str] = field(default_factory=list)
+    skipped: int = 0
+    chunks: int = 0
+    resumed: bool = False
+
+    @property
+    def added(self) -> int:
+        """Number of subcatchments added by this run."""
+        return len(self.names)
+
+
+class JobCheckpoint:
+    """
+    Append-only checkpoint log of one batch job.
+
+    Each record is flushed and fsynced before the call returns; a truncated
+    last line left by a crash during a write is ignored on load.
+
+    Attributes
+    ----------
+    path : Path
+        Checkpoint file.
+    job_id : str
+        Identifier of the job.
+
+    Example
+    -------
+    >>> checkpoint = JobCheckpoint.for_model(Path("models/city.inp"), "nightly-2026-05-04")
+    >>> state = checkpoint.load(existing_ids)
+    >>> checkpoint.record_chunk(state.chunks, offsets, keys, names)
+    >>> checkpoint.record_commit(state.chunks, offsets[-1] + 1, file_state(Path("models/city.inp")))
+    """
+
+    def __init__(self, path: Union[str, Path], job_id: str) -> None:
+        if not _JOB_ID.match(job_id):
+            raise ValueError(f"Invalid job ID: {job_id!r}. Use letters, digits, '_', '-' and '.'")
+        self.path = Path(path)
+        self.job_id = job_id
+
+    @classmethod
+    def for_model(cls, model_path: Union[str, Path], job_id: str) -> "JobCheckpoint":
+        """Checkpoint of ``job_id`` on the INP file ``model_path``."""
+        model_path = Path(model_path)
+        return cls(model_path.parent / JOBS_DIR / f"{inp_stem(model_path)}.{job_id}.checkpoint.jsonl", job_id)
+
+    def _records(self) -> list[dict]:
+        if not self.path.exists():
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.readlines()
+        records = []
+        for number, line in enumerate(lines, start=1):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                if number == len(lines) and not line.endswith("\n"):
+                    break
+                raise CheckpointError(
+                    f"Corrupted checkpoint record on line {number}: {e}", checkpoint_path=str(self.path)
+                ) from e
+        return records
+
+    def load(self, existing: Container[str]) -> ResumeState:
+        """
+        Read the checkpoint.
+
+        Parameters
+        ----------
+        existing : Container[str]
+            Subcatchment IDs currently in the model.
+
+        Returns
+        -------
+        ResumeState
+            Empty if the job has no checkpoint yet.
+
+        Raises
+        ------
+        CheckpointError
+            If a record cannot be parsed or the checkpoint belongs to another
+            job or format version.
+        """
+        state = ResumeState()
+        for record in self._records():
+            op = record.get("op")
+            if op == "job":
+                if record.get("version") != CHECKPOINT_VERSION or record.get("job_id") != self.job_id:
+                    raise CheckpointError(
+                        f"Checkpoint is for job {record.get('job_id')!r} version {record.get('version')}, "
+                        f"expected {self.job_id!r} version {CHECKPOINT_VERSION}",
+                        checkpoint_path=str(self.path),
+                    )
+            elif op == "chunk":
+                state.chunks = max(state.chunks, record["chunk"] + 1)
+                for _, key, name in record["rows"]:
+                    if name in existing:
+                        state.applied.add(int(key, 16))
+                    else:
+                        state.lost += 1
+            elif op == "commit":
+                state.offset = max(state.offset, record["offset"])
+                state.file_state = record["file"]
+        return state
+
+    def _append(self, record: dict) -> None:
+        """Durably append one record, starting the file with a job header."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = []
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            header = {"op": "job", "version": CHECKPOINT_VERSION, "job_id": self.job_id}
+            lines.append(json.dumps({**header, "created": datetime.now().isoformat()}))
+        lines.append(json.dumps(record))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_chunk(self, chunk: int, offsets: Sequence[int], keys: Sequence[int], names: Sequence[str]) -> None:
+        """Log the rows of a chunk and their IDs; call before the chunk is written."""
+        rows = [[offset, f"{key:016x}", name] for offset, key, name in zip(offsets, keys, names)]
+        self._append({"op": "chunk", "chunk": chunk, "rows": rows})
+
+    def record_commit(self, chunk: int, offset: int, state: dict) -> None:
+        """Log that a chunk reached the INP file, with the input offset and file state after it."""
+        self._append({"op": "commit", "chunk": chunk, "offset": offset, "file": state})
+
+    def remove(self) -> None:
+        """Delete the checkpoint, e.g. after the job finished."""
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,231 @@
+"""
+Transparent gzip/zstd support for SWMM INP files.
+
+Compressed models are recognised by their suffix (``.inp.gz`` or ``.inp.zst``).
+All helpers stream their data, so a compressed file is never fully loaded into
+memory. Zstandard support needs the optional ``zstandard`` package.
+
+swmmio itself only reads and writes plain-text paths, so
+:class:`rcg.inp_manage.inp.BuildCatchments` parses a decompressed working copy
+of a compressed model; see its documentation for the disk space this takes.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import IO, Optional, Union
+
+# Compression formats keyed by file suffix
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+# Suffixes accepted for SWMM input files
+INP_SUFFIXES = (".inp", ".inp.gz", ".inp.zst")
+
+# Buffer size used for streaming copies
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """
+    Return the compression format implied by the file suffix.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        File path to inspect.
+
+    Returns
+    -------
+    Optional[str]
+        ``"gzip"``, ``"zstd"`` or None for uncompressed files.
+    """
+    return COMPRESSION_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def compression_suffix(compression: Optional[str]) -> str:
+    """
+    Return the file suffix for a compression format.
+
+    Parameters
+    ----------
+    compression : Optional[str]
+        ``"gzip"``, ``"zstd"`` or None.
+
+    Returns
+    -------
+    str
+        ``".gz"``, ``".zst"`` or an empty string.
+
+    Raises
+    ------
+    ValueError
+        If the compression format is not supported.
+    """
+    if compression is None:
+        return ""
+    for suffix, name in COMPRESSION_SUFFIXES.items():
+        if name == compression:
+            return suffix
+    raise ValueError(f"Unsupported compression: {compression}. Must be one of: {', '.join(COMPRESSION_SUFFIXES.values())}")
+
+
+def is_inp_path(path: Union[str, Path]) -> bool:
+    """Check whether a path has a plain or compressed INP suffix (case-insensitive)."""
+    return Path(path).name.lower().endswith(INP_SUFFIXES)
+
+
+def inp_stem(path: Union[str, Path]) -> str:
+    """
+    Return the model name without the INP and compression suffixes.
+
+    Example
+    -------
+    >>> inp_stem("models/city.inp.gz")
+    'city'
+    """
+    name = Path(path).name
+    if detect_compression(name):
+        name = name[: -len(Path(name).suffix)]
+    if name.lower().endswith(".inp"):
+        name = name[:-4]
+    return name
+
+
+def _zstd_module():
+    """Import a Zstandard implementation, preferring the standard library (Python 3.14+)."""
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError as e:
+        raise ImportError("Reading or writing .zst files requires the 'zstandard' package: pip install zstandard") from e
+
+
+def compress_bytes(data: bytes, compression: Optional[str]) -> bytes:
+    """
+    Compress an in-memory payload.
+
+    Parameters
+    ----------
+    data : bytes
+        Payload to compress.
+    compression : Optional[str]
+        ``"gzip"``, ``"zstd"`` or None to return the data unchanged.
+
+    Returns
+    -------
+    bytes
+        Compressed payload.
+    """
+    if compression is None:
+        return data
+    if compression == "gzip":
+        return gzip.compress(data, mtime=0)
+    if compression == "zstd":
+        return _zstd_module().compress(data)
+    raise ValueError(f"Unsupported compression: {compression}. Must be one of: {', '.join(COMPRESSION_SUFFIXES.values())}")
+
+
+def decompress_bytes(data: bytes, compression: Optional[str]) -> bytes:
+    """
+    Decompress an in-memory payload produced by :func:`compress_bytes`.
+
+    Parameters
+    ----------
+    data : bytes
+        Compressed payload.
+    compression : Optional[str]
+        ``"gzip"``, ``"zstd"`` or None to return the data unchanged.
+
+    Returns
+    -------
+    bytes
+        Decompressed payload.
+    """
+    if compression is None:
+        return data
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return _zstd_module().decompress(data)
+    raise ValueError(f"Unsupported compression: {compression}. Must be one of: {', '.join(COMPRESSION_SUFFIXES.values())}")
+
+
+def open_inp(path: Union[str, Path], mode: str = "rb", compression: Optional[str] = "auto") -> IO:
+    """
+    Open a plain or compressed INP file as a stream.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        File path to open.
+    mode : str
+        File mode (``"rb"``, ``"wb"``, ``"ab"``, ``"rt"``, ``"wt"``, ``"at"``).
+    compression : Optional[str]
+        ``"gzip"``, ``"zstd"``, None for plain files, or ``"auto"`` (default)
+        to detect the format from the suffix.
+
+    Returns
+    -------
+    IO
+        A file object that transparently (de)compresses the data.
+    """
+    if compression == "auto":
+        compression = detect_compression(path)
+
+    encoding = "utf-8" if "t" in mode else None
+    if compression is None:
+        return open(path, mode, encoding=encoding)
+    if compression == "gzip":
+        return gzip.open(path, mode, encoding=encoding)
+    if compression == "zstd":
+        return _zstd_module().open(path, mode, encoding=encoding)
+    raise ValueError(f"Unsupported compression: {compression}. Must be one of: {', '.join(COMPRESSION_SUFFIXES.values())}")
+
+
+def copy_inp(source: Union[str, Path], destination: Union[str, Path]) -> Path:
+    """
+    Atomically copy an INP file, converting between compression formats.
+
+    The data is streamed through a temporary file next to ``destination``,
+    which then replaces it, so readers never see a partially written file.
+    Files with the same format are copied byte for byte.
+
+    Parameters
+    ----------
+    source : Union[str, Path]
+        File to read; its format is detected from the suffix.
+    destination : Union[str, Path]
+        File to write; its format is detected from the suffix.
+
+    Returns
+    -------
+    Path
+        The destination path.
+    """
+    source, destination = Path(source), Path(destination)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{destination.name}.", suffix=".tmp", dir=destination.parent)
+    os.close(fd)
+    try:
+        source_compression = detect_compression(source)
+        destination_compression = detect_compression(destination)
+        if source_compression == destination_compression:
+            shutil.copy2(source, tmp_name)
+        else:
+            with open_inp(source, "rb") as src, open_inp(tmp_name, "wb", destination_compression) as dst:
+                shutil.copyfileobj(src, dst, STREAM_BUFFER_SIZE)
+            shutil.copymode(source, tmp_name)
+        os.replace(tmp_name, destination)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return destination
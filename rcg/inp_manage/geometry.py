@@ -0,0 +1,252 @@
+"""
+Subcatchment polygons supplied by the user instead of generated squares.
+
+Polygons are read from GeoJSON, WKT or ragged NumPy arrays into a
+:class:`PolygonSet`: one ``(V, 2)`` vertex array plus ring offsets. Areas,
+centroids, bounding boxes and characteristic widths of all polygons are then
+computed with segment-wise NumPy reductions (``np.add.reduceat``) rather than
+a Python loop per polygon. Coordinates are expected in meters; Z and M
+values are dropped. A polygon is represented by its exterior ring, and a
+multipolygon by the exterior ring of its largest part, in every format.
+"""
+
+import json
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+# Square meters per hectare
+M2_PER_HA = 10_000
+
+# A ring with the opening parentheses before it; two or more open a polygon, i.e. its exterior ring
+_WKT_RING = re.compile(r"((?:\(\s*)+)([-+0-9.eE\s,]+?)\s*\)")
+
+
+@dataclass
+class PolygonSet:
+    """
+    Exterior rings of several polygons stored as one ragged array.
+
+    Attributes
+    ----------
+    vertices : np.ndarray
+        ``(V, 2)`` vertex coordinates of all rings, ring after ring, without
+        the closing vertex.
+    offsets : np.ndarray
+        ``(N + 1,)`` start of each ring in ``vertices`` followed by ``V``.
+    names : Optional[List[str]]
+        Polygon names, e.g. from GeoJSON feature ids, or None.
+
+    Raises
+    ------
+    ValueError
+        If a ring has fewer than three vertices or the arrays do not match.
+
+    Example
+    -------
+    >>> polygons = PolygonSet.from_rings([[(0, 0), (100, 0), (100, 50), (0, 50)]])
+    >>> polygons.areas_ha()
+    array([0.5])
+    """
+
+    vertices: np.ndarray
+    offsets: np.ndarray
+    names: Optional[list[str]] = None
+
+    def __post_init__(self) -> None:
+        self.vertices = np.asarray(self.vertices, dtype=float).reshape(-1, 2)
+        self.offsets = np.asarray(self.offsets, dtype=np.int64)
+        if self.offsets.ndim != 1 or len(self.offsets) == 0 or self.offsets[0] != 0 or self.offsets[-1] != len(self.vertices):
+            raise ValueError("offsets must start at 0 and end at the number of vertices")
+        if (np.diff(self.offsets) < 3).any():
+            raise ValueError("Every polygon needs at least three distinct vertices")
+        if self.names is not None and len(self.names) != len(self):
+            raise ValueError(f"Got {len(self.names)} names for {len(self)} polygons")
+
+    @classmethod
+    def from_rings(cls, rings: Sequence[Sequence[Sequence[float]]], names: Optional[list[str]] = None) -> "PolygonSet":
+        """
+        Build a set from one vertex sequence per polygon.
+
+        Closing vertices are dropped, and of vertices with three or more
+        values (Z, M) only x and y are kept.
+
+        Raises
+        ------
+        ValueError
+            If a vertex has fewer than two values or the vertices of a ring differ in length.
+        """
+        arrays = []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=float)
+            if ring.ndim != 2 or ring.shape[1] < 2:
+                raise ValueError(f"Every vertex needs x and y coordinates, got a ring of shape {ring.shape}")
+            ring = ring[:, :2]
+            if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                ring = ring[:-1]
+            arrays.append(ring)
+        offsets = np.concatenate([[0], np.cumsum([len(ring) for ring in arrays], dtype=np.int64)])
+        vertices = np.concatenate(arrays) if arrays else np.empty((0, 2))
+        return cls(vertices, offsets, names)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of vertices of each polygon."""
+        return np.diff(self.offsets)
+
+    def _cross(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vertex coordinates, next-vertex indices within each ring, and edge cross products."""
+        x, y = self.vertices[:, 0], self.vertices[:, 1]
+        following = np.arange(1, len(x) + 1)
+        following[self.offsets[1:] - 1] = self.offsets[:-1]
+        return x, following, x * y[following] - x[following] * y
+
+    def signed_areas(self) -> np.ndarray:
+        """Shoelace areas in square coordinate units, positive for counter-clockwise rings."""
+        if len(self) == 0:
+            return np.empty(0)
+        _, _, cross = self._cross()
+        return np.add.reduceat(cross, self.offsets[:-1]) / 2
+
+    def areas_ha(self) -> np.ndarray:
+        """Polygon areas in hectares."""
+        return np.abs(self.signed_areas()) / M2_PER_HA
+
+    def centroids(self) -> np.ndarray:
+        """
+        Area centroids of the polygons.
+
+        Raises
+        ------
+        ValueError
+            If a polygon has zero area.
+        """
+        if len(self) == 0:
+            return np.empty((0, 2))
+        x, following, cross = self._cross()
+        y = self.vertices[:, 1]
+        signed = np.add.reduceat(cross, self.offsets[:-1]) / 2
+        if (signed == 0).any():
+            raise ValueError("Polygons with zero area have no centroid")
+        cx = np.add.reduceat((x + x[following]) * cross, self.offsets[:-1]) / (6 * signed)
+        cy = np.add.reduceat((y + y[following]) * cross, self.offsets[:-1]) / (6 * signed)
+        return np.column_stack([cx, cy])
+
+    def bounds(self) -> np.ndarray:
+        """``(N, 4)`` bounding boxes as ``xmin, ymin, xmax, ymax``."""
+        if len(self) == 0:
+            return np.empty((0, 4))
+        starts = self.offsets[:-1]
+        lower = np.minimum.reduceat(self.vertices, starts, axis=0)
+        upper = np.maximum.reduceat(self.vertices, starts, axis=0)
+        return np.hstack([lower, upper])
+
+    def widths(self, flow_lengths: Optional[Sequence[float]] = None) -> np.ndarray:
+        """
+        Characteristic widths for SWMM (area divided by overland flow length).
+
+        Parameters
+        ----------
+        flow_lengths : Optional[Sequence[float]]
+            Flow length of each polygon in meters. By default it is twice the
+            longer side of the bounding box, which for a square gives the same
+            width as the synthetic squares of :class:`rcg.inp_manage.inp.BuildCatchments`.
+
+        Returns
+        -------
+        np.ndarray
+            Widths in meters.
+        """
+        if flow_lengths is None:
+            bounds = self.bounds()
+            flow_lengths = 2 * np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+        flow_lengths = np.asarray(flow_lengths, dtype=float)
+        if flow_lengths.shape != (len(self),) or (flow_lengths <= 0).any():
+            raise ValueError("flow_lengths must hold one positive value per polygon")
+        return np.abs(self.signed_areas()) / flow_lengths
+
+
+def _largest_ring(rings: Sequence[Sequence[Sequence[float]]]) -> Sequence[Sequence[float]]:
+    """Return the exterior ring enclosing the largest area, the one representing a multipolygon."""
+    areas = np.abs(PolygonSet.from_rings(rings).signed_areas())
+    return rings[int(np.argmax(areas))]
+
+
+def _exterior_ring(geometry: dict) -> list:
+    """Return the exterior ring of a GeoJSON Polygon, or of the largest part of a MultiPolygon."""
+    if geometry["type"] == "Polygon":
+        return geometry["coordinates"][0]
+    if geometry["type"] == "MultiPolygon":
+        return _largest_ring([part[0] for part in geometry["coordinates"]])
+    raise ValueError(f"Unsupported GeoJSON geometry type: {geometry['type']}")
+
+
+def read_geojson(source: Union[str, Path, dict]) -> PolygonSet:
+    """
+    Read polygons from a GeoJSON file or object.
+
+    Accepts a FeatureCollection, a Feature or a bare Polygon/MultiPolygon
+    geometry. Only exterior rings are used; of a MultiPolygon, its largest
+    part. Feature ``id`` values (or a ``name`` property) become polygon
+    names when every feature has one.
+
+    Parameters
+    ----------
+    source : Union[str, Path, dict]
+        Path to a GeoJSON file or an already parsed GeoJSON object.
+    """
+    if not isinstance(source, dict):
+        with open(source, encoding="utf-8") as f:
+            source = json.load(f)
+
+    if source["type"] == "FeatureCollection":
+        features = source["features"]
+    elif source["type"] == "Feature":
+        features = [source]
+    else:
+        features = [{"type": "Feature", "geometry": source, "properties": {}}]
+
+    rings = [_exterior_ring(feature["geometry"]) for feature in features]
+    names = [feature.get("id", (feature.get("properties") or {}).get("name")) for feature in features]
+    return PolygonSet.from_rings(rings, [str(name) for name in names] if all(name is not None for name in names) else None)
+
+
+def parse_wkt(geometries: Union[str, Sequence[str]], names: Optional[list[str]] = None) -> PolygonSet:
+    """
+    Parse ``POLYGON`` and ``MULTIPOLYGON`` WKT strings.
+
+    Only exterior rings are used: that of a polygon, or of the largest part
+    of a multipolygon, as in :func:`read_geojson`.
+
+    Parameters
+    ----------
+    geometries : Union[str, Sequence[str]]
+        One WKT string per polygon.
+    names : Optional[List[str]]
+        Polygon names.
+    """
+    if isinstance(geometries, str):
+        geometries = [geometries]
+    rings = []
+    for wkt in geometries:
+        # The type may be followed by a dimension, e.g. "POLYGON Z"
+        header = wkt.split("(", 1)[0].split()
+        kind = header[0].upper() if header else ""
+        if kind not in ("POLYGON", "MULTIPOLYGON"):
+            raise ValueError(f"Unsupported WKT geometry: {wkt[:40]}")
+        exteriors = [
+            [[float(value) for value in point.split()] for point in match.group(2).split(",")]
+            for match in _WKT_RING.finditer(wkt)
+            if match.group(1).count("(") >= 2
+        ]
+        if not exteriors:
+            raise ValueError(f"Invalid WKT polygon: {wkt[:40]}")
+        rings.append(exteriors[0] if kind == "POLYGON" else _largest_ring(exteriors))
+    return PolygonSet.from_rings(rings, names)
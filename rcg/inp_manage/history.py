@@ -0,0 +1,319 @@
+"""
+Reverse deltas and a persistent undo/redo journal for INP section edits.
+
+Every mutation of a model section is recorded as a :class:`SectionDelta`
+holding the rows of the touched elements before and after the change, so an
+edit can be undone or redone in time proportional to the change rather than
+to the size of the model. Deltas are grouped into :class:`HistoryEntry`
+objects (one per user-level operation) and appended to a JSON-lines journal,
+which lets a later session undo edits made before a crash.
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from rcg.exceptions import BackupError
+
+# Row values of one element; several rows per element are possible (e.g. polygon vertices)
+Rows = list[list]
+
+
+def json_default(value):
+    """Convert numpy scalars and other non-JSON values for ``json.dumps``."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def frame_rows(frame: pd.DataFrame, name: str) -> Optional[Rows]:
+    """
+    Extract the rows of one element from a section DataFrame.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Section DataFrame indexed by element name.
+    name : str
+        Element name.
+
+    Returns
+    -------
+    Optional[Rows]
+        Row values with missing values as None, or None if the element does not exist.
+    """
+    rows = frame[frame.index == name]
+    if rows.empty:
+        return None
+    return rows.astype(object).where(rows.notna(), None).values.tolist()
+
+
+def element_rows(frame: pd.DataFrame, names: Iterable[str]) -> dict[str, Optional[Rows]]:
+    """
+    Extract the rows of several elements in one pass over the section.
+
+    Equivalent to calling :func:`frame_rows` for each name, without scanning
+    the DataFrame once per element.
+    """
+    result: dict[str, Optional[Rows]] = dict.fromkeys(names)
+    rows = frame[frame.index.isin(list(result))]
+    if rows.empty:
+        return result
+    values = rows.astype(object).where(rows.notna(), None).values.tolist()
+    for name, row in zip(rows.index, values):
+        if result[name] is None:
+            result[name] = []
+        result[name].append(row)
+    return result
+
+
+@dataclass
+class SectionDelta:
+    """
+    Change of one INP section, reversible in both directions.
+
+    Attributes
+    ----------
+    section : str
+        Section header, e.g. ``"[SUBAREAS]"``.
+    attribute : str
+        Name of the section DataFrame on ``swmmio.Model.inp``, e.g. ``"subareas"``.
+    columns : List[str]
+        Column names of the stored rows.
+    index_name : Optional[str]
+        Index name of the section DataFrame.
+    before : Dict[str, Optional[Rows]]
+        Rows of each touched element before the change (None if it was added).
+    after : Dict[str, Optional[Rows]]
+        Rows of each touched element after the change (None if it was removed).
+    """
+
+    section: str
+    attribute: str
+    columns: list[str]
+    index_name: Optional[str] = None
+    before: dict[str, Optional[Rows]] = field(default_factory=dict)
+    after: dict[str, Optional[Rows]] = field(default_factory=dict)
+
+    def rename(self, renames: dict[str, str]) -> None:
+        """Rename touched elements in place, e.g. after another writer took their IDs."""
+        self.before = {renames.get(name, name): rows for name, rows in self.before.items()}
+        self.after = {renames.get(name, name): rows for name, rows in self.after.items()}
+
+    @property
+    def added(self) -> list[str]:
+        """Names of elements created by the change."""
+        return [name for name, rows in self.before.items() if rows is None]
+
+    @property
+    def changed(self) -> list[str]:
+        """Names of elements that existed before the change."""
+        return [name for name, rows in self.before.items() if rows is not None]
+
+    def rows_frame(self, state: str) -> Optional[pd.DataFrame]:
+        """
+        Build a DataFrame of the ``"before"`` or ``"after"`` rows.
+
+        Returns
+        -------
+        Optional[pd.DataFrame]
+            Rows of all touched elements in that state, or None if there are none.
+        """
+        names, values = [], []
+        for name, rows in getattr(self, state).items():
+            for row in rows or []:
+                names.append(name)
+                values.append(row)
+        if not values:
+            return None
+        frame = pd.DataFrame(values, columns=self.columns, index=names)
+        frame.index.name = self.index_name
+        return frame
+
+    def to_dict(self) -> dict:
+        """Serialize the delta to a JSON-compatible dictionary."""
+        return {
+            "section": self.section,
+            "attribute": self.attribute,
+            "columns": self.columns,
+            "index_name": self.index_name,
+            "before": self.before,
+            "after": self.after,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SectionDelta":
+        """Deserialize a delta created by :meth:`to_dict`."""
+        return cls(
+            section=data["section"],
+            attribute=data["attribute"],
+            columns=list(data["columns"]),
+            index_name=data.get("index_name"),
+            before=dict(data["before"]),
+            after=dict(data["after"]),
+        )
+
+
+@dataclass
+class HistoryEntry:
+    """
+    One undoable operation made of one or more section deltas.
+
+    Attributes
+    ----------
+    label : str
+        Human-readable description, e.g. ``"add_subcatchment S12"``.
+    deltas : List[SectionDelta]
+        Section changes in the order they were applied.
+    entry_id : str
+        Unique identifier used by the journal.
+    timestamp : float
+        Creation time as a POSIX timestamp.
+    """
+
+    label: str
+    deltas: list[SectionDelta]
+    entry_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    timestamp: float = field(default_factory=time.time)
+
+    def rename(self, renames: dict[str, str]) -> None:
+        """Rename the elements the label refers to, e.g. after another writer took their IDs."""
+        if renames:
+            self.label = "".join(renames.get(part, part) for part in re.split(r"(\s+|,|\.\.)", self.label))
+
+    def to_dict(self) -> dict:
+        """Serialize the entry to a JSON-compatible dictionary."""
+        return {
+            "id": self.entry_id,
+            "label": self.label,
+            "timestamp": self.timestamp,
+            "deltas": [delta.to_dict() for delta in self.deltas],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HistoryEntry":
+        """Deserialize an entry created by :meth:`to_dict`."""
+        return cls(
+            label=data["label"],
+            deltas=[SectionDelta.from_dict(delta) for delta in data["deltas"]],
+            entry_id=data["id"],
+            timestamp=data["timestamp"],
+        )
+
+
+class DeltaJournal:
+    """
+    Undo/redo stacks of history entries, optionally persisted as JSON lines.
+
+    The journal is append-only: applied entries are written as ``do`` records
+    and later undo and redo steps only reference them by id. Each
+    record is flushed and fsynced before the call returns, and loading the
+    file replays the records to rebuild both stacks.
+
+    Attributes
+    ----------
+    path : Optional[Path]
+        Journal file, or None to keep the history in memory only.
+    undo_stack : List[HistoryEntry]
+        Applied entries, oldest first.
+    redo_stack : List[HistoryEntry]
+        Undone entries, most recently undone last.
+
+    Example
+    -------
+    >>> journal = DeltaJournal(Path("models/.rcg_backups/city.journal.jsonl"))
+    >>> journal.record(entry)
+    >>> journal.undo()
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.undo_stack: list[HistoryEntry] = []
+        self.redo_stack: list[HistoryEntry] = []
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        """
+        Rebuild the stacks from the journal file.
+
+        Raises
+        ------
+        BackupError
+            If a complete record cannot be parsed. A truncated last line left
+            by a crash during a write is ignored.
+        """
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for number, line in enumerate(lines, start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                if number == len(lines) and not line.endswith("\n"):
+                    break
+                raise BackupError(f"Corrupted journal record on line {number}: {e}", backup_path=str(self.path)) from e
+
+            op = record["op"]
+            if op == "do":
+                self.undo_stack.append(HistoryEntry.from_dict(record["entry"]))
+                self.redo_stack.clear()
+            elif op == "undo":
+                self.redo_stack.append(self._pop(self.undo_stack, record["id"]))
+            elif op == "redo":
+                self.undo_stack.append(self._pop(self.redo_stack, record["id"]))
+
+    def _pop(self, stack: list[HistoryEntry], entry_id: str) -> HistoryEntry:
+        # Writers sharing a model append to the same journal, so entries may interleave
+        for position in range(len(stack) - 1, -1, -1):
+            if stack[position].entry_id == entry_id:
+                return stack.pop(position)
+        raise BackupError(f"Journal references unknown entry {entry_id}", backup_path=str(self.path))
+
+    def _append(self, record: dict) -> None:
+        """Durably append one record to the journal file."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=json_default) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, entry: HistoryEntry) -> None:
+        """Push an applied entry onto the undo stack and clear the redo stack."""
+        self._append({"op": "do", "entry": entry.to_dict()})
+        self.undo_stack.append(entry)
+        self.redo_stack.clear()
+
+    def undo(self) -> Optional[HistoryEntry]:
+        """Move the latest entry to the redo stack; the caller reverts its deltas."""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack[-1]
+        self._append({"op": "undo", "id": entry.entry_id})
+        self.redo_stack.append(self.undo_stack.pop())
+        return entry
+
+    def redo(self) -> Optional[HistoryEntry]:
+        """Move the latest undone entry back to the undo stack; the caller reapplies it."""
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack[-1]
+        self._append({"op": "redo", "id": entry.entry_id})
+        self.undo_stack.append(self.redo_stack.pop())
+        return entry
+
+    def clear(self) -> None:
+        """Forget all entries; the journal file is truncated."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
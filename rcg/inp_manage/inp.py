@@ -1,19 +1,44 @@
+import io
+import logging
 import math
 import shutil
-from collections.abc import Generator
-from contextlib import contextmanager
+import tempfile
+import weakref
+from collections.abc import Callable, Generator, Iterable, Mapping, Sequence, Sized
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass, field
-from datetime import datetime
 from pathlib import Path
 from types import TracebackType
 from typing import Optional, Union
 
+import numpy as np
 import pandas as pd
 import swmmio
-from swmmio.utils.modify_model import replace_inp_section
+from swmmio.utils.modify_model import write_inp_section
+from swmmio.utils.text import get_inp_sections_details
 
+from rcg import metrics
+from rcg.exceptions import ModelOperationError
 from rcg.fuzzy.categories import LandCover, LandForm
 from rcg.fuzzy.engine import Prototype
+from rcg.inp_manage.backup_store import BackupStore
+from rcg.inp_manage.checkpoint import DEFAULT_CHUNK_ROWS, JobCheckpoint, JobResult, row_key
+from rcg.inp_manage.compression import compression_suffix, copy_inp, detect_compression, inp_stem
+from rcg.inp_manage.geometry import PolygonSet
+from rcg.inp_manage.history import DeltaJournal, HistoryEntry, SectionDelta, element_rows
+from rcg.inp_manage.journal import WriteAheadJournal, file_state
+from rcg.inp_manage.layout import layout_squares, polygon_bounds
+from rcg.inp_manage.locking import FileLock, LockMetrics, WriteQueue
+from rcg.inp_manage.sections import SectionEdit
+from rcg.inp_manage.spatial import NodeIndex, OutletConstraints, PointIndex, read_gage_symbols
+from rcg.inp_manage.tracing import NULL_RECORDER, SpanRecorder
+from rcg.logging_config import get_logger
+from rcg.progress import CancellationToken, ProgressCallback, ProgressTracker
+
+logger = get_logger("inp_manage.inp")
+
+# Supported strategies for persisting section changes to the INP file
+WRITE_MODES = ("replace", "append")
 
 
 @dataclass
@@ -94,6 +119,31 @@ class ModelParameters:
         }
     )
 
+    def subarea_values(self, catchment_class: str) -> dict[str, Union[float, int]]:
+        """
+        ``[SUBAREAS]`` roughness and depression storage of a catchment class.
+
+        Parameters
+        ----------
+        catchment_class : str
+            Linguistic catchment class, e.g. ``"urban"``.
+
+        Returns
+        -------
+        Dict[str, Union[float, int]]
+            ``N-Imperv``, ``N-Perv``, ``S-Imperv`` and ``S-Perv`` (depression
+            storage converted from inches to mm) and ``PctZero``.
+        """
+        manning_coeffs = self.manning_coefficients[catchment_class]
+        depression_params = self.depression_storage[catchment_class]
+        return {
+            "N-Imperv": manning_coeffs[0],
+            "N-Perv": manning_coeffs[1],
+            "S-Imperv": depression_params[0] * 25.4,
+            "S-Perv": depression_params[1] * 25.4,
+            "PctZero": depression_params[2],
+        }
+
 
 class BuildCatchments:
     """
@@ -101,6 +151,14 @@ class BuildCatchments:
 
     Provides backup/restore functionality for safe file operations.
 
+    Compressed models (``.inp.gz``, ``.inp.zst``) are written in place through
+    the compression stream, but swmmio parses and saves only plain-text paths:
+    while a compressed model is open, its decompressed text is kept in a
+    private temporary directory, and :meth:`save` to a compressed path
+    compresses that working copy. Plan for temporary disk space of the
+    uncompressed size. The working copy is removed by :meth:`close`, on leaving a ``with`` block, or
+    when the instance is garbage collected.
+
     Attributes
     ----------
     file_path : Path
@@ -112,26 +170,108 @@ class BuildCatchments:
     backup_enabled : bool
         Whether automatic backups are enabled.
     backup_path : Optional[Path]
-        Path to the current backup file, if any.
+        Path to the manifest of the current backup, if any.
+    backup_store : BackupStore
+        Deduplicated backup store in the ``.rcg_backups`` directory next to the INP file.
+    write_mode : str
+        How section changes are written: ``"replace"`` regenerates the whole
+        section from the DataFrame, ``"append"`` inserts only the new rows and
+        copies existing lines verbatim.
+    compression : Optional[str]
+        Compression of the INP file (``"gzip"``, ``"zstd"`` or None).
+    backup_compression : Optional[str]
+        Compression applied to backup chunks; None keeps the format of the INP file.
+    history : DeltaJournal
+        Undo/redo stacks of reverse deltas. With backups enabled they are
+        journaled to ``.rcg_backups/<model>.journal.jsonl`` and reloaded on
+        the next start, so edits of an interrupted session can still be undone.
+    wal : WriteAheadJournal
+        Write-ahead journal through which every batch of section edits is
+        applied. A batch interrupted by a crash is replayed or discarded when
+        the model is opened again.
+    lock : Optional[FileLock]
+        Advisory lock on ``<model>.lock`` serializing writers in different
+        processes, or None if locking is disabled.
+    lock_metrics : LockMetrics
+        Lock contention and conflict counters of this instance.
+    recorder : SpanRecorder
+        Receiver of timing spans around each stage of an edit; a no-op by default.
     """
 
-    def __init__(self, file_path: str, backup: bool = True) -> None:
+    def __init__(
+        self,
+        file_path: str,
+        backup: bool = True,
+        write_mode: str = "replace",
+        backup_compression: Optional[str] = None,
+        locking: bool = True,
+        recorder: Optional[SpanRecorder] = None,
+    ) -> None:
         """
         Initialize with a SWMM model file.
 
         Parameters
         ----------
         file_path : str
-            Path to the SWMM input file.
+            Path to the SWMM input file (``.inp``, ``.inp.gz`` or ``.inp.zst``).
         backup : bool, optional
             Whether to enable automatic backups (default: True).
+        write_mode : str, optional
+            Either ``"replace"`` (default) or ``"append"``.
+        backup_compression : Optional[str], optional
+            Compress backups with ``"gzip"`` or ``"zstd"`` (default: same as the INP file).
+        locking : bool, optional
+            Coordinate writes with other processes editing the same file (default: True).
+        recorder : Optional[SpanRecorder], optional
+            Collect timing spans, e.g. a :class:`rcg.inp_manage.tracing.TimingRecorder`
+            (default: no tracing).
+
+        Raises
+        ------
+        ValueError
+            If ``write_mode`` or ``backup_compression`` is not supported.
         """
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f"Invalid write_mode: {write_mode}. Must be one of: {', '.join(WRITE_MODES)}")
+        compression_suffix(backup_compression)
+
         self.file_path = Path(file_path)
-        self.model: swmmio.Model = swmmio.Model(str(self.file_path))
+        self.recorder: SpanRecorder = recorder if recorder is not None else NULL_RECORDER
+        self.compression = detect_compression(self.file_path)
+        self._working_dir: Optional[Path] = None
+        self._remove_working_dir: Optional[weakref.finalize] = None
+        self.wal = WriteAheadJournal(self.file_path)
+        self.lock_metrics = LockMetrics()
+        self.lock = FileLock(self.file_path.with_name(f"{self.file_path.name}.lock"), self.lock_metrics) if locking else None
+        self.write_queue = WriteQueue(self.file_path.with_name(f"{self.file_path.name}.queue"))
+        self._file_signature: Optional[dict] = None
+        if self.lock is not None:
+            # Another process may be applying its journal right now
+            with self.lock:
+                self.wal.recover()
+        else:
+            self.wal.recover()
+        self.model: swmmio.Model = self._load_model()
         self.parameters = ModelParameters()
         self.backup_enabled = backup
         self.backup_path: Optional[Path] = None
         self._backup_history: list[Path] = []
+        self.write_mode = write_mode
+        self.backup_compression = backup_compression
+        self.backup_store = BackupStore(
+            self.file_path.parent / ".rcg_backups", compression=backup_compression or self.compression
+        )
+        journal_path = self.backup_store.root / f"{inp_stem(self.file_path)}.journal.jsonl" if backup else None
+        self.history = DeltaJournal(journal_path)
+        self._section_details: Optional[dict] = None
+        self._node_index: Optional[NodeIndex] = None
+        self._gage_index: Optional[PointIndex] = None
+        # Deltas of the running operation, and deltas/entries of the batch not yet written
+        self._pending_deltas: Optional[list[SectionDelta]] = None
+        self._unwritten: Optional[list[SectionDelta]] = None
+        self._unrecorded: list[HistoryEntry] = []
+        # New elements of the last written batch that were renamed because another writer took their IDs
+        self._renames: dict[str, str] = {}
 
     def __enter__(self) -> "BuildCatchments":
         if self.backup_enabled:
@@ -139,27 +279,88 @@ class BuildCatchments:
         return self
 
     def __exit__(self, exc_type: Optional[type], exc_val: Optional[BaseException], exc_tb: Optional[TracebackType]) -> None:
+        self.close()
         if exc_type is not None:
-            print(f"Error occurred: {exc_val}")
+            logger.error("Error occurred: %s", exc_val)
             if self.backup_enabled and self.backup_path:
-                print(f"Backup available at: {self.backup_path}")
+                logger.info("Backup available at: %s", self.backup_path)
+
+    def close(self) -> None:
+        """
+        Remove the plain-text working copy of a compressed model.
+
+        Nothing to do for plain INP files. Afterwards the sections swmmio has
+        not read yet are gone, so a compressed model must not be edited again.
+        """
+        if self._remove_working_dir is not None:
+            self._remove_working_dir()
+            self._remove_working_dir = None
+            self._working_dir = None
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Timings of the stages recorded so far.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            ``count``, ``total_s``, ``mean_s`` and ``max_s`` per span name
+            (``load_model``, ``prototype``, ``get_linguistic``,
+            ``apply_rows[SUBCATCHMENTS]``, ``write``, ...); empty unless a
+            recording ``recorder`` was given.
+        """
+        return self.recorder.stats()
+
+    def _load_model(self) -> swmmio.Model:
+        """
+        Parse the INP file with swmmio.
+
+        swmmio re-reads sections lazily from a plain-text path and cannot take
+        a stream, so a compressed INP is streamed into a private working copy
+        that is parsed instead; it lives until :meth:`close`.
+        The file signature is recorded first, so a concurrent change is always
+        detected as a conflict later.
+        """
+        with self.recorder.span("load_model"):
+            self._file_signature = file_state(self.file_path)
+            metrics.INP_READ_BYTES.inc(self._file_signature["size"])
+            if self.compression is None:
+                return swmmio.Model(str(self.file_path))
+
+            if self._working_dir is None:
+                self._working_dir = Path(tempfile.mkdtemp(prefix="rcg_"))
+                self._remove_working_dir = weakref.finalize(self, shutil.rmtree, str(self._working_dir), True)
+
+            working_path = self._working_dir / f"{inp_stem(self.file_path)}.inp"
+            copy_inp(self.file_path, working_path)
+            return swmmio.Model(str(working_path))
+
+    def _reload(self) -> None:
+        """Reload the model after another writer changed the file."""
+        self.model = self._load_model()
+        self._section_details = None
+        self._node_index = None
+        self._gage_index = None
+        self.lock_metrics.reloads += 1
+
+    def _refresh_if_changed(self) -> None:
+        """Reload the model if another writer changed the file since it was loaded."""
+        if self.lock is not None and file_state(self.file_path) != self._file_signature:
+            self._reload()
 
     def _create_backup(self) -> Path:
         """
         Create a timestamped backup of the current INP file.
 
+        Only sections that are not yet in the backup store are written; the
+        backup itself is a small manifest referencing the stored chunks.
+
         Returns
         -------
         Path
-            Path to the created backup file.
+            Path to the created backup manifest.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{self.file_path.stem}_backup_{timestamp}{self.file_path.suffix}"
-        backup_dir = self.file_path.parent / ".rcg_backups"
-        backup_dir.mkdir(exist_ok=True)
-
-        self.backup_path = backup_dir / backup_name
-        shutil.copy2(self.file_path, self.backup_path)
+        self.backup_path = self.backup_store.save(self.file_path)
         self._backup_history.append(self.backup_path)
 
         return self.backup_path
@@ -168,15 +369,20 @@ class BuildCatchments:
         """
         Restore the INP file from a backup.
 
+        The undo/redo history no longer matches the restored file and is cleared.
+
         Parameters
         ----------
         backup_path : Optional[Path]
-            Path to the backup file to restore. If None, uses the most recent backup.
+            Path to the backup manifest (or a full-copy backup from earlier
+            versions) to restore. If None, uses the most recent backup.
 
         Raises
         ------
         FileNotFoundError
             If no backup is available or the specified backup doesn't exist.
+        BackupError
+            If the backup store is missing chunks or they fail verification.
         """
         restore_from = backup_path or self.backup_path
 
@@ -186,24 +392,41 @@ class BuildCatchments:
         if not restore_from.exists():
             raise FileNotFoundError(f"Backup file not found: {restore_from}")
 
-        shutil.copy2(restore_from, self.file_path)
+        if restore_from.suffix == ".json":
+            self.backup_store.restore(restore_from, self.file_path)
+        else:
+            copy_inp(restore_from, self.file_path)
         # Reload the model after restoration
-        self.model = swmmio.Model(str(self.file_path))
+        self.model = self._load_model()
+        self._section_details = None
+        self._node_index = None
+        self._gage_index = None
+        self.history.clear()
 
-    def get_backup_history(self) -> list[Path]:
+    def get_backup_history(self) -> list[Union[Path, HistoryEntry]]:
         """
-        Get list of all backup files created during this session.
+        Get the backups and the undoable edits, oldest first.
 
         Returns
         -------
-        List[Path]
-            List of paths to backup files.
+        List[Union[Path, HistoryEntry]]
+            Backup manifests created during this session and the history
+            entries on the undo stack (each listing its section deltas), in
+            chronological order.
         """
-        return self._backup_history.copy()
+
+        def created(item: Union[Path, HistoryEntry]) -> float:
+            if isinstance(item, HistoryEntry):
+                return item.timestamp
+            return item.stat().st_mtime if item.exists() else 0.0
+
+        return sorted([*self._backup_history, *self.history.undo_stack], key=created)
 
     def cleanup_backups(self, keep_latest: int = 1) -> int:
         """
-        Remove old backup files, keeping only the specified number of latest backups.
+        Remove old backups, keeping only the specified number of latest backups.
+
+        Chunks that are no longer referenced by any manifest are deleted as well.
 
         Parameters
         ----------
@@ -213,21 +436,26 @@ class BuildCatchments:
         Returns
         -------
         int
-            Number of backup files removed.
+            Number of backups removed.
         """
         if not self._backup_history:
             return 0
 
-        # Sort by modification time (newest first)
-        sorted_backups = sorted(self._backup_history, key=lambda p: p.stat().st_mtime if p.exists() else 0, reverse=True)
+        # History is in creation order, so the newest backups are at the end
+        sorted_backups = list(reversed(self._backup_history))
 
         removed_count = 0
         for backup in sorted_backups[keep_latest:]:
             if backup.exists():
-                backup.unlink()
+                if backup.suffix == ".json":
+                    self.backup_store.delete(backup, collect_garbage=False)
+                else:
+                    backup.unlink()
                 removed_count += 1
                 self._backup_history.remove(backup)
 
+        if removed_count:
+            self.backup_store.collect_garbage()
         return removed_count
 
     @contextmanager
@@ -235,7 +463,10 @@ class BuildCatchments:
         """
         Context manager for atomic operations on the INP file.
 
-        Creates a backup before operations and restores it if an exception occurs.
+        Edits made inside the block only change the in-memory model. They are
+        written to the file as one journaled batch when the block completes,
+        or reverted from their reverse deltas if an exception occurs, in which
+        case the file is never touched.
 
         Example
         -------
@@ -243,33 +474,431 @@ class BuildCatchments:
         ...     builder.add_subcatchment(10.0, "flats_and_plateaus", "urban_moderately_impervious")
         ...     # If this fails, the file will be restored to its original state
         """
-        backup = self._create_backup()
+        if self._unwritten is not None:
+            yield
+            return
+
+        self._refresh_if_changed()
+        self._unwritten = []
+        self._renames = {}
         try:
             yield
         except Exception:
-            # Restore on any error
-            self.restore_backup(backup)
+            self._revert_rows(self._unwritten)
             raise
+        finally:
+            deltas, self._unwritten = self._unwritten, None
+            entries, self._unrecorded = self._unrecorded, []
+        self._commit(deltas, entries)
+
+    def undo(self) -> Optional[HistoryEntry]:
+        """
+        Revert the most recent edit.
+
+        Returns
+        -------
+        Optional[HistoryEntry]
+            The reverted entry, or None if there is nothing to undo.
+
+        Raises
+        ------
+        ModelOperationError
+            If called inside a transaction.
+        """
+        self._check_not_batching("undo")
+        if not self.history.undo_stack:
+            return None
+        deltas = self.history.undo_stack[-1].deltas
+        self._revert_rows(deltas)
+        try:
+            self._persist(deltas, present="after")
+        except BaseException:
+            self._restore_rows(deltas)
+            raise
+        return self.history.undo()
+
+    def redo(self) -> Optional[HistoryEntry]:
+        """
+        Reapply the most recently undone edit.
+
+        Returns
+        -------
+        Optional[HistoryEntry]
+            The reapplied entry, or None if there is nothing to redo.
+
+        Raises
+        ------
+        ModelOperationError
+            If called inside a transaction.
+        """
+        self._check_not_batching("redo")
+        if not self.history.redo_stack:
+            return None
+        deltas = self.history.redo_stack[-1].deltas
+        self._restore_rows(deltas)
+        try:
+            self._persist(deltas, present="before")
+        except BaseException:
+            self._revert_rows(deltas)
+            raise
+        return self.history.redo()
+
+    def _check_not_batching(self, operation: str) -> None:
+        if self._unwritten is not None:
+            raise ModelOperationError(f"{operation}() is not available inside a transaction", operation=operation)
+
+    @contextmanager
+    def _operation(self, label: str) -> Generator[HistoryEntry, None, None]:
+        """
+        Group the section changes made inside the block into one history entry.
+
+        The changes are written as one batch at the end of the block (or of the
+        enclosing transaction). If the block fails, they are reverted in memory
+        and never reach the file. The model is reloaded first if another writer
+        changed the file, so new IDs must be allocated inside the block; the
+        yielded entry lets the caller name it after them.
+        """
+        entry = HistoryEntry(label, [])
+        if self._pending_deltas is not None:
+            yield entry
+            return
+
+        owns_batch = self._unwritten is None
+        if owns_batch:
+            self._refresh_if_changed()
+            self._unwritten = []
+            self._renames = {}
+        self._pending_deltas = []
+        try:
+            yield entry
+        except BaseException:
+            self._revert_rows(self._pending_deltas)
+            del self._unwritten[len(self._unwritten) - len(self._pending_deltas) :]
+            raise
+        finally:
+            deltas, self._pending_deltas = self._pending_deltas, None
+            if owns_batch:
+                unwritten, self._unwritten = self._unwritten, None
+
+        entry.deltas = deltas
+        entries = [entry] if deltas else []
+        if owns_batch:
+            self._commit(unwritten, entries)
+        else:
+            self._unrecorded.extend(entries)
 
     def save(self, output_path: Optional[Path] = None) -> None:
         """
         Save the modified model to the specified path or original file.
 
+        swmmio only writes plain text to a path. A compressed model brings the
+        sections into its working copy and streams that into the compressed
+        file; a plain model saved to a compressed path is staged once in a
+        temporary directory instead.
+
         Args:
             output_path: Path to save (defaults to self.file_path)
         """
-        save_path = output_path or self.file_path
-        self.model.inp.save(str(save_path))
-        print(f"Model saved to {save_path}")  # Or use logging
+        save_path = Path(output_path or self.file_path)
+        if detect_compression(save_path) is None:
+            self.model.inp.save(str(save_path))
+        elif self._working_dir is not None:
+            self.model.inp.save()
+            copy_inp(self.model.inp.path, save_path)
+        else:
+            with tempfile.TemporaryDirectory(prefix="rcg_save_") as tempdir:
+                plain_path = Path(tempdir) / f"{inp_stem(save_path)}.inp"
+                self.model.inp.save(str(plain_path))
+                copy_inp(plain_path, save_path)
+        logger.info("Model saved to %s", save_path)
+
+    def _set_rows(self, attribute: str, names: Iterable[str], rows: Optional[pd.DataFrame]) -> None:
+        """Replace the rows of ``names`` in a section DataFrame; ``rows=None`` removes them."""
+        frame = getattr(self.model.inp, attribute)
+        index_name = frame.index.name
+        kept = frame[~frame.index.isin(list(names))]
+        if rows is None or rows.empty:
+            updated = kept
+        elif kept.empty:
+            updated = rows.copy()
+        else:
+            updated = pd.concat([kept, rows])
+        if index_name is not None:
+            updated.index.name = index_name
+        setattr(self.model.inp, attribute, updated)
 
-    def _get_new_subcatchment_id(self, counter: int = 1) -> str:
-        """Generate a unique subcatchment ID."""
+    def _apply_rows(self, section_header: str, attribute: str, names: list[str], rows: pd.DataFrame) -> None:
+        """
+        Set the rows of the ``names`` elements in a section.
+
+        The previous rows are kept in a reverse delta. Inside an operation or a
+        transaction the write is deferred to the end of the batch; otherwise
+        the change is written and recorded immediately.
+        """
+        with self.recorder.span(f"apply_rows{section_header}", rows=len(rows)):
+            before = element_rows(getattr(self.model.inp, attribute), names)
+            self._set_rows(attribute, names, rows)
+            frame = getattr(self.model.inp, attribute)
+            delta = SectionDelta(
+                section=section_header,
+                attribute=attribute,
+                columns=[str(column) for column in frame.columns],
+                index_name=frame.index.name,
+                before=before,
+                after=element_rows(frame, names),
+            )
+        entry_label = f"update {attribute} {', '.join(names)}"
+
+        if self._unwritten is None:
+            self._commit([delta], [HistoryEntry(entry_label, [delta])])
+            return
+        self._unwritten.append(delta)
+        if self._pending_deltas is not None:
+            self._pending_deltas.append(delta)
+        else:
+            self._unrecorded.append(HistoryEntry(entry_label, [delta]))
+
+    def _revert_rows(self, deltas: list[SectionDelta]) -> None:
+        """Set the in-memory rows back to their state before ``deltas``, newest first."""
+        for delta in reversed(deltas):
+            self._set_rows(delta.attribute, delta.before, delta.rows_frame("before"))
+
+    def _restore_rows(self, deltas: list[SectionDelta]) -> None:
+        """Set the in-memory rows to their state after ``deltas``, oldest first."""
+        for delta in deltas:
+            self._set_rows(delta.attribute, delta.after, delta.rows_frame("after"))
+
+    def _commit(self, deltas: list[SectionDelta], entries: list[HistoryEntry]) -> None:
+        """Write a batch of applied deltas, then record its history entries."""
+        if deltas:
+            try:
+                with self.recorder.span("persist", deltas=len(deltas)):
+                    self._persist(deltas, present="before")
+            except BaseException:
+                self._revert_rows(deltas)
+                raise
+        with self.recorder.span("record_history"):
+            for entry in entries:
+                entry.rename(self._renames)
+                self.history.record(entry)
+
+    def _renamed(self, names: list[str]) -> list[str]:
+        """Final IDs of new elements after the last write, which may have renamed them."""
+        return [self._renames.get(name, name) for name in names]
+
+    def _replacement_text(self, section_header: str, attribute: str) -> str:
+        """Format a whole section from its DataFrame the way swmmio does."""
+        with self.recorder.span(f"format_section{section_header}"):
+            if self._section_details is None:
+                self._section_details = get_inp_sections_details(self.model.inp.path)
+            buffer = io.StringIO()
+            write_inp_section(buffer, self._section_details, section_header, getattr(self.model.inp, attribute), pad_top=False)
+            return buffer.getvalue()
+
+    def _persist(self, deltas: list[SectionDelta], present: str) -> None:
+        """
+        Write ``deltas`` under the cross-process lock.
+
+        ``present`` names the side of the deltas the file is in before the
+        write. If the lock is taken, the batch is queued first so that the
+        current holder can write it together with its own. New elements whose
+        IDs another writer took meanwhile are renamed in ``deltas`` and
+        recorded in ``_renames``.
+        """
+        self._renames = {}
+        if self.lock is None:
+            self._write_deltas(deltas, present)
+            return
+        if self.lock.locked:
+            # The caller already holds the lock, so its new IDs cannot be taken meanwhile
+            self._write_locked(deltas, present, None)
+            return
+
+        ticket = None
+        if not self.lock.acquire(blocking=False):
+            ticket = self.write_queue.submit({"present": present, "deltas": [delta.to_dict() for delta in deltas]})
+            self.lock.acquire()
+        try:
+            self._write_locked(deltas, present, ticket)
+        finally:
+            self.lock.release()
+
+    def _write_locked(self, deltas: list[SectionDelta], present: str, ticket: Optional[str]) -> None:
+        """Write a batch while holding the lock, coalescing queued batches of other writers."""
+        recovered = self.wal.recover()
+        conflict = recovered is not None or file_state(self.file_path) != self._file_signature
+        queued = self.write_queue.pending()
+
+        if ticket is not None and all(queued_ticket != ticket for queued_ticket, _ in queued):
+            # Another writer already wrote this batch while we were waiting
+            result = self.write_queue.take_result(ticket)
+            self._reload()
+            self._apply_batch_result(deltas, present, result)
+            self.lock_metrics.batches_delegated += 1
+            return
+
+        others = [(queued_ticket, batch) for queued_ticket, batch in queued if queued_ticket != ticket]
+        if not conflict and not others:
+            self._write_deltas(deltas, present)
+        else:
+            self.lock_metrics.conflicts += int(conflict)
+            self._write_coalesced(deltas, present, others)
+        if ticket is not None:
+            self.write_queue.discard(ticket)
+        self.lock_metrics.batches_written += 1 + len(others)
+        self.lock_metrics.batches_coalesced += len(others)
+
+    def _write_coalesced(self, deltas: list[SectionDelta], present: str, others: list[tuple[str, dict]]) -> None:
+        """
+        Rebase this batch and the queued ones onto the current file and write them at once.
+
+        The model is reloaded, every batch is applied on top of it in order
+        (renaming new elements whose IDs another writer took meanwhile), and
+        all touched sections are written in one journaled pass.
+        """
+        self._reload()
+        existing = {}
+        batches = [(None, deltas, present)]
+        batches += [
+            (ticket, [SectionDelta.from_dict(d) for d in batch["deltas"]], batch["present"]) for ticket, batch in others
+        ]
+
+        results = {}
+        for ticket, batch_deltas, batch_present in batches:
+            for delta in batch_deltas:
+                if delta.section not in existing:
+                    existing[delta.section] = set(getattr(self.model.inp, delta.attribute).index)
+            result = self._rebase(batch_deltas, batch_present)
+            if ticket is None:
+                self._renames.update(result["renames"])
+            else:
+                results[ticket] = result
+
+        touched = self._touched_sections([delta for _, batch_deltas, _ in batches for delta in batch_deltas], existing)
+
+        def complete_queued() -> None:
+            for ticket, result in results.items():
+                self.write_queue.complete(ticket, result)
+
+        try:
+            self._commit_edits(touched, on_logged=complete_queued)
+        except Exception as e:
+            # The waiting writers must not assume their batches were written
+            for ticket in results:
+                self.write_queue.complete(ticket, {"error": str(e)})
+            self._reload()
+            raise
+
+    def _rebase(self, deltas: list[SectionDelta], present: str) -> dict:
+        """
+        Apply a batch on top of the freshly loaded model.
+
+        Returns
+        -------
+        dict
+            ``renames`` of new elements and the ``before`` rows each delta now
+            replaces, for the writer that submitted the batch.
+        """
+        target = "after" if present == "before" else "before"
+        new_names = [
+            name
+            for delta in deltas
+            for name, rows in getattr(delta, present).items()
+            if rows is None and getattr(delta, target)[name] is not None
+        ]
+        taken = set(self.model.inp.subcatchments.index)
+        for delta in deltas:
+            taken.update(getattr(self.model.inp, delta.attribute).index)
+
+        renames = {}
+        for name in dict.fromkeys(new_names):
+            if name in taken:
+                renames[name] = self._get_new_subcatchment_id(reserved=taken)
+                taken.add(renames[name])
+        self.lock_metrics.renamed_ids += len(renames)
+
+        result = {"renames": renames, "before": []}
+        for delta in deltas:
+            delta.rename(renames)
+            frame = getattr(self.model.inp, delta.attribute)
+            fresh = element_rows(frame, getattr(delta, target))
+            if present == "before":
+                delta.before = fresh
+            result["before"].append(fresh)
+            self._set_rows(delta.attribute, getattr(delta, target), delta.rows_frame(target))
+        return result
+
+    def _apply_batch_result(self, deltas: list[SectionDelta], present: str, result: dict) -> None:
+        """Update a batch written by another writer with its renames and replaced rows."""
+        for delta, fresh in zip(deltas, result["before"]):
+            delta.rename(result["renames"])
+            if present == "before":
+                delta.before = fresh
+        self._renames.update(result["renames"])
+        self.lock_metrics.renamed_ids += len(result["renames"])
+
+    def _touched_sections(self, deltas: list[SectionDelta], existing: dict[str, set]) -> dict[str, tuple[str, set, set]]:
+        """Map each touched section to its attribute, touched names and names to remove from the file."""
+        touched: dict[str, tuple[str, set, set]] = {}
+        for delta in deltas:
+            _, names, drop = touched.setdefault(delta.section, (delta.attribute, set(), set()))
+            names.update(delta.before)
+            drop.update(name for name in delta.before if name in existing[delta.section])
+        return touched
+
+    def _write_deltas(self, deltas: list[SectionDelta], present: str) -> None:
+        """Write the current rows of every element touched by ``deltas``; the file is on the ``present`` side."""
+        existing = {}
+        for delta in deltas:
+            state = getattr(delta, present)
+            existing.setdefault(delta.section, set()).update(name for name, rows in state.items() if rows is not None)
+        self._commit_edits(self._touched_sections(deltas, existing))
+
+    def _commit_edits(self, touched: dict[str, tuple[str, set, set]], on_logged: Optional[Callable[[], None]] = None) -> None:
+        """
+        Write the current rows of the touched elements as one batch.
+
+        In append mode the lines of touched elements still in the file are
+        removed and their current rows are appended; all other lines are kept
+        verbatim. Otherwise each touched section is regenerated. Either way
+        the edits of all sections go through the write-ahead journal and a
+        single atomic replace.
+        """
+        edits = []
+        for section_header, (attribute, names, drop) in touched.items():
+            metrics.SECTION_REWRITES.inc(section=section_header, mode=self.write_mode)
+            if self.write_mode == "append":
+                frame = getattr(self.model.inp, attribute)
+                edits.append(SectionEdit(section_header, frame[frame.index.isin(list(names))], frozenset(drop)))
+            else:
+                edits.append(SectionEdit(section_header, replacement=self._replacement_text(section_header, attribute)))
+
+        working_path = Path(self.model.inp.path) if self.compression is not None else None
+        with self.recorder.span("write", sections=len(edits)):
+            self.wal.commit(edits, working_path, on_logged)
+        self._file_signature = file_state(self.file_path)
+        metrics.INP_WRITTEN_BYTES.inc(self._file_signature["size"])
+
+    def _get_new_subcatchment_id(self, counter: int = 1, reserved: Optional[set] = None) -> str:
+        """Generate a unique subcatchment ID, also avoiding the ``reserved`` names."""
         while True:
             name = f"S{len(self.model.inp.subcatchments) + counter}"
-            if name not in self.model.inp.subcatchments.index:
+            if name not in self.model.inp.subcatchments.index and (reserved is None or name not in reserved):
                 return name
             counter += 1
 
+    def _get_new_subcatchment_ids(self, count: int) -> list[str]:
+        """Generate ``count`` unique subcatchment IDs in one pass."""
+        existing = set(self.model.inp.subcatchments.index)
+        names = []
+        counter = len(existing) + 1
+        while len(names) < count:
+            name = f"S{counter}"
+            if name not in existing:
+                names.append(name)
+            counter += 1
+        return names
+
     def _add_timeseries(self) -> None:
         """Add a predefined time series to the model."""
         timeseries = pd.DataFrame(
@@ -310,6 +939,22 @@ class BuildCatchments:
             self._add_raingage()
         return self.model.inp.raingages.index[0]
 
+    def _get_raingages(self, centroids: np.ndarray) -> list[str]:
+        """
+        Get the raingage nearest to each subcatchment centroid (Thiessen assignment).
+
+        Gages are located by their ``[SYMBOLS]`` entry; the index is built on
+        first use and kept until the model is reloaded. Without positioned
+        gages every subcatchment gets :meth:`_get_raingage`.
+        """
+        if self._gage_index is None:
+            symbols = read_gage_symbols(self.model.inp.path)
+            self._gage_index = PointIndex.from_frame(symbols[symbols.index.isin(self.model.inp.raingages.index.astype(str))])
+        if len(self._gage_index) == 0:
+            return [self._get_raingage()] * len(centroids)
+        names, _ = self._gage_index.query(centroids)
+        return list(names)
+
     def _get_outlet(self, subcatchment_id: str) -> str:
         """Get the outlet (last outfall or junction, or self)."""
         if len(self.model.inp.outfalls) > 0:
@@ -318,87 +963,464 @@ class BuildCatchments:
             return self.model.inp.junctions.index[-1]
         return subcatchment_id
 
-    def _add_subcatchment(self, config: SubcatchmentConfig) -> None:
-        """Add a new subcatchment to the model."""
-        outlet = self._get_outlet(config.subcatchment_id)
-        width = round((config.area * 10_000) / (2 * math.sqrt(config.area * 10_000)), 2)
-
-        subcatchment_data = {
-            "Raingage": self._get_raingage(),
-            "Outlet": outlet,
-            "Area": config.area,
-            "PercImperv": round(config.prototype.impervious_result, 2),
-            "Width": width,
-            "PercSlope": round(config.prototype.slope_result, 2),
-            "CurbLength": 0,
-        }
+    def _get_outlets(
+        self, subcatchment_ids: list[str], centroids: np.ndarray, constraints: Optional[OutletConstraints] = None
+    ) -> list[str]:
+        """
+        Get the nearest eligible node to each subcatchment centroid.
 
-        self.model.inp.subcatchments.loc[config.subcatchment_id] = subcatchment_data
-        replace_inp_section(self.model.inp.path, "[SUBCATCHMENTS]", self.model.inp.subcatchments)
+        The node index is built on first use and kept until the model is
+        reloaded. Without constraints, subcatchments of a model without node
+        coordinates fall back to :meth:`_get_outlet`.
 
-    def _add_subarea(self, config: SubcatchmentConfig) -> None:
-        """Add a new subarea to the model."""
-        populate_key = config.prototype.get_linguistic(config.prototype.catchment_result)
-        manning_coeffs = self.parameters.manning_coefficients[populate_key]
-        depression_params = self.parameters.depression_storage[populate_key]
+        Raises
+        ------
+        ModelOperationError
+            If no node satisfies ``constraints``.
+        """
+        if self._node_index is None:
+            self._node_index = NodeIndex.from_model(self.model.inp)
+        outlets = self._node_index.nearest(centroids, constraints)
+        if constraints is not None and len(outlets) and outlets[0] is None:
+            raise ModelOperationError(f"No node satisfies the outlet constraints: {constraints}", operation="add_subcatchment")
+        return [
+            outlet if outlet is not None else self._get_outlet(subcatchment_id)
+            for subcatchment_id, outlet in zip(subcatchment_ids, outlets)
+        ]
 
-        subarea_data = {
-            "N-Imperv": manning_coeffs[0],
-            "N-Perv": manning_coeffs[1],
-            "S-Imperv": depression_params[0] * 25.4,
-            "S-Perv": depression_params[1] * 25.4,
-            "PctZero": depression_params[2],
-            "RouteTo": "OUTLET",
-        }
+    def _layout_polygons(self, configs: list[SubcatchmentConfig]) -> tuple[pd.DataFrame, np.ndarray]:
+        """
+        Lay out square polygons for new subcatchments.
 
-        self.model.inp.subareas.loc[config.subcatchment_id] = subarea_data
-        replace_inp_section(self.model.inp.path, "[SUBAREAS]", self.model.inp.subareas)
+        The squares are packed into the free space closest to the node nearest
+        to the last polygon vertex (or to that vertex in a model without node
+        coordinates), without overlapping each other or existing polygons.
 
-    def _add_coords(self, config: SubcatchmentConfig) -> None:
-        """Add coordinates for a square-shaped subcatchment."""
-        side_length = math.sqrt(config.area * 10000)
-        base_x, base_y = (
-            (0, 0)
-            if len(self.model.inp.polygons) == 0
-            else (self.model.inp.polygons["X"].iloc[-1], self.model.inp.polygons["Y"].iloc[-1])
-        )
+        Returns
+        -------
+        Tuple[pd.DataFrame, np.ndarray]
+            Polygon vertices (four per subcatchment) and the ``(N, 2)`` centroids.
+        """
+        sides = np.sqrt(np.array([config.area for config in configs], dtype=float) * 10_000)
+        polygons = self.model.inp.polygons
+        anchor = (0.0, 0.0) if len(polygons) == 0 else (float(polygons["X"].iloc[-1]), float(polygons["Y"].iloc[-1]))
+        if self._node_index is None:
+            self._node_index = NodeIndex.from_model(self.model.inp)
+        if len(self._node_index):
+            (node,) = self._node_index.nearest(np.array([anchor]))
+            anchor = tuple(self._node_index.nodes.loc[node, ["X", "Y"]].astype(float))
 
-        coords = pd.DataFrame(
-            {
-                "X": [base_x, base_x + side_length, base_x + side_length, base_x],
-                "Y": [base_y, base_y, base_y - side_length, base_y - side_length],
-            },
-            index=[config.subcatchment_id] * 4,
-        )
+        vertices, centroids = layout_squares(sides, polygon_bounds(polygons), anchor)
+        coords = pd.DataFrame(vertices, columns=["X", "Y"], index=np.repeat([config.subcatchment_id for config in configs], 4))
         coords.index.names = ["Name"]
-        self.model.inp.polygons = pd.concat([self.model.inp.polygons, coords])
-        replace_inp_section(self.model.inp.path, "[POLYGONS]", self.model.inp.polygons)
+        return coords, centroids
+
+    def _subcatchment_rows(
+        self,
+        configs: list[SubcatchmentConfig],
+        outlets: list[str],
+        raingages: list[str],
+        widths: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        Build the ``[SUBCATCHMENTS]`` rows of new subcatchments.
+
+        Without ``widths`` each subcatchment is taken to be a square whose
+        flow length is twice its side.
+        """
+        if widths is None:
+            widths = [(config.area * 10_000) / (2 * math.sqrt(config.area * 10_000)) for config in configs]
+        rows = []
+        for config, raingage, width in zip(configs, raingages, widths):
+            rows.append(
+                {
+                    "Raingage": raingage,
+                    "Area": config.area,
+                    "PercImperv": round(config.prototype.impervious_result, 2),
+                    "Width": round(float(width), 2),
+                    "PercSlope": round(config.prototype.slope_result, 2),
+                    "CurbLength": 0,
+                }
+            )
+        subcatchments = pd.DataFrame(rows, index=[config.subcatchment_id for config in configs])
+        subcatchments.insert(1, "Outlet", outlets)
+        return subcatchments
+
+    def _subarea_rows(self, configs: list[SubcatchmentConfig]) -> pd.DataFrame:
+        """Build the ``[SUBAREAS]`` rows of new subcatchments."""
+        rows = []
+        # Subcatchments of the same land form and land cover share their prototype
+        classes: dict[int, str] = {}
+        for config in configs:
+            populate_key = classes.get(id(config.prototype))
+            if populate_key is None:
+                with self.recorder.span("get_linguistic"):
+                    populate_key = config.prototype.get_linguistic(config.prototype.catchment_result)
+                classes[id(config.prototype)] = populate_key
+            rows.append({**self.parameters.subarea_values(populate_key), "RouteTo": "OUTLET"})
+        return pd.DataFrame(rows, index=[config.subcatchment_id for config in configs])
+
+    def _infiltration_rows(self, configs: list[SubcatchmentConfig]) -> pd.DataFrame:
+        """Build the ``[INFILTRATION]`` rows of new subcatchments."""
+        infiltration = pd.DataFrame(
+            [self.parameters.infiltration_defaults] * len(configs), index=[config.subcatchment_id for config in configs]
+        )
+        infiltration.index.names = ["Subcatchment"]
+        return infiltration
+
+    def _add_subcatchment(self, config: SubcatchmentConfig, outlet_constraints: Optional[OutletConstraints] = None) -> None:
+        """Add a new subcatchment draining to the node and using the raingage nearest to its centroid."""
+        _, centroids = self._layout_polygons([config])
+        outlets = self._get_outlets([config.subcatchment_id], centroids, outlet_constraints)
+        subcatchment = self._subcatchment_rows([config], outlets, self._get_raingages(centroids))
+        self._apply_rows("[SUBCATCHMENTS]", "subcatchments", [config.subcatchment_id], subcatchment)
+
+    def _add_subarea(self, config: SubcatchmentConfig) -> None:
+        """Add a new subarea to the model."""
+        self._apply_rows("[SUBAREAS]", "subareas", [config.subcatchment_id], self._subarea_rows([config]))
+
+    def _add_coords(self, config: SubcatchmentConfig) -> None:
+        """Add coordinates for a square-shaped subcatchment placed in free space."""
+        coords, _ = self._layout_polygons([config])
+        self._apply_rows("[POLYGONS]", "polygons", [config.subcatchment_id], coords)
 
     def _add_infiltration(self, config: SubcatchmentConfig) -> None:
         """Add infiltration parameters for the subcatchment."""
-        infiltration_parameters = self.parameters.infiltration_defaults
-        self.model.inp.infiltration.loc[config.subcatchment_id] = infiltration_parameters
-        self.model.inp.infiltration.index.names = ["Subcatchment"]
-        replace_inp_section(self.model.inp.path, "[INFILTRATION]", self.model.inp.infiltration)
+        self._apply_rows("[INFILTRATION]", "infiltration", [config.subcatchment_id], self._infiltration_rows([config]))
+
+    def _add_new_subcatchments(
+        self,
+        specs: Iterable[tuple[float, Union[str, LandForm], Union[str, LandCover]]],
+        outlet_constraints: Optional[OutletConstraints] = None,
+        polygons: Optional[PolygonSet] = None,
+        flow_lengths: Optional[Sequence[float]] = None,
+        prototypes: Optional[Mapping[tuple[LandForm, LandCover], Prototype]] = None,
+    ) -> list[str]:
+        """
+        Add subcatchments with one change per section; must run inside an operation.
+
+        Fuzzy prototypes are computed once per land form and land cover pair,
+        and all outlets and raingages are found with one batch query of the
+        node and gage indexes. With ``polygons`` (one per spec) their vertices,
+        centroids and widths are used instead of laying out squares, and their
+        names, if any, become the subcatchment IDs. ``prototypes`` computed in
+        advance (e.g. from :class:`rcg.fuzzy.table.EngineTable`) are reused.
+        """
+        prototypes = dict(prototypes or {})
+        configs = []
+        for area, land_form, land_cover in specs:
+            # Convert to Enum for Prototype (already validated in CLI/runner)
+            land_form_enum = land_form if isinstance(land_form, LandForm) else getattr(LandForm, land_form)
+            land_cover_enum = land_cover if isinstance(land_cover, LandCover) else getattr(LandCover, land_cover)
+            config = SubcatchmentConfig(area=area, land_form=land_form_enum, land_cover=land_cover_enum)
+            key = (land_form_enum, land_cover_enum)
+            if key not in prototypes:
+                with self.recorder.span("prototype", land_form=land_form_enum.name, land_cover=land_cover_enum.name):
+                    prototypes[key] = Prototype(land_form=land_form_enum, land_cover=land_cover_enum)
+            config.prototype = prototypes[key]
+            configs.append(config)
+        if not configs:
+            return []
+
+        with self.recorder.span("allocate_ids", count=len(configs)):
+            if polygons is not None and polygons.names is not None:
+                names = [str(name) for name in polygons.names]
+                taken = set(self.model.inp.subcatchments.index.astype(str))
+                if len(set(names)) != len(names) or taken.intersection(names):
+                    raise ValueError("Polygon names must be unique and not used by existing subcatchments")
+            else:
+                names = self._get_new_subcatchment_ids(len(configs))
+        for config, name in zip(configs, names):
+            config.subcatchment_id = name
 
-    def add_subcatchment(self, area: float, land_form: Union[str, LandForm], land_cover: Union[str, LandCover]) -> None:
+        widths = None
+        with self.recorder.span("layout"):
+            if polygons is None:
+                coords, centroids = self._layout_polygons(configs)
+            else:
+                centroids = polygons.centroids()
+                widths = polygons.widths(flow_lengths)
+                coords = pd.DataFrame(polygons.vertices, columns=["X", "Y"], index=np.repeat(names, polygons.counts))
+                coords.index.names = ["Name"]
+        with self.recorder.span("assign_outlets"):
+            outlets = self._get_outlets(names, centroids, outlet_constraints)
+            raingages = self._get_raingages(centroids)
+        subcatchments = self._subcatchment_rows(configs, outlets, raingages, widths)
+        self._apply_rows("[SUBCATCHMENTS]", "subcatchments", names, subcatchments)
+        self._apply_rows("[SUBAREAS]", "subareas", names, self._subarea_rows(configs))
+        self._apply_rows("[POLYGONS]", "polygons", names, coords)
+        self._apply_rows("[INFILTRATION]", "infiltration", names, self._infiltration_rows(configs))
+        # One record per row only when someone listens; otherwise a single level check
+        if logger.isEnabledFor(logging.DEBUG):
+            for config, outlet in zip(configs, outlets):
+                logger.debug(
+                    "Prepared subcatchment %s",
+                    config.subcatchment_id,
+                    extra={
+                        "subcatchment": config.subcatchment_id,
+                        "area": config.area,
+                        "land_form": config.land_form.name,
+                        "land_cover": config.land_cover.name,
+                        "outlet": outlet,
+                    },
+                )
+        return names
+
+    def add_subcatchment(
+        self,
+        area: float,
+        land_form: Union[str, LandForm],
+        land_cover: Union[str, LandCover],
+        outlet_constraints: Optional[OutletConstraints] = None,
+    ) -> str:
         """
         Add a new subcatchment to the model (for CLI/GUI use).
 
+        The subcatchment drains to the junction or outfall nearest to its
+        centroid and takes rainfall from the nearest raingage.
+
         Args:
             area: Subcatchment area in hectares
             land_form: Land form type as string or LandForm enum
             land_cover: Land cover type as string or LandCover enum
+            outlet_constraints: Restrictions on the node type or invert of the outlet
+
+        Returns:
+            ID of the new subcatchment
+        """
+        with self.recorder.span("add_subcatchment"), self._operation("add_subcatchment") as entry:
+            (name,) = self._add_new_subcatchments([(area, land_form, land_cover)], outlet_constraints)
+            entry.label = f"add_subcatchment {name}"
+        return self._renamed([name])[0]
+
+    def add_subcatchments(
+        self,
+        specs: Iterable[tuple[float, Union[str, LandForm], Union[str, LandCover]]],
+        outlet_constraints: Optional[OutletConstraints] = None,
+        prototypes: Optional[Mapping[tuple[LandForm, LandCover], Prototype]] = None,
+    ) -> list[str]:
         """
-        # Convert to Enum for Prototype (already validated in CLI/runner)
-        land_form_enum = getattr(LandForm, land_form)
-        land_cover_enum = getattr(LandCover, land_cover)
+        Add many subcatchments as one undoable batch.
 
-        config = SubcatchmentConfig(area=area, land_form=land_form_enum, land_cover=land_cover_enum)
-        config.subcatchment_id = self._get_new_subcatchment_id()
-        config.prototype = Prototype(land_form=land_form_enum, land_cover=land_cover_enum)
+        Outlets and raingages are assigned by proximity as in
+        :meth:`add_subcatchment`, with a single index query for the whole batch.
 
-        self._add_subcatchment(config)
-        self._add_subarea(config)
-        self._add_coords(config)
-        self._add_infiltration(config)
+        Parameters
+        ----------
+        specs : Iterable[Tuple[float, Union[str, LandForm], Union[str, LandCover]]]
+            Area in hectares, land form and land cover of each subcatchment.
+        outlet_constraints : Optional[OutletConstraints]
+            Restrictions on the node type or invert of the outlets.
+        prototypes : Optional[Mapping[Tuple[LandForm, LandCover], Prototype]]
+            Precomputed prototypes keyed by land form and land cover, e.g.
+            :meth:`rcg.fuzzy.table.EngineTable.prototypes`; other pairs are inferred.
+
+        Returns
+        -------
+        List[str]
+            IDs of the new subcatchments, in the order of ``specs``.
+        """
+        with self.recorder.span("add_subcatchments"), self._operation("add_subcatchments") as entry:
+            names = self._add_new_subcatchments(specs, outlet_constraints, prototypes=prototypes)
+            if names:
+                entry.label = f"add_subcatchments {names[0]}..{names[-1]} ({len(names)})"
+        return self._renamed(names)
+
+    def add_subcatchments_from_polygons(
+        self,
+        polygons: Union[PolygonSet, Sequence[np.ndarray]],
+        land_forms: Union[str, LandForm, Sequence[Union[str, LandForm]]],
+        land_covers: Union[str, LandCover, Sequence[Union[str, LandCover]]],
+        flow_lengths: Optional[Sequence[float]] = None,
+        outlet_constraints: Optional[OutletConstraints] = None,
+        prototypes: Optional[Mapping[tuple[LandForm, LandCover], Prototype]] = None,
+    ) -> list[str]:
+        """
+        Add delineated subcatchments from their polygons as one undoable batch.
+
+        Areas (shoelace formula), centroids and characteristic widths are
+        computed from the vertices for all polygons at once, and the vertices
+        are written to ``[POLYGONS]`` unchanged. Outlets and raingages are
+        assigned by proximity of the centroids as in :meth:`add_subcatchments`.
+
+        Parameters
+        ----------
+        polygons : Union[PolygonSet, Sequence[np.ndarray]]
+            Polygons in model coordinates (meters), e.g. from
+            :func:`rcg.inp_manage.geometry.read_geojson` or
+            :func:`rcg.inp_manage.geometry.parse_wkt`, or one ``(V, 2)`` vertex
+            array per polygon. Polygon names become the subcatchment IDs.
+        land_forms : Union[str, LandForm, Sequence[Union[str, LandForm]]]
+            Land form of every polygon, or one per polygon.
+        land_covers : Union[str, LandCover, Sequence[Union[str, LandCover]]]
+            Land cover of every polygon, or one per polygon.
+        flow_lengths : Optional[Sequence[float]]
+            Overland flow length of each polygon in meters; see :meth:`PolygonSet.widths`.
+        outlet_constraints : Optional[OutletConstraints]
+            Restrictions on the node type or invert of the outlets.
+        prototypes : Optional[Mapping[Tuple[LandForm, LandCover], Prototype]]
+            Precomputed prototypes keyed by land form and land cover; other pairs are inferred.
+
+        Returns
+        -------
+        List[str]
+            IDs of the new subcatchments, in polygon order.
+
+        Raises
+        ------
+        ValueError
+            If a polygon is degenerate, the categories do not match the number
+            of polygons, or a polygon name is already taken.
+        """
+        if not isinstance(polygons, PolygonSet):
+            polygons = PolygonSet.from_rings(polygons)
+        if isinstance(land_forms, (str, LandForm)):
+            land_forms = [land_forms] * len(polygons)
+        if isinstance(land_covers, (str, LandCover)):
+            land_covers = [land_covers] * len(polygons)
+        if not len(land_forms) == len(land_covers) == len(polygons):
+            raise ValueError(
+                f"Expected {len(polygons)} land forms and land covers, got {len(land_forms)} and {len(land_covers)}"
+            )
+
+        specs = zip(np.round(polygons.areas_ha(), 4).tolist(), land_forms, land_covers)
+        with self.recorder.span("add_subcatchments_from_polygons"), self._operation("add_subcatchments") as entry:
+            names = self._add_new_subcatchments(specs, outlet_constraints, polygons, flow_lengths, prototypes)
+            if names:
+                entry.label = f"add_subcatchments {names[0]}..{names[-1]} ({len(names)})"
+        return self._renamed(names)
+
+    def run_batch(
+        self,
+        specs: Iterable[tuple[float, Union[str, LandForm], Union[str, LandCover]]],
+        job_id: str,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        outlet_constraints: Optional[OutletConstraints] = None,
+        prototypes: Optional[Mapping[tuple[LandForm, LandCover], Prototype]] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancellationToken] = None,
+        total: Optional[int] = None,
+    ) -> JobResult:
+        """
+        Add subcatchments in chunks, resuming an earlier run of the same job.
+
+        Every chunk of ``chunk_rows`` rows is one undoable, journaled write,
+        and is recorded in the checkpoint of the job (see
+        :mod:`rcg.inp_manage.checkpoint`) before and after it is written.
+        Rows that an earlier run already added to the model are recognised by
+        their offset and content hash and skipped, so a rerun after a crash
+        continues where the last run stopped without adding any row twice.
+        ``specs`` is consumed lazily and may be a generator over a large file.
+
+        ``progress`` is called after every committed chunk and ``cancel`` is
+        checked before every chunk is written. A cancelled run rolls the
+        chunk in progress back in memory, raises
+        :class:`rcg.exceptions.OperationCancelled` and can be resumed later.
+
+        Parameters
+        ----------
+        specs : Iterable[Tuple[float, Union[str, LandForm], Union[str, LandCover]]]
+            Area in hectares, land form and land cover of each subcatchment.
+        job_id : str
+            Identifier of the job; reruns must use the same ID and input.
+        chunk_rows : int, optional
+            Rows per chunk (default: 1000).
+        outlet_constraints : Optional[OutletConstraints]
+            Restrictions on the node type or invert of the outlets.
+        prototypes : Optional[Mapping[Tuple[LandForm, LandCover], Prototype]]
+            Precomputed prototypes keyed by land form and land cover.
+        progress : Optional[ProgressCallback]
+            Receiver of a :class:`rcg.progress.ProgressReport` after every chunk.
+        cancel : Optional[CancellationToken]
+            Token checked between chunks.
+        total : Optional[int]
+            Number of rows in ``specs``, for the ETA; defaults to ``len(specs)`` if it has one.
+
+        Returns
+        -------
+        JobResult
+            IDs added by this run and the number of skipped rows and written chunks.
+
+        Raises
+        ------
+        ModelOperationError
+            If called inside a transaction, where chunks could not be committed one by one.
+        CheckpointError
+            If the checkpoint of the job cannot be read.
+        OperationCancelled
+            If ``cancel`` was cancelled; committed chunks are kept.
+        """
+        self._check_not_batching("run_batch")
+        if chunk_rows < 1:
+            raise ValueError(f"chunk_rows must be positive, got: {chunk_rows}")
+        checkpoint = JobCheckpoint.for_model(self.file_path, job_id)
+        self._refresh_if_changed()
+        state = checkpoint.load(set(self.model.inp.subcatchments.index.astype(str)))
+        if state.chunks:
+            logger.info(
+                "Resuming job %s after %d chunk(s): %d row(s) applied, %d lost",
+                job_id,
+                state.chunks,
+                len(state.applied),
+                state.lost,
+            )
+        result = JobResult(job_id, checkpoint.path, resumed=state.chunks > 0)
+        if total is None and isinstance(specs, Sized):
+            total = len(specs)
+        tracker = ProgressTracker(progress, total)
+
+        def write(chunk: list[tuple[int, int, tuple]], done: int) -> None:
+            number = state.chunks + result.chunks
+            self._run_batch_chunk(checkpoint, number, chunk, outlet_constraints, prototypes, result, cancel, tracker)
+            tracker.update(done)
+
+        chunk: list[tuple[int, int, tuple]] = []
+        done = 0
+        for offset, spec in enumerate(specs):
+            done = offset + 1
+            key = row_key(offset, *spec)
+            if key in state.applied:
+                result.skipped += 1
+                continue
+            chunk.append((offset, key, spec))
+            if len(chunk) == chunk_rows:
+                write(chunk, done)
+                chunk = []
+        if chunk:
+            write(chunk, done)
+        elif done > tracker.done:
+            tracker.update(done)
+        return result
+
+    def _run_batch_chunk(
+        self,
+        checkpoint: JobCheckpoint,
+        number: int,
+        chunk: list[tuple[int, int, tuple]],
+        outlet_constraints: Optional[OutletConstraints],
+        prototypes: Optional[Mapping[tuple[LandForm, LandCover], Prototype]],
+        result: JobResult,
+        cancel: Optional[CancellationToken],
+        tracker: ProgressTracker,
+    ) -> None:
+        """
+        Write one chunk of a batch job, logging its rows before and its commit after the write.
+
+        The lock is held from ID allocation to the write, so the names logged
+        in the checkpoint are the ones written and no other writer can take them.
+        """
+        offsets = [offset for offset, _, _ in chunk]
+        if cancel is not None:
+            cancel.raise_if_cancelled(tracker.done)
+        lock = self.lock if self.lock is not None else nullcontext()
+        with lock, self.recorder.span("run_batch_chunk", rows=len(chunk)), self._operation("add_subcatchments") as entry:
+            names = self._add_new_subcatchments([spec for _, _, spec in chunk], outlet_constraints, prototypes=prototypes)
+            entry.label = f"{checkpoint.job_id} chunk {number}: add_subcatchments {names[0]}..{names[-1]} ({len(names)})"
+            # Last chance to stop: raising here reverts the rows in memory before anything is written
+            if cancel is not None:
+                cancel.raise_if_cancelled(tracker.done)
+            # Logged before the write, so a crash right after it cannot cause duplicates
+            checkpoint.record_chunk(number, offsets, [key for _, key, _ in chunk], names)
+        checkpoint.record_commit(number, offsets[-1] + 1, file_state(self.file_path))
+        result.names.extend(names)
+        result.chunks += 1
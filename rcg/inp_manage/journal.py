@@ -0,0 +1,204 @@
+"""
+Write-ahead journal for crash-safe multi-section edits.
+
+A batch of section edits is first written to ``<model>.wal`` next to the INP
+file, together with the size and modification time of the file it applies
+to. The edits are then applied in one streaming pass that ends with an atomic
+replace, and the journal is removed. If the process dies in between, the next
+open finds the leftover journal: when the INP file still has the recorded
+state the batch never reached it and is replayed, otherwise it was already
+applied and the journal is discarded.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import pandas as pd
+
+from rcg.inp_manage.compression import copy_inp, detect_compression, inp_stem
+from rcg.inp_manage.history import json_default
+from rcg.inp_manage.sections import SectionEdit, apply_section_edits
+from rcg.logging_config import get_logger
+
+logger = get_logger("inp_manage.journal")
+
+# Journal format version
+WAL_VERSION = 1
+
+
+def file_state(path: Union[str, Path]) -> dict:
+    """Return the size and modification time used to recognise a file version."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _fsync_directory(path: Path) -> None:
+    """Flush a directory entry change to disk where the platform supports it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def edit_to_dict(edit: SectionEdit) -> dict:
+    """Serialize a section edit to a JSON-compatible dictionary."""
+    data = {"section": edit.section_header, "drop": sorted(edit.drop), "replacement": edit.replacement, "rows": None}
+    if edit.new_data is not None:
+        frame = edit.new_data.astype(object)
+        data["rows"] = {
+            "index": [str(name) for name in frame.index],
+            "columns": [str(column) for column in frame.columns],
+            "values": frame.where(frame.notna(), None).values.tolist(),
+        }
+    return data
+
+
+def edit_from_dict(data: dict) -> SectionEdit:
+    """Deserialize a section edit created by :func:`edit_to_dict`."""
+    new_data = None
+    if data["rows"] is not None:
+        rows = data["rows"]
+        new_data = pd.DataFrame(rows["values"], index=rows["index"], columns=rows["columns"])
+    return SectionEdit(data["section"], new_data, frozenset(data["drop"]), data["replacement"])
+
+
+def apply_edits(target: Path, edits: list[SectionEdit], working_path: Optional[Path] = None) -> None:
+    """
+    Apply section edits to a plain or compressed INP file with one atomic replace.
+
+    Parameters
+    ----------
+    target : Path
+        INP file to update.
+    edits : List[SectionEdit]
+        Edits to apply.
+    working_path : Optional[Path]
+        Uncompressed working copy of a compressed ``target``. It is edited and
+        then recompressed over ``target``; without it a temporary copy is used.
+    """
+    if detect_compression(target) is None:
+        apply_section_edits(target, edits, in_place=False)
+        return
+
+    if working_path is not None:
+        apply_section_edits(working_path, edits, in_place=False)
+        copy_inp(working_path, target)
+        return
+
+    with tempfile.TemporaryDirectory(dir=target.parent) as tempdir:
+        plain_path = Path(tempdir) / f"{inp_stem(target)}.inp"
+        copy_inp(target, plain_path)
+        apply_section_edits(plain_path, edits, in_place=False)
+        copy_inp(plain_path, target)
+
+
+class WriteAheadJournal:
+    """
+    Write-ahead journal guarding one INP file.
+
+    Attributes
+    ----------
+    target : Path
+        INP file the journaled edits apply to.
+    path : Path
+        Journal file, ``<target>.wal``.
+
+    Example
+    -------
+    >>> wal = WriteAheadJournal(Path("models/city.inp"))
+    >>> wal.recover()
+    >>> wal.commit([SectionEdit("[SUBAREAS]", new_rows)])
+    """
+
+    def __init__(self, target: Union[str, Path]) -> None:
+        self.target = Path(target)
+        self.path = self.target.with_name(f"{self.target.name}.wal")
+
+    def _write(self, edits: list[SectionEdit]) -> None:
+        """Durably write the journal for a batch before it is applied."""
+        record = {
+            "version": WAL_VERSION,
+            "target": self.target.name,
+            "state": file_state(self.target),
+            "edits": [edit_to_dict(edit) for edit in edits],
+        }
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, default=json_default)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        _fsync_directory(self.path.parent)
+
+    def commit(
+        self, edits: list[SectionEdit], working_path: Optional[Path] = None, on_logged: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Journal a batch of edits, apply it atomically and drop the journal.
+
+        Parameters
+        ----------
+        edits : List[SectionEdit]
+            Edits making up the batch.
+        working_path : Optional[Path]
+            Uncompressed working copy of a compressed target, see :func:`apply_edits`.
+        on_logged : Optional[Callable[[], None]]
+            Called once the journal is durable and before the edits are applied.
+        """
+        if not edits:
+            return
+        self._write(edits)
+        try:
+            if on_logged is not None:
+                on_logged()
+            apply_edits(self.target, edits, working_path)
+        finally:
+            # A batch that raised was not applied and must not be replayed later
+            self.path.unlink(missing_ok=True)
+
+    def recover(self) -> Optional[str]:
+        """
+        Finish or discard a batch interrupted by a crash.
+
+        Returns
+        -------
+        Optional[str]
+            ``"replayed"`` if the batch was applied now, ``"discarded"`` if it
+            had already been applied or the journal is unusable, None if there
+            was no journal.
+        """
+        if not self.path.exists():
+            return None
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                record = json.load(f)
+            edits = [edit_from_dict(edit) for edit in record["edits"]]
+            pending = record["state"] == file_state(self.target)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Discarding unreadable write-ahead journal %s: %s", self.path, e)
+            self.path.unlink(missing_ok=True)
+            return "discarded"
+
+        if pending:
+            apply_edits(self.target, edits)
+            outcome = "replayed"
+        else:
+            outcome = "discarded"
+        self.path.unlink(missing_ok=True)
+        logger.info("Recovered write-ahead journal %s: %s", self.path, outcome)
+        return outcome
@@ -0,0 +1,159 @@
+"""
+Non-overlapping layout of generated subcatchment polygons.
+
+New squares are shelf-packed into one rectangular block, and the block is
+placed in the free space of a uniform occupancy grid that covers the bounding
+boxes of the existing polygons. The grid is rasterized and searched with
+summed-area tables, so placing a whole batch costs a few array operations
+regardless of how many polygons the model already has.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Upper bound on the grid size per axis; the cell size grows to respect it
+MAX_GRID_CELLS = 1024
+
+# Vertex offsets of a square relative to its top-left corner, in units of its side
+SQUARE_VERTICES = np.array([[0, 0], [1, 0], [1, -1], [0, -1]], dtype=float)
+
+
+def polygon_bounds(polygons: pd.DataFrame) -> np.ndarray:
+    """
+    Compute the bounding box of every polygon.
+
+    Parameters
+    ----------
+    polygons : pd.DataFrame
+        Polygon vertices with ``X`` and ``Y`` columns, indexed by polygon name.
+
+    Returns
+    -------
+    np.ndarray
+        ``(K, 4)`` array of ``xmin, ymin, xmax, ymax`` per polygon.
+    """
+    if polygons.empty:
+        return np.empty((0, 4))
+    vertices = polygons[["X", "Y"]].apply(pd.to_numeric, errors="coerce").dropna()
+    grouped = vertices.groupby(level=0, sort=False)
+    lower = grouped.min().to_numpy(dtype=float)
+    upper = grouped.max().to_numpy(dtype=float)
+    return np.hstack([lower, upper])
+
+
+def shelf_pack(sides: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """
+    Pack squares into shelves of a roughly square block.
+
+    Squares are placed largest first, left to right, starting a new shelf
+    below the previous one whenever the block width would be exceeded.
+
+    Parameters
+    ----------
+    sides : np.ndarray
+        Side length of each square.
+
+    Returns
+    -------
+    Tuple[np.ndarray, float, float]
+        ``(N, 2)`` offsets of the top-left corners from the top-left corner of
+        the block (``y`` pointing down), and the block width and height.
+    """
+    order = np.argsort(-sides, kind="stable")
+    block_width = max(float(sides.max()), math.sqrt(float(np.square(sides).sum())))
+    offsets = np.empty((len(sides), 2))
+    x = shelf_top = shelf_height = used_width = 0.0
+    for position in order:
+        side = float(sides[position])
+        if x > 0 and x + side > block_width:
+            shelf_top += shelf_height
+            x = shelf_height = 0.0
+        offsets[position] = (x, shelf_top)
+        x += side
+        shelf_height = max(shelf_height, side)
+        used_width = max(used_width, x)
+    return offsets, used_width, shelf_top + shelf_height
+
+
+def _free_block(
+    bounds: np.ndarray, anchor: tuple[float, float], width: float, height: float, cell: float
+) -> tuple[float, float]:
+    """Return the top-left corner of the free grid-aligned block closest to ``anchor``."""
+    while True:
+        block_cols = max(1, math.ceil(width / cell))
+        block_rows = max(1, math.ceil(height / cell))
+        anchor_col, anchor_row = math.floor(anchor[0] / cell), math.floor(anchor[1] / cell)
+
+        col0 = np.floor(bounds[:, 0] / cell).astype(np.int64)
+        row0 = np.floor(bounds[:, 1] / cell).astype(np.int64)
+        col1 = np.maximum(col0, np.ceil(bounds[:, 2] / cell).astype(np.int64) - 1)
+        row1 = np.maximum(row0, np.ceil(bounds[:, 3] / cell).astype(np.int64) - 1)
+
+        # The window leaves room for the block beyond every occupied cell, so a free spot always exists
+        min_col = int(np.append(col0, anchor_col).min()) - block_cols - 1
+        min_row = int(np.append(row0, anchor_row).min()) - block_rows - 1
+        max_col = int(np.append(col1, anchor_col).max()) + block_cols + 1
+        max_row = int(np.append(row1, anchor_row).max()) + block_rows + 1
+        if max(max_col - min_col, max_row - min_row) < MAX_GRID_CELLS:
+            break
+        cell *= 2
+
+    n_cols, n_rows = max_col - min_col + 1, max_row - min_row + 1
+    # Rasterize the bounding boxes with a 2-D difference array
+    coverage = np.zeros((n_rows + 1, n_cols + 1), dtype=np.int32)
+    np.add.at(coverage, (row0 - min_row, col0 - min_col), 1)
+    np.add.at(coverage, (row0 - min_row, col1 - min_col + 1), -1)
+    np.add.at(coverage, (row1 - min_row + 1, col0 - min_col), -1)
+    np.add.at(coverage, (row1 - min_row + 1, col1 - min_col + 1), 1)
+    occupied = (coverage.cumsum(axis=0).cumsum(axis=1)[:n_rows, :n_cols] > 0).astype(np.int32)
+
+    # Occupied cells under every block position, from a summed-area table
+    table = np.zeros((n_rows + 1, n_cols + 1), dtype=np.int32)
+    table[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+    under = (
+        table[block_rows:, block_cols:]
+        - table[:-block_rows, block_cols:]
+        - table[block_rows:, :-block_cols]
+        + table[:-block_rows, :-block_cols]
+    )
+    rows, cols = np.nonzero(under == 0)
+    left = (cols + min_col) * cell
+    top = (rows + min_row + block_rows) * cell
+    best = np.argmin((left - anchor[0]) ** 2 + (top - anchor[1]) ** 2)
+    return float(left[best]), float(top[best])
+
+
+def layout_squares(
+    sides: np.ndarray, occupied: np.ndarray, anchor: tuple[float, float] = (0.0, 0.0)
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Place squares next to ``anchor`` without overlapping each other or existing polygons.
+
+    Parameters
+    ----------
+    sides : np.ndarray
+        Side length of each square.
+    occupied : np.ndarray
+        ``(K, 4)`` bounding boxes of existing polygons, see :func:`polygon_bounds`.
+    anchor : Tuple[float, float]
+        Point the block of new squares should be as close to as possible.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        ``(4N, 2)`` vertices, four per square in input order (top-left,
+        top-right, bottom-right, bottom-left), and ``(N, 2)`` centroids.
+    """
+    sides = np.asarray(sides, dtype=float)
+    if len(sides) == 0:
+        return np.empty((0, 2)), np.empty((0, 2))
+    offsets, width, height = shelf_pack(sides)
+    cell = float(np.median(sides))
+    left, top = _free_block(np.asarray(occupied, dtype=float).reshape(-1, 4), anchor, width, height, cell)
+
+    corners = np.column_stack([left + offsets[:, 0], top - offsets[:, 1]])
+    vertices = corners[:, None, :] + sides[:, None, None] * SQUARE_VERTICES[None, :, :]
+    centroids = corners + np.column_stack([sides, -sides]) / 2
+    return vertices.reshape(-1, 2), centroids
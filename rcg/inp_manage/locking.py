@@ -0,0 +1,291 @@
+"""
+Cross-process coordination for writers sharing one INP file.
+
+Writers serialize their read-modify-write cycles with an advisory lock on
+``<model>.lock`` (``fcntl.flock`` on POSIX, ``msvcrt.locking`` on Windows).
+A writer that finds the lock taken leaves its batch in the ``<model>.queue``
+spool directory before waiting. Whoever holds the lock next applies every
+queued batch in one write (group commit) and leaves a result file for each
+waiting writer, which then only reloads the model instead of rewriting it.
+"""
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Optional, Union
+
+from rcg.exceptions import ModelOperationError
+from rcg.inp_manage.history import json_default
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Polling interval for blocking acquisition where the platform lock cannot block
+POLL_INTERVAL = 0.05
+
+
+@dataclass
+class LockMetrics:
+    """
+    Contention counters of one writer.
+
+    Attributes
+    ----------
+    acquisitions : int
+        Number of times the lock was acquired.
+    contended : int
+        Acquisitions that found the lock held by another writer.
+    wait_seconds : float
+        Total time spent waiting for the lock.
+    max_wait_seconds : float
+        Longest single wait.
+    hold_seconds : float
+        Total time the lock was held.
+    conflicts : int
+        Writes that found the file changed by another writer since it was loaded.
+    reloads : int
+        Times the model was reloaded because of another writer.
+    batches_written : int
+        Batches written by this writer, including coalesced ones.
+    batches_coalesced : int
+        Batches of other writers included in this writer's writes.
+    batches_delegated : int
+        Batches of this writer that another writer wrote.
+    renamed_ids : int
+        New element IDs renamed because another writer had already used them.
+    """
+
+    acquisitions: int = 0
+    contended: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    hold_seconds: float = 0.0
+    conflicts: int = 0
+    reloads: int = 0
+    batches_written: int = 0
+    batches_coalesced: int = 0
+    batches_delegated: int = 0
+    renamed_ids: int = 0
+
+    def as_dict(self) -> dict:
+        """Return the counters as a dictionary."""
+        return asdict(self)
+
+
+def _try_lock(fd: int) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+    try:
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _lock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while not _try_lock(fd):
+        time.sleep(POLL_INTERVAL)
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a lock file.
+
+    The lock belongs to the open file, so separate instances conflict even
+    within one process. Lock files are never deleted, as removing them would
+    let two writers lock different inodes.
+
+    Attributes
+    ----------
+    path : Path
+        Lock file.
+    metrics : LockMetrics
+        Contention counters updated on every acquisition.
+
+    Example
+    -------
+    >>> with FileLock(Path("models/city.inp.lock")):
+    ...     ...  # read, modify and write the model
+    """
+
+    def __init__(self, path: Union[str, Path], metrics: Optional[LockMetrics] = None) -> None:
+        self.path = Path(path)
+        self.metrics = metrics or LockMetrics()
+        self._fd: Optional[int] = None
+        self._acquired_at = 0.0
+        # A failed non-blocking attempt followed by a blocking one is one contended acquisition
+        self._contention_counted = False
+
+    @property
+    def locked(self) -> bool:
+        """Whether this instance currently holds the lock."""
+        return self._fd is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Acquire the lock.
+
+        Parameters
+        ----------
+        blocking : bool
+            Wait until the lock is free; otherwise return False immediately.
+
+        Returns
+        -------
+        bool
+            Whether the lock was acquired.
+
+        Raises
+        ------
+        ModelOperationError
+            If this instance already holds the lock.
+        """
+        if self._fd is not None:
+            raise ModelOperationError(f"Lock already held: {self.path}", operation="lock")
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        start = time.perf_counter()
+        try:
+            if not _try_lock(fd):
+                if not self._contention_counted:
+                    self.metrics.contended += 1
+                    self._contention_counted = True
+                if not blocking:
+                    os.close(fd)
+                    return False
+                _lock(fd)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self._contention_counted = False
+        self._acquired_at = time.perf_counter()
+        waited = self._acquired_at - start
+        self.metrics.acquisitions += 1
+        self.metrics.wait_seconds += waited
+        self.metrics.max_wait_seconds = max(self.metrics.max_wait_seconds, waited)
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """Release the lock if it is held."""
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        self.metrics.hold_seconds += time.perf_counter() - self._acquired_at
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc_val: Optional[BaseException], exc_tb: Optional[TracebackType]) -> None:
+        self.release()
+
+
+class WriteQueue:
+    """
+    Spool directory of batches waiting for the lock.
+
+    Batches are stored as ``<ticket>.batch.json`` and named so that sorting
+    them gives submission order. The writer that applies a batch on behalf of
+    another replaces it with ``<ticket>.result.json``.
+
+    Attributes
+    ----------
+    directory : Path
+        Spool directory.
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+
+    def _write(self, path: Path, data: dict) -> None:
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=json_default)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+
+    def submit(self, batch: dict) -> str:
+        """
+        Queue a batch.
+
+        Returns
+        -------
+        str
+            Ticket identifying the batch.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        ticket = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._write(self.directory / f"{ticket}.batch.json", batch)
+        return ticket
+
+    def pending(self) -> list[tuple[str, dict]]:
+        """Return the queued batches as ``(ticket, batch)`` pairs in submission order."""
+        if not self.directory.exists():
+            return []
+        batches = []
+        for path in sorted(self.directory.glob("*.batch.json")):
+            with open(path, encoding="utf-8") as f:
+                batches.append((path.name[: -len(".batch.json")], json.load(f)))
+        return batches
+
+    def complete(self, ticket: str, result: dict) -> None:
+        """Replace a batch applied on behalf of another writer with its result."""
+        self._write(self.directory / f"{ticket}.result.json", result)
+        self.discard(ticket)
+
+    def take_result(self, ticket: str) -> dict:
+        """
+        Read and remove the result of a batch applied by another writer.
+
+        Raises
+        ------
+        ModelOperationError
+            If the batch is neither queued nor completed, or the writer that
+            took it over failed to write it.
+        """
+        path = self.directory / f"{ticket}.result.json"
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+        except OSError as e:
+            raise ModelOperationError(f"Queued batch {ticket} was lost", operation="write") from e
+        path.unlink()
+        if "error" in result:
+            raise ModelOperationError(f"Queued batch {ticket} failed: {result['error']}", operation="write")
+        return result
+
+    def discard(self, ticket: str) -> None:
+        """Remove a queued batch."""
+        (self.directory / f"{ticket}.batch.json").unlink(missing_ok=True)
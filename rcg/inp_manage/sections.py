@@ -0,0 +1,398 @@
+"""
+Section-level editing of SWMM INP files without re-serializing existing rows.
+
+``swmmio.utils.modify_model.replace_inp_section`` regenerates a whole section
+from a DataFrame, which reformats every row the user has written by hand.
+The helpers in this module only insert new lines at the end of a section and
+drop the lines of removed rows; every other byte of the file is copied verbatim.
+"""
+
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+# Column widths used by the SWMM GUI when it writes INP files
+NAME_WIDTH = 16
+VALUE_WIDTH = 10
+
+# Buffer size for the verbatim byte copies
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def format_value(value) -> str:
+    """
+    Format a single section value the way SWMM expects it.
+
+    Parameters
+    ----------
+    value : any
+        Cell value from a section DataFrame.
+
+    Returns
+    -------
+    str
+        Text representation, or an empty string for missing values.
+    """
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+def format_section_rows(section_data: pd.DataFrame) -> list[str]:
+    """
+    Format DataFrame rows as INP data lines (without line terminators).
+
+    The index is written as the first token, followed by the column values.
+    Trailing missing values are dropped so optional columns stay empty.
+
+    Parameters
+    ----------
+    section_data : pd.DataFrame
+        Rows to format, indexed by element name.
+
+    Returns
+    -------
+    List[str]
+        One formatted line per row.
+    """
+    lines = []
+    for name, row in zip(section_data.index, section_data.itertuples(index=False, name=None)):
+        values = [format_value(value) for value in row]
+        while values and values[-1] == "":
+            values.pop()
+        line = str(name).ljust(NAME_WIDTH) + " " + " ".join(value.ljust(VALUE_WIDTH) for value in values)
+        lines.append(line.rstrip())
+    return lines
+
+
+def _header_key(line: bytes) -> bytes:
+    """Return the normalized section header of a line (empty if not a header)."""
+    stripped = line.split(b";", 1)[0].strip()
+    if stripped.startswith(b"[") and stripped.endswith(b"]"):
+        return stripped.upper()
+    return b""
+
+
+def read_section_rows(inp_path: Union[str, Path], section_header: str) -> list[list[str]]:
+    """
+    Read the data lines of a section that ``swmmio`` does not parse, e.g. ``[SYMBOLS]``.
+
+    Parameters
+    ----------
+    inp_path : Union[str, Path]
+        Path to the INP file.
+    section_header : str
+        Section header, matched like in :func:`find_section_end`.
+
+    Returns
+    -------
+    List[List[str]]
+        Whitespace-separated tokens of each data line; comments and blank
+        lines are skipped. Empty if the section is missing.
+    """
+    target = section_header.strip().upper().encode()
+    rows = []
+    in_section = False
+    with open(inp_path, "rb") as f:
+        for line in f:
+            key = _header_key(line)
+            if key:
+                if in_section:
+                    break
+                in_section = key == target
+            elif in_section:
+                tokens = line.split(b";", 1)[0].split()
+                if tokens:
+                    rows.append([token.decode() for token in tokens])
+    return rows
+
+
+def find_section_end(inp_path: Union[str, Path], section_header: str) -> tuple[bool, int, bytes, bool]:
+    """
+    Locate the byte offset right after the last non-blank line of a section.
+
+    Section headers are matched case-insensitively and the first occurrence wins,
+    mirroring how ``swmmio`` reads sections.
+
+    Parameters
+    ----------
+    inp_path : Union[str, Path]
+        Path to the INP file.
+    section_header : str
+        Section header, e.g. ``"[SUBCATCHMENTS]"``.
+
+    Returns
+    -------
+    Tuple[bool, int, bytes, bool]
+        Whether the section was found, the insertion offset (end of file when the
+        section is missing), the newline sequence used by the file, and whether
+        the byte before the insertion offset is a line terminator.
+    """
+    target = section_header.strip().upper().encode()
+    newline = b"\n"
+    offset = 0
+    insert_at = None
+    ends_with_newline = True
+    in_section = False
+
+    with open(inp_path, "rb") as f:
+        for index, line in enumerate(f):
+            if index == 0 and line.endswith(b"\r\n"):
+                newline = b"\r\n"
+
+            key = _header_key(line)
+            if key:
+                if in_section:
+                    break
+                if key == target:
+                    in_section = True
+                    insert_at = offset + len(line)
+                    ends_with_newline = line.endswith(b"\n")
+            elif in_section and line.strip():
+                insert_at = offset + len(line)
+                ends_with_newline = line.endswith(b"\n")
+
+            offset += len(line)
+        else:
+            if insert_at is None:
+                # Section missing: the new section goes at the end of the file
+                insert_at = offset
+                f.seek(max(offset - 1, 0))
+                ends_with_newline = offset == 0 or f.read(1) == b"\n"
+
+    return in_section, insert_at, newline, ends_with_newline
+
+
+def _splice(inp_path: Path, offset: int, payload: bytes) -> None:
+    """Insert ``payload`` at ``offset``, copying all other bytes verbatim."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{inp_path.name}.", suffix=".tmp", dir=inp_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as new, open(inp_path, "rb") as old:
+            remaining = offset
+            while remaining > 0:
+                chunk = old.read(min(COPY_BUFFER_SIZE, remaining))
+                if not chunk:
+                    break
+                new.write(chunk)
+                remaining -= len(chunk)
+            new.write(payload)
+            shutil.copyfileobj(old, new, COPY_BUFFER_SIZE)
+        shutil.copymode(inp_path, tmp_name)
+        os.replace(tmp_name, inp_path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def append_inp_section(inp_path: Union[str, Path], section_header: str, new_data: pd.DataFrame) -> int:
+    """
+    Append rows to a section of an INP file without rewriting existing rows.
+
+    The new lines are inserted after the last non-blank line of the section.
+    Everything else, including comments and formatting, is copied verbatim.
+    When the section is the last one in the file, the lines are appended in
+    place, so the cost depends only on the number of new rows. A missing
+    section is created at the end of the file.
+
+    Parameters
+    ----------
+    inp_path : Union[str, Path]
+        Path to the INP file to modify.
+    section_header : str
+        Section header, e.g. ``"[SUBCATCHMENTS]"``.
+    new_data : pd.DataFrame
+        Only the rows to add, indexed by element name.
+
+    Returns
+    -------
+    int
+        Number of bytes inserted into the file.
+
+    Example
+    -------
+    >>> rows = builder.model.inp.subareas.loc[["S11"]]
+    >>> append_inp_section("model.inp", "[SUBAREAS]", rows)
+    """
+    inp_path = Path(inp_path)
+    lines = format_section_rows(new_data)
+    if not lines:
+        return 0
+
+    found, offset, newline, ends_with_newline = find_section_end(inp_path, section_header)
+
+    payload = b"" if ends_with_newline else newline
+    if not found:
+        payload += newline + section_header.encode() + newline
+    payload += newline.join(line.encode() for line in lines) + newline
+
+    if offset == inp_path.stat().st_size:
+        with open(inp_path, "ab") as f:
+            f.write(payload)
+    else:
+        _splice(inp_path, offset, payload)
+
+    return len(payload)
+
+
+@dataclass
+class SectionEdit:
+    """
+    Pending change to one INP section.
+
+    Attributes
+    ----------
+    section_header : str
+        Section header, e.g. ``"[SUBAREAS]"``.
+    new_data : Optional[pd.DataFrame]
+        Rows appended at the end of the section.
+    drop : frozenset
+        Element names whose existing data lines are removed from the section.
+    replacement : Optional[str]
+        Complete text of the section, header included, written instead of the
+        existing section; ``new_data`` and ``drop`` are ignored when it is set.
+    """
+
+    section_header: str
+    new_data: Optional[pd.DataFrame] = None
+    drop: frozenset = field(default_factory=frozenset)
+    replacement: Optional[str] = None
+
+    @property
+    def key(self) -> bytes:
+        """Normalized header used to match the section in the file."""
+        return self.section_header.strip().upper().encode()
+
+
+def _row_name(line: bytes) -> Optional[str]:
+    """Return the element name of a data line, or None for comments."""
+    tokens = line.split(b";", 1)[0].split()
+    return tokens[0].decode() if tokens else None
+
+
+def apply_section_edits(inp_path: Union[str, Path], edits: list[SectionEdit], in_place: bool = True) -> None:
+    """
+    Apply edits to several sections of an INP file in a single streaming pass.
+
+    Dropped rows are skipped, new rows are inserted after the last non-blank
+    line of their section, replaced sections are swapped for their new text,
+    and every other byte is copied verbatim. The result replaces the file
+    atomically.
+
+    Parameters
+    ----------
+    inp_path : Union[str, Path]
+        Path to the INP file to modify.
+    edits : List[SectionEdit]
+        Section edits; missing sections are created at the end of the file.
+    in_place : bool
+        Allow edits that only append to one section to use the in-place fast
+        path of :func:`append_inp_section`, which is not atomic.
+    """
+    inp_path = Path(inp_path)
+    edits = [
+        edit
+        for edit in edits
+        if edit.replacement is not None or edit.drop or (edit.new_data is not None and len(edit.new_data))
+    ]
+    if not edits:
+        return
+    if in_place and len(edits) == 1 and edits[0].replacement is None and not edits[0].drop:
+        append_inp_section(inp_path, edits[0].section_header, edits[0].new_data)
+        return
+
+    with open(inp_path, "rb") as f:
+        first_line = f.readline()
+    newline = b"\r\n" if first_line.endswith(b"\r\n") else b"\n"
+
+    headers: dict[bytes, str] = {}
+    drops: dict[bytes, set] = {}
+    payloads: dict[bytes, bytes] = {}
+    replacements: dict[bytes, bytes] = {}
+    for edit in edits:
+        if edit.replacement is not None:
+            replacements[edit.key] = edit.replacement.replace("\n", newline.decode()).encode()
+            continue
+        headers.setdefault(edit.key, edit.section_header)
+        drops.setdefault(edit.key, set()).update(edit.drop)
+        lines = format_section_rows(edit.new_data) if edit.new_data is not None else []
+        payloads[edit.key] = payloads.get(edit.key, b"") + b"".join(line.encode() + newline for line in lines)
+    for key in replacements:
+        headers.pop(key, None)
+        drops.pop(key, None)
+        payloads.pop(key, None)
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{inp_path.name}.", suffix=".tmp", dir=inp_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as new, open(inp_path, "rb") as old:
+            current: Optional[bytes] = None
+            skipping = False  # inside a section that is being replaced
+            held: list[bytes] = []  # blank lines between the last row and the next section
+            at_line_start = True
+
+            def write(data: bytes) -> None:
+                nonlocal at_line_start
+                if data:
+                    new.write(data)
+                    at_line_start = data.endswith(b"\n")
+
+            def close_section() -> None:
+                nonlocal current, held
+                if current is not None:
+                    if payloads[current] and not at_line_start:
+                        write(newline)
+                    write(payloads.pop(current))
+                    write(b"".join(held))
+                    held = []
+                    current = None
+
+            for line in old:
+                key = _header_key(line)
+                if key:
+                    close_section()
+                    skipping = False
+                    if key in replacements:
+                        if not at_line_start:
+                            write(newline)
+                        write(replacements.pop(key))
+                        skipping = True
+                        continue
+                    if key in payloads:
+                        current = key
+                    write(line)
+                elif skipping:
+                    continue
+                elif current is None:
+                    write(line)
+                elif not line.strip():
+                    held.append(line)
+                elif _row_name(line) not in drops[current] or line.lstrip().startswith(b";"):
+                    write(b"".join(held) + line)
+                    held = []
+            close_section()
+
+            for key, payload in payloads.items():
+                if payload:
+                    if not at_line_start:
+                        write(newline)
+                    write(newline + headers[key].encode() + newline + payload)
+            for replacement in replacements.values():
+                if replacement:
+                    if not at_line_start:
+                        write(newline)
+                    write(newline + replacement)
+
+        shutil.copymode(inp_path, tmp_name)
+        os.replace(tmp_name, inp_path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
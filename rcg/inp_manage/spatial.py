@@ -0,0 +1,220 @@
+"""
+Spatial indexes for assigning new subcatchments to nearby model elements.
+
+Points are indexed once with a KD-tree (``scipy.spatial.cKDTree``) and whole
+batches of query points are answered in one vectorized call, so assigning M
+subcatchments to N nodes costs O((N + M) log N) instead of O(N * M). Assigning
+each subcatchment to its nearest raingage is equivalent to Thiessen polygons.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from rcg.inp_manage.sections import read_section_rows
+
+# Node types that can drain a subcatchment, keyed to their swmmio section attribute
+OUTLET_NODE_TYPES = {"junction": "junctions", "outfall": "outfalls"}
+
+
+class PointIndex:
+    """
+    Nearest-neighbour index over named points.
+
+    Attributes
+    ----------
+    names : np.ndarray
+        Point names in index order.
+
+    Example
+    -------
+    >>> index = PointIndex.from_frame(model.inp.coordinates)
+    >>> names, distances = index.query(np.array([[10.0, 20.0], [30.0, 5.0]]))
+    """
+
+    def __init__(self, names: list[str], xy: np.ndarray) -> None:
+        self.names = np.asarray(names, dtype=object)
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        self._tree = cKDTree(xy) if len(self.names) else None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "PointIndex":
+        """Index a DataFrame with ``X`` and ``Y`` columns, skipping rows without coordinates."""
+        frame = frame.dropna(subset=["X", "Y"])
+        return cls([str(name) for name in frame.index], frame[["X", "Y"]].to_numpy(dtype=float))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def query(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the nearest indexed point for each query point.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Query coordinates of shape ``(M, 2)``.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Name of the nearest point and its distance for each query point.
+            Names are None and distances infinite when the index is empty.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if self._tree is None:
+            return np.full(len(points), None, dtype=object), np.full(len(points), np.inf)
+        distances, positions = self._tree.query(points)
+        return self.names[positions], distances
+
+
+def read_gage_symbols(inp_path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Read the map positions of raingages from the ``[SYMBOLS]`` section.
+
+    Parameters
+    ----------
+    inp_path : Union[str, Path]
+        Path to a plain-text INP file.
+
+    Returns
+    -------
+    pd.DataFrame
+        ``X`` and ``Y`` columns indexed by gage name; rows with unreadable
+        coordinates are dropped.
+    """
+    rows = [row for row in read_section_rows(inp_path, "[SYMBOLS]") if len(row) >= 3]
+    symbols = pd.DataFrame([row[1:3] for row in rows], index=[row[0] for row in rows], columns=["X", "Y"])
+    symbols = symbols.apply(pd.to_numeric, errors="coerce").dropna()
+    symbols.index.name = "Gage"
+    return symbols
+
+
+@dataclass(frozen=True)
+class OutletConstraints:
+    """
+    Restrictions on the nodes a subcatchment may drain to.
+
+    Attributes
+    ----------
+    node_types : Optional[frozenset]
+        Allowed node types (``"junction"``, ``"outfall"``); None allows all.
+    min_invert : Optional[float]
+        Lowest allowed invert elevation.
+    max_invert : Optional[float]
+        Highest allowed invert elevation.
+
+    Raises
+    ------
+    ValueError
+        If a node type is unknown or the invert range is empty.
+    """
+
+    node_types: Optional[frozenset] = None
+    min_invert: Optional[float] = None
+    max_invert: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        if self.node_types is not None:
+            object.__setattr__(self, "node_types", frozenset(self.node_types))
+            unknown = self.node_types - set(OUTLET_NODE_TYPES)
+            if unknown:
+                raise ValueError(
+                    f"Invalid node type: {', '.join(sorted(unknown))}. Must be one of: {', '.join(OUTLET_NODE_TYPES)}"
+                )
+        if self.min_invert is not None and self.max_invert is not None and self.min_invert > self.max_invert:
+            raise ValueError(f"min_invert ({self.min_invert}) is greater than max_invert ({self.max_invert})")
+
+
+class NodeIndex:
+    """
+    Index of the nodes new subcatchments can drain to.
+
+    A KD-tree is built lazily for each distinct set of constraints and reused
+    for later batches, so filtering never falls back to a linear scan.
+
+    Attributes
+    ----------
+    nodes : pd.DataFrame
+        Nodes with coordinates, indexed by name, with ``X``, ``Y``,
+        ``NodeType`` and ``InvertElev`` columns.
+
+    Example
+    -------
+    >>> index = NodeIndex.from_model(model.inp)
+    >>> index.nearest(centroids, OutletConstraints(node_types={"outfall"}))
+    """
+
+    def __init__(self, nodes: pd.DataFrame) -> None:
+        self.nodes = nodes
+        self._indexes: dict[Optional[OutletConstraints], PointIndex] = {}
+
+    @classmethod
+    def from_model(cls, inp) -> "NodeIndex":
+        """
+        Build the index from the ``[COORDINATES]``, ``[JUNCTIONS]`` and ``[OUTFALLS]`` sections.
+
+        Parameters
+        ----------
+        inp : swmmio.core.inp
+            Model input sections.
+        """
+        frames = []
+        for node_type, attribute in OUTLET_NODE_TYPES.items():
+            section = getattr(inp, attribute)
+            if section.empty:
+                continue
+            frame = pd.DataFrame({"NodeType": node_type, "InvertElev": section.get("InvertElev")}, index=section.index)
+            frames.append(frame)
+        if not frames:
+            return cls(pd.DataFrame(columns=["X", "Y", "NodeType", "InvertElev"]))
+
+        nodes = pd.concat(frames)
+        nodes.index = nodes.index.astype(str)
+        coordinates = inp.coordinates
+        coordinates = coordinates[~coordinates.index.duplicated()]
+        coordinates.index = coordinates.index.astype(str)
+        nodes = nodes.join(coordinates[["X", "Y"]], how="inner")
+        return cls(nodes[["X", "Y", "NodeType", "InvertElev"]])
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _index(self, constraints: Optional[OutletConstraints]) -> PointIndex:
+        if constraints not in self._indexes:
+            eligible = self.nodes
+            if constraints is not None:
+                mask = pd.Series(True, index=eligible.index)
+                if constraints.node_types is not None:
+                    mask &= eligible["NodeType"].isin(constraints.node_types)
+                invert = pd.to_numeric(eligible["InvertElev"], errors="coerce")
+                if constraints.min_invert is not None:
+                    mask &= invert >= constraints.min_invert
+                if constraints.max_invert is not None:
+                    mask &= invert <= constraints.max_invert
+                eligible = eligible[mask]
+            self._indexes[constraints] = PointIndex.from_frame(eligible)
+        return self._indexes[constraints]
+
+    def nearest(self, points: np.ndarray, constraints: Optional[OutletConstraints] = None) -> np.ndarray:
+        """
+        Find the nearest eligible node for each point.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Query coordinates of shape ``(M, 2)``, e.g. subcatchment centroids.
+        constraints : Optional[OutletConstraints]
+            Restrictions on eligible nodes.
+
+        Returns
+        -------
+        np.ndarray
+            Node name for each point, or None where no node is eligible.
+        """
+        names, _ = self._index(constraints).query(points)
+        return names
@@ -0,0 +1,432 @@
+"""
+Synthetic SWMM models for scale testing.
+
+:func:`generate_model` writes a valid INP file with any number of nodes,
+links, subcatchments, raingages and timeseries rows. Options, evaporation,
+report and other settings are copied from a template (by default
+``rcg/config/template.inp``, shipped with the package); the object sections
+are replaced with generated rows under the template's column headers.
+
+The layout is a square grid of subcatchments with the drainage nodes
+spread over the same extent; every subcatchment drains to the node and
+takes rainfall from the raingage of the grid cell it lies in. Junctions
+form chains that end at the outfalls, so the network is connected.
+
+Rows are generated and written in chunks, so memory use does not grow with
+the model size. The output is fully determined by the spec, including its
+seed, and ``.gz``/``.zst`` output paths are compressed on the fly.
+
+Usage:
+    python -m rcg.inp_manage.synthetic model.inp --subcatchments 100000 --junctions 5000
+"""
+
+import argparse
+import math
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import repeat
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from rcg.inp_manage.compression import open_inp
+
+TEMPLATE = Path(__file__).resolve().parent.parent / "config" / "template.inp"
+
+# Rows generated and written at once
+CHUNK_ROWS = 16_384
+
+# Sections replaced with generated rows; a section repeated in a template
+# (e.g. both [Polygons] and [POLYGONS]) is written once
+GENERATED_SECTIONS = (
+    "[RAINGAGES]",
+    "[SUBCATCHMENTS]",
+    "[SUBAREAS]",
+    "[INFILTRATION]",
+    "[JUNCTIONS]",
+    "[OUTFALLS]",
+    "[CONDUITS]",
+    "[XSECTIONS]",
+    "[TIMESERIES]",
+    "[MAP]",
+    "[COORDINATES]",
+    "[VERTICES]",
+    "[POLYGONS]",
+    "[SYMBOLS]",
+    "[PROFILES]",
+)
+
+
+@dataclass
+class SyntheticModelSpec:
+    """
+    Size and layout of a synthetic model.
+
+    Attributes
+    ----------
+    subcatchments : int
+        Number of subcatchments.
+    junctions : int
+        Number of junctions.
+    outfalls : int
+        Number of outfalls; junction chains are distributed among them.
+    conduits : Optional[int]
+        Number of conduits. At least ``junctions`` (one outgoing conduit per
+        junction); extra conduits connect random junction pairs. None means
+        ``junctions``.
+    raingages : int
+        Number of raingages, each with its own timeseries.
+    timeseries_rows : int
+        Rows of each raingage's timeseries, one per minute.
+    polygon_vertices : int
+        Vertices of each subcatchment polygon (a regular polygon).
+    spacing : float
+        Distance between subcatchment centroids in map units (meters).
+    origin : Tuple[float, float]
+        Map coordinates of the lower left corner.
+    seed : int
+        Seed of the generated attribute values.
+
+    Raises
+    ------
+    ValueError
+        If a count is out of range.
+    """
+
+    subcatchments: int = 1000
+    junctions: int = 100
+    outfalls: int = 1
+    conduits: Optional[int] = None
+    raingages: int = 1
+    timeseries_rows: int = 24
+    polygon_vertices: int = 4
+    spacing: float = 100.0
+    origin: tuple[float, float] = (777_000.0, 592_000.0)
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if self.conduits is None:
+            self.conduits = self.junctions
+        if self.subcatchments < 0 or self.junctions < 0 or self.timeseries_rows < 0:
+            raise ValueError("subcatchments, junctions and timeseries_rows must not be negative")
+        if self.outfalls < 1 or self.raingages < 1:
+            raise ValueError("A model needs at least one outfall and one raingage")
+        if self.conduits < self.junctions:
+            raise ValueError(f"conduits must be at least junctions ({self.junctions}), got: {self.conduits}")
+        if self.conduits > self.junctions and self.junctions < 2:
+            raise ValueError("Extra conduits need at least two junctions")
+        if self.polygon_vertices < 3 or self.spacing <= 0:
+            raise ValueError("polygon_vertices must be at least 3 and spacing positive")
+
+    @property
+    def nodes(self) -> int:
+        return self.junctions + self.outfalls
+
+    @property
+    def extent(self) -> float:
+        """Side of the square covered by the model."""
+        return max(math.ceil(math.sqrt(self.subcatchments)), 1) * self.spacing
+
+
+def _names(prefix: str, index: np.ndarray) -> list[str]:
+    return [f"{prefix}{i}" for i in (index + 1).tolist()]
+
+
+def _node_names(index: np.ndarray, junctions: int) -> list[str]:
+    """Names of nodes numbered junctions first, then outfalls."""
+    return [f"J{i + 1}" if i < junctions else f"O{i - junctions + 1}" for i in index.tolist()]
+
+
+def _rows(*columns: Union[np.ndarray, list, str, float]) -> str:
+    """
+    Join columns into fixed-width section lines.
+
+    Columns are arrays or lists of one value per row, or scalars repeated on
+    every row. Floats are rounded to 3 decimals.
+    """
+    n = next(len(column) for column in columns if isinstance(column, (np.ndarray, list)))
+    values = []
+    for column in columns:
+        if isinstance(column, np.ndarray):
+            column = (column.round(3) if column.dtype.kind == "f" else column).tolist()
+        values.append(column if isinstance(column, list) else repeat(column, n))
+    line = "%-16s" + " %-10s" * (len(columns) - 1) + "\n"
+    return "".join(line % row for row in zip(*values))
+
+
+class _Generator:
+    """Row generators of every section of one model."""
+
+    def __init__(self, spec: SyntheticModelSpec) -> None:
+        self.spec = spec
+        self.side = max(math.ceil(math.sqrt(spec.subcatchments)), 1)
+        self.node_side = math.ceil(math.sqrt(spec.nodes))
+        self.node_cell = spec.extent / self.node_side
+        # Regular polygon inscribed in a grid cell, leaving a gap to the neighbours
+        self.radius = 0.4 * spec.spacing
+        k = spec.polygon_vertices
+        self.polygon_area = 0.5 * k * self.radius**2 * math.sin(2 * math.pi / k)
+
+    def _rng(self, section: str, chunk: int = 0) -> np.random.Generator:
+        return np.random.default_rng([self.spec.seed, GENERATED_SECTIONS.index(section), chunk])
+
+    def _chunks(self, count: int) -> Iterator[tuple[int, np.ndarray]]:
+        for number, start in enumerate(range(0, count, CHUNK_ROWS)):
+            yield number, np.arange(start, min(start + CHUNK_ROWS, count))
+
+    def subcatchment_centroids(self, index: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        x0, y0 = self.spec.origin
+        return x0 + (index % self.side + 0.5) * self.spec.spacing, y0 + (index // self.side + 0.5) * self.spec.spacing
+
+    def node_coordinates(self, index: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        x0, y0 = self.spec.origin
+        return x0 + (index % self.node_side + 0.5) * self.node_cell, y0 + (index // self.node_side + 0.5) * self.node_cell
+
+    def raingages(self) -> Iterator[str]:
+        index = np.arange(self.spec.raingages)
+        yield _rows(_names("RG", index), "INTENSITY", "0:01", "1.0", _names("TIMESERIES TS", index))
+
+    def symbols(self) -> Iterator[str]:
+        index = np.arange(self.spec.raingages)
+        # Raingages in a row across the middle of the model, one per vertical band
+        band = self.spec.extent / self.spec.raingages
+        x = self.spec.origin[0] + (index + 0.5) * band
+        yield _rows(_names("RG", index), x, self.spec.origin[1] + self.spec.extent / 2)
+
+    def timeseries(self) -> Iterator[str]:
+        minutes = range(1, self.spec.timeseries_rows + 1)
+        times = [f"{minute // 60}:{minute % 60:02d}" for minute in minutes]
+        for gage in range(self.spec.raingages):
+            rng = self._rng("[TIMESERIES]", gage)
+            yield _rows(f"TS{gage + 1}", "", times, rng.gamma(2.0, 8.0, len(times)).round(2))
+
+    def subcatchments(self) -> Iterator[str]:
+        x0, y0 = self.spec.origin
+        band = self.spec.extent / self.spec.raingages
+        area_ha = round(self.polygon_area / 10_000, 6)
+        width = round(math.sqrt(self.polygon_area), 3)
+        for number, index in self._chunks(self.spec.subcatchments):
+            rng = self._rng("[SUBCATCHMENTS]", number)
+            x, y = self.subcatchment_centroids(index)
+            node = ((y - y0) // self.node_cell * self.node_side + (x - x0) // self.node_cell).astype(np.int64)
+            gage = ((x - x0) // band).astype(np.int64)
+            yield _rows(
+                _names("S", index),
+                _names("RG", np.minimum(gage, self.spec.raingages - 1)),
+                _node_names(np.minimum(node, self.spec.nodes - 1), self.spec.junctions),
+                area_ha,
+                rng.uniform(0, 95, len(index)).round(2),
+                width,
+                rng.uniform(0.5, 40, len(index)).round(2),
+                0,
+            )
+
+    def subareas(self) -> Iterator[str]:
+        for number, index in self._chunks(self.spec.subcatchments):
+            rng = self._rng("[SUBAREAS]", number)
+            n = len(index)
+            yield _rows(
+                _names("S", index),
+                rng.choice([0.011, 0.013, 0.015], n),
+                rng.choice([0.05, 0.15, 0.24, 0.41, 0.8], n),
+                1.27,
+                5.08,
+                rng.integers(0, 100, n),
+                "OUTLET",
+            )
+
+    def infiltration(self) -> Iterator[str]:
+        for _, index in self._chunks(self.spec.subcatchments):
+            yield _rows(_names("S", index), 3.5, 0.5, 0.25, 7, 0)
+
+    def polygons(self) -> Iterator[str]:
+        k = self.spec.polygon_vertices
+        angles = 2 * np.pi * np.arange(k) / k + np.pi / k
+        for _, index in self._chunks(self.spec.subcatchments):
+            x, y = self.subcatchment_centroids(index)
+            px = (x[:, None] + self.radius * np.cos(angles)).ravel()
+            py = (y[:, None] + self.radius * np.sin(angles)).ravel()
+            yield _rows(_names("S", np.repeat(index, k)), px, py)
+
+    def _downstream(self, index: np.ndarray) -> np.ndarray:
+        """
+        Node each junction drains to.
+
+        Junction ``i`` belongs to the chain of outfall ``i % outfalls`` and
+        drains to the previous junction of that chain, or to the outfall.
+        """
+        outfalls, junctions = self.spec.outfalls, self.spec.junctions
+        return np.where(index < outfalls, junctions + index % outfalls, index - outfalls)
+
+    def junctions(self) -> Iterator[str]:
+        for number, index in self._chunks(self.spec.junctions):
+            rng = self._rng("[JUNCTIONS]", number)
+            n = len(index)
+            # Invert rises along each chain so every conduit slopes downstream
+            elevation = 100 + (index // self.spec.outfalls) * 0.05 + rng.uniform(0, 0.04, n)
+            yield _rows(_names("J", index), elevation, rng.uniform(1.5, 4, n).round(2), 0, 0, 0)
+
+    def outfalls(self) -> Iterator[str]:
+        yield _rows(_names("O", np.arange(self.spec.outfalls)), 99.5, "FREE", "", "NO")
+
+    def _conduit_ends(self, number: int, index: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        junctions = self.spec.junctions
+        upstream = np.where(index < junctions, index, 0)
+        downstream = self._downstream(upstream)
+        extra = index >= junctions
+        if extra.any():
+            rng = self._rng("[CONDUITS]", number)
+            pairs = rng.integers(0, junctions - 1, (int(extra.sum()), 2))
+            # Connect a junction to one further down its network to avoid self-loops
+            upstream[extra] = pairs.max(axis=1) + 1
+            downstream[extra] = pairs.min(axis=1)
+        return upstream, downstream
+
+    def conduits(self) -> Iterator[str]:
+        for number, index in self._chunks(self.spec.conduits):
+            upstream, downstream = self._conduit_ends(number, index)
+            ux, uy = self.node_coordinates(upstream)
+            dx, dy = self.node_coordinates(downstream)
+            yield _rows(
+                _names("C", index),
+                _node_names(upstream, self.spec.junctions),
+                _node_names(downstream, self.spec.junctions),
+                np.maximum(np.hypot(ux - dx, uy - dy), 1.0).round(2),
+                0.013,
+                0,
+                0,
+                0,
+                0,
+            )
+
+    def xsections(self) -> Iterator[str]:
+        for number, index in self._chunks(self.spec.conduits):
+            rng = self._rng("[XSECTIONS]", number)
+            diameters = rng.choice([0.3, 0.4, 0.5, 0.6, 0.8, 1.0, 1.2], len(index))
+            yield _rows(_names("C", index), "CIRCULAR", diameters, 0, 0, 0, 1)
+
+    def coordinates(self) -> Iterator[str]:
+        for _, index in self._chunks(self.spec.nodes):
+            x, y = self.node_coordinates(index)
+            yield _rows(_node_names(index, self.spec.junctions), x, y)
+
+    def map(self) -> Iterator[str]:
+        x0, y0 = self.spec.origin
+        yield f"DIMENSIONS {x0:.3f} {y0:.3f} {x0 + self.spec.extent:.3f} {y0 + self.spec.extent:.3f}\nUnits      Meters\n"
+
+    def section(self, header: str) -> Iterator[str]:
+        """Generated rows of a section in :data:`GENERATED_SECTIONS`."""
+        generators = {
+            "[RAINGAGES]": self.raingages,
+            "[SUBCATCHMENTS]": self.subcatchments,
+            "[SUBAREAS]": self.subareas,
+            "[INFILTRATION]": self.infiltration,
+            "[JUNCTIONS]": self.junctions,
+            "[OUTFALLS]": self.outfalls,
+            "[CONDUITS]": self.conduits,
+            "[XSECTIONS]": self.xsections,
+            "[TIMESERIES]": self.timeseries,
+            "[MAP]": self.map,
+            "[COORDINATES]": self.coordinates,
+            "[POLYGONS]": self.polygons,
+            "[SYMBOLS]": self.symbols,
+        }
+        if header in generators:
+            yield from generators[header]()
+
+
+def _template_sections(template: Path) -> list[tuple[str, list[str]]]:
+    """Split the template into ``(header, lines)`` pairs; text before the first header has an empty header."""
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    with open_inp(template, "rt") as f:
+        for line in f:
+            if line.lstrip().startswith("["):
+                sections.append((line.strip().upper(), [line]))
+            else:
+                sections[-1][1].append(line)
+    return sections
+
+
+def generate_model(
+    output_path: Union[str, Path], spec: Optional[SyntheticModelSpec] = None, template: Union[str, Path] = TEMPLATE
+) -> Path:
+    """
+    Write a synthetic SWMM model.
+
+    Parameters
+    ----------
+    output_path : Union[str, Path]
+        File to write; ``.inp.gz`` and ``.inp.zst`` paths are compressed.
+    spec : Optional[SyntheticModelSpec]
+        Model size and seed; the defaults if None.
+    template : Union[str, Path]
+        INP file supplying the settings sections and column headers.
+
+    Returns
+    -------
+    Path
+        ``output_path``.
+
+    Example
+    -------
+    >>> generate_model("large.inp", SyntheticModelSpec(subcatchments=100_000, junctions=2_000, seed=1))
+    """
+    output_path = Path(output_path)
+    spec = spec if spec is not None else SyntheticModelSpec()
+    generator = _Generator(spec)
+    written = set()
+    with open_inp(output_path, "wt") as out:
+        for header, lines in _template_sections(Path(template)):
+            if header not in GENERATED_SECTIONS:
+                out.writelines(lines)
+                continue
+            if header in written:
+                continue
+            written.add(header)
+            out.write(lines[0])
+            out.writelines(line for line in lines[1:] if line.lstrip().startswith(";;"))
+            for chunk in generator.section(header):
+                out.write(chunk)
+            out.write("\n")
+    return output_path
+
+
+def main() -> int:
+    """Generate a synthetic model from the command line."""
+    defaults = SyntheticModelSpec()
+    parser = argparse.ArgumentParser(description="Generate a synthetic SWMM model")
+    parser.add_argument("output", type=Path, help="INP file to write (.inp, .inp.gz or .inp.zst)")
+    parser.add_argument("--subcatchments", type=int, default=defaults.subcatchments)
+    parser.add_argument("--junctions", type=int, default=defaults.junctions)
+    parser.add_argument("--outfalls", type=int, default=defaults.outfalls)
+    parser.add_argument("--conduits", type=int, default=None, help="Defaults to the number of junctions")
+    parser.add_argument("--raingages", type=int, default=defaults.raingages)
+    parser.add_argument("--timeseries-rows", type=int, default=defaults.timeseries_rows, help="Rows per raingage series")
+    parser.add_argument("--polygon-vertices", type=int, default=defaults.polygon_vertices)
+    parser.add_argument("--spacing", type=float, default=defaults.spacing, help="Distance between subcatchments (m)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--template", type=Path, default=TEMPLATE, help="INP file supplying settings and headers")
+    args = parser.parse_args()
+
+    try:
+        spec = SyntheticModelSpec(
+            subcatchments=args.subcatchments,
+            junctions=args.junctions,
+            outfalls=args.outfalls,
+            conduits=args.conduits,
+            raingages=args.raingages,
+            timeseries_rows=args.timeseries_rows,
+            polygon_vertices=args.polygon_vertices,
+            spacing=args.spacing,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    generate_model(args.output, spec, args.template)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
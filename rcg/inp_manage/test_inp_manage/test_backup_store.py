@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+
+from rcg.exceptions import BackupError
+from rcg.inp_manage.backup_store import BackupStore, iter_chunks
+from rcg.inp_manage.compression import copy_inp
+from rcg.inp_manage.locking import FileLock
+
+INP_TEXT = """[TITLE]
+;;Project Title/Notes
+
+[SUBCATCHMENTS]
+;;Name  Raingage  Outlet  Area
+S1      RG1       J1      5.0
+S2      RG1       J1      7.5
+
+[JUNCTIONS]
+;;Name  Elevation
+J1      146.61
+"""
+
+
+@pytest.fixture
+def inp_file(tmp_path):
+    path = tmp_path / "model.inp"
+    path.write_text(INP_TEXT)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(tmp_path / ".rcg_backups")
+
+
+def object_files(store):
+    return sorted(store.objects_dir.glob("*/*"))
+
+
+class TestIterChunks:
+    def test_chunks_follow_sections(self, inp_file):
+        chunks = list(iter_chunks(inp_file))
+        assert b"".join(chunks) == INP_TEXT.encode()
+        assert [chunk.split(b"\n")[0] for chunk in chunks] == [b"[TITLE]", b"[SUBCATCHMENTS]", b"[JUNCTIONS]"]
+
+    def test_long_sections_are_split(self, inp_file):
+        chunks = list(iter_chunks(inp_file, chunk_lines=2))
+        assert b"".join(chunks) == INP_TEXT.encode()
+        assert all(chunk.count(b"\n") <= 2 for chunk in chunks)
+
+
+class TestBackupStore:
+    def test_save_and_restore(self, store, inp_file):
+        manifest = store.save(inp_file)
+        inp_file.write_text("corrupted")
+
+        store.restore(manifest, inp_file)
+
+        assert inp_file.read_text() == INP_TEXT
+        assert store.read_manifest(manifest)["size"] == len(INP_TEXT)
+
+    def test_identical_backups_share_chunks(self, store, inp_file):
+        store.save(inp_file)
+        files_after_first = object_files(store)
+        store.save(inp_file)
+
+        assert object_files(store) == files_after_first
+        assert len(store.list_manifests(inp_file)) == 2
+
+    def test_changed_section_adds_only_its_chunk(self, store, inp_file):
+        store.save(inp_file)
+        chunk_count = len(object_files(store))
+
+        inp_file.write_text(INP_TEXT.replace("7.5", "8.0"))
+        store.save(inp_file)
+
+        assert len(object_files(store)) == chunk_count + 1
+
+    def test_delete_collects_unreferenced_chunks(self, store, inp_file):
+        first = store.save(inp_file)
+        inp_file.write_text(INP_TEXT.replace("7.5", "8.0"))
+        second = store.save(inp_file)
+        chunk_count = len(object_files(store))
+
+        store.delete(first)
+
+        assert not first.exists()
+        assert len(object_files(store)) == chunk_count - 1
+        store.restore(second, inp_file)
+        assert "8.0" in inp_file.read_text()
+
+    def test_garbage_collection_waits_for_running_save(self, store, inp_file):
+        store.save(inp_file)
+        # A save in another process that has written a chunk but not yet its manifest
+        orphan = store.objects_dir / "ab" / ("ab" + "0" * 62)
+        orphan.parent.mkdir(exist_ok=True)
+        orphan.write_bytes(b"chunk\n")
+        collected = []
+
+        with FileLock(store.root / "store.lock"):
+            collector = threading.Thread(target=lambda: collected.append(store.collect_garbage()))
+            collector.start()
+            collector.join(0.2)
+            assert collector.is_alive()
+            assert orphan.exists()
+        collector.join(10)
+
+        assert collected == [1]
+        assert not orphan.exists()
+
+    def test_compressed_chunks(self, tmp_path, inp_file):
+        store = BackupStore(tmp_path / ".rcg_backups", compression="gzip")
+        manifest = store.save(inp_file)
+
+        assert all(path.suffix == ".gz" for path in object_files(store))
+        store.restore(manifest, tmp_path / "restored.inp")
+        assert (tmp_path / "restored.inp").read_text() == INP_TEXT
+
+    def test_restore_into_compressed_target(self, store, inp_file, tmp_path):
+        gz_path = copy_inp(inp_file, tmp_path / "model.inp.gz")
+        manifest = store.save(gz_path)
+
+        store.restore(manifest, gz_path)
+
+        copy_inp(gz_path, tmp_path / "check.inp")
+        assert (tmp_path / "check.inp").read_text() == INP_TEXT
+
+    def test_missing_chunk_raises(self, store, inp_file):
+        manifest = store.save(inp_file)
+        object_files(store)[0].unlink()
+
+        with pytest.raises(BackupError, match="Missing backup chunk"):
+            store.restore(manifest, inp_file)
+        assert inp_file.read_text() == INP_TEXT
+
+    def test_corrupted_chunk_raises(self, store, inp_file):
+        manifest = store.save(inp_file)
+        object_files(store)[0].write_bytes(b"tampered\n")
+
+        with pytest.raises(BackupError, match="checksum"):
+            store.restore(manifest, inp_file)
+        assert inp_file.read_text() == INP_TEXT
+
+    def test_invalid_compression(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported compression"):
+            BackupStore(tmp_path, compression="lzma")
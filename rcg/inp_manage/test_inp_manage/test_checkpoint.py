@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from rcg.exceptions import CheckpointError
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.inp_manage.checkpoint import JOBS_DIR, JobCheckpoint, row_key
+
+
+class TestRowKey:
+    def test_depends_on_offset_and_content(self):
+        key = row_key(0, 2.5, "mountains", "forests")
+
+        assert key == row_key(0, 2.5, LandForm.mountains, LandCover.forests)
+        assert key != row_key(1, 2.5, "mountains", "forests")
+        assert key != row_key(0, 2.6, "mountains", "forests")
+        assert key != row_key(0, 2.5, "mountains", "rural")
+
+
+class TestJobCheckpoint:
+    @pytest.fixture
+    def checkpoint(self, tmp_path):
+        return JobCheckpoint.for_model(tmp_path / "city.inp.gz", "nightly-1")
+
+    def test_path_is_next_to_model(self, checkpoint, tmp_path):
+        assert checkpoint.path == tmp_path / JOBS_DIR / "city.nightly-1.checkpoint.jsonl"
+
+    def test_invalid_job_id(self, tmp_path):
+        with pytest.raises(ValueError):
+            JobCheckpoint.for_model(tmp_path / "city.inp", "../escape")
+
+    def test_load_without_checkpoint(self, checkpoint):
+        state = checkpoint.load({"S1"})
+
+        assert state.applied == set()
+        assert (state.offset, state.chunks, state.lost, state.file_state) == (0, 0, 0, None)
+
+    def test_load_applied_rows(self, checkpoint):
+        keys = [row_key(offset, 1.0, "mountains", "forests") for offset in range(3)]
+        checkpoint.record_chunk(0, [0, 1], keys[:2], ["S1", "S2"])
+        checkpoint.record_commit(0, 2, {"size": 10, "mtime_ns": 1})
+        # Written but not committed before a crash
+        checkpoint.record_chunk(1, [2], keys[2:], ["S3"])
+
+        state = checkpoint.load({"S1", "S3"})
+
+        assert state.applied == {keys[0], keys[2]}
+        assert state.lost == 1
+        assert state.offset == 2
+        assert state.chunks == 2
+        assert state.file_state == {"size": 10, "mtime_ns": 1}
+
+    def test_truncated_last_record_is_ignored(self, checkpoint):
+        checkpoint.record_chunk(0, [0], [row_key(0, 1.0, "mountains", "forests")], ["S1"])
+        with open(checkpoint.path, "a") as f:
+            f.write('{"op": "commit", "chu')
+
+        assert checkpoint.load({"S1"}).chunks == 1
+
+    def test_corrupted_record_raises(self, checkpoint):
+        checkpoint.record_chunk(0, [0], [row_key(0, 1.0, "mountains", "forests")], ["S1"])
+        lines = checkpoint.path.read_text().splitlines()
+        checkpoint.path.write_text("\n".join([lines[0], "not json", lines[1]]) + "\n")
+
+        with pytest.raises(CheckpointError):
+            checkpoint.load({"S1"})
+
+    def test_checkpoint_of_another_job_raises(self, checkpoint, tmp_path):
+        checkpoint.record_commit(0, 1, {"size": 1, "mtime_ns": 1})
+        other = JobCheckpoint(checkpoint.path, "other")
+
+        with pytest.raises(CheckpointError):
+            other.load(set())
+
+    def test_header_is_written_once(self, checkpoint):
+        checkpoint.record_commit(0, 1, {})
+        checkpoint.record_commit(1, 2, {})
+
+        ops = [json.loads(line)["op"] for line in checkpoint.path.read_text().splitlines()]
+        assert ops == ["job", "commit", "commit"]
+
+    def test_remove(self, checkpoint):
+        checkpoint.record_commit(0, 1, {})
+        checkpoint.remove()
+        checkpoint.remove()
+
+        assert not checkpoint.path.exists()
@@ -0,0 +1,85 @@
+import gzip
+
+import pytest
+
+from rcg.inp_manage.compression import (
+    compression_suffix,
+    copy_inp,
+    detect_compression,
+    inp_stem,
+    is_inp_path,
+    open_inp,
+)
+
+INP_TEXT = "[JUNCTIONS]\n;;Name  Elevation\nJ1      146.61\n"
+
+
+class TestSuffixes:
+    @pytest.mark.parametrize(
+        "path, expected",
+        [("model.inp", None), ("model.inp.gz", "gzip"), ("model.INP.GZ", "gzip"), ("model.inp.zst", "zstd")],
+    )
+    def test_detect_compression(self, path, expected):
+        assert detect_compression(path) == expected
+
+    def test_compression_suffix(self):
+        assert compression_suffix(None) == ""
+        assert compression_suffix("gzip") == ".gz"
+        assert compression_suffix("zstd") == ".zst"
+
+    def test_compression_suffix_invalid(self):
+        with pytest.raises(ValueError, match="Unsupported compression"):
+            compression_suffix("bz2")
+
+    @pytest.mark.parametrize("path", ["a.inp", "a.INP", "a.inp.gz", "a.inp.zst"])
+    def test_is_inp_path(self, path):
+        assert is_inp_path(path)
+
+    @pytest.mark.parametrize("path", ["a.txt", "a.gz", "a.inp.bz2"])
+    def test_is_not_inp_path(self, path):
+        assert not is_inp_path(path)
+
+    @pytest.mark.parametrize("path", ["dir/city.inp", "city.inp.gz", "city.inp.zst"])
+    def test_inp_stem(self, path):
+        assert inp_stem(path) == "city"
+
+
+class TestStreams:
+    def test_open_gzip_text(self, tmp_path):
+        path = tmp_path / "model.inp.gz"
+        with open_inp(path, "wt") as f:
+            f.write(INP_TEXT)
+
+        assert gzip.decompress(path.read_bytes()).decode() == INP_TEXT
+        with open_inp(path, "rt") as f:
+            assert f.read() == INP_TEXT
+
+    def test_open_zstd_text(self, tmp_path):
+        pytest.importorskip("zstandard")
+        path = tmp_path / "model.inp.zst"
+        with open_inp(path, "wt") as f:
+            f.write(INP_TEXT)
+
+        with open_inp(path, "rt") as f:
+            assert f.read() == INP_TEXT
+
+    @pytest.mark.parametrize("target", ["copy.inp.gz", "copy.inp.zst"])
+    def test_copy_inp_round_trip(self, tmp_path, target):
+        if target.endswith(".zst"):
+            pytest.importorskip("zstandard")
+        plain = tmp_path / "model.inp"
+        plain.write_text(INP_TEXT)
+
+        compressed = copy_inp(plain, tmp_path / target)
+        restored = copy_inp(compressed, tmp_path / "restored.inp")
+
+        assert compressed.read_bytes() != INP_TEXT.encode()
+        assert restored.read_text() == INP_TEXT
+
+    def test_copy_inp_leaves_no_temporary_files(self, tmp_path):
+        plain = tmp_path / "model.inp"
+        plain.write_text(INP_TEXT)
+
+        copy_inp(plain, tmp_path / "model.inp.gz")
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["model.inp", "model.inp.gz"]
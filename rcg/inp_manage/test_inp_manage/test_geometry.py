@@ -0,0 +1,130 @@
+import json
+
+import numpy as np
+import pytest
+
+from rcg.inp_manage.geometry import PolygonSet, parse_wkt, read_geojson
+
+RECTANGLE = [(0.0, 0.0), (200.0, 0.0), (200.0, 100.0), (0.0, 100.0)]
+TRIANGLE = [(0.0, 0.0), (-30.0, -40.0), (30.0, -40.0)]
+
+
+class TestPolygonSet:
+    def test_areas_centroids_and_bounds(self):
+        polygons = PolygonSet.from_rings([RECTANGLE, TRIANGLE])
+
+        assert polygons.counts.tolist() == [4, 3]
+        assert polygons.signed_areas() == pytest.approx([20_000.0, 1_200.0])
+        assert polygons.areas_ha() == pytest.approx([2.0, 0.12])
+        assert polygons.centroids() == pytest.approx(np.array([[100.0, 50.0], [0.0, -80.0 / 3]]))
+        assert polygons.bounds().tolist() == [[0.0, 0.0, 200.0, 100.0], [-30.0, -40.0, 30.0, 0.0]]
+
+    def test_clockwise_rings_have_positive_area(self):
+        polygons = PolygonSet.from_rings([RECTANGLE[::-1]])
+
+        assert polygons.signed_areas() == pytest.approx([-20_000.0])
+        assert polygons.areas_ha() == pytest.approx([2.0])
+        assert polygons.centroids() == pytest.approx(np.array([[100.0, 50.0]]))
+
+    def test_closing_vertex_is_dropped(self):
+        polygons = PolygonSet.from_rings([RECTANGLE + [RECTANGLE[0]]])
+
+        assert len(polygons.vertices) == 4
+
+    def test_widths(self):
+        polygons = PolygonSet.from_rings([RECTANGLE, [(0.0, 0.0), (100.0, 0.0), (100.0, 100.0), (0.0, 100.0)]])
+
+        assert polygons.widths([50.0, 25.0]) == pytest.approx([400.0, 400.0])
+        # The default flow length is twice the longer bounding-box side, as for generated squares
+        assert polygons.widths() == pytest.approx([50.0, 50.0])
+        with pytest.raises(ValueError):
+            polygons.widths([50.0])
+
+    def test_matches_loop_over_many_polygons(self):
+        rng = np.random.default_rng(0)
+        rings = []
+        for count in rng.integers(3, 12, 200):
+            angles = np.sort(rng.random(count)) * 2 * np.pi
+            rings.append(np.column_stack([np.cos(angles), np.sin(angles)]) * rng.random() * 100 + rng.random(2) * 1000)
+
+        polygons = PolygonSet.from_rings(rings)
+
+        expected = [0.5 * abs(np.dot(r[:, 0], np.roll(r[:, 1], -1)) - np.dot(np.roll(r[:, 0], -1), r[:, 1])) for r in rings]
+        assert np.abs(polygons.signed_areas()) == pytest.approx(expected)
+
+    @pytest.mark.parametrize("rings", [[[(0.0, 0.0), (1.0, 1.0)]], [[(0.0, 0.0), (1.0, 1.0), (0.0, 0.0)]]])
+    def test_rejects_rings_with_too_few_vertices(self, rings):
+        with pytest.raises(ValueError):
+            PolygonSet.from_rings(rings)
+
+    def test_extra_coordinates_are_dropped(self):
+        polygons = PolygonSet.from_rings([[(x, y, 7.0, 1.0) for x, y in RECTANGLE]])
+
+        assert polygons.vertices.tolist() == [list(vertex) for vertex in RECTANGLE]
+
+    @pytest.mark.parametrize("ring", [[0.0, 0.0, 1.0, 0.0, 1.0, 1.0], [(0.0,), (1.0,), (2.0,)]])
+    def test_rejects_vertices_without_x_and_y(self, ring):
+        with pytest.raises(ValueError, match="x and y"):
+            PolygonSet.from_rings([ring])
+
+    def test_degenerate_polygon_has_no_centroid(self):
+        with pytest.raises(ValueError):
+            PolygonSet.from_rings([[(0.0, 0.0), (1.0, 1.0), (2.0, 2.0)]]).centroids()
+
+
+def test_read_geojson(tmp_path):
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": "A", "geometry": {"type": "Polygon", "coordinates": [RECTANGLE + [RECTANGLE[0]]]}},
+            {
+                "type": "Feature",
+                "properties": {"name": "B"},
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [[TRIANGLE[::-1]], [[(x, y, 12.5) for x, y in RECTANGLE]]],
+                },
+            },
+        ],
+    }
+    path = tmp_path / "catchments.geojson"
+    path.write_text(json.dumps(collection))
+
+    polygons = read_geojson(path)
+
+    assert polygons.names == ["A", "B"]
+    # The largest part of a MultiPolygon is used
+    assert polygons.areas_ha() == pytest.approx([2.0, 2.0])
+    assert polygons.vertices[polygons.offsets[1] :].tolist() == [list(vertex) for vertex in RECTANGLE]
+
+
+def test_parse_wkt():
+    polygons = parse_wkt(
+        [
+            "POLYGON ((0 0, 200 0, 200 100, 0 100, 0 0))",
+            "MULTIPOLYGON (((0 0, -30 -40, 30 -40, 0 0)), ((500 500, 501 500, 501 501)))",
+        ]
+    )
+
+    assert polygons.areas_ha() == pytest.approx([2.0, 0.12])
+    with pytest.raises(ValueError):
+        parse_wkt("LINESTRING (0 0, 1 1)")
+
+
+def test_parse_wkt_uses_largest_part_and_exterior_rings():
+    polygons = parse_wkt(
+        [
+            "MULTIPOLYGON (((500 500, 501 500, 501 501)), ((0 0, 200 0, 200 100, 0 100, 0 0), (10 10, 20 10, 20 20)))",
+            "POLYGON Z ((0 0 5, 200 0 5, 200 100 6, 0 100 6, 0 0 5), (10 10 5, 20 10 5, 20 20 5))",
+        ]
+    )
+
+    assert polygons.areas_ha() == pytest.approx([2.0, 2.0])
+    assert polygons.vertices[: polygons.offsets[1]].tolist() == [list(vertex) for vertex in RECTANGLE]
+
+
+def test_multipolygon_rule_is_the_same_for_geojson_and_wkt():
+    geojson = read_geojson({"type": "MultiPolygon", "coordinates": [[TRIANGLE], [RECTANGLE]]})
+    wkt = parse_wkt("MULTIPOLYGON (((0 0, -30 -40, 30 -40)), ((0 0, 200 0, 200 100, 0 100)))")
+
+    np.testing.assert_array_equal(geojson.vertices, wkt.vertices)
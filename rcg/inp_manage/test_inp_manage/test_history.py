@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from rcg.exceptions import BackupError
+from rcg.inp_manage.history import DeltaJournal, HistoryEntry, SectionDelta, frame_rows
+
+
+def make_entry(label="edit"):
+    delta = SectionDelta(
+        section="[SUBAREAS]",
+        attribute="subareas",
+        columns=["N-Imperv", "RouteTo"],
+        index_name="Name",
+        before={"S1": [[0.015, "OUTLET"]], "S2": None},
+        after={"S1": [[0.013, "OUTLET"]], "S2": [[0.02, None]]},
+    )
+    return HistoryEntry(label, [delta])
+
+
+class TestSectionDelta:
+    def test_added_and_changed(self):
+        delta = make_entry().deltas[0]
+        assert delta.added == ["S2"]
+        assert delta.changed == ["S1"]
+
+    def test_rows_frame(self):
+        frame = make_entry().deltas[0].rows_frame("after")
+        assert list(frame.index) == ["S1", "S2"]
+        assert frame.index.name == "Name"
+        assert frame.loc["S2", "N-Imperv"] == 0.02
+        assert make_entry().deltas[0].rows_frame("before").index.tolist() == ["S1"]
+
+    def test_frame_rows_handles_missing_values(self):
+        frame = pd.DataFrame({"X": [1.0, 2.0, None]}, index=["P1", "P1", "P2"])
+        assert frame_rows(frame, "P1") == [[1.0], [2.0]]
+        assert frame_rows(frame, "P2") == [[None]]
+        assert frame_rows(frame, "P3") is None
+
+
+class TestDeltaJournal:
+    def test_stacks_survive_reload(self, tmp_path):
+        path = tmp_path / "model.journal.jsonl"
+        journal = DeltaJournal(path)
+        first, second, third = make_entry("first"), make_entry("second"), make_entry("third")
+        for entry in (first, second, third):
+            journal.record(entry)
+        journal.undo()
+        journal.undo()
+        journal.redo()
+
+        reloaded = DeltaJournal(path)
+
+        assert [entry.label for entry in reloaded.undo_stack] == ["first", "second"]
+        assert [entry.label for entry in reloaded.redo_stack] == ["third"]
+        assert reloaded.undo_stack[0].deltas[0].after == first.deltas[0].after
+
+    def test_record_clears_redo(self):
+        journal = DeltaJournal()
+        journal.record(make_entry())
+        journal.undo()
+        journal.record(make_entry())
+
+        assert journal.redo() is None
+        assert len(journal.undo_stack) == 1
+
+    def test_truncated_last_record_is_ignored(self, tmp_path):
+        path = tmp_path / "model.journal.jsonl"
+        DeltaJournal(path).record(make_entry())
+        with open(path, "a") as f:
+            f.write('{"op": "do", "entry": {"id"')
+
+        assert len(DeltaJournal(path).undo_stack) == 1
+
+    def test_corrupted_record_raises(self, tmp_path):
+        path = tmp_path / "model.journal.jsonl"
+        path.write_text("not json\n")
+
+        with pytest.raises(BackupError, match="Corrupted journal"):
+            DeltaJournal(path)
+
+    def test_clear_removes_file(self, tmp_path):
+        path = tmp_path / "model.journal.jsonl"
+        journal = DeltaJournal(path)
+        journal.record(make_entry())
+
+        journal.clear()
+
+        assert not path.exists()
+        assert journal.undo_stack == []
@@ -1,14 +1,29 @@
+import gzip
+import json
+import logging
 import math
 import os
 import tempfile
+import threading
+import time
 
+import numpy as np
 import pandas as pd
 import pytest
 from swmmio import Model
 
+from rcg import metrics
+from rcg.exceptions import ModelOperationError, OperationCancelled
 from rcg.fuzzy.categories import LandCover, LandForm
 from rcg.fuzzy.engine import Prototype
+from rcg.inp_manage.checkpoint import JobCheckpoint
+from rcg.inp_manage.compression import copy_inp
+from rcg.inp_manage.geometry import PolygonSet
 from rcg.inp_manage.inp import BuildCatchments, SubcatchmentConfig
+from rcg.inp_manage.locking import FileLock
+from rcg.inp_manage.spatial import OutletConstraints
+from rcg.inp_manage.tracing import TimingRecorder
+from rcg.progress import CancellationToken
 
 
 class TestBuildCatchments:
@@ -196,6 +211,102 @@ class TestBuildCatchments:
 
             assert len(test_model.model.inp.subcatchments) == initial_count + 1
 
+    def test_add_subcatchment_append_mode_keeps_existing_lines(self, temp_inp_file):
+        with open(temp_inp_file) as f:
+            original_lines = f.read().splitlines()
+
+        test_model = BuildCatchments(str(temp_inp_file), backup=False, write_mode="append")
+        new_id = test_model._get_new_subcatchment_id()
+        assert test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural") == new_id
+
+        with open(temp_inp_file) as f:
+            new_lines = f.read().splitlines()
+
+        added_lines = [line for line in new_lines if line.split()[:1] == [new_id]]
+        assert len(new_lines) == len(original_lines) + len(added_lines)
+        assert len(added_lines) == 7  # subcatchment, subarea, 4 polygon vertices, infiltration
+        assert [line for line in new_lines if line not in added_lines] == original_lines
+
+        reloaded = Model(str(temp_inp_file))
+        assert new_id in reloaded.inp.subcatchments.index
+        assert reloaded.inp.subcatchments.loc[new_id, "Area"] == pytest.approx(5.5)
+        assert new_id in reloaded.inp.infiltration.index
+
+    def test_add_subcatchment_to_gzip_model(self, temp_inp_file):
+        gz_path = copy_inp(temp_inp_file, temp_inp_file.with_name("model.inp.gz"))
+
+        test_model = BuildCatchments(str(gz_path), backup=False, write_mode="append")
+        new_id = test_model._get_new_subcatchment_id()
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+
+        with gzip.open(gz_path, "rt") as f:
+            content = f.read()
+        assert content.startswith(temp_inp_file.read_text().split("[SUBCATCHMENTS]")[0])
+        assert content.count(f"\n{new_id} ") == 7
+
+        reloaded = BuildCatchments(str(gz_path), backup=False)
+        assert new_id in reloaded.model.inp.subcatchments.index
+
+    def test_compressed_save_streams_working_copy(self, monkeypatch, caplog, temp_inp_file):
+        gz_path = copy_inp(temp_inp_file, temp_inp_file.with_name("model.inp.gz"))
+        test_model = BuildCatchments(str(gz_path), backup=False)
+        test_model.model.inp.subcatchments.loc[test_model.model.inp.subcatchments.index[0], "Area"] = 42.0
+        sources = []
+
+        def recording_copy_inp(source, destination):
+            sources.append(str(source))
+            return copy_inp(source, destination)
+
+        monkeypatch.setattr("rcg.inp_manage.inp.copy_inp", recording_copy_inp)
+        output_path = temp_inp_file.with_name("saved.inp.gz")
+
+        with caplog.at_level(logging.INFO, logger="rcg.inp_manage.inp"):
+            test_model.save(output_path)
+
+        # No staged plain copy: the compressed file is streamed from the working copy
+        assert sources == [str(test_model.model.inp.path)]
+        assert f"Model saved to {output_path}" in caplog.text
+        saved = BuildCatchments(str(output_path), backup=False)
+        assert saved.model.inp.subcatchments["Area"].iloc[0] == pytest.approx(42.0)
+        saved.close()
+        test_model.close()
+
+    def test_error_in_with_block_is_logged(self, caplog, temp_inp_file):
+        with caplog.at_level(logging.INFO, logger="rcg.inp_manage.inp"), pytest.raises(RuntimeError):
+            with BuildCatchments(str(temp_inp_file), backup=False):
+                raise RuntimeError("boom")
+
+        assert "Error occurred: boom" in caplog.text
+
+    def test_close_removes_working_copy(self, temp_inp_file):
+        gz_path = copy_inp(temp_inp_file, temp_inp_file.with_name("model.inp.gz"))
+
+        with BuildCatchments(str(gz_path), backup=False) as test_model:
+            working_dir = os.path.dirname(test_model.model.inp.path)
+            assert os.path.isdir(working_dir)
+
+        assert not os.path.exists(working_dir)
+        test_model.close()
+
+    def test_compressed_backup_restores(self, temp_inp_file):
+        original_content = temp_inp_file.read_text()
+        test_model = BuildCatchments(str(temp_inp_file), backup=True, backup_compression="gzip")
+
+        backup_path = test_model._create_backup()
+        chunk_files = list((backup_path.parent / "objects").glob("*/*"))
+        assert chunk_files
+        assert all(path.name.endswith(".gz") for path in chunk_files)
+
+        with open(temp_inp_file, "a") as f:
+            f.write("\n; Modified content")
+        test_model.restore_backup()
+
+        assert temp_inp_file.read_text() == original_content
+
+    def test_invalid_write_mode(self, model_path):
+        with pytest.raises(ValueError, match="Invalid write_mode"):
+            BuildCatchments(model_path, backup=False, write_mode="rewrite")
+
     def test_backup_enabled_by_default(self, model_path):
         with tempfile.TemporaryDirectory() as tempdir:
             model = Model(model_path)
@@ -253,6 +364,32 @@ class TestBuildCatchments:
 
             assert restored_content == original_content
 
+    def test_repeated_backups_share_chunks(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=True)
+        objects_dir = temp_inp_file.parent / ".rcg_backups" / "objects"
+
+        first = test_model._create_backup()
+        chunk_count = len(list(objects_dir.glob("*/*")))
+        second = test_model._create_backup()
+
+        assert first != second
+        assert len(list(objects_dir.glob("*/*"))) == chunk_count
+        assert test_model.get_backup_history() == [first, second]
+
+    def test_cleanup_backups_removes_manifests(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=True)
+        first = test_model._create_backup()
+        with open(temp_inp_file, "a") as f:
+            f.write("\n; Modified content\n")
+        second = test_model._create_backup()
+
+        assert test_model.cleanup_backups(keep_latest=1) == 1
+        assert not first.exists()
+        assert test_model.get_backup_history() == [second]
+
+        test_model.restore_backup(second)
+        assert temp_inp_file.read_text().endswith("; Modified content\n")
+
     def test_context_manager_creates_backup(self, model_path):
         with tempfile.TemporaryDirectory() as tempdir:
             model = Model(model_path)
@@ -270,27 +407,477 @@ class TestBuildCatchments:
             model.inp.save(inp_path)
 
             test_model = BuildCatchments(inp_path, backup=True)
-
-            # Read original content
-            with open(inp_path) as f:
-                original_content = f.read()
+            initial_ids = list(test_model.model.inp.subcatchments.index)
+            new_id = test_model._get_new_subcatchment_id()
 
             # Transaction that fails
             try:
                 with test_model.transaction():
-                    # Modify file
-                    with open(inp_path, "a") as f:
-                        f.write("\n; Modified content")
+                    test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
                     # Raise an error to trigger rollback
                     raise ValueError("Intentional error")
             except ValueError:
                 pass
 
-            # Check content is restored
-            with open(inp_path) as f:
-                restored_content = f.read()
+            # Check the edit is reverted in memory, on disk and in the history
+            assert list(test_model.model.inp.subcatchments.index) == initial_ids
+            assert new_id not in Model(inp_path).inp.subcatchments.index
+            assert test_model.undo() is None
+            assert test_model.redo() is None
+
+    def test_transaction_rollback_is_byte_exact_in_append_mode(self, temp_inp_file):
+        original_content = temp_inp_file.read_bytes()
+        test_model = BuildCatchments(str(temp_inp_file), backup=True, write_mode="append")
+
+        with pytest.raises(ValueError):
+            with test_model.transaction():
+                test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+                test_model.add_subcatchment(area=2.0, land_form="mountains", land_cover="forests")
+                raise ValueError("Intentional error")
+
+        assert temp_inp_file.read_bytes() == original_content
+
+    def test_add_subcatchment_writes_one_batch(self, temp_inp_file, mocker):
+        test_model = BuildCatchments(str(temp_inp_file), backup=False, write_mode="append")
+        commit = mocker.spy(test_model.wal, "commit")
+
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+
+        commit.assert_called_once()
+        edits = commit.call_args.args[0]
+        assert [edit.section_header for edit in edits] == ["[SUBCATCHMENTS]", "[SUBAREAS]", "[POLYGONS]", "[INFILTRATION]"]
+        assert not test_model.wal.path.exists()
+
+    def test_add_subcatchment_records_stage_timings(self, temp_inp_file):
+        recorder = TimingRecorder()
+        test_model = BuildCatchments(str(temp_inp_file), backup=False, recorder=recorder)
+
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+
+        stats = test_model.stats()
+        for stage in [
+            "load_model",
+            "add_subcatchment",
+            "allocate_ids",
+            "prototype",
+            "get_linguistic",
+            "layout",
+            "assign_outlets",
+            "apply_rows[SUBCATCHMENTS]",
+            "apply_rows[INFILTRATION]",
+            "format_section[SUBAREAS]",
+            "persist",
+            "write",
+        ]:
+            assert stats[stage]["count"] >= 1, stage
+        assert stats["add_subcatchment"]["total_s"] >= stats["write"]["total_s"]
+        assert BuildCatchments(str(temp_inp_file), backup=False).stats() == {}
+
+    def test_add_subcatchment_records_io_metrics(self, temp_inp_file, tmp_path):
+        read = metrics.INP_READ_BYTES.value()
+        written = metrics.INP_WRITTEN_BYTES.value()
+        rewrites = metrics.SECTION_REWRITES.value(section="[SUBAREAS]", mode="replace")
+        backed_up = metrics.BACKUP_SOURCE_BYTES.value()
+
+        with BuildCatchments(str(temp_inp_file)) as test_model:
+            test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
 
-            assert restored_content == original_content
+        size = os.path.getsize(temp_inp_file)
+        assert metrics.INP_READ_BYTES.value() > read
+        assert metrics.INP_WRITTEN_BYTES.value() == written + size
+        assert metrics.SECTION_REWRITES.value(section="[SUBAREAS]", mode="replace") == rewrites + 1
+        assert metrics.BACKUP_SOURCE_BYTES.value() > backed_up
+
+        prometheus = metrics.REGISTRY.save(tmp_path / "rcg.prom").read_text()
+        assert "# TYPE rcg_inp_written_bytes_total counter" in prometheus
+        assert 'rcg_section_rewrites_total{section="[SUBAREAS]",mode="replace"}' in prometheus
+        assert 'rcg_engine_inference_seconds_bucket{le="+Inf"}' in prometheus
+        exported = json.loads(metrics.REGISTRY.save(tmp_path / "rcg.json").read_text())
+        assert exported["rcg_inp_written_bytes_total"]["samples"] == [
+            {"labels": {}, "value": metrics.INP_WRITTEN_BYTES.value()}
+        ]
+
+    def test_add_subcatchments_logs_each_row_at_debug(self, temp_inp_file):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        inp_logger = logging.getLogger("rcg.inp_manage.inp")
+        level = inp_logger.level
+        inp_logger.addHandler(handler)
+        try:
+            test_model = BuildCatchments(str(temp_inp_file), backup=False)
+            inp_logger.setLevel(logging.INFO)
+            test_model.add_subcatchment(area=2.0, land_form="mountains", land_cover="forests")
+            assert records == []
+
+            inp_logger.setLevel(logging.DEBUG)
+            names = test_model.add_subcatchments([(1.0, "mountains", "forests"), (3.0, "mountains", "rural")])
+        finally:
+            inp_logger.removeHandler(handler)
+            inp_logger.setLevel(level)
+
+        assert [record.subcatchment for record in records] == names
+        assert [record.area for record in records] == [1.0, 3.0]
+        assert records[1].land_cover == "rural"
+        assert records[0].getMessage() == f"Prepared subcatchment {names[0]}"
+
+    def test_run_batch_resumes_after_crash(self, temp_inp_file):
+        specs = [(1.0 + offset, "mountains", "forests") for offset in range(7)]
+
+        def crashing(rows):
+            for offset, spec in enumerate(rows):
+                if offset == 5:
+                    raise RuntimeError("worker killed")
+                yield spec
+
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+        existing = len(test_model.model.inp.subcatchments)
+        with pytest.raises(RuntimeError):
+            test_model.run_batch(crashing(specs), "job-1", chunk_rows=2)
+
+        resumed = BuildCatchments(str(temp_inp_file), backup=False).run_batch(specs, "job-1", chunk_rows=2)
+
+        assert resumed.resumed
+        assert resumed.skipped == 4
+        assert resumed.added == 3
+        subcatchments = Model(str(temp_inp_file)).inp.subcatchments
+        assert len(subcatchments) == existing + 7
+        assert sorted(subcatchments["Area"].tolist()[-7:]) == [spec[0] for spec in specs]
+
+    def test_run_batch_never_duplicates_written_chunk(self, temp_inp_file, monkeypatch):
+        specs = [(2.0, "mountains", "forests"), (3.0, "mountains", "rural")]
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+        existing = len(test_model.model.inp.subcatchments)
+
+        def crash(*args):
+            raise RuntimeError("worker killed")
+
+        # The chunk reaches the file, but the process dies before its commit record
+        with monkeypatch.context() as patch:
+            patch.setattr(JobCheckpoint, "record_commit", crash)
+            with pytest.raises(RuntimeError):
+                test_model.run_batch(specs, "job-2")
+
+        result = BuildCatchments(str(temp_inp_file), backup=False).run_batch(specs, "job-2")
+
+        assert (result.added, result.skipped) == (0, 2)
+        assert len(Model(str(temp_inp_file)).inp.subcatchments) == existing + 2
+
+    def test_run_batch_reapplies_lost_rows(self, temp_inp_file):
+        specs = [(2.0, "mountains", "forests")]
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+        (name,) = test_model.run_batch(specs, "job-3").names
+        test_model.undo()
+        assert name not in Model(str(temp_inp_file)).inp.subcatchments.index
+
+        result = test_model.run_batch(specs, "job-3")
+
+        assert result.added == 1
+        assert result.skipped == 0
+        assert result.names[0] in Model(str(temp_inp_file)).inp.subcatchments.index
+
+    def test_run_batch_reports_progress(self, temp_inp_file):
+        specs = [(1.0 + offset, "mountains", "forests") for offset in range(5)]
+        reports = []
+
+        BuildCatchments(str(temp_inp_file), backup=False).run_batch(specs, "job-4", chunk_rows=2, progress=reports.append)
+
+        assert [report.done for report in reports] == [2, 4, 5]
+        assert all(report.total == 5 for report in reports)
+        assert reports[-1].fraction == 1.0
+        assert reports[-1].eta_s == 0
+
+    def test_run_batch_cancel_keeps_committed_chunks(self, temp_inp_file):
+        specs = [(1.0 + offset, "mountains", "forests") for offset in range(6)]
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+        existing = len(test_model.model.inp.subcatchments)
+        token = CancellationToken()
+
+        with pytest.raises(OperationCancelled) as error:
+            test_model.run_batch(specs, "job-5", chunk_rows=2, progress=lambda report: token.cancel(), cancel=token)
+
+        assert error.value.done == 2
+        assert len(test_model.model.inp.subcatchments) == existing + 2
+        assert len(Model(str(temp_inp_file)).inp.subcatchments) == existing + 2
+
+        resumed = BuildCatchments(str(temp_inp_file), backup=False).run_batch(specs, "job-5", chunk_rows=2)
+        assert (resumed.added, resumed.skipped) == (4, 2)
+
+    def test_outlet_is_nearest_node(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+
+        test_model.add_subcatchment(area=0.01, land_form="flats_and_plateaus", land_cover="rural")
+        test_model.add_subcatchment(
+            area=0.01,
+            land_form="flats_and_plateaus",
+            land_cover="rural",
+            outlet_constraints=OutletConstraints(node_types={"outfall"}),
+        )
+
+        reloaded = Model(str(temp_inp_file)).inp
+        nearest, outfall = reloaded.subcatchments.index[-2:]
+        centroid = reloaded.polygons.loc[nearest, ["X", "Y"]].mean()
+        distances = ((reloaded.coordinates[["X", "Y"]] - centroid) ** 2).sum(axis=1)
+        assert reloaded.subcatchments.loc[nearest, "Outlet"] == distances.idxmin()
+        assert reloaded.subcatchments.loc[outfall, "Outlet"] == "O4"
+
+    def test_raingage_is_nearest_gage(self, temp_inp_file):
+        # New squares are packed next to the nodes; put one gage there and one across the batch
+        j3_x, j3_y = Model(str(temp_inp_file)).inp.coordinates.loc["J3", ["X", "Y"]]
+        gages = pd.DataFrame({"X": [j3_x, j3_x + 600], "Y": [j3_y, j3_y - 600]}, index=["RG_near", "RG_far"])
+        text = temp_inp_file.read_text()
+        raingages = "".join(f"{name} INTENSITY 0:01 1.0 TIMESERIES test_series\n" for name in gages.index)
+        symbols = "".join(f"{name} {row.X} {row.Y}\n" for name, row in gages.iterrows())
+        text = text.replace("[SUBCATCHMENTS]", f"{raingages}\n[SUBCATCHMENTS]", 1)
+        text = text.replace("[PROFILES]", f"{symbols}\n[PROFILES]", 1)
+        temp_inp_file.write_text(text)
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+
+        names = test_model.add_subcatchments([(1.0, "flats_and_plateaus", "rural")] * 36)
+
+        reloaded = Model(str(temp_inp_file)).inp
+        for name in names:
+            centroid = reloaded.polygons.loc[name, ["X", "Y"]].mean()
+            assert reloaded.subcatchments.loc[name, "Raingage"] == ((gages - centroid) ** 2).sum(axis=1).idxmin()
+        assert set(reloaded.subcatchments.loc[names, "Raingage"]) == {"RG_near", "RG_far"}
+
+    def test_unsatisfiable_outlet_constraints(self, temp_inp_file):
+        original_content = temp_inp_file.read_bytes()
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+        initial_count = len(test_model.model.inp.subcatchments)
+
+        with pytest.raises(ModelOperationError, match="outlet constraints"):
+            test_model.add_subcatchment(1.0, "flats_and_plateaus", "rural", outlet_constraints=OutletConstraints(max_invert=0))
+
+        assert len(test_model.model.inp.subcatchments) == initial_count
+        assert temp_inp_file.read_bytes() == original_content
+
+    def test_add_subcatchments_batch(self, temp_inp_file, mocker):
+        test_model = BuildCatchments(str(temp_inp_file), backup=False, write_mode="append")
+        initial_count = len(test_model.model.inp.subcatchments)
+        commit = mocker.spy(test_model.wal, "commit")
+
+        names = test_model.add_subcatchments(
+            [(1.0, "flats_and_plateaus", "rural"), (0.5, LandForm.mountains, LandCover.forests)] * 50
+        )
+
+        assert len(names) == len(set(names)) == 100
+        commit.assert_called_once()
+        assert len(test_model.history.undo_stack) == 1
+        reloaded = Model(str(temp_inp_file))
+        assert len(reloaded.inp.subcatchments) == initial_count + 100
+        assert set(reloaded.inp.subcatchments.loc[names, "Outlet"]) <= {"J1", "J3", "O4"}
+        assert reloaded.inp.polygons.loc[names].index.value_counts().eq(4).all()
+        bounds = reloaded.inp.polygons.groupby(level=0).agg(["min", "max"])
+        new, old = bounds.loc[names], bounds.drop(index=names)
+        for _, box in new.iterrows():
+            assert not (
+                (box[("X", "min")] < old[("X", "max")])
+                & (old[("X", "min")] < box[("X", "max")])
+                & (box[("Y", "min")] < old[("Y", "max")])
+                & (old[("Y", "min")] < box[("Y", "max")])
+            ).any()
+
+        test_model.undo()
+        assert len(Model(str(temp_inp_file)).inp.subcatchments) == initial_count
+
+    def test_add_subcatchments_from_polygons(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+        j3 = test_model.model.inp.coordinates.loc["J3"]
+        x, y = float(j3["X"]), float(j3["Y"])
+        polygons = PolygonSet.from_rings(
+            [[(x, y), (x + 200, y), (x + 200, y + 100), (x, y + 100)], [(x, y), (x - 30, y - 40), (x + 30, y - 40)]],
+            names=["Field", "Orchard"],
+        )
+
+        names = test_model.add_subcatchments_from_polygons(
+            polygons, "flats_and_plateaus", ["rural", "forests"], flow_lengths=[50.0, 40.0]
+        )
+
+        assert names == ["Field", "Orchard"]
+        reloaded = Model(str(temp_inp_file))
+        subcatchments = reloaded.inp.subcatchments.loc[names]
+        assert subcatchments["Area"].tolist() == pytest.approx([2.0, 0.12])
+        assert subcatchments["Width"].tolist() == pytest.approx([400.0, 30.0])
+        assert reloaded.inp.polygons.loc["Field", ["X", "Y"]].to_numpy() == pytest.approx(
+            np.array([[x, y], [x + 200, y], [x + 200, y + 100], [x, y + 100]])
+        )
+        assert len(reloaded.inp.polygons.loc["Orchard"]) == 3
+
+        with pytest.raises(ValueError, match="names"):
+            test_model.add_subcatchments_from_polygons(polygons, "flats_and_plateaus", "rural")
+
+    def test_transaction_writes_on_success_only(self, temp_inp_file):
+        original_content = temp_inp_file.read_bytes()
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+
+        with test_model.transaction():
+            test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+            test_model.add_subcatchment(area=2.0, land_form="mountains", land_cover="forests")
+            assert temp_inp_file.read_bytes() == original_content
+
+        reloaded = Model(str(temp_inp_file))
+        assert len(reloaded.inp.subcatchments) == len(test_model.model.inp.subcatchments)
+        assert len(test_model.history.undo_stack) == 2
+
+    def test_undo_not_allowed_inside_transaction(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=False)
+
+        with pytest.raises(ModelOperationError, match="inside a transaction"):
+            with test_model.transaction():
+                test_model.undo()
+
+    def test_open_replays_interrupted_batch(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=False, write_mode="append")
+        new_id = test_model._get_new_subcatchment_id()
+        # Simulate a crash after the journal was written but before the batch was applied
+        test_model.wal.commit = lambda edits, *args: test_model.wal._write(edits)
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+        assert new_id not in Model(str(temp_inp_file)).inp.subareas.index
+
+        reopened = BuildCatchments(str(temp_inp_file), backup=False)
+
+        assert new_id in reopened.model.inp.subcatchments.index
+        assert new_id in reopened.model.inp.subareas.index
+        assert not reopened.wal.path.exists()
+
+    @pytest.mark.parametrize("write_mode", ["replace", "append"])
+    def test_stale_writers_do_not_lose_updates(self, temp_inp_file, write_mode):
+        first = BuildCatchments(str(temp_inp_file), backup=False, write_mode=write_mode)
+        second = BuildCatchments(str(temp_inp_file), backup=False, write_mode=write_mode)
+        initial_count = len(first.model.inp.subcatchments)
+        new_id = first._get_new_subcatchment_id()
+        assert second._get_new_subcatchment_id() == new_id
+        for attribute in ("subareas", "polygons", "infiltration"):
+            getattr(second.model.inp, attribute)
+
+        first.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+        # Both writers derived the same ID; the second one is stale at commit time
+        second._refresh_if_changed = lambda: None
+        second.add_subcatchment(area=2.0, land_form="mountains", land_cover="forests")
+
+        reloaded = Model(str(temp_inp_file))
+        assert len(reloaded.inp.subcatchments) == initial_count + 2
+        assert reloaded.inp.subcatchments.loc[new_id, "Area"] == pytest.approx(5.5)
+        renamed_id = next(iter(second.history.undo_stack[-1].deltas[0].after))
+        assert renamed_id != new_id
+        assert reloaded.inp.subcatchments.loc[renamed_id, "Area"] == pytest.approx(2.0)
+        assert renamed_id in reloaded.inp.subareas.index
+        assert second.lock_metrics.conflicts == 1
+        assert second.lock_metrics.renamed_ids == 1
+
+    def test_renamed_id_is_returned(self, temp_inp_file):
+        first = BuildCatchments(str(temp_inp_file), backup=False)
+        second = BuildCatchments(str(temp_inp_file), backup=False)
+        first_id = first.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+        second._refresh_if_changed = lambda: None
+
+        second_id = second.add_subcatchment(area=2.0, land_form="mountains", land_cover="forests")
+
+        reloaded = Model(str(temp_inp_file))
+        assert second_id != first_id
+        assert reloaded.inp.subcatchments.loc[first_id, "Area"] == pytest.approx(5.5)
+        assert reloaded.inp.subcatchments.loc[second_id, "Area"] == pytest.approx(2.0)
+        assert second.history.undo_stack[-1].label == f"add_subcatchment {second_id}"
+
+    def test_batch_chunks_log_written_ids(self, temp_inp_file):
+        first = BuildCatchments(str(temp_inp_file), backup=False)
+        second = BuildCatchments(str(temp_inp_file), backup=False)
+        first.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+
+        result = second.run_batch([(2.0, "mountains", "forests")] * 3, job_id="stale", chunk_rows=2)
+
+        subcatchments = Model(str(temp_inp_file)).inp.subcatchments
+        assert subcatchments.loc[result.names, "Area"].tolist() == pytest.approx([2.0] * 3)
+        state = JobCheckpoint(result.checkpoint_path, "stale").load(set(subcatchments.index))
+        assert (state.chunks, len(state.applied), state.lost) == (2, 3, 0)
+        assert second.lock_metrics.renamed_ids == 0
+
+    def test_writer_reloads_before_allocating_ids(self, temp_inp_file):
+        first = BuildCatchments(str(temp_inp_file), backup=False)
+        second = BuildCatchments(str(temp_inp_file), backup=False)
+        initial_count = len(second.model.inp.subcatchments)
+
+        first.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+        second.add_subcatchment(area=2.0, land_form="mountains", land_cover="forests")
+
+        assert second.lock_metrics.reloads == 1
+        assert second.lock_metrics.renamed_ids == 0
+        assert len(Model(str(temp_inp_file)).inp.subcatchments) == initial_count + 2
+        assert len(second.model.inp.subcatchments) == initial_count + 2
+
+    def test_queued_writers_are_coalesced(self, temp_inp_file):
+        writers = [BuildCatchments(str(temp_inp_file), backup=False, write_mode="append") for _ in range(3)]
+        initial_count = len(writers[0].model.inp.subcatchments)
+        blocker = FileLock(writers[0].lock.path)
+        blocker.acquire()
+
+        threads = [
+            threading.Thread(target=writer.add_subcatchment, args=(1.0, "flats_and_plateaus", "rural")) for writer in writers
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 30
+        while len(writers[0].write_queue.pending()) < len(writers) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        blocker.release()
+        for thread in threads:
+            thread.join()
+
+        metrics = [writer.lock_metrics for writer in writers]
+        assert sum(m.batches_written for m in metrics) == len(writers)
+        assert sum(m.batches_coalesced for m in metrics) == len(writers) - 1
+        assert sum(m.batches_delegated for m in metrics) == len(writers) - 1
+        assert sum(m.contended for m in metrics) == len(writers)
+
+        reloaded = Model(str(temp_inp_file))
+        assert len(reloaded.inp.subcatchments) == initial_count + len(writers)
+        assert reloaded.inp.polygons.index.value_counts().max() == 4
+        for writer in writers:
+            assert len(writer.model.inp.subcatchments) == initial_count + len(writers)
+        assert list(writers[0].write_queue.directory.iterdir()) == []
+
+    def test_undo_and_redo(self, temp_inp_file):
+        original_content = temp_inp_file.read_bytes()
+        test_model = BuildCatchments(str(temp_inp_file), backup=True, write_mode="append")
+        new_id = test_model._get_new_subcatchment_id()
+
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+        edited_content = temp_inp_file.read_bytes()
+
+        entry = test_model.undo()
+        assert entry.label == f"add_subcatchment {new_id}"
+        assert [delta.section for delta in entry.deltas] == ["[SUBCATCHMENTS]", "[SUBAREAS]", "[POLYGONS]", "[INFILTRATION]"]
+        assert all(delta.added == [new_id] for delta in entry.deltas)
+        assert temp_inp_file.read_bytes() == original_content
+        assert new_id not in test_model.model.inp.polygons.index
+
+        assert test_model.redo() is entry
+        assert temp_inp_file.read_bytes() == edited_content
+        assert test_model.model.inp.subcatchments.loc[new_id, "Area"] == pytest.approx(5.5)
+
+    def test_undo_after_restart_uses_journal(self, temp_inp_file):
+        original_content = temp_inp_file.read_bytes()
+        test_model = BuildCatchments(str(temp_inp_file), backup=True, write_mode="append")
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+        del test_model
+
+        reopened = BuildCatchments(str(temp_inp_file), backup=True, write_mode="append")
+        assert len(reopened.get_backup_history()) == 1
+        reopened.undo()
+
+        assert temp_inp_file.read_bytes() == original_content
+
+    def test_backup_history_lists_snapshots_and_deltas(self, temp_inp_file):
+        test_model = BuildCatchments(str(temp_inp_file), backup=True)
+        snapshot = test_model._create_backup()
+        test_model.add_subcatchment(area=5.5, land_form="flats_and_plateaus", land_cover="rural")
+
+        history = test_model.get_backup_history()
+
+        assert history[0] == snapshot
+        assert history[1].label.startswith("add_subcatchment")
+        assert len(history[1].deltas) == 4
 
     def test_subcatchment_config_validation(self):
         with pytest.raises(ValueError, match="Area must be positive"):
@@ -0,0 +1,111 @@
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from rcg.inp_manage import journal as journal_module
+from rcg.inp_manage.compression import copy_inp
+from rcg.inp_manage.journal import WriteAheadJournal, apply_edits, edit_from_dict, edit_to_dict
+from rcg.inp_manage.sections import SectionEdit
+
+INP_TEXT = """[SUBCATCHMENTS]
+;;Name  Raingage  Outlet  Area
+S1      RG1       J1      5.0
+
+[SUBAREAS]
+;;Name  N-Imperv
+S1      0.015
+"""
+
+
+@pytest.fixture
+def inp_file(tmp_path):
+    path = tmp_path / "model.inp"
+    path.write_text(INP_TEXT)
+    return path
+
+
+def make_edits():
+    subcatchment = pd.DataFrame({"Raingage": ["RG1"], "Outlet": ["J1"], "Area": [2.0]}, index=["S2"])
+    subarea = pd.DataFrame({"N-Imperv": [0.013]}, index=["S2"])
+    return [SectionEdit("[SUBCATCHMENTS]", subcatchment), SectionEdit("[SUBAREAS]", subarea)]
+
+
+def assert_edits_applied(text):
+    assert "S2               RG1        J1         2.0\n\n[SUBAREAS]" in text
+    assert text.endswith("S2               0.013\n")
+
+
+class TestSerialization:
+    def test_round_trip(self):
+        edit = SectionEdit("[SUBAREAS]", pd.DataFrame({"A": [1.0], "B": [None]}, index=["S2"]), frozenset({"S1"}))
+
+        restored = edit_from_dict(json.loads(json.dumps(edit_to_dict(edit))))
+
+        assert restored.section_header == "[SUBAREAS]"
+        assert restored.drop == frozenset({"S1"})
+        assert restored.new_data.loc["S2", "A"] == 1.0
+        assert pd.isna(restored.new_data.loc["S2", "B"])
+
+
+class TestWriteAheadJournal:
+    def test_commit_applies_batch_and_removes_journal(self, inp_file):
+        wal = WriteAheadJournal(inp_file)
+
+        wal.commit(make_edits())
+
+        assert_edits_applied(inp_file.read_text())
+        assert not wal.path.exists()
+        assert sorted(p.name for p in inp_file.parent.iterdir()) == ["model.inp"]
+
+    def test_recover_replays_unapplied_batch(self, inp_file):
+        wal = WriteAheadJournal(inp_file)
+        wal._write(make_edits())  # crash before the batch was applied
+
+        assert WriteAheadJournal(inp_file).recover() == "replayed"
+
+        assert_edits_applied(inp_file.read_text())
+        assert not wal.path.exists()
+
+    def test_recover_discards_applied_batch(self, inp_file):
+        wal = WriteAheadJournal(inp_file)
+        wal._write(make_edits())
+        apply_edits(inp_file, make_edits())  # crash after the atomic replace
+        applied = inp_file.read_text()
+
+        assert wal.recover() == "discarded"
+
+        assert inp_file.read_text() == applied
+        assert not wal.path.exists()
+
+    def test_recover_discards_unreadable_journal(self, inp_file):
+        wal = WriteAheadJournal(inp_file)
+        wal.path.write_text("{")
+
+        assert wal.recover() == "discarded"
+        assert inp_file.read_text() == INP_TEXT
+
+    def test_recover_without_journal(self, inp_file):
+        assert WriteAheadJournal(inp_file).recover() is None
+
+    def test_failed_batch_is_not_replayed(self, inp_file, monkeypatch):
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(journal_module, "apply_edits", fail)
+        wal = WriteAheadJournal(inp_file)
+
+        with pytest.raises(OSError):
+            wal.commit(make_edits())
+
+        assert not wal.path.exists()
+        assert inp_file.read_text() == INP_TEXT
+
+    def test_replay_into_compressed_file(self, inp_file):
+        gz_path = copy_inp(inp_file, inp_file.with_name("model.inp.gz"))
+        WriteAheadJournal(gz_path)._write(make_edits())
+
+        assert WriteAheadJournal(gz_path).recover() == "replayed"
+
+        assert_edits_applied(gzip.decompress(gz_path.read_bytes()).decode())
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rcg.inp_manage.layout import layout_squares, polygon_bounds, shelf_pack
+
+
+def boxes_overlap(first, second):
+    """Pairwise interior overlap of two sets of ``xmin, ymin, xmax, ymax`` boxes."""
+    eps = 1e-9
+    return (
+        (first[:, None, 0] < second[None, :, 2] - eps)
+        & (second[None, :, 0] < first[:, None, 2] - eps)
+        & (first[:, None, 1] < second[None, :, 3] - eps)
+        & (second[None, :, 1] < first[:, None, 3] - eps)
+    )
+
+
+def square_bounds(vertices):
+    corners = vertices.reshape(-1, 4, 2)
+    return np.hstack([corners.min(axis=1), corners.max(axis=1)])
+
+
+def test_polygon_bounds():
+    polygons = pd.DataFrame(
+        {"X": [0.0, 4.0, 2.0, 10.0, 12.0], "Y": [0.0, 1.0, 3.0, -5.0, -1.0]}, index=["A", "A", "A", "B", "B"]
+    )
+
+    assert polygon_bounds(polygons).tolist() == [[0.0, 0.0, 4.0, 3.0], [10.0, -5.0, 12.0, -1.0]]
+    assert polygon_bounds(pd.DataFrame(columns=["X", "Y"])).shape == (0, 4)
+
+
+def test_shelf_pack_fits_squares_without_overlap():
+    sides = np.array([3.0, 1.0, 2.0, 2.0, 1.0, 4.0])
+
+    offsets, width, height = shelf_pack(sides)
+
+    boxes = np.column_stack([offsets[:, 0], -offsets[:, 1] - sides, offsets[:, 0] + sides, -offsets[:, 1]])
+    assert boxes_overlap(boxes, boxes).sum() == len(sides)
+    assert (offsets[:, 0] + sides <= width + 1e-9).all()
+    assert (offsets[:, 1] + sides <= height + 1e-9).all()
+
+
+class TestLayoutSquares:
+    def test_vertices_and_centroids(self):
+        vertices, centroids = layout_squares(np.array([10.0]), np.empty((0, 4)), anchor=(0.0, 0.0))
+
+        assert vertices.tolist() == [[0.0, 0.0], [10.0, 0.0], [10.0, -10.0], [0.0, -10.0]]
+        assert centroids.tolist() == [[5.0, -5.0]]
+
+    def test_avoids_existing_polygons_and_each_other(self):
+        rng = np.random.default_rng(0)
+        corners = rng.random((200, 2)) * 1000
+        occupied = np.hstack([corners, corners + rng.random((200, 1)) * 40 + 5])
+        sides = rng.random(500) * 20 + 1
+
+        vertices, centroids = layout_squares(sides, occupied, anchor=(500.0, 500.0))
+
+        boxes = square_bounds(vertices)
+        assert not boxes_overlap(boxes, occupied).any()
+        assert boxes_overlap(boxes, boxes).sum() == len(sides)
+        assert centroids == pytest.approx(boxes.reshape(-1, 2, 2).mean(axis=1))
+
+    def test_block_is_placed_next_to_anchor(self):
+        occupied = np.array([[0.0, 0.0, 100.0, 100.0]])
+
+        vertices, _ = layout_squares(np.array([10.0, 10.0]), occupied, anchor=(50.0, 50.0))
+
+        assert not boxes_overlap(square_bounds(vertices), occupied).any()
+        # The block's top-left corner is on the nearest free spot, just outside the occupied box
+        assert np.hypot(*(vertices[0] - [50.0, 50.0])) == pytest.approx(50.0)
+
+    def test_empty_batch(self):
+        vertices, centroids = layout_squares(np.array([]), np.empty((0, 4)))
+
+        assert vertices.shape == (0, 2)
+        assert centroids.shape == (0, 2)
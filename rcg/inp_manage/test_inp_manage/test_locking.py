@@ -0,0 +1,65 @@
+import pytest
+
+from rcg.exceptions import ModelOperationError
+from rcg.inp_manage.locking import FileLock, LockMetrics, WriteQueue
+
+
+class TestFileLock:
+    def test_second_holder_is_refused(self, tmp_path):
+        first = FileLock(tmp_path / "model.inp.lock")
+        second = FileLock(tmp_path / "model.inp.lock")
+
+        with first:
+            assert first.locked
+            assert second.acquire(blocking=False) is False
+        assert second.acquire(blocking=False) is True
+        second.release()
+
+        assert second.metrics.contended == 1
+        assert second.metrics.acquisitions == 1
+
+    def test_metrics_track_hold_time(self, tmp_path):
+        metrics = LockMetrics()
+        with FileLock(tmp_path / "model.inp.lock", metrics):
+            pass
+
+        assert metrics.acquisitions == 1
+        assert metrics.hold_seconds >= 0
+        assert metrics.as_dict()["contended"] == 0
+
+    def test_reacquire_raises(self, tmp_path):
+        lock = FileLock(tmp_path / "model.inp.lock")
+        with lock:
+            with pytest.raises(ModelOperationError, match="already held"):
+                lock.acquire()
+
+
+class TestWriteQueue:
+    def test_batches_in_submission_order(self, tmp_path):
+        queue = WriteQueue(tmp_path / "model.inp.queue")
+        first = queue.submit({"n": 1})
+        second = queue.submit({"n": 2})
+
+        assert queue.pending() == [(first, {"n": 1}), (second, {"n": 2})]
+
+    def test_complete_hands_result_to_submitter(self, tmp_path):
+        queue = WriteQueue(tmp_path / "model.inp.queue")
+        ticket = queue.submit({"n": 1})
+
+        queue.complete(ticket, {"renames": {"S1": "S2"}})
+
+        assert queue.pending() == []
+        assert queue.take_result(ticket) == {"renames": {"S1": "S2"}}
+        assert list(queue.directory.iterdir()) == []
+
+    def test_failed_batch_raises(self, tmp_path):
+        queue = WriteQueue(tmp_path / "model.inp.queue")
+        ticket = queue.submit({"n": 1})
+        queue.complete(ticket, {"error": "disk full"})
+
+        with pytest.raises(ModelOperationError, match="disk full"):
+            queue.take_result(ticket)
+
+    def test_lost_batch_raises(self, tmp_path):
+        with pytest.raises(ModelOperationError, match="lost"):
+            WriteQueue(tmp_path).take_result("missing")
@@ -0,0 +1,161 @@
+import pandas as pd
+import pytest
+
+from rcg.inp_manage.sections import (
+    SectionEdit,
+    append_inp_section,
+    apply_section_edits,
+    find_section_end,
+    format_section_rows,
+    read_section_rows,
+)
+
+INP_TEXT = """[TITLE]
+;;Project Title/Notes
+
+[SUBAREAS]
+;;Name  N-Imperv N-Perv
+S1      0.015    0.41   ; hand-edited comment
+S2      0.013    0.24
+
+[JUNCTIONS]
+;;Name  Elevation
+J1      146.61
+"""
+
+
+@pytest.fixture
+def inp_file(tmp_path):
+    path = tmp_path / "model.inp"
+    path.write_bytes(INP_TEXT.encode())
+    return path
+
+
+def make_rows(names, **columns):
+    frame = pd.DataFrame(columns, index=names)
+    frame.index.names = ["Name"]
+    return frame
+
+
+class TestFormatSectionRows:
+    def test_formats_index_and_values(self):
+        lines = format_section_rows(make_rows(["S3"], A=[0.013], B=["OUTLET"]))
+        assert lines == ["S3               0.013      OUTLET"]
+
+    def test_drops_trailing_missing_values(self):
+        lines = format_section_rows(make_rows(["S3"], A=[1.0], B=[None]))
+        assert lines[0].split() == ["S3", "1.0"]
+
+
+class TestFindSectionEnd:
+    def test_offset_after_last_data_line(self, inp_file):
+        found, offset, newline, ends_with_newline = find_section_end(inp_file, "[SUBAREAS]")
+        assert found is True
+        assert newline == b"\n"
+        assert ends_with_newline is True
+        assert INP_TEXT.encode()[:offset].endswith(b"S2      0.013    0.24\n")
+
+    def test_header_matched_case_insensitively(self, inp_file):
+        assert find_section_end(inp_file, "[subareas]")[0] is True
+
+    def test_missing_section_points_to_end_of_file(self, inp_file):
+        found, offset, _, _ = find_section_end(inp_file, "[POLYGONS]")
+        assert found is False
+        assert offset == len(INP_TEXT.encode())
+
+
+class TestReadSectionRows:
+    def test_tokenizes_data_lines_without_comments(self, inp_file):
+        assert read_section_rows(inp_file, "[subareas]") == [["S1", "0.015", "0.41"], ["S2", "0.013", "0.24"]]
+
+    def test_missing_section_is_empty(self, inp_file):
+        assert read_section_rows(inp_file, "[SYMBOLS]") == []
+
+
+class TestAppendInpSection:
+    def test_existing_bytes_copied_verbatim(self, inp_file):
+        append_inp_section(inp_file, "[SUBAREAS]", make_rows(["S3"], A=[0.013], B=[0.15]))
+
+        content = inp_file.read_text()
+        before, after = INP_TEXT.split("\n[JUNCTIONS]")
+        assert content.startswith(before.rstrip("\n") + "\nS3 ")
+        assert content.endswith("\n[JUNCTIONS]" + after)
+        assert "S1      0.015    0.41   ; hand-edited comment" in content
+
+    def test_appends_to_last_section_in_place(self, inp_file):
+        inserted = append_inp_section(inp_file, "[JUNCTIONS]", make_rows(["J2"], Elevation=[140.0]))
+
+        content = inp_file.read_text()
+        assert content.startswith(INP_TEXT)
+        assert len(content) == len(INP_TEXT) + inserted
+
+    def test_creates_missing_section(self, inp_file):
+        append_inp_section(inp_file, "[POLYGONS]", make_rows(["S1", "S1"], X=[0.0, 1.0], Y=[0.0, 1.0]))
+
+        content = inp_file.read_text()
+        assert content.startswith(INP_TEXT)
+        assert content.split("[POLYGONS]\n")[1].count("S1") == 2
+
+    def test_file_without_trailing_newline(self, tmp_path):
+        path = tmp_path / "model.inp"
+        path.write_bytes(b"[JUNCTIONS]\nJ1  146.61")
+
+        append_inp_section(path, "[JUNCTIONS]", make_rows(["J2"], Elevation=[140.0]))
+
+        assert path.read_bytes().splitlines()[1:] == [b"J1  146.61", b"J2               140.0"]
+
+    def test_preserves_crlf_line_endings(self, tmp_path):
+        path = tmp_path / "model.inp"
+        path.write_bytes(INP_TEXT.replace("\n", "\r\n").encode())
+
+        append_inp_section(path, "[SUBAREAS]", make_rows(["S3"], A=[0.013]))
+
+        content = path.read_bytes()
+        assert b"S3               0.013\r\n\r\n[JUNCTIONS]" in content
+        assert content.count(b"\n") == content.count(b"\r\n")
+
+    def test_empty_frame_is_noop(self, inp_file):
+        assert append_inp_section(inp_file, "[SUBAREAS]", make_rows([], A=[])) == 0
+        assert inp_file.read_text() == INP_TEXT
+
+
+class TestApplySectionEdits:
+    def test_drop_and_append_in_one_pass(self, inp_file):
+        apply_section_edits(
+            inp_file,
+            [
+                SectionEdit("[SUBAREAS]", make_rows(["S2"], A=[0.5]), drop=frozenset({"S2"})),
+                SectionEdit("[JUNCTIONS]", make_rows(["J2"], A=[140.0])),
+            ],
+        )
+
+        content = inp_file.read_text()
+        assert "S1      0.015    0.41   ; hand-edited comment\nS2               0.5\n\n[JUNCTIONS]" in content
+        assert content.endswith("J1      146.61\nJ2               140.0\n")
+
+    def test_dropping_appended_rows_restores_file(self, inp_file):
+        append_inp_section(inp_file, "[SUBAREAS]", make_rows(["S3"], A=[0.013]))
+
+        apply_section_edits(inp_file, [SectionEdit("[SUBAREAS]", drop=frozenset({"S3"}))])
+
+        assert inp_file.read_text() == INP_TEXT
+
+    def test_creates_missing_section(self, inp_file):
+        apply_section_edits(
+            inp_file,
+            [
+                SectionEdit("[SUBAREAS]", drop=frozenset({"S1"})),
+                SectionEdit("[OUTFALLS]", make_rows(["O1"], A=[140.0])),
+            ],
+        )
+
+        content = inp_file.read_text()
+        assert "S1 " not in content
+        assert content.endswith("J1      146.61\n\n[OUTFALLS]\nO1               140.0\n")
+
+    def test_replaces_whole_section(self, inp_file):
+        apply_section_edits(inp_file, [SectionEdit("[subareas]", replacement="[SUBAREAS]\nS9 1.0\n\n")])
+
+        content = inp_file.read_text()
+        assert "S1 " not in content
+        assert "[TITLE]\n;;Project Title/Notes\n\n[SUBAREAS]\nS9 1.0\n\n[JUNCTIONS]" in content
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from swmmio import Model
+
+from rcg.inp_manage.spatial import NodeIndex, OutletConstraints, PointIndex, read_gage_symbols
+
+
+@pytest.fixture
+def model_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_file.inp")
+
+
+class TestPointIndex:
+    def test_query_returns_nearest_names_and_distances(self):
+        index = PointIndex(["A", "B", "C"], np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]]))
+
+        names, distances = index.query(np.array([[1.0, 1.0], [9.0, 0.0], [0.0, 20.0]]))
+
+        assert list(names) == ["A", "B", "C"]
+        assert distances == pytest.approx([np.sqrt(2), 1.0, 10.0])
+
+    def test_from_frame_skips_missing_coordinates(self):
+        frame = pd.DataFrame({"X": [0.0, np.nan], "Y": [0.0, 5.0]}, index=["A", "B"])
+
+        index = PointIndex.from_frame(frame)
+
+        assert len(index) == 1
+        assert list(index.names) == ["A"]
+
+    def test_empty_index_returns_none(self):
+        names, distances = PointIndex([], np.empty((0, 2))).query(np.array([[1.0, 2.0]]))
+
+        assert list(names) == [None]
+        assert np.isinf(distances).all()
+
+
+def test_read_gage_symbols(model_path):
+    symbols = read_gage_symbols(model_path)
+
+    assert list(symbols.index) == ["Raingage2"]
+    assert symbols.loc["Raingage2"].tolist() == pytest.approx([777181.54, 592591.318])
+
+
+class TestNodeIndex:
+    def test_from_model_indexes_junctions_and_outfalls(self, model_path):
+        index = NodeIndex.from_model(Model(model_path).inp)
+
+        assert set(index.nodes.index) == {"J1", "J3", "O4"}
+        assert index.nodes.loc["O4", "NodeType"] == "outfall"
+        assert index.nodes.loc["J1", "InvertElev"] == pytest.approx(146.61)
+
+    def test_nearest_respects_constraints(self, model_path):
+        index = NodeIndex.from_model(Model(model_path).inp)
+        near_j3 = np.array([[777197.0, 592565.0]])
+
+        assert list(index.nearest(near_j3)) == ["J3"]
+        assert list(index.nearest(near_j3, OutletConstraints(node_types={"outfall"}))) == ["O4"]
+        assert list(index.nearest(near_j3, OutletConstraints(min_invert=146.6))) == ["J1"]
+        assert list(index.nearest(near_j3, OutletConstraints(max_invert=100.0))) == [None]
+
+    def test_indexes_are_built_once_per_constraint(self, model_path):
+        index = NodeIndex.from_model(Model(model_path).inp)
+        constraints = OutletConstraints(node_types={"junction"})
+
+        first = index._index(constraints)
+        index.nearest(np.zeros((3, 2)), OutletConstraints(node_types=["junction"]))
+
+        assert index._index(constraints) is first
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"node_types": {"storage"}}, {"min_invert": 10.0, "max_invert": 5.0}],
+    )
+    def test_invalid_constraints(self, kwargs):
+        with pytest.raises(ValueError):
+            OutletConstraints(**kwargs)
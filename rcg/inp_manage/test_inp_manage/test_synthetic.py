@@ -0,0 +1,118 @@
+import gzip
+
+import numpy as np
+import pytest
+import swmmio
+
+from rcg.inp_manage import synthetic
+from rcg.inp_manage.inp import BuildCatchments
+from rcg.inp_manage.synthetic import TEMPLATE, SyntheticModelSpec, generate_model
+
+SPEC = SyntheticModelSpec(subcatchments=50, junctions=12, outfalls=2, conduits=15, raingages=3, timeseries_rows=90, seed=4)
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    return generate_model(tmp_path / "synthetic.inp", SPEC)
+
+
+class TestGenerateModel:
+    def test_section_sizes(self, model_path):
+        model = swmmio.Model(str(model_path))
+
+        assert len(model.inp.subcatchments) == 50
+        assert len(model.inp.subareas) == 50
+        assert len(model.inp.infiltration) == 50
+        assert len(model.inp.polygons) == 50 * SPEC.polygon_vertices
+        assert len(model.inp.junctions) == 12
+        assert len(model.inp.outfalls) == 2
+        assert len(model.inp.conduits) == 15
+        assert len(model.inp.xsections) == 15
+        assert len(model.inp.coordinates) == 14
+        assert len(model.inp.raingages) == 3
+        assert len(model.inp.timeseries) == 3 * 90
+
+    def test_references_are_valid(self, model_path):
+        model = swmmio.Model(str(model_path))
+        nodes = set(model.inp.junctions.index) | set(model.inp.outfalls.index)
+        subcatchments = model.inp.subcatchments
+
+        assert set(subcatchments["Outlet"]) <= nodes
+        assert set(subcatchments["Raingage"]) == set(model.inp.raingages.index)
+        assert set(model.inp.conduits["InletNode"]) | set(model.inp.conduits["OutletNode"]) <= nodes
+        assert (model.inp.conduits["InletNode"] != model.inp.conduits["OutletNode"]).all()
+
+    def test_every_junction_drains_to_an_outfall(self, model_path):
+        conduits = swmmio.Model(str(model_path)).inp.conduits
+        downstream = dict(zip(conduits["InletNode"].iloc[: SPEC.junctions], conduits["OutletNode"].iloc[: SPEC.junctions]))
+
+        for junction in downstream:
+            node, steps = junction, 0
+            while node.startswith("J"):
+                node, steps = downstream[node], steps + 1
+                assert steps <= SPEC.junctions
+            assert node.startswith("O")
+
+    def test_areas_match_polygons(self, model_path):
+        model = swmmio.Model(str(model_path))
+        polygon = model.inp.polygons.loc["S1"][["X", "Y"]].to_numpy(dtype=float)
+        x, y = polygon[:, 0], polygon[:, 1]
+        shoelace_ha = abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2 / 10_000
+
+        assert float(model.inp.subcatchments.loc["S1", "Area"]) == pytest.approx(shoelace_ha, rel=1e-3)
+
+    def test_template_is_package_data(self):
+        assert TEMPLATE.is_file()
+        assert TEMPLATE.parent.name == "config"
+
+    def test_keeps_template_settings(self, model_path):
+        text = model_path.read_text()
+
+        assert "FLOW_UNITS           CMS" in text
+        assert text.upper().count("[POLYGONS]") == 1
+        assert "Raingage2" not in text
+
+    def test_deterministic_for_seed(self, tmp_path, model_path):
+        same = generate_model(tmp_path / "same.inp", SPEC)
+        other = generate_model(tmp_path / "other.inp", SyntheticModelSpec(**{**SPEC.__dict__, "seed": 5}))
+
+        assert same.read_bytes() == model_path.read_bytes()
+        assert other.read_bytes() != model_path.read_bytes()
+
+    def test_streams_in_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(synthetic, "CHUNK_ROWS", 7)
+
+        model = swmmio.Model(str(generate_model(tmp_path / "chunked.inp", SPEC)))
+
+        assert len(model.inp.subcatchments) == 50
+        assert model.inp.subcatchments.index.is_unique
+        assert len(model.inp.conduits) == 15
+
+    def test_compressed_output(self, tmp_path, model_path):
+        path = generate_model(tmp_path / "synthetic.inp.gz", SPEC)
+
+        assert gzip.decompress(path.read_bytes()) == model_path.read_bytes()
+
+    def test_model_can_be_edited(self, model_path):
+        model = BuildCatchments(str(model_path), backup=False)
+
+        name = model.add_subcatchment(2.0, "mountains", "forests")
+
+        assert name == "S51"
+        assert name in swmmio.Model(str(model_path)).inp.subcatchments.index
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"outfalls": 0},
+        {"raingages": 0},
+        {"junctions": 10, "conduits": 9},
+        {"junctions": 1, "conduits": 3},
+        {"polygon_vertices": 2},
+        {"subcatchments": -1},
+    ],
+)
+def test_spec_rejects_invalid_sizes(options):
+    with pytest.raises(ValueError):
+        SyntheticModelSpec(**options)
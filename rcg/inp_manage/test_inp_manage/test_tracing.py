@@ -0,0 +1,97 @@
+import json
+import threading
+
+import pytest
+
+from rcg.inp_manage.tracing import NULL_RECORDER, TimingRecorder
+
+
+class TestNullRecorder:
+    def test_span_is_a_shared_no_op(self):
+        with NULL_RECORDER.span("stage", rows=3):
+            pass
+
+        assert NULL_RECORDER.span("a") is NULL_RECORDER.span("b")
+        assert NULL_RECORDER.stats() == {}
+
+
+class TestTimingRecorder:
+    def test_nested_spans(self):
+        recorder = TimingRecorder()
+
+        with recorder.span("outer"):
+            with recorder.span("inner", section="[SUBAREAS]"):
+                pass
+            with recorder.span("inner"):
+                pass
+
+        assert [(span.name, span.depth) for span in recorder.spans] == [("inner", 1), ("inner", 1), ("outer", 0)]
+        outer = recorder.spans[-1]
+        for inner in recorder.spans[:2]:
+            assert outer.start_ns <= inner.start_ns
+            assert inner.start_ns + inner.duration_ns <= outer.start_ns + outer.duration_ns
+        assert recorder.spans[0].attributes == {"section": "[SUBAREAS]"}
+
+    def test_span_is_recorded_when_block_raises(self):
+        recorder = TimingRecorder()
+
+        try:
+            with recorder.span("failing"):
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        assert [span.name for span in recorder.spans] == ["failing"]
+        with recorder.span("next"):
+            pass
+        assert recorder.spans[-1].depth == 0
+
+    def test_stats(self):
+        recorder = TimingRecorder()
+        for _ in range(3):
+            with recorder.span("write"):
+                pass
+
+        stats = recorder.stats()["write"]
+
+        assert stats["count"] == 3
+        assert stats["mean_s"] * 3 == pytest.approx(stats["total_s"])
+        assert 0 <= stats["max_s"] <= stats["total_s"]
+
+    def test_max_spans_drops_oldest(self):
+        recorder = TimingRecorder(max_spans=2)
+        for name in ["a", "b", "c"]:
+            with recorder.span(name):
+                pass
+
+        assert [span.name for span in recorder.spans] == ["b", "c"]
+
+    def test_depth_is_per_thread(self):
+        recorder = TimingRecorder()
+
+        def work():
+            with recorder.span("thread"):
+                pass
+
+        with recorder.span("main"):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+
+        depths = {span.name: span.depth for span in recorder.spans}
+        assert depths == {"thread": 0, "main": 0}
+
+    def test_chrome_trace(self, tmp_path):
+        recorder = TimingRecorder()
+        with recorder.span("add_subcatchment"):
+            with recorder.span("prototype", land_form="mountains"):
+                pass
+
+        path = recorder.save_chrome_trace(tmp_path / "trace.json")
+        events = json.loads(path.read_text())["traceEvents"]
+
+        assert [event["name"] for event in events] == ["add_subcatchment", "prototype"]
+        assert all(event["ph"] == "X" for event in events)
+        assert events[0]["ts"] == 0
+        assert events[1]["args"] == {"land_form": "mountains"}
+        assert events[0]["dur"] >= events[1]["dur"]
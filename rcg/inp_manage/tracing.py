@@ -0,0 +1,179 @@
+"""
+Timing spans of model operations.
+
+:class:`BuildCatchments` wraps each stage of an edit (model load, ID
+allocation, fuzzy inference, row building, section formatting and the
+journaled write) in ``recorder.span(name)``. The default
+:data:`NULL_RECORDER` returns one shared no-op context manager, so tracing
+costs a method call per stage when it is off. A :class:`TimingRecorder`
+keeps every span, aggregates them by name and exports them as Chrome
+trace-event JSON for ``chrome://tracing`` or Perfetto.
+"""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Protocol, Union
+
+
+class SpanRecorder(Protocol):
+    """Receiver of timing spans."""
+
+    def span(self, name: str, **attributes: Any) -> AbstractContextManager[None]:
+        """Context manager timing the enclosed block as ``name``."""
+        ...
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Aggregated timings by span name."""
+        ...
+
+
+class NullRecorder:
+    """Recorder that discards everything; the default of :class:`BuildCatchments`."""
+
+    _context = nullcontext()
+
+    def span(self, name: str, **attributes: Any) -> AbstractContextManager[None]:
+        return self._context
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {}
+
+
+NULL_RECORDER = NullRecorder()
+
+
+@dataclass
+class Span:
+    """
+    One timed block.
+
+    Attributes
+    ----------
+    name : str
+        Stage name, e.g. ``"prototype"`` or ``"write"``.
+    start_ns : int
+        Start as ``time.perf_counter_ns()``.
+    duration_ns : int
+        Duration in nanoseconds.
+    depth : int
+        Number of enclosing spans on the same thread.
+    thread_id : int
+        Identifier of the thread that ran the block.
+    attributes : Dict[str, Any]
+        Details given to :meth:`TimingRecorder.span`.
+    """
+
+    name: str
+    start_ns: int
+    duration_ns: int
+    depth: int
+    thread_id: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class TimingRecorder:
+    """
+    Recorder keeping every span in memory.
+
+    Attributes
+    ----------
+    spans : List[Span]
+        Finished spans in the order they ended.
+    max_spans : Optional[int]
+        Spans kept at most; older ones are dropped first. None keeps all.
+
+    Example
+    -------
+    >>> recorder = TimingRecorder()
+    >>> builder = BuildCatchments("model.inp", recorder=recorder)
+    >>> builder.add_subcatchment(2.0, "mountains", "forests")
+    >>> builder.stats()["prototype"]["total_s"]
+    >>> recorder.save_chrome_trace("add_subcatchment.json")
+    """
+
+    def __init__(self, max_spans: Optional[int] = None) -> None:
+        self.spans: list[Span] = []
+        self.max_spans = max_spans
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            self._local.depth = depth
+            with self._lock:
+                self.spans.append(Span(name, start, duration, depth, threading.get_ident(), attributes))
+                if self.max_spans is not None and len(self.spans) > self.max_spans:
+                    del self.spans[: len(self.spans) - self.max_spans]
+
+    def clear(self) -> None:
+        """Drop all recorded spans."""
+        with self._lock:
+            self.spans.clear()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Aggregate the spans by name.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            ``count``, ``total_s``, ``mean_s`` and ``max_s`` of each span
+            name, in the order the names first finished.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        stats: dict[str, dict[str, float]] = {}
+        for span in spans:
+            entry = stats.setdefault(span.name, {"count": 0, "total_s": 0.0, "mean_s": 0.0, "max_s": 0.0})
+            seconds = span.duration_ns / 1e9
+            entry["count"] += 1
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+        for entry in stats.values():
+            entry["mean_s"] = entry["total_s"] / entry["count"]
+        return stats
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """
+        The spans as Chrome trace-event JSON.
+
+        Every span is a complete (``"ph": "X"``) event with microsecond
+        timestamps relative to the first span.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        origin = min((span.start_ns for span in spans), default=0)
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": "rcg",
+                "ph": "X",
+                "ts": (span.start_ns - origin) / 1000,
+                "dur": span.duration_ns / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {key: str(value) for key, value in span.attributes.items()},
+            }
+            for span in sorted(spans, key=lambda span: (span.start_ns, span.depth))
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: Union[str, Path]) -> Path:
+        """Write :meth:`chrome_trace` to ``path``."""
+        path = Path(path)
+        path.write_text(json.dumps(self.chrome_trace()))
+        return path
@@ -3,11 +3,24 @@ Centralized logging configuration for RCG.
 
 This module provides a unified logging setup for the rapid-catchment-generator
 project, ensuring consistent log formatting and handling across all modules.
+
+Batch workers can log as JSON lines and hand records to a background thread
+(``setup_logging(json_format=True, async_logging=True)``), so a log call only
+appends to a queue and never waits for the console or disk. Hot paths pass
+``%``-style arguments instead of f-strings, so a disabled level costs no
+formatting at all, and attach per-subcatchment context with ``extra``::
+
+    logger.debug("Added subcatchment %s", name, extra={"subcatchment": name, "area": area})
 """
 
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from typing import Optional
 
@@ -18,6 +31,74 @@ DEFAULT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 # Package logger name
 LOGGER_NAME = "rcg"
 
+# Attributes of every LogRecord; any other attribute was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+# Background listeners of asynchronous loggers, by logger name
+_listeners: dict[str, QueueListener] = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format each record as one JSON object per line.
+
+    The object holds ``time`` (ISO 8601, UTC), ``level``, ``logger`` and
+    ``message``, every field passed through ``extra`` (e.g. ``subcatchment``,
+    ``area``, ``land_form``) and ``exception`` if there is one. Values that
+    are not JSON types are written as strings.
+
+    Example
+    -------
+    >>> logger.info("Added subcatchment %s", "S7", extra={"subcatchment": "S7", "area": 2.5})
+    {"time": "2026-05-04T09:12:31.418+00:00", "level": "INFO", "logger": "rcg.cli", "message": "Added subcatchment S7", "subcatchment": "S7", "area": 2.5}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queue handler merging the message arguments but leaving the traceback to the formatter."""
+
+    _traceback_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments may be mutable or unpicklable, so they are rendered in the logging thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stop_listener(name: str) -> None:
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the background threads of all asynchronous loggers; runs at exit."""
+    for name in list(_listeners):
+        _stop_listener(name)
+
+
+atexit.register(shutdown_logging)
+
 
 def setup_logging(
     level: int = logging.INFO,
@@ -27,12 +108,15 @@ def setup_logging(
     date_format: str = DEFAULT_DATE_FORMAT,
     max_bytes: int = 10 * 1024 * 1024,  # 10 MB
     backup_count: int = 5,
+    json_format: bool = False,
+    async_logging: bool = False,
 ) -> logging.Logger:
     """
     Set up centralized logging configuration.
 
     Creates and configures a logger with console output and optional file output.
     Uses RotatingFileHandler for file logging to manage log file sizes.
+    Calling it again for the same name replaces the previous configuration.
 
     Parameters
     ----------
@@ -51,6 +135,13 @@ def setup_logging(
         Maximum size of log file before rotation (default: 10 MB).
     backup_count : int
         Number of backup log files to keep (default: 5).
+    json_format : bool
+        Write one JSON object per record (see :class:`JsonFormatter`) instead of
+        ``log_format`` lines.
+    async_logging : bool
+        Only put records on a queue in the logging thread; a background
+        :class:`~logging.handlers.QueueListener` writes them to the console and
+        file. It is flushed by :func:`shutdown_logging`, at the latest at exit.
 
     Returns
     -------
@@ -66,22 +157,23 @@ def setup_logging(
     # Get or create logger
     logger = logging.getLogger(name)
 
-    # Clear any existing handlers
+    # Clear any existing handlers, flushing the records still queued for them
+    _stop_listener(name)
     logger.handlers.clear()
 
     # Set level
     logger.setLevel(level)
 
     # Create formatter
-    formatter = logging.Formatter(log_format, datefmt=date_format)
+    formatter = JsonFormatter() if json_format else logging.Formatter(log_format, datefmt=date_format)
 
-    # Add console handler
+    # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers: list[logging.Handler] = [console_handler]
 
-    # Add file handler if log_file is specified
+    # Create file handler if log_file is specified
     if log_file is not None:
         log_file = Path(log_file)
         log_file.parent.mkdir(parents=True, exist_ok=True)
@@ -89,7 +181,20 @@ def setup_logging(
         file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if async_logging:
+        # An unbounded queue, so logging never blocks; the listener thread does the I/O
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
+        queue_handler = _RecordQueueHandler(records)
+        queue_handler.setLevel(level)
+        logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
     # Prevent propagation to root logger
     logger.propagate = False
@@ -145,8 +250,9 @@ def set_log_level(level: int, name: Optional[str] = None) -> None:
     logger = get_logger(name)
     logger.setLevel(level)
 
-    # Also update all handlers
-    for handler in logger.handlers:
+    # Also update all handlers, including those behind a queue
+    listener = _listeners.get(logger.name)
+    for handler in [*logger.handlers, *(listener.handlers if listener is not None else ())]:
         handler.setLevel(level)
 
 
@@ -0,0 +1,296 @@
+"""
+Process-wide counters and histograms of engine and model I/O activity.
+
+The fuzzy engine and :class:`rcg.inp_manage.inp.BuildCatchments` record into
+the shared :data:`REGISTRY`: inference calls and scikit-fuzzy cache hits,
+inference latency, INP bytes read and written, rewritten sections and backup
+bytes. Batch workers dump it at the end of a run in the Prometheus text
+format, e.g. into the node exporter's textfile-collector directory, or as
+JSON::
+
+    from rcg.metrics import REGISTRY
+
+    REGISTRY.save("/var/lib/node_exporter/textfile/rcg.prom")
+    REGISTRY.save("metrics.json")
+
+Recording is a dictionary update under a lock, so it is cheap next to the
+inference and file I/O it measures.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Union
+
+# Upper bounds of the default histogram buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    """Common part of counters and histograms: name, help text and label handling."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value per label set.
+
+    Example
+    -------
+    >>> rewrites = Counter("rcg_section_rewrites_total", "Sections written.", ("section",))
+    >>> rewrites.inc(section="[SUBAREAS]")
+    >>> rewrites.value(section="[SUBAREAS]")
+    1.0
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add ``amount`` (non-negative) to the value of ``labels``."""
+        if amount < 0:
+            raise ValueError(f"Counter {self.name} can only increase, got {amount}")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Current value of ``labels``; 0 if never incremented."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [{"labels": self._labels(key), "value": value} for key, value in self._values.items()]
+
+    def prometheus_lines(self) -> list[str]:
+        return [f"{self.name}{_format_labels(sample['labels'])} {_format_value(sample['value'])}" for sample in self.samples()]
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket distribution of observed values per label set.
+
+    Attributes
+    ----------
+    buckets : Tuple[float, ...]
+        Increasing upper bounds; a final ``+Inf`` bucket is implied.
+
+    Example
+    -------
+    >>> latency = Histogram("rcg_engine_inference_seconds", "Inference latency.")
+    >>> with latency.time():
+    ...     engine.compute_all(8, 11)
+    >>> latency.samples()[0]["count"]
+    1
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        if list(buckets) != sorted(buckets):
+            raise ValueError(f"Histogram {name} buckets must be increasing")
+        self.buckets = tuple(float(bound) for bound in buckets)
+        # Per label set: non-cumulative bucket counts (the last one is +Inf), sum and count
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Add one observation to ``labels``."""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            state[0][index] += 1
+            state[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the enclosed block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[dict[str, Any]]:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative, buckets = 0, {}
+                for bound, count in zip((*self.buckets, math.inf), counts):
+                    cumulative += count
+                    buckets[_format_value(bound)] = cumulative
+                samples.append({"labels": self._labels(key), "count": cumulative, "sum": total[0], "buckets": buckets})
+        return samples
+
+    def prometheus_lines(self) -> list[str]:
+        lines = []
+        for sample in self.samples():
+            labels = sample["labels"]
+            for bound, count in sample["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {sample['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named collection of metrics with Prometheus text and JSON export.
+
+    Example
+    -------
+    >>> registry = MetricsRegistry()
+    >>> calls = registry.counter("rcg_engine_calls_total", "Inferences.", ("output",))
+    >>> calls.inc(output="slope")
+    >>> print(registry.to_prometheus())
+    # HELP rcg_engine_calls_total Inferences.
+    # TYPE rcg_engine_calls_total counter
+    rcg_engine_calls_total{output="slope"} 1
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Union[Counter, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Union[Counter, Histogram]) -> Union[Counter, Histogram]:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"Metric {metric.name} is already registered as a different {existing.kind}")
+        return existing
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Return the counter ``name``, creating it on first use."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Return the histogram ``name``, creating it on first use."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Union[Counter, Histogram]:
+        """Registered metric ``name``."""
+        return self._metrics[name]
+
+    def reset(self) -> None:
+        """Clear every recorded value, keeping the metrics registered."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        """All metrics as ``{name: {"type", "help", "samples"}}``."""
+        return {
+            metric.name: {"type": metric.kind, "help": metric.documentation, "samples": metric.samples()}
+            for metric in list(self._metrics.values())
+        }
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Write the metrics atomically to ``path``.
+
+        A ``.json`` path gets :meth:`to_dict` as JSON; any other path gets the
+        Prometheus text format. The file is written next to ``path`` and
+        renamed into place, so a textfile collector never reads half of it.
+        """
+        path = Path(path)
+        text = json.dumps(self.to_dict(), indent=2) if path.suffix == ".json" else self.to_prometheus()
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return path
+
+
+REGISTRY = MetricsRegistry()
+
+ENGINE_CALLS = REGISTRY.counter("rcg_engine_calls_total", "Fuzzy inferences requested, by output.", ("output",))
+ENGINE_CACHE_HITS = REGISTRY.counter(
+    "rcg_engine_cache_hits_total", "Fuzzy inferences answered from the scikit-fuzzy simulation cache.", ("output",)
+)
+ENGINE_CACHE_MISSES = REGISTRY.counter(
+    "rcg_engine_cache_misses_total", "Fuzzy inferences computed by scikit-fuzzy.", ("output",)
+)
+INFERENCE_SECONDS = REGISTRY.histogram("rcg_engine_inference_seconds", "Latency of FuzzyEngine.compute_all in seconds.")
+INP_READ_BYTES = REGISTRY.counter("rcg_inp_read_bytes_total", "Bytes of INP files loaded, as stored on disk.")
+INP_WRITTEN_BYTES = REGISTRY.counter("rcg_inp_written_bytes_total", "Bytes of INP files written, as stored on disk.")
+SECTION_REWRITES = REGISTRY.counter(
+    "rcg_section_rewrites_total", "INP sections written, by section and write mode.", ("section", "mode")
+)
+BACKUP_SOURCE_BYTES = REGISTRY.counter("rcg_backup_source_bytes_total", "Uncompressed bytes of INP files backed up.")
+BACKUP_WRITTEN_BYTES = REGISTRY.counter(
+    "rcg_backup_written_bytes_total", "Bytes written to backup stores after deduplication and compression."
+)
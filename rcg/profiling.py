@@ -0,0 +1,164 @@
+"""
+CPU and memory profiling of command-line workflows.
+
+``--profile cpu`` runs the workflow under :mod:`cProfile`, writes the raw
+statistics to a ``.pstats`` file (open it with ``python -m pstats`` or
+snakeviz) and prints the most expensive functions. ``--profile mem`` traces
+allocations with :mod:`tracemalloc`, taking a snapshot before and after the
+model is loaded and after every write, and prints the allocation sites that
+grew most between consecutive snapshots.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Optional, TextIO, Union
+
+from rcg.inp_manage.tracing import NULL_RECORDER, SpanRecorder
+
+PROFILE_MODES = ("cpu", "mem")
+
+# Number of functions or allocation sites listed by default
+DEFAULT_TOP = 25
+
+# Frames stored per allocation; more frames give better tracebacks at a higher cost
+TRACEMALLOC_FRAMES = 10
+
+# Stages of BuildCatchments after which a memory snapshot is taken
+SNAPSHOT_SPANS = ("load_model", "write")
+
+
+class _SnapshotRecorder:
+    """Span recorder taking tracemalloc snapshots around model loads and writes."""
+
+    def __init__(self) -> None:
+        self.snapshots: list[tuple[str, tracemalloc.Snapshot]] = []
+        self._counts: dict[str, int] = {}
+
+    def take(self, label: str) -> None:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        self.snapshots.append((label, snapshot))
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        if name not in SNAPSHOT_SPANS:
+            yield
+            return
+        self._counts[name] = self._counts.get(name, 0) + 1
+        label = f"{name} #{self._counts[name]}"
+        if name == "load_model":
+            self.take(f"before {label}")
+        try:
+            yield
+        finally:
+            self.take(f"after {label}")
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {}
+
+
+class Profiler:
+    """
+    Context manager profiling the enclosed workflow.
+
+    Pass :attr:`recorder` to :class:`rcg.inp_manage.inp.BuildCatchments` so
+    memory snapshots are taken at its model loads and writes.
+
+    Attributes
+    ----------
+    mode : str
+        ``"cpu"`` or ``"mem"``.
+    output : Optional[Path]
+        Where the report is written: the ``.pstats`` file in CPU mode
+        (``rcg-<timestamp>.pstats`` by default), a text copy of the printed
+        report in memory mode (nothing by default).
+    top : int
+        Number of functions or allocation sites listed.
+    stream : TextIO
+        Where the summary is printed.
+
+    Example
+    -------
+    >>> with Profiler("mem") as profiler:
+    ...     BuildCatchments("model.inp", recorder=profiler.recorder).add_subcatchment(2.0, "mountains", "forests")
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        output: Optional[Union[str, Path]] = None,
+        top: int = DEFAULT_TOP,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profile mode: {mode}. Must be one of: {', '.join(PROFILE_MODES)}")
+        if output is None and mode == "cpu":
+            output = f"rcg-{time.strftime('%Y%m%d-%H%M%S')}.pstats"
+        self.mode = mode
+        self.output = Path(output) if output is not None else None
+        self.top = top
+        self.stream = stream if stream is not None else sys.stderr
+        self._profile: Optional[cProfile.Profile] = None
+        self._snapshots: Optional[_SnapshotRecorder] = None
+
+    @property
+    def recorder(self) -> SpanRecorder:
+        """Span recorder to pass to ``BuildCatchments``."""
+        return self._snapshots if self._snapshots is not None else NULL_RECORDER
+
+    def __enter__(self) -> "Profiler":
+        if self.mode == "cpu":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._snapshots = _SnapshotRecorder()
+            self._snapshots.take("start")
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc_val: Optional[BaseException], exc_tb: Optional[TracebackType]) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+            self._report_cpu(self._profile)
+            self._profile = None
+        elif self._snapshots is not None:
+            self._snapshots.take("end")
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._report_memory(self._snapshots.snapshots, peak)
+
+    def _report_cpu(self, profile: cProfile.Profile) -> None:
+        profile.dump_stats(str(self.output))
+        buffer = io.StringIO()
+        stats = pstats.Stats(profile, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        self.stream.write(f"CPU profile written to {self.output}\n{buffer.getvalue()}")
+
+    def _report_memory(self, snapshots: list[tuple[str, tracemalloc.Snapshot]], peak: int) -> None:
+        lines = [f"Peak traced memory: {peak / 2**20:.1f} MiB"]
+        for (previous_label, previous), (label, snapshot) in zip(snapshots, snapshots[1:]):
+            differences = snapshot.compare_to(previous, "lineno")
+            growth = sum(difference.size_diff for difference in differences)
+            lines.append(f"\n{previous_label} -> {label}: {growth / 2**20:+.2f} MiB")
+            for difference in differences[: self.top]:
+                frame = difference.traceback[0]
+                lines.append(
+                    f"  {difference.size_diff / 2**10:+10.1f} KiB {difference.count_diff:+8d} blocks  {frame.filename}:{frame.lineno}"
+                )
+        report = "\n".join(lines) + "\n"
+        self.stream.write(report)
+        if self.output is not None:
+            self.output.write_text(report)
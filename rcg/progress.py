@@ -0,0 +1,151 @@
+"""
+Progress reporting and cooperative cancellation of long operations.
+
+Long operations such as :meth:`rcg.inp_manage.inp.BuildCatchments.run_batch`
+take a ``progress`` callback, called with a :class:`ProgressReport` after
+every committed chunk, and a :class:`CancellationToken`, checked between
+chunks. Cancelling never interrupts a write: the chunk in progress is rolled
+back in memory, :class:`rcg.exceptions.OperationCancelled` is raised and the
+INP file keeps every chunk committed so far.
+
+Example
+-------
+>>> token = CancellationToken()
+>>> signal.signal(signal.SIGINT, lambda *args: token.cancel())
+>>> builder.run_batch(specs, "nightly", progress=print_progress, cancel=token)
+"""
+
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, TextIO
+
+from rcg.exceptions import OperationCancelled
+
+
+@dataclass(frozen=True)
+class ProgressReport:
+    """
+    State of a long operation.
+
+    Attributes
+    ----------
+    done : int
+        Input rows processed, including rows skipped as already done.
+    total : Optional[int]
+        Rows in the input, if known.
+    elapsed_s : float
+        Seconds since the operation started.
+    rows_per_s : float
+        Rows processed per second so far.
+    eta_s : Optional[float]
+        Estimated seconds until the end; None without ``total``.
+    """
+
+    done: int
+    total: Optional[int]
+    elapsed_s: float
+    rows_per_s: float
+    eta_s: Optional[float]
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of rows processed in [0, 1]; None without ``total``."""
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+
+
+ProgressCallback = Callable[[ProgressReport], None]
+
+
+class ProgressTracker:
+    """
+    Turn row counts into :class:`ProgressReport` calls of a callback.
+
+    Attributes
+    ----------
+    callback : Optional[ProgressCallback]
+        Receiver of the reports; None makes :meth:`update` a no-op.
+    total : Optional[int]
+        Rows in the input, if known.
+    done : int
+        Rows processed so far.
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback], total: Optional[int] = None) -> None:
+        self.callback = callback
+        self.total = total
+        self.done = 0
+        self._started = time.perf_counter()
+
+    def report(self) -> ProgressReport:
+        """Current state."""
+        elapsed = time.perf_counter() - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total is not None:
+            eta = max(self.total - self.done, 0) / rate if rate > 0 else None
+        return ProgressReport(self.done, self.total, elapsed, rate, eta)
+
+    def update(self, done: int) -> None:
+        """Set the number of processed rows and notify the callback."""
+        self.done = done
+        if self.callback is not None:
+            self.callback(self.report())
+
+
+class CancellationToken:
+    """
+    Thread-safe flag asking an operation to stop at its next checkpoint.
+
+    Example
+    -------
+    >>> token = CancellationToken()
+    >>> threading.Timer(60, token.cancel).start()
+    >>> token.raise_if_cancelled(done=1000)
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation; safe to call from any thread or a signal handler."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested."""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self, done: Optional[int] = None) -> None:
+        """
+        Raise if cancellation was requested.
+
+        Raises
+        ------
+        OperationCancelled
+            With the number of rows processed so far.
+        """
+        if self._event.is_set():
+            raise OperationCancelled("Operation cancelled", done=done)
+
+
+def format_progress(report: ProgressReport) -> str:
+    """One-line summary such as ``12000/50000 rows (24.0%), 850 rows/s, ETA 0:00:44``."""
+    text = f"{report.done}/{report.total} rows ({report.fraction:.1%})" if report.total else f"{report.done} rows"
+    text += f", {report.rows_per_s:.0f} rows/s"
+    if report.eta_s is not None:
+        text += f", ETA {timedelta(seconds=round(report.eta_s))}"
+    return text
+
+
+def print_progress(report: ProgressReport, stream: Optional[TextIO] = None) -> None:
+    """Progress callback overwriting one terminal line on stderr."""
+    stream = stream if stream is not None else sys.stderr
+    end = "\n" if report.total is not None and report.done >= report.total else ""
+    stream.write(f"\r{format_progress(report)}{end}")
+    stream.flush()
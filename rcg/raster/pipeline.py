@@ -0,0 +1,377 @@
+"""
+Subcatchments from categorical land-form and land-cover rasters.
+
+Rasters are ``.npy`` files opened as read-only memmaps, so the workers of the
+process pool map the same pages instead of receiving copies. Every tile is
+reduced to per-zone counts of (land form, land cover) pairs and only these
+small tables leave the workers, which keeps memory bounded by the tile size
+whatever the size of the raster. Zones are then parameterized with one
+vectorized lookup in the precomputed :class:`rcg.fuzzy.table.EngineTable` and
+written through the batch path of :class:`rcg.inp_manage.inp.BuildCatchments`.
+
+Given the model coordinates of the raster's top-left corner, every zone is
+written as a square footprint of its area centred on the zone's centroid, so
+outlets and raingages are assigned by proximity to where the zone really is.
+
+Example
+-------
+>>> builder = BuildCatchments("city.inp")
+>>> zones = build_from_rasters(
+...     builder, "cover.npy", "form.npy", zones="blocks.npy", cell_size=5.0, origin=(421_500.0, 5_573_200.0)
+... )
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+from rcg.inp_manage.geometry import M2_PER_HA, PolygonSet
+from rcg.inp_manage.inp import BuildCatchments
+from rcg.inp_manage.spatial import OutletConstraints
+from rcg.logging_config import get_logger
+
+logger = get_logger("raster.pipeline")
+
+RasterSource = Union[str, Path, np.ndarray]
+
+N_PAIRS = N_LAND_FORMS * N_LAND_COVERS
+
+# Default tile edge in cells; a tile of int32 codes is then 4 MB per raster
+DEFAULT_TILE_SIZE = 1024
+
+# Smallest zone area written as a subcatchment [ha]; areas are stored with 4 decimals
+MIN_AREA_HA = 0.0001
+
+
+def open_raster(source: RasterSource) -> np.ndarray:
+    """Open a ``.npy`` file as a read-only memmap; arrays are returned as they are."""
+    if isinstance(source, (str, Path)):
+        return np.load(source, mmap_mode="r")
+    return np.asarray(source)
+
+
+def tile_windows(shape: tuple[int, int], tile_size: int = DEFAULT_TILE_SIZE) -> list[tuple[slice, slice]]:
+    """Split a raster of ``shape`` into row-major windows of at most ``tile_size`` cells per side."""
+    if tile_size <= 0:
+        raise ValueError(f"tile_size must be positive, got: {tile_size}")
+    return [
+        (slice(row, min(row + tile_size, shape[0])), slice(col, min(col + tile_size, shape[1])))
+        for row in range(0, shape[0], tile_size)
+        for col in range(0, shape[1], tile_size)
+    ]
+
+
+@dataclass
+class ZoneStatistics:
+    """
+    Cell counts of every land form and land cover pair per zone.
+
+    Attributes
+    ----------
+    zone_ids : np.ndarray
+        ``(Z,)`` sorted zone IDs.
+    pair_counts : np.ndarray
+        ``(Z, 9, 14)`` number of cells per zone, land form and land cover.
+    coordinate_sums : np.ndarray
+        ``(Z, 2)`` sums of the row and column indices of the classified cells
+        of each zone.
+    """
+
+    zone_ids: np.ndarray
+    pair_counts: np.ndarray
+    coordinate_sums: np.ndarray
+
+    @classmethod
+    def combine(cls, parts: list[tuple[np.ndarray, np.ndarray, np.ndarray]]) -> "ZoneStatistics":
+        """Sum per-tile ``(zone_ids, (u, 126) counts, (u, 2) coordinate sums)`` over zones split across tiles."""
+        if not parts:
+            return cls(
+                np.empty(0, dtype=np.int64),
+                np.zeros((0, N_LAND_FORMS, N_LAND_COVERS), dtype=np.int64),
+                np.zeros((0, 2)),
+            )
+        ids = np.concatenate([part[0] for part in parts])
+        zone_ids, inverse = np.unique(ids, return_inverse=True)
+        counts = np.zeros((len(zone_ids), N_PAIRS), dtype=np.int64)
+        np.add.at(counts, inverse, np.concatenate([part[1] for part in parts]))
+        sums = np.zeros((len(zone_ids), 2))
+        np.add.at(sums, inverse, np.concatenate([part[2] for part in parts]))
+        return cls(zone_ids, counts.reshape(-1, N_LAND_FORMS, N_LAND_COVERS), sums)
+
+    @property
+    def cell_counts(self) -> np.ndarray:
+        """Number of classified cells per zone."""
+        return self.pair_counts.sum(axis=(1, 2))
+
+    @property
+    def land_form_fractions(self) -> np.ndarray:
+        """``(Z, 9)`` fraction of each zone covered by each land form."""
+        return self.pair_counts.sum(axis=2) / self.cell_counts[:, None]
+
+    @property
+    def land_cover_fractions(self) -> np.ndarray:
+        """``(Z, 14)`` fraction of each zone covered by each land cover."""
+        return self.pair_counts.sum(axis=1) / self.cell_counts[:, None]
+
+    @property
+    def cell_centroids(self) -> np.ndarray:
+        """``(Z, 2)`` centroid of each zone as fractional ``(row, column)`` from the raster's top-left corner."""
+        return self.coordinate_sums / self.cell_counts[:, None] + 0.5
+
+    def present_pairs(self) -> list[tuple[int, int]]:
+        """Land form and land cover codes of the pairs found in any zone."""
+        forms, covers = np.nonzero(self.pair_counts.sum(axis=0))
+        return list(zip((forms + 1).tolist(), (covers + 1).tolist()))
+
+    def dominant_pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """Land form and land cover codes of the most frequent pair in each zone."""
+        flat = self.pair_counts.reshape(len(self.zone_ids), N_PAIRS).argmax(axis=1)
+        return flat // N_LAND_COVERS + 1, flat % N_LAND_COVERS + 1
+
+
+def _count_tile(
+    land_cover: np.ndarray,
+    land_form: np.ndarray,
+    zones: Optional[np.ndarray],
+    window: tuple[slice, slice],
+    tile_zone: int,
+    zone_nodata: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count pairs and sum cell positions per zone in one window; cells with invalid codes or ``zone_nodata`` are skipped."""
+    cover = np.asarray(land_cover[window], dtype=np.int64)
+    form = np.asarray(land_form[window], dtype=np.int64)
+    zone = np.full(cover.shape, tile_zone, dtype=np.int64) if zones is None else np.asarray(zones[window], dtype=np.int64)
+
+    valid = (cover >= 1) & (cover <= N_LAND_COVERS) & (form >= 1) & (form <= N_LAND_FORMS) & (zone != zone_nodata)
+    pairs = (form[valid] - 1) * N_LAND_COVERS + cover[valid] - 1
+    zone_ids, inverse = np.unique(zone[valid], return_inverse=True)
+    counts = np.bincount(inverse * N_PAIRS + pairs, minlength=len(zone_ids) * N_PAIRS)
+    # np.nonzero walks the cells in the same row-major order as the boolean indexing above
+    rows, cols = np.nonzero(valid)
+    sums = np.column_stack(
+        [
+            np.bincount(inverse, weights=rows + window[0].start, minlength=len(zone_ids)),
+            np.bincount(inverse, weights=cols + window[1].start, minlength=len(zone_ids)),
+        ]
+    )
+    return zone_ids, counts.reshape(-1, N_PAIRS), sums.reshape(-1, 2)
+
+
+def _count_tile_task(args: tuple) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Process-pool entry point: reopen the memmaps in the worker and count one tile."""
+    sources, window, tile_zone, zone_nodata = args
+    land_cover, land_form, zones = (None if source is None else open_raster(source) for source in sources)
+    return _count_tile(land_cover, land_form, zones, window, tile_zone, zone_nodata)
+
+
+def zone_statistics(
+    land_cover: RasterSource,
+    land_form: RasterSource,
+    zones: Optional[RasterSource] = None,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    zone_nodata: int = 0,
+    processes: Optional[int] = None,
+) -> ZoneStatistics:
+    """
+    Count land form and land cover pairs per zone, tile by tile.
+
+    Parameters
+    ----------
+    land_cover : RasterSource
+        Land cover codes (1-14, see :class:`LandCover`); other values are nodata.
+    land_form : RasterSource
+        Land form codes (1-9, see :class:`LandForm`) on the same grid.
+    zones : Optional[RasterSource]
+        Zone IDs on the same grid, one zone per subcatchment. Without it every
+        tile becomes a zone, numbered from 1 in row-major order.
+    tile_size : int
+        Tile edge in cells.
+    zone_nodata : int
+        Zone ID of cells outside any zone.
+    processes : Optional[int]
+        Worker processes; None uses all CPUs. Rasters passed as arrays rather
+        than ``.npy`` paths are always processed in this process.
+
+    Returns
+    -------
+    ZoneStatistics
+        Pair counts of every zone with at least one classified cell.
+
+    Raises
+    ------
+    ValueError
+        If the rasters are not 2-D or their shapes differ.
+    """
+    sources = (land_cover, land_form, zones)
+    rasters = [None if source is None else open_raster(source) for source in sources]
+    shapes = {raster.shape for raster in rasters if raster is not None}
+    if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+        raise ValueError(f"Rasters must be 2-D and share one shape, got: {sorted(shapes)}")
+
+    windows = tile_windows(next(iter(shapes)), tile_size)
+    processes = processes if processes is not None else os.cpu_count() or 1
+    in_memory = any(source is not None and not isinstance(source, (str, Path)) for source in sources)
+    logger.info("Counting %d tiles with %d process(es)", len(windows), 1 if in_memory else processes)
+
+    if in_memory or processes <= 1 or len(windows) == 1:
+        parts = [_count_tile(*rasters, window, number, zone_nodata) for number, window in enumerate(windows, 1)]
+    else:
+        paths = tuple(None if source is None else str(source) for source in sources)
+        tasks = [(paths, window, number, zone_nodata) for number, window in enumerate(windows, 1)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parts = list(pool.map(_count_tile_task, tasks, chunksize=max(1, len(tasks) // (4 * processes))))
+    return ZoneStatistics.combine(parts)
+
+
+def _zone_table(stats: ZoneStatistics) -> EngineTable:
+    """The shipped engine table, completed with any pair of ``stats`` it lacks."""
+    table = EngineTable.load_default()
+    table.update(stats.present_pairs())
+    return table
+
+
+def infer_zones(
+    stats: ZoneStatistics,
+    cell_size: float,
+    table: Optional[EngineTable] = None,
+    origin: Optional[tuple[float, float]] = None,
+) -> pd.DataFrame:
+    """
+    Derive subcatchment parameters of every zone.
+
+    Each zone takes the land form and land cover of its most frequent pair,
+    as a subcatchment does in :meth:`BuildCatchments.add_subcatchment`. The
+    slope and imperviousness of all pairs in the zone, weighted by their
+    area, are reported alongside for comparison.
+
+    Parameters
+    ----------
+    stats : ZoneStatistics
+        Output of :func:`zone_statistics`.
+    cell_size : float
+        Raster cell edge in meters.
+    table : Optional[EngineTable]
+        Engine outputs; by default the precomputed table of the default engine.
+    origin : Optional[Tuple[float, float]]
+        Model coordinates (meters) of the outer top-left corner of the raster,
+        whose rows run southwards; adds the ``X`` and ``Y`` zone centroids.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by zone ID, with ``Area`` (ha), ``LandForm``, ``LandCover``,
+        ``Fraction`` (share of the dominant pair), ``PercSlope``,
+        ``PercImperv``, ``WeightedSlope`` and ``WeightedImperv`` columns, and
+        ``X`` and ``Y`` with ``origin``.
+    """
+    if cell_size <= 0:
+        raise ValueError(f"cell_size must be positive, got: {cell_size}")
+    if table is None:
+        table = _zone_table(stats)
+
+    forms, covers = stats.dominant_pairs()
+    dominant = table.lookup(forms, covers)
+    cells = stats.cell_counts
+    counts = stats.pair_counts.reshape(len(cells), N_PAIRS)
+    # Pairs absent from the table have zero weight in every zone
+    weighted = {name: counts @ np.nan_to_num(table.values[name].reshape(N_PAIRS)) / cells for name in ("slope", "impervious")}
+
+    frame = pd.DataFrame(
+        {
+            "Area": cells * cell_size**2 / M2_PER_HA,
+            "LandForm": [LandForm(code).name for code in forms.tolist()],
+            "LandCover": [LandCover(code).name for code in covers.tolist()],
+            "Fraction": counts.max(axis=1) / cells,
+            "PercSlope": dominant["slope"],
+            "PercImperv": dominant["impervious"],
+            "WeightedSlope": weighted["slope"],
+            "WeightedImperv": weighted["impervious"],
+        },
+        index=pd.Index(stats.zone_ids, name="Zone"),
+    )
+    if origin is not None:
+        centroids = stats.cell_centroids
+        frame["X"] = origin[0] + centroids[:, 1] * cell_size
+        frame["Y"] = origin[1] - centroids[:, 0] * cell_size
+    return frame
+
+
+def zone_footprints(frame: pd.DataFrame) -> PolygonSet:
+    """Square of each zone's area centred on its ``X``/``Y`` centroid, as counter-clockwise rings."""
+    half = np.sqrt(frame["Area"].to_numpy() * M2_PER_HA) / 2
+    x, y = frame["X"].to_numpy(), frame["Y"].to_numpy()
+    corners = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=float)
+    rings = np.stack([x, y], axis=1)[:, None, :] + corners[None, :, :] * half[:, None, None]
+    return PolygonSet(rings.reshape(-1, 2), np.arange(0, 4 * len(frame) + 1, 4))
+
+
+def build_from_rasters(
+    builder: BuildCatchments,
+    land_cover: RasterSource,
+    land_form: RasterSource,
+    zones: Optional[RasterSource] = None,
+    cell_size: float = 1.0,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    zone_nodata: int = 0,
+    processes: Optional[int] = None,
+    outlet_constraints: Optional[OutletConstraints] = None,
+    origin: Optional[tuple[float, float]] = None,
+    table: Optional[EngineTable] = None,
+) -> pd.DataFrame:
+    """
+    Add one subcatchment per raster zone as a single undoable batch.
+
+    With ``origin`` each zone becomes a square footprint of its area centred
+    on its centroid and is added through
+    :meth:`BuildCatchments.add_subcatchments_from_polygons`, so outlets and
+    raingages are the ones nearest to the zone. Without it the zones carry no
+    position and are laid out next to the existing subcatchments by
+    :meth:`BuildCatchments.add_subcatchments`.
+
+    Zones smaller than :data:`MIN_AREA_HA` cannot be stored and are skipped
+    with a warning; their ``Subcatchment`` is None.
+
+    Parameters are those of :func:`zone_statistics` and :func:`infer_zones`;
+    ``outlet_constraints`` is passed to the batch method.
+
+    Returns
+    -------
+    pd.DataFrame
+        The :func:`infer_zones` table with a ``Subcatchment`` column holding
+        the ID of the subcatchment created for each zone.
+    """
+    stats = zone_statistics(land_cover, land_form, zones, tile_size, zone_nodata, processes)
+    table = table if table is not None else _zone_table(stats)
+    frame = infer_zones(stats, cell_size, table, origin)
+
+    kept = frame["Area"].round(4).to_numpy() >= MIN_AREA_HA
+    if not kept.all():
+        logger.warning(
+            "Skipping %d zone(s) below %g ha: %s",
+            (~kept).sum(),
+            MIN_AREA_HA,
+            ", ".join(str(zone) for zone in frame.index[~kept][:20]),
+        )
+    added = frame[kept]
+    if origin is not None:
+        names = builder.add_subcatchments_from_polygons(
+            zone_footprints(added),
+            added["LandForm"].tolist(),
+            added["LandCover"].tolist(),
+            outlet_constraints=outlet_constraints,
+            prototypes=table.prototypes(),
+        )
+    else:
+        specs = zip(added["Area"].round(4).tolist(), added["LandForm"], added["LandCover"])
+        names = builder.add_subcatchments(specs, outlet_constraints, prototypes=table.prototypes())
+    frame["Subcatchment"] = None
+    frame.loc[kept, "Subcatchment"] = names
+    logger.info("Added %d subcatchments from raster zones", len(names))
+    return frame
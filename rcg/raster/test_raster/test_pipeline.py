@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+from swmmio import Model
+
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+from rcg.inp_manage.inp import BuildCatchments
+from rcg.raster.pipeline import build_from_rasters, infer_zones, tile_windows, zone_statistics
+
+
+@pytest.fixture
+def rasters():
+    rng = np.random.default_rng(0)
+    land_cover = rng.integers(0, 15, (37, 23)).astype(np.int16)
+    land_form = rng.integers(1, 10, (37, 23)).astype(np.int16)
+    zones = rng.integers(0, 6, (37, 23)).astype(np.int32)
+    return land_cover, land_form, zones
+
+
+def direct_counts(land_cover, land_form, zones, zone_id):
+    counts = np.zeros((N_LAND_FORMS, N_LAND_COVERS), dtype=np.int64)
+    valid = (zones == zone_id) & (land_cover >= 1)
+    np.add.at(counts, (land_form[valid] - 1, land_cover[valid] - 1), 1)
+    return counts
+
+
+def test_tile_windows_cover_the_raster():
+    windows = tile_windows((5, 7), 3)
+
+    coverage = np.zeros((5, 7), dtype=int)
+    for window in windows:
+        coverage[window] += 1
+    assert len(windows) == 6
+    assert (coverage == 1).all()
+
+
+class TestZoneStatistics:
+    def test_counts_match_whole_raster(self, rasters):
+        land_cover, land_form, zones = rasters
+
+        stats = zone_statistics(land_cover, land_form, zones, tile_size=8)
+
+        # Zone 0 is nodata, land cover 0 is outside the valid codes
+        assert stats.zone_ids.tolist() == [1, 2, 3, 4, 5]
+        for zone_id, counts in zip(stats.zone_ids, stats.pair_counts):
+            assert (counts == direct_counts(land_cover, land_form, zones, zone_id)).all()
+        assert stats.land_cover_fractions.sum(axis=1) == pytest.approx(np.ones(5))
+
+    def test_process_pool_over_memmaps(self, rasters, tmp_path):
+        paths = []
+        for name, raster in zip(("cover", "form", "zones"), rasters):
+            paths.append(tmp_path / f"{name}.npy")
+            np.save(paths[-1], raster)
+
+        pooled = zone_statistics(*paths, tile_size=8, processes=2)
+        serial = zone_statistics(*rasters, tile_size=8)
+
+        assert (pooled.zone_ids == serial.zone_ids).all()
+        assert (pooled.pair_counts == serial.pair_counts).all()
+
+    def test_tiles_are_zones_without_zone_raster(self, rasters):
+        land_cover, land_form, _ = rasters
+
+        stats = zone_statistics(land_cover, land_form, tile_size=20)
+
+        assert stats.zone_ids.tolist() == [1, 2, 3, 4]
+        assert stats.cell_counts[0] == (land_cover[:20, :20] >= 1).sum()
+
+    def test_rejects_mismatched_shapes(self, rasters):
+        with pytest.raises(ValueError):
+            zone_statistics(rasters[0], rasters[1][:-1])
+
+
+def test_infer_zones_uses_dominant_pair_and_weights():
+    land_form = np.full((4, 4), 2)
+    land_cover = np.array([[10, 10, 10, 11]] * 4)
+    values = {name: np.full((N_LAND_FORMS, N_LAND_COVERS), np.nan) for name in ("slope", "impervious", "catchment")}
+    for name, rural, forests in [("slope", 1.0, 5.0), ("impervious", 20.0, 4.0), ("catchment", 0.3, 0.6)]:
+        values[name][1, 9], values[name][1, 10] = rural, forests
+
+    zones = infer_zones(zone_statistics(land_cover, land_form), cell_size=10.0, table=EngineTable(values))
+
+    row = zones.loc[1]
+    assert row["Area"] == pytest.approx(0.16)
+    assert (row["LandForm"], row["LandCover"]) == ("flats_and_plateaus", "rural")
+    assert row["Fraction"] == pytest.approx(0.75)
+    assert row["PercImperv"] == pytest.approx(20.0)
+    assert row["WeightedImperv"] == pytest.approx(0.75 * 20.0 + 0.25 * 4.0)
+
+
+def test_build_from_rasters(temp_inp_file):
+    land_form = np.full((30, 30), 2, dtype=np.int8)
+    land_cover = np.full((30, 30), 10, dtype=np.int8)
+    zones = np.zeros((30, 30), dtype=np.int32)
+    zones[:10], zones[10:25] = 7, 9
+    builder = BuildCatchments(str(temp_inp_file), backup=False)
+    initial_count = len(builder.model.inp.subcatchments)
+
+    result = build_from_rasters(builder, land_cover, land_form, zones, cell_size=10.0, processes=1)
+
+    assert result.index.tolist() == [7, 9]
+    assert result["Area"].tolist() == pytest.approx([3.0, 4.5])
+    subcatchments = Model(str(temp_inp_file)).inp.subcatchments
+    assert len(subcatchments) == initial_count + 2
+    assert subcatchments.loc[result["Subcatchment"], "Area"].tolist() == pytest.approx([3.0, 4.5])
+    assert len(builder.history.undo_stack) == 1
+
+
+def test_centroids_of_zones(rasters):
+    land_cover, land_form, zones = rasters
+
+    stats = zone_statistics(land_cover, land_form, zones, tile_size=8)
+
+    for zone_id, centroid in zip(stats.zone_ids, stats.cell_centroids):
+        rows, cols = np.nonzero((zones == zone_id) & (land_cover >= 1))
+        assert centroid == pytest.approx([rows.mean() + 0.5, cols.mean() + 0.5])
+
+
+def test_build_from_rasters_at_origin(temp_inp_file):
+    land_form = np.full((30, 30), 2, dtype=np.int8)
+    land_cover = np.full((30, 30), 10, dtype=np.int8)
+    zones = np.zeros((30, 30), dtype=np.int32)
+    zones[:10], zones[20:, 20:] = 7, 9
+    builder = BuildCatchments(str(temp_inp_file), backup=False)
+
+    result = build_from_rasters(builder, land_cover, land_form, zones, cell_size=10.0, processes=1, origin=(1000.0, 5000.0))
+
+    assert result[["X", "Y"]].to_numpy() == pytest.approx(np.array([[1150.0, 4950.0], [1250.0, 4750.0]]))
+    reloaded = Model(str(temp_inp_file)).inp
+    for zone, name in result["Subcatchment"].items():
+        centroid = reloaded.polygons.loc[name, ["X", "Y"]].mean()
+        assert centroid.tolist() == pytest.approx(result.loc[zone, ["X", "Y"]].tolist())
+    assert reloaded.subcatchments.loc[result["Subcatchment"], "Area"].tolist() == pytest.approx([3.0, 1.0])
+
+
+def test_build_from_rasters_skips_zones_below_minimum_area(temp_inp_file, caplog):
+    land_form = np.full((30, 30), 2, dtype=np.int8)
+    land_cover = np.full((30, 30), 10, dtype=np.int8)
+    zones = np.full((30, 30), 7, dtype=np.int32)
+    zones[0, 0] = 9
+    builder = BuildCatchments(str(temp_inp_file), backup=False)
+    initial_count = len(builder.model.inp.subcatchments)
+
+    # 0.1 m cells: zone 9 is 0.01 m2
+    result = build_from_rasters(builder, land_cover, land_form, zones, cell_size=0.1, processes=1)
+
+    assert result.loc[9, "Subcatchment"] is None
+    assert result.loc[7, "Subcatchment"] is not None
+    assert len(Model(str(temp_inp_file)).inp.subcatchments) == initial_count + 1
+    assert "Skipping 1 zone(s)" in caplog.text
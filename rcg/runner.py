@@ -2,21 +2,42 @@
 Interactive command-line interface for creating and adding multiple subcatchments
 to an existing SWMM model through step-by-step prompts.
 
+With ``--specs`` the subcatchments listed in a CSV file (columns ``area``,
+``land_form`` and ``land_cover``) are added to one or more models as a
+resumable batch job, with a progress line; Ctrl+C stops it cleanly after the
+current chunk, and rerunning the same command resumes it.
+
 Usage:
-    python3 runner.py file_path
+    python3 runner.py file_path [--profile cpu|mem]
+    python3 runner.py file_path [file_path ...] --specs specs.csv [--job-id ID]
 
 Example:
     python3 runner.py example.inp
 """
 
+import argparse
 import logging
+import re
+import signal
 import sys
-from typing import Union
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
 
+from rcg.exceptions import OperationCancelled
 from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.inp_manage.checkpoint import DEFAULT_CHUNK_ROWS, JobResult
 from rcg.inp_manage.inp import BuildCatchments
+from rcg.inp_manage.tracing import SpanRecorder
 from rcg.logging_config import setup_logging as setup_central_logging
-from rcg.validation import validate_area, validate_file_path, validate_land_cover, validate_land_form
+from rcg.profiling import DEFAULT_TOP, PROFILE_MODES, Profiler
+from rcg.progress import CancellationToken, ProgressCallback, print_progress
+from rcg.validation import validate_area, validate_batch, validate_file_path, validate_land_cover, validate_land_form
+
+# Columns of a specs file, matched case-insensitively
+SPEC_COLUMNS = ("area", "land_form", "land_cover")
 
 
 def setup_logging() -> logging.Logger:
@@ -59,22 +80,27 @@ def add_multiple_subcatchments(model: BuildCatchments, logger: logging.Logger) -
 
     try:
         while True:
-            logger.info(f"Adding subcatchment #{subcatchment_count + 1}")
+            logger.info("Adding subcatchment #%d", subcatchment_count + 1)
 
             area = prompt_for_float("Enter area in hectares (ha, positive number <=10000): ")
             land_form = prompt_for_category("Enter land form: ", validate_land_form, LandForm)
             land_cover = prompt_for_category("Enter land cover: ", validate_land_cover, LandCover)
 
-            model.add_subcatchment(area, land_form, land_cover)
+            name = model.add_subcatchment(area, land_form, land_cover)
             subcatchment_count += 1
-            logger.info(f"Subcatchment #{subcatchment_count} added successfully")
+            logger.info(
+                "Subcatchment #%d added successfully as %s",
+                subcatchment_count,
+                name,
+                extra={"subcatchment": name, "area": area, "land_form": land_form.name, "land_cover": land_cover.name},
+            )
 
             while True:
                 user_input = input("\nDo you want to add another subcatchment? (y/n): ").lower().strip()
                 if user_input == "y":
                     break
                 elif user_input == "n":
-                    logger.info(f"Finished adding {subcatchment_count} subcatchment(s)")
+                    logger.info("Finished adding %d subcatchment(s)", subcatchment_count)
                     return
                 else:
                     print("Please enter 'y' or 'n'")
@@ -82,9 +108,9 @@ def add_multiple_subcatchments(model: BuildCatchments, logger: logging.Logger) -
     except KeyboardInterrupt:
         logger.info("Process interrupted by user")
         if subcatchment_count > 0:
-            logger.info(f"Added {subcatchment_count} subcatchment(s) before interruption")
+            logger.info("Added %d subcatchment(s) before interruption", subcatchment_count)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise
 
 
@@ -107,24 +133,137 @@ def generate_subcatchment(file_path: str, area: float, land_form: str, land_cove
     model.add_subcatchment(area, land_form, land_cover)
 
 
+def run_specs_file(
+    file_paths: list[Path],
+    specs_path: Path,
+    job_id: str,
+    logger: logging.Logger,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    progress: Optional[ProgressCallback] = print_progress,
+    cancel: Optional[CancellationToken] = None,
+    recorder: Optional[SpanRecorder] = None,
+) -> list[JobResult]:
+    """
+    Add the subcatchments listed in a CSV file to every model as a resumable batch job.
+
+    Invalid rows are reported and left out; the valid ones are added with
+    :meth:`BuildCatchments.run_batch`, so a rerun with the same ``job_id``
+    continues where a crashed or cancelled run stopped.
+
+    Parameters
+    ----------
+    file_paths : List[Path]
+        SWMM input files, processed one after another.
+    specs_path : Path
+        CSV file with ``area``, ``land_form`` and ``land_cover`` columns.
+    job_id : str
+        Identifier of the job, shared by all models.
+    logger : logging.Logger
+        Receiver of the summaries.
+    chunk_rows : int
+        Rows per chunk, i.e. per write and checkpoint.
+    progress : Optional[ProgressCallback]
+        Receiver of the progress of each model.
+    cancel : Optional[CancellationToken]
+        Token checked between chunks.
+    recorder : Optional[SpanRecorder]
+        Receiver of timing spans, e.g. from ``--profile mem``.
+
+    Returns
+    -------
+    List[JobResult]
+        Outcome per model.
+
+    Raises
+    ------
+    ValueError
+        If the specs file lacks a column.
+    OperationCancelled
+        If ``cancel`` was cancelled; chunks written so far are kept.
+    """
+    specs = pd.read_csv(specs_path)
+    columns = {str(column).strip().lower(): column for column in specs.columns}
+    missing = [column for column in SPEC_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Specs file must have the columns {', '.join(SPEC_COLUMNS)}, missing: {', '.join(missing)}")
+
+    validation = validate_batch(*(specs[columns[column]] for column in SPEC_COLUMNS))
+    if len(validation.errors):
+        logger.warning(
+            "Leaving out %d invalid value(s) of %s:\n%s",
+            len(validation.errors),
+            specs_path,
+            validation.errors.head(20).to_string(index=False),
+        )
+    total = int(validation.valid.sum())
+
+    results = []
+    for number, file_path in enumerate(file_paths, 1):
+        logger.info("Model %d/%d: %s", number, len(file_paths), file_path)
+        model = BuildCatchments(str(file_path), recorder=recorder)
+        result = model.run_batch(validation.specs(), job_id, chunk_rows, progress=progress, cancel=cancel, total=total)
+        logger.info(
+            "Added %d subcatchment(s) to %s in %d chunk(s), skipped %d added earlier",
+            result.added,
+            file_path,
+            result.chunks,
+            result.skipped,
+        )
+        results.append(result)
+    return results
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Create the argument parser of the interactive runner."""
+    parser = argparse.ArgumentParser(description="Interactively add subcatchments to a SWMM model")
+    parser.add_argument("file_paths", nargs="+", metavar="file_path", help="Path to the SWMM input file")
+    parser.add_argument("--specs", type=Path, help="CSV file of subcatchments to add as a batch job instead of prompting")
+    parser.add_argument("--job-id", help="Batch job identifier for resuming (default: name of the specs file)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows written per chunk")
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="Profile the session: cpu writes a .pstats file, mem reports allocation growth per stage",
+    )
+    parser.add_argument("--profile-output", help="Where to write the profile (default: rcg-<timestamp>.pstats for cpu)")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP, help="Functions or allocation sites listed")
+    return parser
+
+
 if __name__ == "__main__":
     logger = setup_logging()
+    parser = create_parser()
+    args = parser.parse_args()
+    if args.specs is None and len(args.file_paths) != 1:
+        parser.error("interactive mode takes exactly one file_path; use --specs for several models")
 
-    if len(sys.argv) != 2:
-        logger.error("Usage: python runner.py <path_to_inp_file>")
-        logger.info("For CLI, try: python -m rcg.cli --help")
-        sys.exit(1)
-
-    file_path_str = sys.argv[1]
-    logger.info(f"Validating and loading SWMM model: {file_path_str}")
+    logger.info("Validating and loading SWMM model(s): %s", ", ".join(args.file_paths))
 
     try:
-        file_path = validate_file_path(file_path_str)  # Validate before loading
-        user_model = BuildCatchments(str(file_path))
-        add_multiple_subcatchments(user_model, logger)
+        file_paths = [validate_file_path(file_path) for file_path in args.file_paths]  # Validate before loading
+        profiling = Profiler(args.profile, args.profile_output, args.profile_top) if args.profile else nullcontext()
+        with profiling as profiler:
+            recorder = profiler.recorder if profiler else None
+            if args.specs is None:
+                user_model = BuildCatchments(str(file_paths[0]), recorder=recorder)
+                add_multiple_subcatchments(user_model, logger)
+            else:
+                token = CancellationToken()
+
+                def request_cancel(signum, frame):
+                    logger.warning("Cancelling after the current chunk; press Ctrl+C again to abort")
+                    token.cancel()
+                    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+                signal.signal(signal.SIGINT, request_cancel)
+                job_id = args.job_id or re.sub(r"[^A-Za-z0-9_.-]", "_", args.specs.stem)
+                run_specs_file(file_paths, args.specs, job_id, logger, args.chunk_rows, cancel=token, recorder=recorder)
+    except OperationCancelled as e:
+        logger.warning("Cancelled after %s row(s); rerun the same command to resume", e.done)
+        sys.exit(130)
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Error loading model: {e}")
+        logger.error("Error loading model: %s", e)
         sys.exit(1)
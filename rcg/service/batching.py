@@ -0,0 +1,242 @@
+"""
+Micro-batching of fuzzy inference requests.
+
+Requests that arrive within a short window are coalesced and answered with
+one vectorized :class:`rcg.fuzzy.table.EngineTable` lookup. Land form and
+land cover pairs missing from the table are computed first on a single
+worker thread, because scikit-fuzzy simulations are neither fast nor
+thread-safe, so the event loop never blocks on inference.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from rcg.exceptions import ServiceOverloadedError
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Quantiles are reported as the upper bound of the bucket holding them,
+    which is accurate to the bucket resolution and costs O(1) per sample.
+
+    Example
+    -------
+    >>> histogram = LatencyHistogram()
+    >>> histogram.record(0.004)
+    >>> histogram.snapshot()["p99_ms"]
+    5.0
+    """
+
+    def __init__(self, bounds_ms: tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.bounds = np.asarray(bounds_ms, dtype=float)
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add one sample."""
+        milliseconds = seconds * 1000
+        self.counts[np.searchsorted(self.bounds, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket containing quantile ``q``; NaN without samples, inf past the last bucket."""
+        if self.count == 0:
+            return float("nan")
+        position = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return float(self.bounds[position]) if position < len(self.bounds) else float("inf")
+
+    def snapshot(self) -> dict:
+        """Count, mean, p50/p95/p99 and cumulative bucket counts keyed by upper bound (ms)."""
+        cumulative = np.cumsum(self.counts).tolist()
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {**{f"{bound:g}": count for bound, count in zip(self.bounds, cumulative)}, "+Inf": cumulative[-1]},
+        }
+
+
+@dataclass
+class _Request:
+    land_forms: np.ndarray
+    land_covers: np.ndarray
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent inference requests into batched table lookups.
+
+    A batch is closed when ``window`` seconds have passed since its first
+    request or when it holds ``max_batch`` items; a single request larger
+    than ``max_batch`` forms a batch of its own. Requests that would raise
+    the number of waiting items above ``max_pending`` are rejected.
+
+    Attributes
+    ----------
+    table : EngineTable
+        Engine outputs; by default the precomputed table, and pairs missing
+        from it are computed when they are first requested.
+    window : float
+        Seconds a batch stays open for more requests.
+    max_batch : int
+        Items after which a batch is processed without waiting.
+    max_pending : int
+        Items allowed to wait for processing.
+    batches : int
+        Number of batches processed.
+    items : int
+        Number of items processed.
+    rejected : int
+        Number of requests rejected because of backpressure.
+
+    Example
+    -------
+    >>> batcher = MicroBatcher(window=0.002)
+    >>> await batcher.start()
+    >>> results = await batcher.submit(np.array([2]), np.array([10]))
+    """
+
+    def __init__(
+        self, table: Optional[EngineTable] = None, window: float = 0.002, max_batch: int = 512, max_pending: int = 4096
+    ) -> None:
+        if window < 0 or max_batch < 1 or max_pending < 1:
+            raise ValueError("window must not be negative; max_batch and max_pending must be positive")
+        self.table = table if table is not None else EngineTable.load_default()
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.pending = 0
+        self.batch_latency = LatencyHistogram()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rcg-inference")
+
+    async def start(self) -> None:
+        """Start the batching task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the batching task; waiting requests are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, land_forms: np.ndarray, land_covers: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Queue land form and land cover codes for the next batch.
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            ``slope``, ``impervious``, ``catchment`` and ``catchment_class``
+            arrays in the order of the inputs.
+
+        Raises
+        ------
+        ValueError
+            If a code is out of range or the arrays differ in length.
+        ServiceOverloadedError
+            If too many items are already waiting.
+        """
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher.start() must be awaited first")
+        land_forms = np.asarray(land_forms, dtype=np.int64).ravel()
+        land_covers = np.asarray(land_covers, dtype=np.int64).ravel()
+        if len(land_forms) != len(land_covers):
+            raise ValueError(f"Got {len(land_forms)} land forms and {len(land_covers)} land covers")
+        if ((land_forms < 1) | (land_forms > N_LAND_FORMS)).any() or ((land_covers < 1) | (land_covers > N_LAND_COVERS)).any():
+            raise ValueError(f"Land form codes must be 1-{N_LAND_FORMS} and land cover codes 1-{N_LAND_COVERS}")
+        if self.pending + len(land_forms) > self.max_pending:
+            self.rejected += 1
+            raise ServiceOverloadedError(
+                f"{self.pending} items are waiting (limit {self.max_pending})", pending=self.pending, limit=self.max_pending
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending += len(land_forms)
+        self._queue.put_nowait(_Request(land_forms, land_covers, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0].land_forms)
+            deadline = loop.time() + self.window
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request.land_forms)
+            await self._process(batch)
+
+    async def _process(self, batch: list[_Request]) -> None:
+        """Answer every request of ``batch`` with one lookup."""
+        started = time.perf_counter()
+        land_forms = np.concatenate([request.land_forms for request in batch])
+        land_covers = np.concatenate([request.land_covers for request in batch])
+        self.pending -= len(land_forms)
+        try:
+            missing = ~self.table.computed[land_forms - 1, land_covers - 1]
+            if missing.any():
+                pairs = set(zip(land_forms[missing].tolist(), land_covers[missing].tolist()))
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.table.update, pairs)
+            results = self.table.lookup(land_forms, land_covers)
+            results["catchment_class"] = self.table.catchment_classes[land_forms - 1, land_covers - 1]
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(land_forms)
+        start = 0
+        for request in batch:
+            end = start + len(request.land_forms)
+            if not request.future.done():
+                request.future.set_result({name: values[start:end] for name, values in results.items()})
+            start = end
+        self.batch_latency.record(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        """Batching counters and the latency of batch processing."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "computed_pairs": int(self.table.computed.sum()),
+            "batch_latency": self.batch_latency.snapshot(),
+        }
@@ -0,0 +1,400 @@
+"""
+Load generator for the inference service and the in-process engine APIs.
+
+A :class:`RequestMix` draws land form and land cover codes and batch sizes
+from configurable distributions with a fixed seed, so the same mix can be
+replayed on every commit. Requests are driven at several concurrency levels
+against a target:
+
+* ``engine``: :meth:`FuzzyEngine.compute_all` per item, serialized on one
+  thread as a single-process caller would run it;
+* ``batcher``: an in-process :class:`MicroBatcher`;
+* ``service``: a running :mod:`rcg.service.server` over HTTP.
+
+The report is JSON with the machine, Python and git metadata, throughput,
+p50/p95/p99 latency and the resident memory of each level. Python allocation
+peaks are measured with ``--trace-memory`` in a separate, untimed pass, as
+tracing every allocation would slow the timed one down.
+
+Usage:
+    python -m rcg.service.loadtest --target service --url http://127.0.0.1:8750 \\
+        --concurrency 1 8 32 --requests 2000 --batch-sizes 1:0.9 32:0.1 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Protocol
+from urllib.parse import urlparse
+
+import numpy as np
+
+from rcg.exceptions import ServiceOverloadedError
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.sysinfo import machine_metadata
+
+if TYPE_CHECKING:
+    from rcg.fuzzy.engine import FuzzyEngine
+    from rcg.service.batching import MicroBatcher
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class RequestMix:
+    """
+    Distributions requests are drawn from.
+
+    Attributes
+    ----------
+    land_form_weights : Optional[Dict[str, float]]
+        Relative frequency of each land form by name; None draws uniformly.
+    land_cover_weights : Optional[Dict[str, float]]
+        Relative frequency of each land cover by name; None draws uniformly.
+    batch_sizes : Dict[int, float]
+        Relative frequency of each number of items per request.
+    seed : int
+        Seed of the random generator.
+
+    Raises
+    ------
+    ValueError
+        If a category name is unknown or the weights are not positive.
+    """
+
+    land_form_weights: Optional[dict[str, float]] = None
+    land_cover_weights: Optional[dict[str, float]] = None
+    batch_sizes: dict[int, float] = field(default_factory=lambda: {1: 1.0})
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self._form_p = self._probabilities(self.land_form_weights, LandForm)
+        self._cover_p = self._probabilities(self.land_cover_weights, LandCover)
+        sizes = np.array(list(self.batch_sizes), dtype=np.int64)
+        weights = np.array(list(self.batch_sizes.values()), dtype=float)
+        if (sizes < 1).any() or (weights <= 0).any() or len(sizes) == 0:
+            raise ValueError("batch_sizes must map positive sizes to positive weights")
+        self._sizes, self._size_p = sizes, weights / weights.sum()
+
+    @staticmethod
+    def _probabilities(weights: Optional[dict[str, float]], categories: type) -> np.ndarray:
+        if weights is None:
+            return np.full(len(categories), 1 / len(categories))
+        unknown = set(weights) - set(categories.get_all_categories())
+        if unknown:
+            raise ValueError(f"Unknown {categories.__name__} categories: {', '.join(sorted(unknown))}")
+        p = np.array([weights.get(member.name, 0.0) for member in categories], dtype=float)
+        if (p < 0).any() or p.sum() <= 0:
+            raise ValueError(f"{categories.__name__} weights must be non-negative and not all zero")
+        return p / p.sum()
+
+    def requests(self, count: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Draw ``count`` requests as land form and land cover code arrays."""
+        rng = np.random.default_rng(self.seed)
+        sizes = rng.choice(self._sizes, size=count, p=self._size_p)
+        total = int(sizes.sum())
+        forms = rng.choice(np.arange(1, len(LandForm) + 1), size=total, p=self._form_p)
+        covers = rng.choice(np.arange(1, len(LandCover) + 1), size=total, p=self._cover_p)
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        return [(forms[start:end], covers[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+class Target(Protocol):
+    """Something requests can be sent to."""
+
+    name: str
+
+    async def __call__(self, land_forms: np.ndarray, land_covers: np.ndarray) -> None: ...
+
+
+class EngineTarget:
+    """Call :meth:`FuzzyEngine.compute_all` for every item on one worker thread."""
+
+    name = "engine"
+
+    def __init__(self, engine: Optional["FuzzyEngine"] = None) -> None:
+        from rcg.fuzzy.engine import get_default_fuzzy_engine
+
+        self.engine = engine if engine is not None else get_default_fuzzy_engine()
+        # The engine's simulations keep state between calls
+        self._lock = threading.Lock()
+
+    def _compute(self, land_forms: np.ndarray, land_covers: np.ndarray) -> None:
+        with self._lock:
+            for form, cover in zip(land_forms.tolist(), land_covers.tolist()):
+                self.engine.compute_all(form, cover)
+
+    async def __call__(self, land_forms: np.ndarray, land_covers: np.ndarray) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._compute, land_forms, land_covers)
+
+
+class BatcherTarget:
+    """Submit to an in-process :class:`MicroBatcher`, started and stopped with the run."""
+
+    name = "batcher"
+
+    def __init__(self, batcher: Optional["MicroBatcher"] = None) -> None:
+        from rcg.service.batching import MicroBatcher
+
+        self.batcher = batcher if batcher is not None else MicroBatcher()
+
+    async def __call__(self, land_forms: np.ndarray, land_covers: np.ndarray) -> None:
+        await self.batcher.submit(land_forms, land_covers)
+
+
+class HttpTarget:
+    """
+    POST to a running inference service.
+
+    Every worker keeps its own keep-alive connection. Single items go to
+    ``/compute`` and larger requests to ``/batch``.
+    """
+
+    name = "service"
+
+    def __init__(self, url: str) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self._connections: dict[int, tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+
+    async def _connection(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        key = id(asyncio.current_task())
+        if key not in self._connections:
+            self._connections[key] = await asyncio.open_connection(self.host, self.port)
+        return self._connections[key]
+
+    async def __call__(self, land_forms: np.ndarray, land_covers: np.ndarray) -> None:
+        items = [{"land_form": form, "land_cover": cover} for form, cover in zip(land_forms.tolist(), land_covers.tolist())]
+        path, payload = ("/compute", items[0]) if len(items) == 1 else ("/batch", {"items": items})
+        body = json.dumps(payload).encode()
+        reader, writer = await self._connection()
+        try:
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            content = await reader.readexactly(length)
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError):
+            self._connections.pop(id(asyncio.current_task()), None)
+            raise
+        if status == 503:
+            raise ServiceOverloadedError(json.loads(content).get("error", "Service overloaded"))
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}: {content[:200]!r}")
+
+    async def close(self) -> None:
+        for _, writer in self._connections.values():
+            writer.close()
+        self._connections.clear()
+
+
+def _max_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process since it started in KiB, where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def _send_all(
+    target: Target, requests: list[tuple[np.ndarray, np.ndarray]], concurrency: int
+) -> tuple[np.ndarray, Counter]:
+    """Send ``requests`` with ``concurrency`` workers; return the latency of each (NaN if it failed) and error types."""
+    latencies = np.full(len(requests), np.nan)
+    errors: Counter = Counter()
+    cursor = iter(range(len(requests)))
+
+    async def worker() -> None:
+        for index in cursor:
+            started = time.perf_counter()
+            try:
+                await target(*requests[index])
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies[index] = time.perf_counter() - started
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def run_level(
+    target: Target, requests: list[tuple[np.ndarray, np.ndarray]], concurrency: int, trace_memory: bool = False
+) -> dict:
+    """
+    Send ``requests`` with ``concurrency`` workers and summarize the results.
+
+    Parameters
+    ----------
+    target : Target
+        Where requests are sent.
+    requests : List[Tuple[np.ndarray, np.ndarray]]
+        Land form and land cover codes of each request.
+    concurrency : int
+        Number of concurrent workers.
+    trace_memory : bool
+        Send the requests a second time under :mod:`tracemalloc` to measure
+        the peak of Python allocations; the timed pass never traces.
+
+    Returns
+    -------
+    dict
+        Counts, throughput, latency percentiles (ms) and error types of the
+        timed pass; ``peak_rss_growth_kb``, how much the level raised the
+        peak resident set size of the process, and ``process_peak_rss_kb``,
+        that peak since the process started; ``python_peak_bytes`` of the
+        traced pass, or None.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be positive, got: {concurrency}")
+    rss_before = _max_rss_kb()
+    started = time.perf_counter()
+    latencies, errors = await _send_all(target, requests, concurrency)
+    duration = time.perf_counter() - started
+    rss_after = _max_rss_kb()
+
+    python_peak = None
+    if trace_memory:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        try:
+            await _send_all(target, requests, concurrency)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        python_peak = peak - baseline
+
+    succeeded = latencies[~np.isnan(latencies)] * 1000
+    items = sum(len(request[0]) for request in requests)
+    percentiles = np.percentile(succeeded, [50, 95, 99]).tolist() if len(succeeded) else [None] * 3
+    return {
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "items": items,
+        "succeeded": len(succeeded),
+        "errors": dict(errors),
+        "duration_s": duration,
+        "throughput_rps": len(succeeded) / duration if duration else None,
+        "items_per_s": items / duration if duration else None,
+        "latency_ms": {
+            "p50": percentiles[0],
+            "p95": percentiles[1],
+            "p99": percentiles[2],
+            "mean": float(succeeded.mean()) if len(succeeded) else None,
+            "max": float(succeeded.max()) if len(succeeded) else None,
+        },
+        "peak_rss_growth_kb": rss_after - rss_before if rss_before is not None else None,
+        "process_peak_rss_kb": rss_after,
+        "python_peak_bytes": python_peak,
+    }
+
+
+async def run_load_test(
+    target: Target, mix: RequestMix, concurrency_levels: list[int], requests: int, trace_memory: bool = False
+) -> dict:
+    """
+    Run the same request mix at every concurrency level.
+
+    Parameters
+    ----------
+    target : Target
+        Where requests are sent.
+    mix : RequestMix
+        Request distributions; every level replays the same seeded requests.
+    concurrency_levels : List[int]
+        Numbers of concurrent workers.
+    requests : int
+        Requests per level.
+    trace_memory : bool
+        Measure Python allocation peaks in an extra untimed pass per level; see :func:`run_level`.
+
+    Returns
+    -------
+    dict
+        ``metadata``, ``config`` and one ``levels`` entry per concurrency level.
+    """
+    drawn = mix.requests(requests)
+    if isinstance(target, BatcherTarget):
+        await target.batcher.start()
+    try:
+        levels = [await run_level(target, drawn, concurrency, trace_memory) for concurrency in concurrency_levels]
+    finally:
+        if isinstance(target, BatcherTarget):
+            await target.batcher.close()
+        if isinstance(target, HttpTarget):
+            await target.close()
+    return {
+        "metadata": machine_metadata(),
+        "config": {
+            "target": target.name,
+            "requests_per_level": requests,
+            "trace_memory": trace_memory,
+            "mix": {**asdict(mix), "batch_sizes": {str(size): weight for size, weight in mix.batch_sizes.items()}},
+        },
+        "levels": levels,
+    }
+
+
+def _batch_sizes(values: list[str]) -> dict[int, float]:
+    """Parse ``SIZE:WEIGHT`` arguments."""
+    sizes = {}
+    for value in values:
+        size, _, weight = value.partition(":")
+        sizes[int(size)] = float(weight or 1)
+    return sizes
+
+
+def main() -> int:
+    """Run a load test from the command line and print or save the JSON report."""
+    parser = argparse.ArgumentParser(description="Rapid Catchment Generator load test")
+    parser.add_argument("--target", choices=("engine", "batcher", "service"), default="batcher", help="What to load")
+    parser.add_argument("--url", default="http://127.0.0.1:8750", help="Service URL for --target service")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--batch-sizes", nargs="+", default=["1:1"], help="Items per request as SIZE:WEIGHT")
+    parser.add_argument("--land-forms", type=json.loads, default=None, help="JSON weights, e.g. '{\"mountains\": 2}'")
+    parser.add_argument("--land-covers", type=json.loads, default=None, help="JSON weights of land covers")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request mix")
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="Measure Python allocation peaks in an extra untimed pass per level"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write the report to this file")
+    args = parser.parse_args()
+
+    mix = RequestMix(args.land_forms, args.land_covers, _batch_sizes(args.batch_sizes), args.seed)
+    targets = {"engine": EngineTarget, "batcher": BatcherTarget, "service": lambda: HttpTarget(args.url)}
+    report = asyncio.run(run_load_test(targets[args.target](), mix, args.concurrency, args.requests, args.trace_memory))
+
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Local HTTP/JSON service for catchment parameter inference.
+
+A small HTTP/1.1 server built on ``asyncio`` streams (no dependencies beyond
+the standard library) that answers through a :class:`MicroBatcher`, so
+concurrent requests share one table lookup.
+
+Endpoints:
+    POST /compute  ``{"land_form": ..., "land_cover": ...}`` -> one result
+    POST /batch    ``{"items": [{"land_form": ..., "land_cover": ...}, ...]}`` -> ``{"results": [...]}``
+    GET  /health   liveness check
+    GET  /stats    batching counters and per-endpoint latency histograms
+
+Categories are given by name (case-insensitive) or code. A result holds
+``slope``, ``impervious``, ``catchment`` and ``catchment_class``. Requests
+rejected for backpressure get ``503`` with a ``Retry-After`` header.
+
+Usage:
+    python -m rcg.service.server [--host HOST] [--port PORT] [--window-ms MS]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from http import HTTPStatus
+from typing import Any, Optional
+
+import numpy as np
+
+from rcg.exceptions import ServiceOverloadedError
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+from rcg.logging_config import get_logger, setup_logging
+from rcg.service.batching import LatencyHistogram, MicroBatcher
+
+logger = get_logger("service.server")
+
+DEFAULT_PORT = 8750
+
+# Largest accepted request body in bytes
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Seconds an idle keep-alive connection is kept open
+IDLE_TIMEOUT = 30.0
+
+_LAND_FORM_CODES = {member.name.lower(): member.value for member in LandForm}
+_LAND_COVER_CODES = {member.name.lower(): member.value for member in LandCover}
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _code(value: Any, codes: dict[str, int], field: str) -> int:
+    """Map a category name or code to its code."""
+    if isinstance(value, str) and value.lower() in codes:
+        return codes[value.lower()]
+    if isinstance(value, int) and not isinstance(value, bool) and value in codes.values():
+        return value
+    raise _HttpError(HTTPStatus.BAD_REQUEST, f"Invalid {field}: {value!r}")
+
+
+def _codes(items: list) -> tuple[np.ndarray, np.ndarray]:
+    """Land form and land cover codes of request items."""
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "items must be a list of objects")
+    land_forms = [_code(item.get("land_form"), _LAND_FORM_CODES, "land_form") for item in items]
+    land_covers = [_code(item.get("land_cover"), _LAND_COVER_CODES, "land_cover") for item in items]
+    return np.array(land_forms, dtype=np.int64), np.array(land_covers, dtype=np.int64)
+
+
+def _results(values: dict[str, np.ndarray]) -> list[dict[str, Any]]:
+    """Turn columnar batch results into one JSON object per item."""
+    columns = {name: column.tolist() for name, column in values.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+class InferenceService:
+    """
+    HTTP front end of a :class:`MicroBatcher`.
+
+    Attributes
+    ----------
+    host : str
+        Interface to listen on.
+    port : int
+        Port to listen on; after :meth:`start` the bound port (useful with 0).
+    batcher : MicroBatcher
+        Batcher answering inference requests.
+    max_items : int
+        Largest number of items accepted in one ``/batch`` request; at most
+        (and by default) ``batcher.max_pending``, so a request the batcher
+        could never accept is rejected as too large rather than as overload.
+    latency : Dict[str, LatencyHistogram]
+        Request latency per endpoint, including time spent waiting for a batch.
+
+    Example
+    -------
+    >>> service = InferenceService(port=0)
+    >>> await service.start()
+    >>> await service.serve_forever()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        batcher: Optional[MicroBatcher] = None,
+        max_items: Optional[int] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.batcher = batcher if batcher is not None else MicroBatcher()
+        if max_items is None:
+            max_items = self.batcher.max_pending
+        if not 1 <= max_items <= self.batcher.max_pending:
+            raise ValueError(f"max_items must be between 1 and max_pending ({self.batcher.max_pending}), got: {max_items}")
+        self.max_items = max_items
+        self.latency: dict[str, LatencyHistogram] = {path: LatencyHistogram() for path in ("/compute", "/batch")}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start the batcher and bind the listening socket."""
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("RCG inference service listening on http://%s:%d", self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections and stop the batcher."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.batcher.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; return whether the connection stays open."""
+        started = time.perf_counter()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        extra_headers = {}
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            method, path, version = "", "", "HTTP/1.0"
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        try:
+            if not method:
+                raise _HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body exceeds {MAX_BODY_BYTES} bytes")
+            body = await reader.readexactly(length) if length else b""
+            status, payload = HTTPStatus.OK, await self._dispatch(method, path, body)
+        except _HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ServiceOverloadedError as e:
+            status, payload = HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)}
+            extra_headers["Retry-After"] = "1"
+        except ValueError as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            logger.exception("Request %s %s failed", method, path)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Internal error: {e}"}
+
+        content = json.dumps(payload).encode()
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(content)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{name}: {value}" for name, value in extra_headers.items()),
+        ]
+        writer.write("\r\n".join(head).encode() + b"\r\n\r\n" + content)
+        await writer.drain()
+        if path in self.latency and status == HTTPStatus.OK:
+            self.latency[path].record(time.perf_counter() - started)
+        return keep_alive
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Any:
+        """Route a request to its endpoint."""
+        if method == "GET" and path == "/health":
+            return {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return {"batching": self.batcher.stats(), "latency": {path: h.snapshot() for path, h in self.latency.items()}}
+        if method != "POST" or path not in ("/compute", "/batch"):
+            raise _HttpError(HTTPStatus.NOT_FOUND, f"No endpoint {method} {path}")
+
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}") from e
+        if not isinstance(request, dict):
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+        if path == "/compute":
+            land_forms, land_covers = _codes([request])
+            return _results(await self.batcher.submit(land_forms, land_covers))[0]
+
+        items = request.get("items")
+        if isinstance(items, list) and len(items) > self.max_items:
+            raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {self.max_items} items per request")
+        land_forms, land_covers = _codes(items)
+        return {"results": _results(await self.batcher.submit(land_forms, land_covers)) if len(items) else []}
+
+
+def main() -> int:
+    """Run the inference service until interrupted."""
+    parser = argparse.ArgumentParser(description="Rapid Catchment Generator inference service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="How long a batch waits for more requests")
+    parser.add_argument("--max-batch", type=int, default=512, help="Items after which a batch is processed at once")
+    parser.add_argument("--max-pending", type=int, default=4096, help="Waiting items before requests are rejected")
+    parser.add_argument("--max-items", type=int, help="Largest /batch request (default and maximum: --max-pending)")
+    parser.add_argument(
+        "--warm", action="store_true", help="Compute the engine outputs missing from the precomputed table before serving"
+    )
+    args = parser.parse_args()
+    if args.max_items is not None and not 1 <= args.max_items <= args.max_pending:
+        parser.error(f"--max-items must be between 1 and --max-pending ({args.max_pending})")
+
+    # Records go through a queue, so logging never blocks the event loop
+    setup_logging(name="rcg.service", async_logging=True)
+
+    async def serve() -> None:
+        table = EngineTable.load_default()
+        if args.warm:
+            table.update((form, cover) for form in range(1, N_LAND_FORMS + 1) for cover in range(1, N_LAND_COVERS + 1))
+        batcher = MicroBatcher(table, args.window_ms / 1000, args.max_batch, args.max_pending)
+        service = InferenceService(args.host, args.port, batcher, args.max_items)
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
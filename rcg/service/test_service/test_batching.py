@@ -0,0 +1,96 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from rcg.exceptions import ServiceOverloadedError
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+from rcg.service.batching import LatencyHistogram, MicroBatcher
+
+
+@pytest.fixture(scope="module")
+def table():
+    forms, covers = np.meshgrid(np.arange(1, N_LAND_FORMS + 1), np.arange(1, N_LAND_COVERS + 1), indexing="ij")
+    return EngineTable({"slope": forms * 100.0 + covers, "impervious": covers * 1.0, "catchment": np.full(forms.shape, 0.5)})
+
+
+def run_batcher(batcher, coroutine_factory):
+    async def scenario():
+        await batcher.start()
+        try:
+            return await coroutine_factory()
+        finally:
+            await batcher.close()
+
+    return asyncio.run(scenario())
+
+
+class TestLatencyHistogram:
+    def test_quantiles_are_bucket_upper_bounds(self):
+        histogram = LatencyHistogram(bounds_ms=(1, 10, 100))
+        for seconds in [0.0005] * 90 + [0.005] * 9 + [0.05]:
+            histogram.record(seconds)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot["count"] == 100
+        assert (snapshot["p50_ms"], snapshot["p95_ms"], snapshot["p99_ms"]) == (1.0, 10.0, 10.0)
+        assert snapshot["buckets"] == {"1": 90, "10": 99, "100": 100, "+Inf": 100}
+
+    def test_empty_and_overflow(self):
+        histogram = LatencyHistogram(bounds_ms=(1,))
+        assert np.isnan(histogram.quantile(0.5))
+
+        histogram.record(5.0)
+        assert histogram.quantile(0.5) == float("inf")
+
+
+class TestMicroBatcher:
+    def test_concurrent_requests_share_one_batch(self, table):
+        batcher = MicroBatcher(table, window=0.05)
+
+        async def requests():
+            return await asyncio.gather(*(batcher.submit([form], [10]) for form in range(1, 10)))
+
+        results = run_batcher(batcher, requests)
+
+        assert batcher.batches == 1
+        assert batcher.items == 9
+        assert [result["slope"].tolist() for result in results] == [[form * 100.0 + 10] for form in range(1, 10)]
+        assert results[0]["catchment_class"].tolist() == [table.catchment_classes[0, 9]]
+
+    def test_max_batch_closes_batches_early(self, table):
+        batcher = MicroBatcher(table, window=10.0, max_batch=4)
+
+        async def requests():
+            return await asyncio.gather(*(batcher.submit([2, 3], [10, 11]) for _ in range(4)))
+
+        run_batcher(batcher, requests)
+
+        assert batcher.batches == 2
+
+    def test_backpressure_rejects_excess_items(self, table):
+        batcher = MicroBatcher(table, window=0.05, max_pending=3)
+
+        async def requests():
+            return await asyncio.gather(*(batcher.submit([2, 2], [10, 10]) for _ in range(2)), return_exceptions=True)
+
+        results = run_batcher(batcher, requests)
+
+        assert isinstance(results[1], ServiceOverloadedError)
+        assert batcher.rejected == 1
+        assert batcher.pending == 0
+
+    def test_rejects_invalid_codes(self, table):
+        batcher = MicroBatcher(table)
+
+        with pytest.raises(ValueError):
+            run_batcher(batcher, lambda: batcher.submit([0], [10]))
+
+    def test_missing_pairs_are_computed(self):
+        batcher = MicroBatcher(EngineTable.empty(), window=0.0)
+
+        result = run_batcher(batcher, lambda: batcher.submit([2], [10]))
+
+        assert batcher.table.computed.sum() == 1
+        assert result["impervious"][0] == pytest.approx(batcher.table.engine.compute_impervious(2, 10))
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import sys
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+from rcg.service.batching import MicroBatcher
+from rcg.service.loadtest import BatcherTarget, HttpTarget, RequestMix, run_level, run_load_test
+from rcg.service.server import InferenceService
+
+
+@pytest.fixture(scope="module")
+def table():
+    forms, covers = np.meshgrid(np.arange(1, N_LAND_FORMS + 1), np.arange(1, N_LAND_COVERS + 1), indexing="ij")
+    return EngineTable({"slope": forms * 100.0 + covers, "impervious": covers * 1.0, "catchment": np.full(forms.shape, 0.5)})
+
+
+def test_request_mix_is_seeded_and_weighted():
+    mix = RequestMix(
+        land_form_weights={"mountains": 3, "flats_and_plateaus": 1},
+        land_cover_weights={"rural": 1},
+        batch_sizes={1: 1, 10: 1},
+        seed=7,
+    )
+
+    requests = mix.requests(200)
+    forms = np.concatenate([forms for forms, _ in requests])
+    covers = np.concatenate([covers for _, covers in requests])
+
+    assert len(requests) == 200
+    assert {len(forms) for forms, _ in requests} == {1, 10}
+    assert set(forms.tolist()) == {2, 8}
+    assert set(covers.tolist()) == {10}
+    assert (forms == 8).mean() == pytest.approx(0.75, abs=0.05)
+    for (forms_a, covers_a), (forms_b, covers_b) in zip(requests, mix.requests(200)):
+        np.testing.assert_array_equal(forms_a, forms_b)
+        np.testing.assert_array_equal(covers_a, covers_b)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"land_form_weights": {"volcano": 1}}, {"land_cover_weights": {"rural": 0}}, {"batch_sizes": {0: 1}}],
+)
+def test_request_mix_rejects_invalid_distributions(options):
+    with pytest.raises(ValueError):
+        RequestMix(**options)
+
+
+def test_load_test_against_batcher(table):
+    mix = RequestMix(batch_sizes={1: 3, 4: 1}, seed=1)
+
+    report = asyncio.run(run_load_test(BatcherTarget(MicroBatcher(table, window=0.001)), mix, [1, 4], 50))
+
+    assert json.loads(json.dumps(report)) == report
+    assert report["config"]["target"] == "batcher"
+    assert report["metadata"]["cpu_count"] is not None
+    assert [level["concurrency"] for level in report["levels"]] == [1, 4]
+    for level in report["levels"]:
+        assert level["succeeded"] == 50
+        assert level["errors"] == {}
+        assert level["latency_ms"]["p50"] <= level["latency_ms"]["p95"] <= level["latency_ms"]["p99"]
+        assert level["throughput_rps"] > 0
+        assert level["python_peak_bytes"] is None
+        if sys.platform != "win32":
+            assert level["peak_rss_growth_kb"] >= 0
+            assert level["process_peak_rss_kb"] > 0
+
+
+def test_memory_is_traced_in_an_untimed_pass(table):
+    mix = RequestMix(batch_sizes={1: 1, 8: 1}, seed=3)
+    batcher = MicroBatcher(table, window=0.001)
+    submitted = []
+    submit = batcher.submit
+
+    async def counting_submit(land_forms, land_covers):
+        submitted.append(len(land_forms))
+        return await submit(land_forms, land_covers)
+
+    batcher.submit = counting_submit
+
+    report = asyncio.run(run_load_test(BatcherTarget(batcher), mix, [2], 20, trace_memory=True))
+
+    (level,) = report["levels"]
+    assert report["config"]["trace_memory"]
+    assert level["succeeded"] == 20
+    assert len(submitted) == 40
+    assert level["python_peak_bytes"] > 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_load_test_against_service_counts_rejections(table):
+    mix = RequestMix(batch_sizes={1: 1, 3: 1}, seed=2)
+
+    async def main():
+        service = InferenceService(port=0, batcher=MicroBatcher(table, window=0.02, max_pending=4))
+        await service.start()
+        target = HttpTarget(f"http://127.0.0.1:{service.port}")
+        try:
+            return await run_level(target, mix.requests(40), concurrency=8)
+        finally:
+            await target.close()
+            await service.close()
+
+    level = asyncio.run(main())
+
+    assert level["requests"] == 40
+    assert level["succeeded"] + sum(level["errors"].values()) == 40
+    assert set(level["errors"]) <= {"ServiceOverloadedError"}
+    assert level["succeeded"] > 0
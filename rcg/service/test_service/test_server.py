@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from rcg.fuzzy.table import N_LAND_COVERS, N_LAND_FORMS, EngineTable
+from rcg.service.batching import MicroBatcher
+from rcg.service.server import InferenceService
+
+
+@pytest.fixture(scope="module")
+def table():
+    forms, covers = np.meshgrid(np.arange(1, N_LAND_FORMS + 1), np.arange(1, N_LAND_COVERS + 1), indexing="ij")
+    return EngineTable({"slope": forms * 100.0 + covers, "impervious": covers * 1.0, "catchment": np.full(forms.shape, 0.5)})
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def run_service(table, scenario, **batcher_options):
+    async def main():
+        service = InferenceService(port=0, batcher=MicroBatcher(table, **batcher_options), max_items=5)
+        await service.start()
+        try:
+            return await scenario(service), service
+        finally:
+            await service.close()
+
+    return asyncio.run(main())
+
+
+def test_compute_and_batch(table):
+    async def scenario(service):
+        single = await request(service.port, "POST", "/compute", {"land_form": "Mountains", "land_cover": 11})
+        batch = await request(
+            service.port,
+            "POST",
+            "/batch",
+            {"items": [{"land_form": 2, "land_cover": "rural"}, {"land_form": 8, "land_cover": 11}]},
+        )
+        return single, batch
+
+    (single, batch), service = run_service(table, scenario)
+
+    assert single[0] == 200
+    assert single[1]["slope"] == 811.0
+    assert set(single[1]) == {"slope", "impervious", "catchment", "catchment_class"}
+    assert batch[0] == 200
+    assert [result["slope"] for result in batch[1]["results"]] == [210.0, 811.0]
+    assert service.latency["/compute"].count == 1
+
+
+def test_concurrent_clients_are_batched(table):
+    async def scenario(service):
+        return await asyncio.gather(
+            *(request(service.port, "POST", "/compute", {"land_form": 2, "land_cover": 10}) for _ in range(8))
+        )
+
+    responses, service = run_service(table, scenario, window=0.1)
+
+    assert all(status == 200 for status, _ in responses)
+    assert service.batcher.batches < 8
+
+
+@pytest.mark.parametrize(
+    "method, path, payload, status",
+    [
+        ("POST", "/compute", {"land_form": "volcano", "land_cover": 10}, 400),
+        ("POST", "/batch", {"items": [{"land_form": 2, "land_cover": 10}] * 6}, 413),
+        ("GET", "/nowhere", None, 404),
+    ],
+)
+def test_errors(table, method, path, payload, status):
+    async def scenario(service):
+        return await request(service.port, method, path, payload)
+
+    (response_status, payload), _ = run_service(table, scenario)
+
+    assert response_status == status
+    assert "error" in payload
+
+
+def test_stats(table):
+    async def scenario(service):
+        await request(service.port, "POST", "/compute", {"land_form": 2, "land_cover": 10})
+        return await request(service.port, "GET", "/stats")
+
+    (status, stats), _ = run_service(table, scenario)
+
+    assert status == 200
+    assert stats["batching"]["items"] == 1
+    assert stats["latency"]["/compute"]["count"] == 1
+
+
+def test_batch_above_max_pending_is_too_large_not_overloaded(table):
+    async def scenario(service):
+        return await request(service.port, "POST", "/batch", {"items": [{"land_form": 2, "land_cover": 10}] * 4})
+
+    async def main():
+        service = InferenceService(port=0, batcher=MicroBatcher(table, max_pending=3))
+        await service.start()
+        try:
+            return await scenario(service), service
+        finally:
+            await service.close()
+
+    (status, payload), service = asyncio.run(main())
+
+    assert service.max_items == 3
+    assert status == 413
+    assert service.batcher.rejected == 0
+
+
+def test_max_items_above_max_pending_is_rejected(table):
+    with pytest.raises(ValueError):
+        InferenceService(port=0, batcher=MicroBatcher(table, max_pending=3), max_items=4)
+
+
+def test_unexpected_error_is_internal_server_error(table, monkeypatch):
+    async def scenario(service):
+        async def fail(*args):
+            raise RuntimeError("inference failed")
+
+        monkeypatch.setattr(service.batcher, "submit", fail)
+        return await request(service.port, "POST", "/compute", {"land_form": 2, "land_cover": 10})
+
+    (status, payload), _ = run_service(table, scenario)
+
+    assert status == 500
+    assert "inference failed" in payload["error"]
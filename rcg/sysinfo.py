@@ -0,0 +1,40 @@
+"""
+Description of the machine and source revision that produced a measurement.
+
+Shared by the load generator (:mod:`rcg.service.loadtest`) and the benchmark
+suite, so their reports can be compared on the same terms.
+"""
+
+import os
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def machine_metadata() -> dict:
+    """Machine, interpreter and source revision the results were produced on."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "git_commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
@@ -0,0 +1,216 @@
+import argparse
+import logging
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from swmmio import Model
+
+from rcg import cli, daemon
+from rcg.daemon import RcgDaemon, forward
+from rcg.fuzzy.categories import LandCover, LandForm
+
+unix_sockets = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not available")
+
+
+@pytest.fixture
+def socket_path():
+    # Socket paths are limited to about 100 characters, which tmp_path can exceed on macOS
+    with tempfile.TemporaryDirectory(prefix="rcg") as directory:
+        yield Path(directory) / "rcg.sock"
+
+
+@pytest.fixture
+def running_daemon(socket_path):
+    server = RcgDaemon(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.ready.wait(120)
+    yield server
+    server.shutdown()
+    thread.join(10)
+
+
+class FakeModel:
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+
+class SlowModel(FakeModel):
+    loads = []
+    release = threading.Event()
+
+    def __init__(self, file_path):
+        self.loads.append(file_path)
+        if file_path.endswith("slow.inp"):
+            assert self.release.wait(30)
+        super().__init__(file_path)
+
+
+@unix_sockets
+class TestProtocol:
+    def test_ping(self, running_daemon):
+        response = forward({"command": "ping"}, running_daemon.socket_path)
+
+        assert response["ok"]
+        assert response["result"]["models"] == []
+
+    def test_add_subcatchment(self, running_daemon, temp_inp_file):
+        initial_count = len(Model(str(temp_inp_file)).inp.subcatchments)
+        request = {
+            "command": "add_subcatchment",
+            "input_file": str(temp_inp_file),
+            "area": 2.5,
+            "land_form": "mountains",
+            "land_cover": "forests",
+        }
+
+        response = forward(request, running_daemon.socket_path)
+
+        assert response["ok"]
+        subcatchments = Model(str(temp_inp_file)).inp.subcatchments
+        assert len(subcatchments) == initial_count + 1
+        assert response["result"]["subcatchment"] in subcatchments.index
+        ping = forward({"command": "ping"}, running_daemon.socket_path)
+        assert ping["result"]["models"] == [str(temp_inp_file.resolve())]
+
+    @pytest.mark.parametrize(
+        ("request_", "error_type"),
+        [
+            ({"command": "unknown"}, "ValueError"),
+            ({"command": "add_subcatchment", "area": 1.0}, "KeyError"),
+        ],
+    )
+    def test_errors_are_reported(self, running_daemon, request_, error_type):
+        response = forward(request_, running_daemon.socket_path)
+
+        assert not response["ok"]
+        assert response["type"] == error_type
+
+    def test_socket_is_private(self, running_daemon):
+        assert stat.S_IMODE(running_daemon.socket_path.stat().st_mode) == 0o600
+
+    def test_socket_of_another_user_is_ignored(self, monkeypatch, running_daemon):
+        monkeypatch.setattr(daemon.os, "getuid", lambda: running_daemon.socket_path.stat().st_uid + 1)
+
+        assert forward({"command": "ping"}, running_daemon.socket_path) is None
+
+    def test_shared_directory_is_refused(self, socket_path):
+        socket_path.parent.chmod(0o777)
+
+        with pytest.raises(RuntimeError, match="must not be writable by others"):
+            RcgDaemon(socket_path).serve_forever()
+
+        assert not socket_path.exists()
+
+    def test_shutdown_removes_socket(self, socket_path):
+        server = RcgDaemon(socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        assert server.ready.wait(120)
+
+        assert forward({"command": "shutdown"}, server.socket_path)["ok"]
+        thread.join(10)
+
+        assert not thread.is_alive()
+        assert not server.socket_path.exists()
+        assert forward({"command": "ping"}, server.socket_path) is None
+
+
+def test_least_recently_used_model_is_dropped(monkeypatch, tmp_path):
+    monkeypatch.setattr("rcg.inp_manage.inp.BuildCatchments", FakeModel)
+    server = RcgDaemon(tmp_path / "rcg.sock", max_models=2)
+    a, b, c = (str(tmp_path / f"{name}.inp") for name in "abc")
+
+    first, _ = server._model(a)
+    server._model(b)
+    assert server._model(a)[0] is first
+    server._model(c)
+
+    assert list(server._models) == [a, c]
+    assert server.handle({"command": "ping"})["models"] == [a, c]
+
+
+def test_cold_load_does_not_block_other_models(monkeypatch, tmp_path):
+    monkeypatch.setattr("rcg.inp_manage.inp.BuildCatchments", SlowModel)
+    SlowModel.loads.clear()
+    SlowModel.release.clear()
+    server = RcgDaemon(tmp_path / "rcg.sock")
+    slow, fast = str(tmp_path / "slow.inp"), str(tmp_path / "fast.inp")
+    results = []
+    loaders = [threading.Thread(target=lambda: results.append(server._model(slow))) for _ in range(2)]
+    for loader in loaders:
+        loader.start()
+    while not SlowModel.loads:
+        time.sleep(0.01)
+
+    assert server._model(fast)[0].file_path == fast
+    assert server.handle({"command": "ping"})["models"] == [fast]
+    SlowModel.release.set()
+    for loader in loaders:
+        loader.join(10)
+
+    assert SlowModel.loads == [slow, fast]
+    assert results[0] is results[1]
+    assert list(server._models) == [fast, slow]
+
+
+def test_default_socket_path(monkeypatch, tmp_path):
+    monkeypatch.delenv(daemon.SOCKET_ENV, raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert daemon.default_socket_path() == tmp_path / "rcg.sock"
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    path = daemon.default_socket_path()
+    assert path.parent.parent == Path(tempfile.gettempdir())
+    assert path.parent.name.startswith("rcg")
+
+
+def test_forward_without_daemon(tmp_path):
+    assert forward({"command": "ping"}, tmp_path / "missing.sock") is None
+
+
+class TestForwardToDaemon:
+    @pytest.fixture
+    def args(self, temp_inp_file):
+        return argparse.Namespace(
+            input_file=temp_inp_file, area=1.5, land_form=LandForm.mountains, land_cover=LandCover.forests
+        )
+
+    def test_no_daemon(self, monkeypatch, args):
+        monkeypatch.setattr(daemon, "forward", lambda request: None)
+
+        assert cli.forward_to_daemon(args, logging.getLogger("test")) is None
+
+    def test_success(self, monkeypatch, args):
+        requests = []
+
+        def fake_forward(request):
+            requests.append(request)
+            return {"ok": True, "result": {"subcatchment": "S9"}}
+
+        monkeypatch.setattr(daemon, "forward", fake_forward)
+
+        assert cli.forward_to_daemon(args, logging.getLogger("test")) == 0
+        assert requests[0]["land_form"] == "mountains"
+        assert requests[0]["input_file"] == str(args.input_file.resolve())
+
+    def test_failure(self, monkeypatch, args):
+        monkeypatch.setattr(daemon, "forward", lambda request: {"ok": False, "error": "boom", "type": "ValueError"})
+
+        assert cli.forward_to_daemon(args, logging.getLogger("test")) == 1
+
+    def test_main_falls_back_to_in_process(self, monkeypatch, tmp_path, temp_inp_file):
+        monkeypatch.setenv(daemon.SOCKET_ENV, str(tmp_path / "missing.sock"))
+        monkeypatch.setattr(
+            sys, "argv", ["rcg", str(temp_inp_file), "--area", "1.5", "--land-form", "mountains", "--land-cover", "forests"]
+        )
+        initial_count = len(Model(str(temp_inp_file)).inp.subcatchments)
+
+        assert cli.main() == 0
+        assert len(Model(str(temp_inp_file)).inp.subcatchments) == initial_count + 1
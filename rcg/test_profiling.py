@@ -0,0 +1,50 @@
+import io
+import pstats
+
+import pytest
+
+from rcg.inp_manage.inp import BuildCatchments
+from rcg.profiling import Profiler
+
+
+def test_cpu_profile_writes_pstats(tmp_path):
+    output = tmp_path / "run.pstats"
+    stream = io.StringIO()
+
+    with Profiler("cpu", output=output, top=5, stream=stream):
+        sorted(range(10_000), key=lambda value: -value)
+
+    assert output.is_file()
+    assert pstats.Stats(str(output)).total_calls > 0
+    assert f"CPU profile written to {output}" in stream.getvalue()
+
+
+def test_memory_profile_snapshots_loads_and_writes(tmp_path, temp_inp_file):
+    output = tmp_path / "memory.txt"
+    stream = io.StringIO()
+
+    with Profiler("mem", output=output, top=3, stream=stream) as profiler:
+        model = BuildCatchments(str(temp_inp_file), backup=False, recorder=profiler.recorder)
+        model.add_subcatchment(2.0, "mountains", "forests")
+
+    report = stream.getvalue()
+    assert report.startswith("Peak traced memory:")
+    assert "start -> before load_model #1" in report
+    assert "before load_model #1 -> after load_model #1" in report
+    assert "after load_model #1 -> after write #1" in report
+    assert "after write #1 -> end" in report
+    assert output.read_text() == report
+
+
+def test_recorder_is_a_no_op_outside_memory_mode(tmp_path):
+    profiler = Profiler("cpu", output=tmp_path / "run.pstats", stream=io.StringIO())
+
+    with profiler.recorder.span("write"):
+        pass
+
+    assert profiler.recorder.stats() == {}
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError, match="Invalid profile mode"):
+        Profiler("gpu")
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rcg.exceptions import ValidationError
+from rcg.fuzzy.categories import LandCover, LandForm
+from rcg.validation import ERROR_COLUMNS, validate_batch
+
+
+class TestValidateBatch:
+    def test_valid_rows(self):
+        result = validate_batch([1.5, 2], ["Mountains", 2], [LandCover.forests, "rural"])
+
+        assert result.errors.empty
+        assert result.valid.tolist() == [True, True]
+        assert list(result.specs()) == [
+            (1.5, LandForm.mountains, LandCover.forests),
+            (2.0, LandForm.flats_and_plateaus, LandCover.rural),
+        ]
+
+    def test_area_bounds(self):
+        result = validate_batch([0, -1, 10001, 10000, "abc"], [1] * 5, [1] * 5)
+
+        assert result.errors["row"].tolist() == [0, 1, 2, 4]
+        assert result.errors["message"].tolist() == [
+            "Area must be positive",
+            "Area must be positive",
+            "Area seems too large (>10000 ha)",
+            "Area must be a valid number",
+        ]
+        assert result.valid.tolist() == [False, False, False, True, False]
+
+    def test_invalid_names_and_codes(self):
+        result = validate_batch([1.0] * 4, ["volcano", 0, 10, 2.5], [1, 15, "forest", 1])
+
+        errors = result.errors
+        assert errors[errors["field"] == "land_form"]["row"].tolist() == [0, 1, 2, 3]
+        assert errors[errors["field"] == "land_cover"]["row"].tolist() == [1, 2]
+        assert not result.valid.any()
+        assert result.land_form.tolist() == [0, 0, 0, 0]
+
+    def test_missing_values(self):
+        result = validate_batch([None, np.nan, 1.0], [1, None, np.nan], [1, 1, None])
+
+        assert result.errors[["row", "field"]].values.tolist() == [
+            [0, "area"],
+            [1, "area"],
+            [1, "land_form"],
+            [2, "land_form"],
+            [2, "land_cover"],
+        ]
+        assert not result.valid.any()
+
+    def test_range_limits_apply_to_names_and_codes(self):
+        limits = {"area_max_hectares": 5, "land_form_range": [1, 3], "land_cover_range": [1, 14]}
+
+        result = validate_batch([1.0, 1.0, 1.0, 6.0], ["mountains", 8, "flats_and_plateaus", 2], [1] * 4, limits)
+
+        assert result.errors["row"].tolist() == [0, 1, 3]
+        assert result.errors["message"].tolist()[:2] == ["Invalid land form (name or code 1-3)"] * 2
+        assert result.valid.tolist() == [False, False, True, False]
+
+    def test_dataframe_columns(self):
+        frame = pd.DataFrame(
+            {"Area": [1.0, -1.0], "LandForm": ["mountains", "hills"], "LandCover": pd.Categorical(["rural", "rural"])},
+            index=[10, 20],
+        )
+
+        result = validate_batch(frame["Area"], frame["LandForm"], frame["LandCover"])
+
+        # Rows are positions in the input, not index labels
+        assert result.errors["row"].tolist() == [1, 1]
+        assert result.land_cover.tolist() == [LandCover.rural.value] * 2
+        assert list(result.specs()) == [(1.0, LandForm.mountains, LandCover.rural)]
+
+    def test_error_table_shape(self):
+        empty = validate_batch([1.0], [1], [1]).errors
+        errors = validate_batch([-1.0, 1.0], [1, "x"], [1, 1]).errors
+
+        assert tuple(empty.columns) == ERROR_COLUMNS
+        assert empty.empty
+        assert empty["row"].dtype == np.int64
+        assert tuple(errors.columns) == ERROR_COLUMNS
+        assert errors["row"].dtype == np.int64
+        assert errors.values.tolist() == [
+            [0, "area", -1.0, "Area must be positive"],
+            [1, "land_form", "x", "Invalid land form (name or code 1-9)"],
+        ]
+
+    def test_columns_must_have_same_length(self):
+        with pytest.raises(ValidationError):
+            validate_batch([1.0, 2.0], [1], [1])
@@ -1,10 +1,21 @@
 """Input validation utilities."""
 
 import argparse
+from collections.abc import Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
 
 from .exceptions import ValidationError as RCGValidationError
 from .fuzzy.categories import LandCover, LandForm
+from .inp_manage.compression import INP_SUFFIXES, is_inp_path, open_inp
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Columns of the error table returned by validate_batch
+ERROR_COLUMNS = ("row", "field", "value", "message")
 
 
 class ValidationError(argparse.ArgumentTypeError):
@@ -62,9 +73,15 @@ def validate_file_path(file_path: str) -> Path:
         If file doesn't exist, is not a file, has wrong extension,
         is empty, or cannot be read
 
+    Notes
+    -----
+    Compressed models (``.inp.gz``, ``.inp.zst``) are accepted; the emptiness
+    check reads the first decompressed bytes.
+
     Examples
     --------
     validate_file_path('model.inp') -> Path('model.inp') if valid
+    validate_file_path('model.inp.gz') -> Path('model.inp.gz') if valid
     """
     path = Path(file_path)
 
@@ -74,11 +91,13 @@ def validate_file_path(file_path: str) -> Path:
     if not path.is_file():
         raise ValidationError(f"Path is not a file: {file_path}")
 
-    if path.suffix.lower() != ".inp":
-        raise ValidationError(f"File must have .inp extension (case-insensitive), got: {path.suffix}")
+    if not is_inp_path(path):
+        raise ValidationError(
+            f"File must have one of the extensions {', '.join(INP_SUFFIXES)} (case-insensitive), got: {path.suffix}"
+        )
 
     try:
-        with path.open("r") as f:
+        with open_inp(path, "rt") as f:
             content = f.read(10)
             if not content:
                 raise ValidationError(f"File is empty: {file_path}")
@@ -164,3 +183,172 @@ def validate_land_cover(land_cover_str: str) -> LandCover:
 
     valid_list = sorted(LandCover.get_all_categories())
     raise ValidationError(f"Invalid land cover '{land_cover_str}' (case-insensitive). Valid options: {', '.join(valid_list)}")
+
+
+@dataclass
+class BatchValidation:
+    """
+    Result of :func:`validate_batch`.
+
+    Attributes
+    ----------
+    area : np.ndarray
+        Areas as float64; NaN in rows whose area is invalid.
+    land_form : np.ndarray
+        Land form codes as int64; 0 in rows whose land form is invalid.
+    land_cover : np.ndarray
+        Land cover codes as int64; 0 in rows whose land cover is invalid.
+    errors : pd.DataFrame
+        One row per invalid value with columns ``row`` (position in the
+        input), ``field``, ``value`` and ``message``, ordered by row.
+    """
+
+    area: "np.ndarray"
+    land_form: "np.ndarray"
+    land_cover: "np.ndarray"
+    errors: "pd.DataFrame"
+
+    @property
+    def valid(self) -> "np.ndarray":
+        """Boolean mask of the rows without errors."""
+        import numpy as np
+
+        return ~np.isnan(self.area) & (self.land_form > 0) & (self.land_cover > 0)
+
+    def specs(self) -> Iterator[tuple[float, LandForm, LandCover]]:
+        """``(area, land_form, land_cover)`` of the valid rows, ready for ``BuildCatchments.add_subcatchments``."""
+        forms = {member.value: member for member in LandForm}
+        covers = {member.value: member for member in LandCover}
+        valid = self.valid
+        for area, form, cover in zip(
+            self.area[valid].tolist(), self.land_form[valid].tolist(), self.land_cover[valid].tolist()
+        ):
+            yield area, forms[form], covers[cover]
+
+
+def _category_code(value: Any, names: dict[str, int], low: int, high: int) -> int:
+    """Code of one category given by name or code; 0 if invalid or outside ``[low, high]``."""
+    if isinstance(value, str):
+        code = names.get(value.strip().lower(), 0)
+    elif isinstance(value, bool):
+        return 0
+    else:
+        try:
+            code = int(value)
+        except (TypeError, ValueError, OverflowError):
+            return 0
+        if code != value:
+            return 0
+    return code if low <= code <= high else 0
+
+
+def _category_codes(values: Any, enum: type, value_range: tuple[int, int]) -> "tuple[np.ndarray, np.ndarray]":
+    """
+    Codes of a column of category names or codes, and the mask of invalid rows.
+
+    Each distinct value is looked up once; the rows are then mapped through
+    the categorical codes without a Python-level loop.
+    """
+    import numpy as np
+    import pandas as pd
+
+    names = {member.name.lower(): member.value for member in enum}
+    categorical = values if isinstance(values, pd.Categorical) else pd.Categorical(values)
+    low, high = value_range
+    lookup = np.array(
+        [_category_code(value, names, low, high) for value in categorical.categories] + [0],
+        dtype=np.int64,
+    )
+    # Missing values have categorical code -1, which picks the trailing 0
+    codes = lookup[np.asarray(categorical.codes)]
+    return codes, codes == 0
+
+
+def validate_batch(
+    area: Any,
+    land_form: Any,
+    land_cover: Any,
+    limits: Optional[dict[str, Any]] = None,
+) -> BatchValidation:
+    """
+    Validate whole columns of subcatchment inputs at once.
+
+    Unlike the per-value validators this never stops at the first error:
+    every bad row is listed in the returned error table, and the valid rows
+    can still be used. Areas must be numbers in (0, ``area_max_hectares``];
+    land forms and land covers may be given as names (case-insensitive),
+    codes or enum members, and codes must lie in ``land_form_range`` and
+    ``land_cover_range``.
+
+    Parameters
+    ----------
+    area, land_form, land_cover : array-like
+        Columns of equal length: lists, NumPy arrays, pandas Series (e.g.
+        DataFrame columns) or Categoricals.
+    limits : Optional[Dict[str, Any]]
+        Validation limits; defaults to ``validation_limits`` of ``defaults.json``.
+
+    Returns
+    -------
+    BatchValidation
+        Parsed columns and the error table.
+
+    Raises
+    ------
+    rcg.exceptions.ValidationError
+        If the columns differ in length.
+
+    Example
+    -------
+    >>> result = validate_batch(frame["Area"], frame["LandForm"], frame["LandCover"])
+    >>> result.errors
+       row       field     value                               message
+    0    3        area      -2.0               Area must be positive
+    1    7  land_cover   forest  Invalid land cover (name or code 1-14)
+    >>> builder.add_subcatchments(result.specs())
+    """
+    import numpy as np
+    import pandas as pd
+
+    if limits is None:
+        from .config.loader import load_defaults_config
+
+        limits = load_defaults_config().validation_limits
+    area_max = float(limits.get("area_max_hectares", 10000))
+    form_range = tuple(limits.get("land_form_range", (1, len(LandForm))))
+    cover_range = tuple(limits.get("land_cover_range", (1, len(LandCover))))
+
+    columns = {"area": area, "land_form": land_form, "land_cover": land_cover}
+    lengths = {name: len(column) for name, column in columns.items()}
+    if len(set(lengths.values())) > 1:
+        raise RCGValidationError(f"Columns must have the same length, got: {lengths}", field="length", value=lengths)
+
+    area_series = area if isinstance(area, pd.Series) else pd.Series(np.asarray(area, dtype=object))
+    areas = pd.to_numeric(area_series, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    form_codes, bad_form = _category_codes(land_form, LandForm, form_range)
+    cover_codes, bad_cover = _category_codes(land_cover, LandCover, cover_range)
+
+    with np.errstate(invalid="ignore"):
+        checks = [
+            ("area", np.isnan(areas), "Area must be a valid number"),
+            ("area", areas <= 0, "Area must be positive"),
+            ("area", areas > area_max, f"Area seems too large (>{area_max:g} ha)"),
+            ("land_form", bad_form, f"Invalid land form (name or code {form_range[0]}-{form_range[1]})"),
+            ("land_cover", bad_cover, f"Invalid land cover (name or code {cover_range[0]}-{cover_range[1]})"),
+        ]
+
+    tables = []
+    for order, (name, mask, message) in enumerate(checks):
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            values = np.asarray(columns[name], dtype=object)[rows]
+            tables.append(pd.DataFrame({"row": rows, "field": name, "value": values, "message": message, "_order": order}))
+    if tables:
+        errors = pd.concat(tables, ignore_index=True).sort_values(["row", "_order"], kind="stable")
+        errors = errors.drop(columns="_order").reset_index(drop=True)
+    else:
+        errors = pd.DataFrame({column: pd.Series(dtype=object) for column in ERROR_COLUMNS})
+        errors["row"] = errors["row"].astype(np.int64)
+
+    areas[~np.isfinite(areas) | (areas <= 0) | (areas > area_max)] = np.nan
+    return BatchValidation(area=areas, land_form=form_codes, land_cover=cover_codes, errors=errors)